@@ -4,6 +4,8 @@
 
 import base64
 import random
+import threading
+import time
 
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, serialization
@@ -13,6 +15,8 @@ from datadog_checks.base import ConfigurationError, ensure_bytes
 
 from .exceptions import APIAuthException, APIConnectionException, APIParsingException
 
+DEFAULT_CACHE_TTL = 300  # seconds
+
 
 class SessionWrapper:
     def __init__(
@@ -102,6 +106,7 @@ class Api:
         log=None,
         cert_key_password=None,
         appcenter=False,
+        cache_ttl=DEFAULT_CACHE_TTL,
     ):
         self.aci_urls = aci_urls
         self.http = http
@@ -130,6 +135,14 @@ class Api:
 
         self.sessions = {}
 
+        # Requests are made from multiple threads, only one of them renews an expired session
+        self._login_lock = threading.Lock()
+
+        # Responses of slowly changing objects (pods, nodes) are kept for `cache_ttl` seconds
+        # Ex: _objects_cache = {'fabric_nodes': (<fetch timestamp>, <nodes>)}
+        self.cache_ttl = cache_ttl
+        self._objects_cache = {}
+
     def close(self):
         self.http.session.close()
 
@@ -169,15 +182,31 @@ class Api:
         # allow for multiple APICs in a cluster to be included in one check so that the check
         # does not bombard a single APIC with dozens of requests and cause it to slow down
         aci_url = random.choice(tuple(self.sessions))
+        session = self.sessions[aci_url]
         try:
-            return self.sessions[aci_url].make_request(path)
+            return session.make_request(path)
         except APIAuthException as e:
             self.log.debug('Token expired for url `%s` (will be automatically renewed): %s', aci_url, e)
             # If we get a 403 answer this may mean that the token expired. Let's refresh the token
             # by login again and retry the request. If it fails again, the integration should exit.
-            self.sessions[aci_url] = self.login_for_url(aci_url)  # refresh session for url
+            with self._login_lock:
+                # Another thread may have refreshed it already
+                if self.sessions[aci_url] is session:
+                    self.sessions[aci_url] = self.login_for_url(aci_url)  # refresh session for url
             return self.sessions[aci_url].make_request(path)
 
+    def _get_cached_object(self, name, fetch):
+        """Return the object cached under `name`, calling `fetch` to refresh it after `cache_ttl` seconds"""
+        cached = self._objects_cache.get(name)
+        if cached is not None:
+            timestamp, value = cached
+            if time.time() - timestamp < self.cache_ttl:
+                return value
+
+        value = fetch()
+        self._objects_cache[name] = (time.time(), value)
+        return value
+
     def get_apps(self, tenant):
         path = "/api/mo/uni/tn-{}.json?query-target=subtree&target-subtree-class=fvAp".format(tenant)
         response = self.make_request(path)
@@ -239,6 +268,9 @@ class Api:
         return self._parse_response(response)
 
     def get_fabric_pods(self):
+        return self._get_cached_object('fabric_pods', self._get_fabric_pods)
+
+    def _get_fabric_pods(self):
         path = '/api/mo/topology.json?query-target=subtree&target-subtree-class=fabricPod'
         response = self.make_request(path)
         return self._parse_response(response)
@@ -255,6 +287,9 @@ class Api:
         return self._parse_response(response)
 
     def get_fabric_nodes(self):
+        return self._get_cached_object('fabric_nodes', self._get_fabric_nodes)
+
+    def _get_fabric_nodes(self):
         path = '/api/mo/topology.json?query-target=subtree&target-subtree-class=fabricNode'
         response = self.make_request(path)
         return self._parse_response(response)
@@ -294,6 +329,13 @@ class Api:
         response = self.make_request(path)
         return self._parse_response(response)
 
+    def get_eth_list_with_stats(self, pod, node):
+        # Every l1PhysIf of the node comes with its stats as `children`
+        query = 'query-target=subtree&target-subtree-class=l1PhysIf&rsp-subtree-include=stats'
+        path = '/api/mo/topology/pod-{}/node-{}/sys.json?{}'.format(pod, node, query)
+        response = self.make_request(path)
+        return self._parse_response(response)
+
     def get_eth_stats(self, pod, node, eth):
         query = 'rsp-subtree-include=stats,no-scoped&page-size=50'
         path = '/api/mo/topology/pod-{}/node-{}/sys/phys-[{}].json?{}'.format(pod, node, eth, query)
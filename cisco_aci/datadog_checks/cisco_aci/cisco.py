@@ -6,12 +6,12 @@ import datetime
 
 from six import iteritems
 
-from datadog_checks.base import AgentCheck
+from datadog_checks.base import AgentCheck, ConfigurationError
 from datadog_checks.base.config import _is_affirmative
 from datadog_checks.base.utils.containers import hash_mutable
 
 from . import aci_metrics
-from .api import Api
+from .api import DEFAULT_CACHE_TTL, Api
 from .capacity import Capacity
 from .fabric import Fabric
 from .tags import CiscoTags
@@ -21,6 +21,8 @@ SOURCE_TYPE = 'cisco_aci'
 
 SERVICE_CHECK_NAME = 'cisco_aci.can_connect'
 
+DEFAULT_THREADS_COUNT = 10
+
 
 class CiscoACICheck(AgentCheck):
 
@@ -35,6 +37,16 @@ class CiscoACICheck(AgentCheck):
         self.check_tags = ['cisco']
         self.tagger = CiscoTags(log=self.log)
 
+        # Per-node and per-application API calls are made from a pool of threads sharing the APIC sessions
+        self.threads_count = int((self.instance or {}).get('threads_count', DEFAULT_THREADS_COUNT))
+        if self.threads_count < 1:
+            raise ConfigurationError('`threads_count` must be greater than 0')
+
+        # Responses of slowly changing objects are kept by the API client for this many seconds
+        self.cache_ttl = int((self.instance or {}).get('cache_ttl', DEFAULT_CACHE_TTL))
+        if self.cache_ttl < 0:
+            raise ConfigurationError('`cache_ttl` must be greater than or equal to 0')
+
     def check(self, instance):
         self.log.info("Starting Cisco Check")
         start = datetime.datetime.utcnow()
@@ -76,6 +88,7 @@ class CiscoACICheck(AgentCheck):
                 log=self.log,
                 appcenter=appcenter,
                 cert_key_password=cert_key_password,
+                cache_ttl=self.cache_ttl,
             )
             self._api_cache[instance_hash] = api
 
@@ -4,6 +4,9 @@
 
 from six import iteritems
 
+from datadog_checks.base import is_affirmative
+from datadog_checks.base.utils.concurrency import map_concurrently
+
 from . import aci_metrics, exceptions, helpers
 
 
@@ -17,12 +20,14 @@ class Fabric:
         self.api = api
         self.instance = instance
         self.check_tags = check.check_tags
+        self.bulk_port_stats = is_affirmative(instance.get('bulk_port_stats', False))
 
         # grab some functions from the check
         self.gauge = check.gauge
         self.rate = check.rate
         self.log = check.log
         self.submit_metrics = check.submit_metrics
+        self.threads_count = check.threads_count
         self.tagger = self.check.tagger
         self.external_host_tags = self.check.external_host_tags
 
@@ -35,6 +40,7 @@ class Fabric:
 
     def submit_pod_health(self, pods):
         pods_dict = {}
+        pods_to_collect = []
         for p in pods:
             pod = p.get('fabricPod', {})
             pod_attrs = pod.get('attributes', {})
@@ -42,22 +48,31 @@ class Fabric:
             if not pod_id:
                 continue
             pods_dict[pod_id] = pod_attrs
-            self.log.info("processing pod %s", pod_id)
-            tags = self.tagger.get_fabric_tags(p, 'fabricPod')
-            try:
-                stats = self.api.get_pod_stats(pod_id)
+            pods_to_collect.append(p)
+
+        for p, stats in map_concurrently(self.get_pod_stats, pods_to_collect, self.threads_count):
+            if stats is not None:
+                tags = self.tagger.get_fabric_tags(p, 'fabricPod')
                 self.submit_fabric_metric(stats, tags, 'fabricPod')
-            except (exceptions.APIConnectionException, exceptions.APIParsingException):
-                pass
-            self.log.info("finished processing pod %s", pod_id)
 
         return pods_dict
 
+    def get_pod_stats(self, pod):
+        pod_id = helpers.get_attributes(pod)['id']
+        self.log.info("processing pod %s", pod_id)
+        try:
+            return self.api.get_pod_stats(pod_id)
+        except (exceptions.APIConnectionException, exceptions.APIParsingException):
+            pass
+        finally:
+            self.log.info("finished processing pod %s", pod_id)
+
     def submit_nodes_health(self, nodes, pods):
+        user_tags = self.instance.get('tags', [])
+        nodes_to_collect = []
         for n in nodes:
             hostname = helpers.get_fabric_hostname(n)
 
-            user_tags = self.instance.get('tags', [])
             tags = self.tagger.get_fabric_tags(n, 'fabricNode')
             self.external_host_tags[hostname] = tags + self.check_tags + user_tags
 
@@ -68,38 +83,86 @@ class Fabric:
             pod_id = helpers.get_pod_from_dn(node_attrs['dn'])
             if not node_id or not pod_id:
                 continue
-            self.log.info("processing node %s on pod %s", node_id, pod_id)
+            nodes_to_collect.append(n)
+
+        # The ports whose stats are fetched once the ports of all the nodes are known
+        # Ex: eths_to_collect = [(<node attributes>, <l1PhysIf>)]
+        eths_to_collect = []
+        for n, (process_metrics, stats, eth_list) in map_concurrently(
+            self.get_node_data, nodes_to_collect, self.threads_count
+        ):
+            hostname = helpers.get_fabric_hostname(n)
+            tags = self.tagger.get_fabric_tags(n, 'fabricNode')
+            node_attrs = helpers.get_attributes(n)
+
+            if process_metrics is not None:
+                self.submit_process_metric(process_metrics, tags + self.check_tags + user_tags, hostname=hostname)
+            if stats is not None:
+                self.submit_fabric_metric(stats, tags, 'fabricNode', hostname=hostname)
+            if not eth_list:
+                continue
+
+            if self.bulk_port_stats:
+                for e in eth_list:
+                    eth_stats = e.get('l1PhysIf', {}).get('children', [])
+                    self.submit_eth_metric(node_attrs, e, eth_stats)
+            else:
+                eths_to_collect.extend((node_attrs, e) for e in eth_list)
+
+        for (node_attrs, e), eth_stats in map_concurrently(self.get_eth_stats, eths_to_collect, self.threads_count):
+            if eth_stats is not None:
+                self.submit_eth_metric(node_attrs, e, eth_stats)
+
+    def get_node_data(self, node):
+        """
+        Return the process metrics, the stats and the ports of a node, each being None if it could not be fetched.
+        The ports of a switch are only fetched along with its stats, and come with their stats with `bulk_port_stats`.
+        """
+        node_attrs = helpers.get_attributes(node)
+        node_id = node_attrs['id']
+        pod_id = helpers.get_pod_from_dn(node_attrs['dn'])
+        process_metrics = stats = eth_list = None
+
+        self.log.info("processing node %s on pod %s", node_id, pod_id)
+        try:
+            process_metrics = self.get_process_metrics(node_attrs)
+        except (exceptions.APIConnectionException, exceptions.APIParsingException):
+            pass
+        if node_attrs.get('role') != "controller":
             try:
-                self.submit_process_metric(n, tags + self.check_tags + user_tags, hostname=hostname)
+                stats = self.api.get_node_stats(pod_id, node_id)
+                eth_list = self.get_eth_list(node_attrs)
             except (exceptions.APIConnectionException, exceptions.APIParsingException):
                 pass
-            if node_attrs.get('role') != "controller":
-                try:
-                    stats = self.api.get_node_stats(pod_id, node_id)
-                    self.submit_fabric_metric(stats, tags, 'fabricNode', hostname=hostname)
-                    self.process_eth(node_attrs)
-                except (exceptions.APIConnectionException, exceptions.APIParsingException):
-                    pass
-            self.log.info("finished processing node %s", node_id)
-
-    def process_eth(self, node):
+        self.log.info("finished processing node %s", node_id)
+
+        return process_metrics, stats, eth_list
+
+    def get_eth_list(self, node):
         self.log.info("processing ethernet ports for %s", node.get('id'))
-        hostname = helpers.get_fabric_hostname(node)
         pod_id = helpers.get_pod_from_dn(node['dn'])
         try:
-            eth_list = self.api.get_eth_list(pod_id, node['id'])
+            if self.bulk_port_stats:
+                return self.api.get_eth_list_with_stats(pod_id, node['id'])
+            return self.api.get_eth_list(pod_id, node['id'])
         except (exceptions.APIConnectionException, exceptions.APIParsingException):
             pass
-        for e in eth_list:
-            eth_attrs = helpers.get_attributes(e)
-            eth_id = eth_attrs['id']
-            tags = self.tagger.get_fabric_tags(e, 'l1PhysIf')
-            try:
-                stats = self.api.get_eth_stats(pod_id, node['id'], eth_id)
-                self.submit_fabric_metric(stats, tags, 'l1PhysIf', hostname=hostname)
-            except (exceptions.APIConnectionException, exceptions.APIParsingException):
-                pass
-        self.log.info("finished processing ethernet ports for %s", node['id'])
+        finally:
+            self.log.info("finished processing ethernet ports for %s", node['id'])
+
+    def get_eth_stats(self, node_eth):
+        node, e = node_eth
+        pod_id = helpers.get_pod_from_dn(node['dn'])
+        eth_id = helpers.get_attributes(e)['id']
+        try:
+            return self.api.get_eth_stats(pod_id, node['id'], eth_id)
+        except (exceptions.APIConnectionException, exceptions.APIParsingException):
+            pass
+
+    def submit_eth_metric(self, node, e, stats):
+        hostname = helpers.get_fabric_hostname(node)
+        tags = self.tagger.get_fabric_tags(e, 'l1PhysIf')
+        self.submit_fabric_metric(stats, tags, 'l1PhysIf', hostname=hostname)
 
     def submit_fabric_metric(self, stats, tags, obj_type, hostname=None):
         for s in stats:
@@ -124,16 +187,16 @@ class Fabric:
 
             self.submit_metrics(metrics, tags, hostname=hostname, instance=self.instance)
 
-    def submit_process_metric(self, obj, tags, hostname=None):
-        attrs = helpers.get_attributes(obj)
+    def get_process_metrics(self, attrs):
         node_id = helpers.get_node_from_dn(attrs['dn'])
         pod_id = helpers.get_pod_from_dn(attrs['dn'])
 
         if attrs['role'] == "controller":
-            metrics = self.api.get_controller_proc_metrics(pod_id, node_id)
+            return self.api.get_controller_proc_metrics(pod_id, node_id)
         else:
-            metrics = self.api.get_spine_proc_metrics(pod_id, node_id)
+            return self.api.get_spine_proc_metrics(pod_id, node_id)
 
+    def submit_process_metric(self, metrics, tags, hostname=None):
         for d in metrics:
             if d.get("procCPUHist5min", {}).get('attributes'):
                 data = d.get("procCPUHist5min").get("attributes", {})
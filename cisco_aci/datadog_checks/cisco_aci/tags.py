@@ -3,6 +3,7 @@
 # Licensed under a 3-clause BSD style license (see LICENSE)
 
 import re
+import threading
 
 from six import iteritems
 
@@ -19,6 +20,8 @@ class CiscoTags:
         self.tenant_farbic_mapper = {}
         self.tenant_tags = {}
         self._api = None
+        # The endpoint groups of different applications are tagged from multiple threads
+        self._lock = threading.Lock()
         if log:
             self.log = log
         else:
@@ -143,14 +146,15 @@ class CiscoTags:
                     # populating the map for eth-app mapping
 
                     tenant_fabric_key = node.group(1) + ":" + port.group(1)
-                    if tenant_fabric_key not in self.tenant_farbic_mapper:
-                        self.tenant_farbic_mapper[tenant_fabric_key] = application_meta
-                    else:
-                        self.tenant_farbic_mapper[tenant_fabric_key].extend(application_meta)
-
-                    self.tenant_farbic_mapper[tenant_fabric_key] = list(
-                        set(self.tenant_farbic_mapper[tenant_fabric_key])
-                    )
+                    with self._lock:
+                        if tenant_fabric_key not in self.tenant_farbic_mapper:
+                            self.tenant_farbic_mapper[tenant_fabric_key] = application_meta
+                        else:
+                            self.tenant_farbic_mapper[tenant_fabric_key].extend(application_meta)
+
+                        self.tenant_farbic_mapper[tenant_fabric_key] = list(
+                            set(self.tenant_farbic_mapper[tenant_fabric_key])
+                        )
             except (exceptions.APIConnectionException, exceptions.APIParsingException):
                 # the exception will already be logged, just pass it over here
                 pass
@@ -5,9 +5,12 @@
 import datetime
 import re
 import time
+from functools import partial
 
 from six import iteritems
 
+from datadog_checks.base.utils.concurrency import map_concurrently
+
 from . import exceptions, helpers
 
 
@@ -29,6 +32,7 @@ class Tenant:
         self.rate = check.rate
         self.log = check.log
         self.submit_metrics = check.submit_metrics
+        self.threads_count = check.threads_count
         self.tagger = self.check.tagger
         self.tenant_metrics = self.check.tenant_metrics
 
@@ -46,17 +50,13 @@ class Tenant:
                 if list_apps is None:
                     break
                 self.log.info("collecting %s apps from %s", len(list_apps), t)
+                apps = []
                 for app in list_apps:
-                    self._submit_app_data(t, app)
-                    app_name = app.get('fvAp', {}).get('attributes', {}).get('name')
-                    if not app_name:
+                    if not app.get('fvAp', {}).get('attributes', {}).get('name'):
                         break
-                    try:
-                        list_epgs = self.api.get_epgs(t, app_name)
-                        self.log.info("collecting %s endpoint groups from %s", len(list_epgs), app_name)
-                        self._submit_epg_data(t, app_name, list_epgs)
-                    except (exceptions.APIConnectionException, exceptions.APIParsingException):
-                        pass
+                    apps.append(app)
+                for _, app_data in map_concurrently(partial(self._get_app_data, t), apps, self.threads_count):
+                    self._submit_app_data(*app_data)
             except (exceptions.APIConnectionException, exceptions.APIParsingException):
                 pass
             self._submit_ten_data(t)
@@ -65,24 +65,36 @@ class Tenant:
             except (exceptions.APIConnectionException, exceptions.APIParsingException):
                 pass
 
-    def _submit_app_data(self, tenant, app):
+    def _get_app_data(self, tenant, app):
+        """
+        Return the stats and tags of an application and of its endpoint groups, which are fetched from a worker thread.
+        """
         a = app.get('fvAp', {})
         app_name = a.get('attributes', {}).get('name')
-        if not app_name:
-            return
         stats = self.api.get_app_stats(tenant, app_name)
         tags = self.tagger.get_application_tags(a)
-        self.submit_raw_obj(stats, tags, 'application')
 
-    def _submit_epg_data(self, tenant, app, epgs):
-        for epg_data in epgs:
-            epg = epg_data.get('fvAEPg', {})
-            epg_name = epg.get('attributes', {}).get('name')
-            if not epg_name:
-                continue
-            stats = self.api.get_epg_stats(tenant, app, epg_name)
-            tags = self.tagger.get_endpoint_group_tags(epg)
-            self.submit_raw_obj(stats, tags, 'endpoint_group')
+        # Ex: epgs = [(<stats>, <tags>)]
+        epgs = []
+        try:
+            list_epgs = self.api.get_epgs(tenant, app_name)
+            self.log.info("collecting %s endpoint groups from %s", len(list_epgs), app_name)
+            for epg_data in list_epgs:
+                epg = epg_data.get('fvAEPg', {})
+                epg_name = epg.get('attributes', {}).get('name')
+                if not epg_name:
+                    continue
+                epg_stats = self.api.get_epg_stats(tenant, app_name, epg_name)
+                epgs.append((epg_stats, self.tagger.get_endpoint_group_tags(epg)))
+        except (exceptions.APIConnectionException, exceptions.APIParsingException):
+            pass
+
+        return stats, tags, epgs
+
+    def _submit_app_data(self, stats, tags, epgs):
+        self.submit_raw_obj(stats, tags, 'application')
+        for epg_stats, epg_tags in epgs:
+            self.submit_raw_obj(epg_stats, epg_tags, 'endpoint_group')
 
     def _submit_ten_data(self, tenant):
         if not tenant:
@@ -6,6 +6,7 @@ import hashlib
 import json
 import logging
 import os
+import re
 
 from datadog_checks.cisco_aci.api import SessionWrapper
 
@@ -690,3 +691,23 @@ class FakeTenantSessionWrapper(FakeSessionWrapper):
 
 class FakeFabricSessionWrapper(FakeSessionWrapper):
     fixture_dirs = [FABRIC_FIXTURES_DIR]
+
+
+class FakeBulkFabricSessionWrapper(FakeFabricSessionWrapper):
+    """Answers the per-node port stats queries with the per-port stats fixtures"""
+
+    bulk_port_stats_query = '&rsp-subtree-include=stats'
+
+    def make_request(self, path):
+        if not path.endswith(self.bulk_port_stats_query):
+            return super(FakeBulkFabricSessionWrapper, self).make_request(path)
+
+        response = super(FakeBulkFabricSessionWrapper, self).make_request(path[: -len(self.bulk_port_stats_query)])
+        pod, node = re.search(r'/pod-(\d+)/node-(\d+)/', path).groups()
+        for eth in response['imdata']:
+            eth = eth['l1PhysIf']
+            eth_path = '/api/mo/topology/pod-{}/node-{}/sys/phys-[{}].json?{}'.format(
+                pod, node, eth['attributes']['id'], 'rsp-subtree-include=stats,no-scoped&page-size=50'
+            )
+            eth['children'] = super(FakeBulkFabricSessionWrapper, self).make_request(eth_path)['imdata']
+        return response
@@ -7,6 +7,7 @@ from copy import deepcopy
 import pytest
 from mock import MagicMock
 
+from datadog_checks.base import ConfigurationError
 from datadog_checks.base.utils.containers import hash_mutable
 from datadog_checks.cisco_aci import CiscoACICheck
 from datadog_checks.cisco_aci.api import Api, SessionWrapper
@@ -93,3 +94,18 @@ def test_config(aggregator, extra_config, expected_http_kwargs):
 
     actual_options = {k: v for k, v in check.http.options.items() if k in expected_http_kwargs}
     assert expected_http_kwargs == actual_options
+
+
+@pytest.mark.parametrize(
+    'extra_config, message',
+    [
+        pytest.param({'threads_count': 0}, '^`threads_count` must be greater than 0$', id='threads count'),
+        pytest.param({'cache_ttl': -1}, '^`cache_ttl` must be greater than or equal to 0$', id='cache ttl'),
+    ],
+)
+def test_config_invalid(extra_config, message):
+    instance = deepcopy(common.CONFIG_WITH_TAGS)
+    instance.update(extra_config)
+
+    with pytest.raises(ConfigurationError, match=message):
+        CiscoACICheck(common.CHECK_NAME, {}, [instance])
@@ -2,6 +2,8 @@
 # All rights reserved
 # Licensed under Simplified BSD License (see LICENSE)
 
+import mock
+
 from datadog_checks.base.utils.containers import hash_mutable
 from datadog_checks.cisco_aci import CiscoACICheck
 from datadog_checks.cisco_aci.api import Api
@@ -3499,3 +3501,47 @@ def test_fabric_mocked(aggregator):
 
     # Assert coverage for this check on this instance
     aggregator.assert_all_metrics_covered()
+
+
+def get_fabric_metrics(aggregator, wrapper_factory, config):
+    check = CiscoACICheck(common.CHECK_NAME, {}, {})
+    api = Api(common.ACI_URLS, check.http, common.USERNAME, password=common.PASSWORD, log=check.log)
+    api.wrapper_factory = wrapper_factory
+    check._api_cache[hash_mutable(config)] = api
+
+    aggregator.reset()
+    check.check(config)
+
+    return sorted(
+        (name, metric.value, sorted(metric.tags), metric.hostname)
+        for name in aggregator.metric_names
+        for metric in aggregator.metrics(name)
+    )
+
+
+def test_fabric_bulk_port_stats(aggregator):
+    config = dict(common.CONFIG_WITH_TAGS, bulk_port_stats=True)
+    metrics = get_fabric_metrics(aggregator, common.FakeBulkFabricSessionWrapper, config)
+
+    assert any(name.startswith('cisco_aci.fabric.port.') for name, _, _, _ in metrics)
+    assert metrics == get_fabric_metrics(aggregator, common.FakeFabricSessionWrapper, common.CONFIG_WITH_TAGS)
+
+
+def test_fabric_nodes_cache():
+    check = CiscoACICheck(common.CHECK_NAME, {}, {})
+    api = Api(common.ACI_URLS, check.http, common.USERNAME, password=common.PASSWORD, log=check.log, cache_ttl=300)
+    api.wrapper_factory = common.FakeFabricSessionWrapper
+    api.login()
+
+    with mock.patch.object(api, 'make_request', wraps=api.make_request) as make_request:
+        nodes = api.get_fabric_nodes()
+        pods = api.get_fabric_pods()
+        assert make_request.call_count == 2
+
+        assert api.get_fabric_nodes() is nodes
+        assert api.get_fabric_pods() is pods
+        assert make_request.call_count == 2
+
+        api.cache_ttl = 0
+        api.get_fabric_nodes()
+        assert make_request.call_count == 3
@@ -49,5 +49,56 @@ def distance(a, b):
     return rtt * 1000.0
 
 
+# Dimensionality of the network coordinates of Consul, for which the distance computation is unrolled
+COORDINATE_DIMENSIONS = 8
+
+
+class Coordinates(object):
+    """
+    Network coordinates of a set of nodes, unpacked once to compute the distances from a node to all of them.
+    The operations of `distance` are performed in the same order, so the results are identical.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.coordinates = [unpack_coordinate(node) for node in nodes]
+        self.unrolled = all(len(vec) == COORDINATE_DIMENSIONS for vec, _, _ in self.coordinates)
+
+    def distances(self, node):
+        """Return the distances from `node` to every node of the set, in order."""
+        a_vec, a_height, a_adjustment = unpack_coordinate(node)
+        if not (self.unrolled and len(a_vec) == COORDINATE_DIMENSIONS):
+            return [distance(node, other) for other in self.nodes]
+
+        a0, a1, a2, a3, a4, a5, a6, a7 = a_vec
+        latencies = []
+        append = latencies.append
+        for (b0, b1, b2, b3, b4, b5, b6, b7), b_height, b_adjustment in self.coordinates:
+            rtt = (
+                sqrt(
+                    (a0 - b0) * (a0 - b0)
+                    + (a1 - b1) * (a1 - b1)
+                    + (a2 - b2) * (a2 - b2)
+                    + (a3 - b3) * (a3 - b3)
+                    + (a4 - b4) * (a4 - b4)
+                    + (a5 - b5) * (a5 - b5)
+                    + (a6 - b6) * (a6 - b6)
+                    + (a7 - b7) * (a7 - b7)
+                )
+                + a_height
+                + b_height
+            )
+
+            adjusted = rtt + a_adjustment + b_adjustment
+            append((adjusted if adjusted > 0.0 else rtt) * 1000.0)
+
+        return latencies
+
+
+def unpack_coordinate(node):
+    coord = node['Coord']
+    return tuple(coord['Vec']), coord['Height'], coord['Adjustment']
+
+
 def ceili(v):
     return int(ceil(v))
@@ -24,8 +24,8 @@ from datadog_checks.consul.common import (
     SOURCE_TYPE_NAME,
     STATUS_SC,
     STATUS_SEVERITY,
+    Coordinates,
     ceili,
-    distance,
 )
 
 from .metrics import METRIC_MAP
@@ -38,6 +38,13 @@ except ImportError:
 
 NodeStatus = namedtuple('NodeStatus', ['node_id', 'service_name', 'service_tags_set', 'status'])
 
+# The statuses of the nodes of a service, `node_statuses` is a list of (node_id, status) where status is None
+# for nodes without checks
+ServiceStatus = namedtuple('ServiceStatus', ['node_count_per_status', 'node_statuses', 'nodes_per_service_tag_counts'])
+
+# A service whose status is reused as long as the health checks summarized by its signature do not change
+CachedService = namedtuple('CachedService', ['signature', 'nodes', 'status'])
+
 
 class ConsulCheck(OpenMetricsBaseCheck):
     def __init__(self, name, init_config, instances):
@@ -98,6 +105,11 @@ class ConsulCheck(OpenMetricsBaseCheck):
         self.disable_legacy_service_tag = is_affirmative(self.instance.get('disable_legacy_service_tag', False))
         self.service_whitelist = self.instance.get('service_whitelist', self.init_config.get('service_whitelist', []))
         self.max_services = self.instance.get('max_services', self.init_config.get('max_services', MAX_SERVICES))
+        self.use_catalog_cache = is_affirmative(self.instance.get('use_catalog_cache', False))
+
+        # {service: CachedService}, valid as long as the catalog index is the same
+        self._catalog_cache = {}
+        self._catalog_index = None
 
         self._local_config = None
         self._last_config_fetch_time = None
@@ -107,13 +119,15 @@ class ConsulCheck(OpenMetricsBaseCheck):
             'client_cert_file': {'name': 'tls_cert'},
             'private_key_file': {'name': 'tls_private_key'},
             'ca_bundle_file': {'name': 'tls_ca_cert'},
+            # The agent configuration, the peers and the catalog rarely change between check runs
+            'conditional_requests': {'name': 'conditional_requests', 'default': True},
         }
 
         if 'acl_token' in self.instance:
             self.http.options['headers']['X-Consul-Token'] = self.instance['acl_token']
 
     def _is_dogstatsd_configured(self):
-        """ Check if the agent has a consul dogstatsd profile configured """
+        """Check if the agent has a consul dogstatsd profile configured"""
         dogstatsd_mapper = datadog_agent.get_config('dogstatsd_mapper_profiles')
         if dogstatsd_mapper:
             for profile in dogstatsd_mapper:
@@ -122,6 +136,9 @@ class ConsulCheck(OpenMetricsBaseCheck):
         return False
 
     def consul_request(self, endpoint):
+        return self._consul_response(endpoint).json()
+
+    def _consul_response(self, endpoint):
         url = urljoin(self.url, endpoint)
         service_check_tags = ["url:{}".format(url)] + self.base_tags
         try:
@@ -146,7 +163,7 @@ class ConsulCheck(OpenMetricsBaseCheck):
         else:
             self.service_check(CONSUL_CAN_CONNECT, self.OK, tags=service_check_tags)
 
-        return resp.json()
+        return resp
 
     # Consul Config Accessors
     def _get_local_config(self):
@@ -254,6 +271,12 @@ class ConsulCheck(OpenMetricsBaseCheck):
     def get_services_in_cluster(self):
         return self.consul_request('/v1/catalog/services')
 
+    def get_indexed_services_in_cluster(self):
+        """Return the services in the catalog along with the `X-Consul-Index` of the services table."""
+        resp = self._consul_response('/v1/catalog/services')
+
+        return resp.json(), resp.headers.get('X-Consul-Index')
+
     def get_nodes_with_service(self, service):
         consul_request_url = '/v1/health/service/{}'.format(service)
 
@@ -292,6 +315,148 @@ class ConsulCheck(OpenMetricsBaseCheck):
 
         return service_tags
 
+    @staticmethod
+    def _get_service_status(service, nodes_with_service):
+        # {'up': 0, 'passing': 0, 'warning': 0, 'critical': 0}
+        node_count_per_status = defaultdict(int)
+
+        # [(node_id, status)]
+        node_statuses = []
+
+        # Maps NodeStatus -> int
+        nodes_per_service_tag_counts = defaultdict(int)
+
+        for node in nodes_with_service:
+            # The node_id is n['Node']['Node']
+            node_id = node.get('Node', {}).get("Node")
+
+            # If there is no Check for the node then Consul and dd-agent consider it up
+            if 'Checks' not in node:
+                node_count_per_status['passing'] += 1
+                node_count_per_status['up'] += 1
+                node_statuses.append((node_id, None))
+            else:
+                found_critical = False
+                found_warning = False
+                found_serf_health = False
+
+                for check in node['Checks']:
+                    if check['CheckID'] == 'serfHealth':
+                        found_serf_health = True
+
+                        # For backwards compatibility, the "up" node_count_per_status is computed
+                        # based on the total # of nodes 'running' as part of the service.
+
+                        # If the serfHealth is `critical` it means the Consul agent isn't even responding,
+                        # and we don't register the node as `up`
+                        if check['Status'] != 'critical':
+                            node_count_per_status["up"] += 1
+                            continue
+
+                    if check['Status'] == 'critical':
+                        found_critical = True
+                        break
+                    elif check['Status'] == 'warning':
+                        found_warning = True
+                        # Keep looping in case there is a critical status
+
+                service_tags_set = frozenset(node.get('Service', {}).get('Tags') or [])
+
+                # Increment the counters based on what was found in Checks
+                # `critical` checks override `warning`s, and if neither are found,
+                # register the node as `passing`
+                if found_critical:
+                    status = 'critical'
+                elif found_warning:
+                    status = 'warning'
+                else:
+                    if not found_serf_health:
+                        # We have not found a serfHealth check for this node, which is unexpected
+                        # If we get here assume this node's status is "up", since we register it as 'passing'
+                        node_count_per_status['up'] += 1
+
+                    status = 'passing'
+
+                node_count_per_status[status] += 1
+                node_statuses.append((node_id, status))
+                nodes_per_service_tag_counts[NodeStatus(node_id, service, service_tags_set, status)] += 1
+
+        return ServiceStatus(node_count_per_status, node_statuses, nodes_per_service_tag_counts)
+
+    @staticmethod
+    def _get_check_signatures(health_state):
+        """
+        Summarize the health checks of every service and the node checks of every node as their count and their
+        highest `ModifyIndex`, which changes whenever a check is added, removed or updated.
+        """
+        service_signatures = {}
+        node_signatures = {}
+
+        for check in health_state:
+            if check.get('ServiceID'):
+                signatures = service_signatures
+                key = check.get('ServiceName')
+            else:
+                signatures = node_signatures
+                key = check.get('Node')
+
+            modify_index = check.get('ModifyIndex') or 0
+            count, max_index = signatures.get(key, (0, 0))
+            signatures[key] = (count + 1, max(max_index, modify_index))
+
+        return service_signatures, node_signatures
+
+    def _get_cached_service_statuses(self, services, catalog_index, health_state, main_tags):
+        """
+        Return the status of every service, only querying the nodes of the services whose health checks, or the
+        node checks of whose nodes, changed since the previous run.
+
+        Registrations are not reflected by health checks, so the whole cache is invalidated when the index
+        of the catalog changes. Without the health state, nothing can be cached.
+        """
+        if health_state is None or catalog_index is None or catalog_index != self._catalog_index:
+            self._catalog_cache = {}
+        self._catalog_index = catalog_index
+
+        if health_state is not None:
+            service_signatures, node_signatures = self._get_check_signatures(health_state)
+
+        def get_signature(service, tags, nodes):
+            return (
+                tuple(tags or ()),
+                service_signatures.get(service),
+                frozenset((node, node_signatures.get(node)) for node in nodes),
+            )
+
+        service_statuses = {}
+        catalog_cache = {}
+        requests_saved = 0
+
+        for service, tags in iteritems(services):
+            cached_service = self._catalog_cache.get(service)
+            if cached_service is not None and cached_service.signature == get_signature(
+                service, tags, cached_service.nodes
+            ):
+                service_statuses[service] = cached_service.status
+                catalog_cache[service] = cached_service
+                requests_saved += 1
+                continue
+
+            service_status = self._get_service_status(service, self.get_nodes_with_service(service))
+            service_statuses[service] = service_status
+
+            if health_state is not None:
+                nodes = frozenset(node_id for node_id, _ in service_status.node_statuses)
+                catalog_cache[service] = CachedService(get_signature(service, tags, nodes), nodes, service_status)
+
+        # Services that left the catalog are dropped
+        self._catalog_cache = catalog_cache
+
+        self.gauge('{}.cache.requests_saved'.format(CONSUL_CATALOG_CHECK), requests_saved, tags=main_tags)
+        self.gauge('{}.cache.requests'.format(CONSUL_CATALOG_CHECK), len(services) - requests_saved, tags=main_tags)
+
+        return service_statuses
+
     def check(self, _):
         # The Prometheus endpoint is available since Consul 1.1.0
         if self.use_prometheus_endpoint:
@@ -322,6 +487,7 @@ class ConsulCheck(OpenMetricsBaseCheck):
 
         service_check_tags = main_tags + ['consul_url:{}'.format(self.url)]
 
+        health_state = None
         try:
             # Make service checks from health checks for all services in catalog
             health_state = self.consul_request('/v1/health/state/any')
@@ -360,12 +526,23 @@ class ConsulCheck(OpenMetricsBaseCheck):
         if self.perform_catalog_checks:
             # Collect node by service, and service by node counts for a whitelist of services
 
-            services = self.get_services_in_cluster()
+            if self.use_catalog_cache:
+                services, catalog_index = self.get_indexed_services_in_cluster()
+            else:
+                services = self.get_services_in_cluster()
 
             self.count_all_nodes(main_tags)
 
             services = self._cull_services_list(services)
 
+            if self.use_catalog_cache:
+                service_statuses = self._get_cached_service_statuses(services, catalog_index, health_state, main_tags)
+            else:
+                service_statuses = {
+                    service: self._get_service_status(service, self.get_nodes_with_service(service))
+                    for service in services
+                }
+
             # {node_id: {"up: 0, "passing": 0, "warning": 0, "critical": 0}
             nodes_to_service_status = defaultdict(lambda: defaultdict(int))
 
@@ -392,74 +569,19 @@ class ConsulCheck(OpenMetricsBaseCheck):
 
                 all_service_tags = self._get_service_tags(service, services[service])
 
-                nodes_with_service = self.get_nodes_with_service(service)
-
-                # {'up': 0, 'passing': 0, 'warning': 0, 'critical': 0}
-                node_count_per_status = defaultdict(int)
-
-                for node in nodes_with_service:
-                    # The node_id is n['Node']['Node']
-                    node_id = node.get('Node', {}).get("Node")
+                service_health = service_statuses[service]
 
+                for node_id, status in service_health.node_statuses:
                     # An additional service is registered on this node. Bump up the counter
                     nodes_to_service_status[node_id]["up"] += 1
+                    if status is not None:
+                        nodes_to_service_status[node_id][status] += 1
 
-                    # If there is no Check for the node then Consul and dd-agent consider it up
-                    if 'Checks' not in node:
-                        node_count_per_status['passing'] += 1
-                        node_count_per_status['up'] += 1
-                    else:
-                        found_critical = False
-                        found_warning = False
-                        found_serf_health = False
-
-                        for check in node['Checks']:
-                            if check['CheckID'] == 'serfHealth':
-                                found_serf_health = True
-
-                                # For backwards compatibility, the "up" node_count_per_status is computed
-                                # based on the total # of nodes 'running' as part of the service.
-
-                                # If the serfHealth is `critical` it means the Consul agent isn't even responding,
-                                # and we don't register the node as `up`
-                                if check['Status'] != 'critical':
-                                    node_count_per_status["up"] += 1
-                                    continue
-
-                            if check['Status'] == 'critical':
-                                found_critical = True
-                                break
-                            elif check['Status'] == 'warning':
-                                found_warning = True
-                                # Keep looping in case there is a critical status
-
-                        service_tags_set = frozenset(node.get('Service', {}).get('Tags') or [])
-
-                        # Increment the counters based on what was found in Checks
-                        # `critical` checks override `warning`s, and if neither are found,
-                        # register the node as `passing`
-                        if found_critical:
-                            node_count_per_status['critical'] += 1
-                            nodes_to_service_status[node_id]["critical"] += 1
-                            node_status = NodeStatus(node_id, service, service_tags_set, 'critical')
-                        elif found_warning:
-                            node_count_per_status['warning'] += 1
-                            nodes_to_service_status[node_id]["warning"] += 1
-                            node_status = NodeStatus(node_id, service, service_tags_set, 'warning')
-                        else:
-                            if not found_serf_health:
-                                # We have not found a serfHealth check for this node, which is unexpected
-                                # If we get here assume this node's status is "up", since we register it as 'passing'
-                                node_count_per_status['up'] += 1
-
-                            node_count_per_status['passing'] += 1
-                            nodes_to_service_status[node_id]["passing"] += 1
-                            node_status = NodeStatus(node_id, service, service_tags_set, 'passing')
-
-                        nodes_per_service_tag_counts[node_status] += 1
+                for node_status, count in iteritems(service_health.nodes_per_service_tag_counts):
+                    nodes_per_service_tag_counts[node_status] += count
 
                 for status_key in STATUS_SC:
-                    status_value = node_count_per_status[status_key]
+                    status_value = service_health.node_count_per_status[status_key]
                     self.gauge(
                         '{}.nodes_{}'.format(CONSUL_CATALOG_CHECK, status_key),
                         status_value,
@@ -516,10 +638,10 @@ class ConsulCheck(OpenMetricsBaseCheck):
                     if name == other_name:
                         # Ignore ourselves
                         continue
+                    other_coordinates = Coordinates(other['Coordinates'])
                     latencies = []
                     for node_a in datacenter['Coordinates']:
-                        for node_b in other['Coordinates']:
-                            latencies.append(distance(node_a, node_b))
+                        latencies.extend(other_coordinates.distances(node_a))
                     latencies.sort()
                     tags = main_tags + ['source_datacenter:{}'.format(name), 'dest_datacenter:{}'.format(other_name)]
                     n = len(latencies)
@@ -540,14 +662,18 @@ class ConsulCheck(OpenMetricsBaseCheck):
         if len(nodes) == 1:
             self.log.debug("Only 1 node in cluster, skipping network latency metrics.")
         else:
+            coordinates = Coordinates(nodes)
+
+            # Expected format: {node_name: [position, ...]}
+            positions = defaultdict(list)
+            for position, node in enumerate(nodes):
+                positions[node['Node']].append(position)
+
             for node in nodes:
                 node_name = node['Node']
-                latencies = []
-                for other in nodes:
-                    other_name = other['Node']
-                    if node_name == other_name:
-                        continue
-                    latencies.append(distance(node, other))
+                latencies = coordinates.distances(node)
+                for position in reversed(positions[node_name]):
+                    del latencies[position]
                 latencies.sort()
                 n = len(latencies)
                 half_n = n // 2
@@ -18,6 +18,8 @@ MOCK_CONFIG_SERVICE_WHITELIST = {
     'service_whitelist': ['service_{}'.format(k) for k in range(70)],
 }
 
+MOCK_CONFIG_CATALOG_CACHE = {'url': 'http://localhost:8500', 'catalog_checks': True, 'use_catalog_cache': True}
+
 MOCK_CONFIG_LEADER_CHECK = {'url': 'http://localhost:8500', 'catalog_checks': True, 'new_leader_checks': True}
 
 MOCK_CONFIG_SELF_LEADER_CHECK = {'url': 'http://localhost:8500', 'catalog_checks': True, 'self_leader_check': True}
@@ -95,6 +97,32 @@ def mock_get_services_in_cluster():
     }
 
 
+def mock_get_catalog_health_state(services, modify_index=1):
+    # The node checks of node-1 and the service checks matching `mock_get_nodes_with_service`
+    health_state = [
+        {
+            "ModifyIndex": modify_index,
+            "Node": "node-1",
+            "CheckID": "serfHealth",
+            "Status": "passing",
+            "ServiceID": "",
+            "ServiceName": "",
+        }
+    ]
+    for service in services:
+        health_state.append(
+            {
+                "ModifyIndex": modify_index,
+                "Node": "node-1",
+                "CheckID": "service:{}".format(service),
+                "Status": "passing",
+                "ServiceID": service,
+                "ServiceName": service,
+            }
+        )
+    return health_state
+
+
 def mock_get_n_services_in_cluster(n):
     dct = {}
     for i in range(n):
@@ -364,3 +392,18 @@ def mock_get_cluster_leader_A():
 
 def mock_get_cluster_leader_B():
     return 'My New Leader'
+
+
+def mock_get_random_coord_nodes(count, dimensions=8):
+    return [
+        {
+            "Node": "host-{}".format(i),
+            "Coord": {
+                "Vec": [random.uniform(-0.01, 0.01) for _ in range(dimensions)],
+                "Error": random.uniform(0, 1.5),
+                "Adjustment": random.uniform(-0.0001, 0.0001),
+                "Height": random.uniform(0, 0.0001),
+            },
+        }
+        for i in range(count)
+    ]
@@ -0,0 +1,23 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under a 3-clause BSD style license (see LICENSE)
+import pytest
+
+from datadog_checks.consul import ConsulCheck
+
+from . import common, consul_mocks
+
+
+@pytest.mark.parametrize('nodes', [100, 1000])
+def test_network_latency(benchmark, nodes):
+    consul_check = ConsulCheck(common.CHECK_NAME, {}, [consul_mocks.MOCK_CONFIG_NETWORK_LATENCY_CHECKS])
+    coord_nodes = consul_mocks.mock_get_random_coord_nodes(nodes)
+    consul_mocks.mock_check(
+        consul_check,
+        {
+            '_get_coord_datacenters': consul_mocks.mock_get_coord_datacenters,
+            '_get_coord_nodes': lambda: coord_nodes,
+        },
+    )
+
+    benchmark(consul_check.check_network_latency, 'dc1', [])
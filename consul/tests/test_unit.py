@@ -7,7 +7,8 @@ import mock
 import pytest
 
 from datadog_checks.consul import ConsulCheck
-from datadog_checks.consul.common import MAX_SERVICES
+from datadog_checks.consul.common import MAX_SERVICES, Coordinates, distance
+from datadog_checks.dev.http import MockResponse
 
 from . import common, consul_mocks
 
@@ -155,6 +156,76 @@ def test_get_nodes_with_service_critical(aggregator):
     aggregator.assert_metric('consul.catalog.services_count', value=1, tags=expected_tags)
 
 
+def test_catalog_cache(aggregator):
+    consul_check = ConsulCheck(common.CHECK_NAME, {}, [consul_mocks.MOCK_CONFIG_CATALOG_CACHE])
+    services = consul_mocks.mock_get_services_in_cluster()
+    health_state = consul_mocks.mock_get_catalog_health_state(services)
+    catalog = {'index': '10'}
+    requested_services = []
+
+    def get_nodes_with_service(service):
+        requested_services.append(service)
+        return consul_mocks.mock_get_nodes_with_service(service)
+
+    my_mocks = consul_mocks._get_consul_mocks()
+    my_mocks['get_nodes_with_service'] = get_nodes_with_service
+    my_mocks['get_indexed_services_in_cluster'] = lambda: (services, catalog['index'])
+    my_mocks['consul_request'] = lambda endpoint: health_state
+    consul_mocks.mock_check(consul_check, my_mocks)
+
+    def run_check():
+        del requested_services[:]
+        aggregator.reset()
+        consul_check.check(None)
+        return sorted(requested_services)
+
+    def assert_catalog_metrics():
+        expected_tags = [
+            'consul_datacenter:dc1',
+            'consul_service_id:service-1',
+            'consul_service-1_service_tag:active',
+            'consul_service-1_service_tag:standby',
+            'consul_service_tag:active',
+            'consul_service_tag:standby',
+        ]
+        aggregator.assert_metric('consul.catalog.nodes_up', value=4, tags=expected_tags)
+        aggregator.assert_metric('consul.catalog.nodes_passing', value=4, tags=expected_tags)
+        aggregator.assert_metric(
+            'consul.catalog.services_passing', value=24, tags=['consul_datacenter:dc1', 'consul_node_id:node-1']
+        )
+
+    assert run_check() == sorted(services)
+    assert_catalog_metrics()
+    aggregator.assert_metric('consul.catalog.cache.requests', value=6, tags=['consul_datacenter:dc1'])
+    aggregator.assert_metric('consul.catalog.cache.requests_saved', value=0, tags=['consul_datacenter:dc1'])
+
+    # Nothing changed, the metrics are computed from the cache
+    assert run_check() == []
+    assert_catalog_metrics()
+    aggregator.assert_metric('consul.catalog.cache.requests', value=0, tags=['consul_datacenter:dc1'])
+    aggregator.assert_metric('consul.catalog.cache.requests_saved', value=6, tags=['consul_datacenter:dc1'])
+
+    # A service check changed
+    health_state[2]['ModifyIndex'] = 2
+    assert run_check() == ['service-2']
+    aggregator.assert_metric('consul.catalog.cache.requests_saved', value=5, tags=['consul_datacenter:dc1'])
+
+    # A service check was removed
+    del health_state[3]
+    assert run_check() == ['service-3']
+
+    # A node check changed, all the services of the node are refreshed
+    health_state[0]['ModifyIndex'] = 2
+    assert run_check() == sorted(services)
+
+    # The catalog changed
+    catalog['index'] = '11'
+    assert run_check() == sorted(services)
+    assert_catalog_metrics()
+
+    assert run_check() == []
+
+
 def test_consul_request(aggregator, instance):
     consul_check = ConsulCheck(common.CHECK_NAME, {}, [consul_mocks.MOCK_CONFIG])
     with mock.patch("datadog_checks.consul.consul.requests.get") as mock_requests_get:
@@ -175,6 +246,33 @@ def test_consul_request(aggregator, instance):
         )
 
 
+@pytest.mark.parametrize(
+    'extra_config, expected_validator',
+    [
+        pytest.param({}, '"1"', id='default'),
+        pytest.param({'conditional_requests': False}, None, id='disabled'),
+    ],
+)
+def test_conditional_requests(aggregator, extra_config, expected_validator):
+    instance = dict(consul_mocks.MOCK_CONFIG, **extra_config)
+    consul_check = ConsulCheck(common.CHECK_NAME, {}, [instance])
+    peers = '["10.0.2.14:8300", "10.0.2.15:8300"]'
+    responses = [
+        MockResponse(peers, normalize_content=False, headers={'ETag': '"1"'}),
+        MockResponse(peers, normalize_content=False, headers={'ETag': '"1"'})
+        if expected_validator is None
+        else MockResponse(status_code=304),
+    ]
+
+    with mock.patch('requests.get', side_effect=responses) as get:
+        assert consul_check.get_peers_in_cluster() == ['10.0.2.14:8300', '10.0.2.15:8300']
+        assert consul_check.get_peers_in_cluster() == ['10.0.2.14:8300', '10.0.2.15:8300']
+
+    assert 'If-None-Match' not in get.call_args_list[0][1]['headers']
+    assert get.call_args_list[1][1]['headers'].get('If-None-Match') == expected_validator
+    aggregator.assert_service_check('consul.can_connect', ConsulCheck.OK, count=2)
+
+
 def test_service_checks(aggregator):
     consul_check = ConsulCheck(common.CHECK_NAME, {}, [consul_mocks.MOCK_CONFIG])
     my_mocks = consul_mocks._get_consul_mocks()
@@ -413,6 +511,15 @@ def test_network_latency_checks(aggregator):
     assert 0.26577747932995816 == node[0][2]
 
 
+@pytest.mark.parametrize('dimensions', [8, 3])
+def test_coordinates_distances(dimensions):
+    nodes = consul_mocks.mock_get_random_coord_nodes(50, dimensions=dimensions)
+    coordinates = Coordinates(nodes)
+
+    for node in nodes:
+        assert coordinates.distances(node) == [distance(node, other) for other in nodes]
+
+
 @pytest.mark.parametrize(
     'test_case, extra_config, expected_http_kwargs',
     [
@@ -4,6 +4,26 @@
 
 from prometheus_client.metrics_core import Metric
 from prometheus_client.parser import _parse_sample, _replace_help_escaping
+from prometheus_client.samples import Sample
+from prometheus_client.utils import floatToGoString
+
+from ...utils.prometheus import metrics_pb2
+
+PROTOBUF_CONTENT_TYPE = 'application/vnd.google.protobuf'
+
+# Endpoints that do not support the protobuf format will fall back to the text format
+PROTOBUF_ACCEPT_HEADER = (
+    'application/vnd.google.protobuf; proto=io.prometheus.client.MetricFamily; encoding=delimited; q=0.7'
+)
+
+# https://github.com/prometheus/client_model/blob/086fe7ca28bde6cec2acd5223423c1475a362858/metrics.proto#L27-L33
+PROTOBUF_METRIC_TYPES = {
+    metrics_pb2.COUNTER: 'counter',
+    metrics_pb2.GAUGE: 'gauge',
+    metrics_pb2.SUMMARY: 'summary',
+    metrics_pb2.UNTYPED: 'untyped',
+    metrics_pb2.HISTOGRAM: 'histogram',
+}
 
 
 # This copies most of the code from upstream at that version:
@@ -89,3 +109,117 @@ def text_fd_to_metric_families(fd):
 
     if name != '':
         yield build_metric(name, documentation, typ, samples)
+
+
+def protobuf_chunks_to_metric_families(chunks, munge_counters=False):
+    """Parse Prometheus protobuf format from an iterable of bytes, e.g. `Response.iter_content()`.
+
+    Messages are decoded as soon as they are complete, and converted to the same Metric's as the text format.
+    If `munge_counters` is set, counters are named like upstream's text parser does rather than ours.
+
+    Yields Metric's.
+    """
+    for message in parse_delimited_metric_families(chunks):
+        metric_type = PROTOBUF_METRIC_TYPES.get(message.type)
+        if metric_type is not None:
+            yield build_metric_from_protobuf(message, metric_type, munge_counters)
+
+
+def parse_delimited_metric_families(chunks):
+    """Yield the MetricFamily messages [0] of a stream of bytes, each one delimited by its varint32 length [1].
+
+    [0] https://github.com/prometheus/client_model/blob/086fe7ca28bde6cec2acd5223423c1475a362858/metrics.proto#L76-%20%20L81  # noqa: E501
+    [1] https://developers.google.com/protocol-buffers/docs/reference/java/com/google/protobuf/AbstractMessageLite#writeDelimitedTo(java.io.OutputStream)  # noqa: E501
+    """
+    buf = bytearray()
+    for chunk in chunks:
+        buf.extend(chunk)
+
+        position = 0
+        while True:
+            message_length, message_start = decode_varint(buf, position)
+            if message_length is None or message_start + message_length > len(buf):
+                break
+
+            position = message_start + message_length
+            message = metrics_pb2.MetricFamily()
+            message.ParseFromString(bytes(buf[message_start:position]))
+            yield message
+
+        del buf[:position]
+
+    if buf:
+        raise ValueError('Truncated protobuf message of {} bytes'.format(len(buf)))
+
+
+def decode_varint(buf, position):
+    """Return the varint at `position` of `buf` and the position after it, or None if it is incomplete."""
+    result = 0
+    shift = 0
+    while position < len(buf):
+        byte = buf[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+
+        shift += 7
+        if shift >= 64:
+            raise ValueError('Too many bytes when decoding varint')
+
+    return None, position
+
+
+def format_float(value):
+    """Format a float like Go's `strconv.FormatFloat(value, 'g', -1, 64)` used by the text format."""
+    value = floatToGoString(value)
+    return value[:-2] if value.endswith('.0') else value
+
+
+def build_metric_from_protobuf(message, metric_type, munge_counters):
+    name = message.name
+    sample_name = name
+    if metric_type == 'counter' and munge_counters:
+        if name.endswith('_total'):
+            name = name[:-6]
+        else:
+            sample_name = name + '_total'
+
+    samples = []
+    for metric in message.metric:
+        labels = {label.name: label.value for label in metric.label}
+        timestamp = metric.timestamp_ms / 1000.0 if metric.HasField('timestamp_ms') else None
+
+        if metric_type == 'counter':
+            samples.append(Sample(sample_name, labels, metric.counter.value, timestamp))
+        elif metric_type == 'gauge':
+            samples.append(Sample(sample_name, labels, metric.gauge.value, timestamp))
+        elif metric_type == 'summary':
+            summary = metric.summary
+            for quantile in summary.quantile:
+                quantile_labels = dict(labels, quantile=format_float(quantile.quantile))
+                samples.append(Sample(name, quantile_labels, quantile.value, timestamp))
+
+            samples.append(Sample(name + '_sum', dict(labels), summary.sample_sum, timestamp))
+            samples.append(Sample(name + '_count', labels, summary.sample_count, timestamp))
+        elif metric_type == 'histogram':
+            histogram = metric.histogram
+            upper_bound = None
+            for bucket in histogram.bucket:
+                upper_bound = format_float(bucket.upper_bound)
+                bucket_labels = dict(labels, le=upper_bound)
+                samples.append(Sample(name + '_bucket', bucket_labels, bucket.cumulative_count, timestamp))
+
+            # The +Inf bucket is implicit in the protobuf format
+            if upper_bound != '+Inf':
+                bucket_labels = dict(labels, le='+Inf')
+                samples.append(Sample(name + '_bucket', bucket_labels, histogram.sample_count, timestamp))
+
+            samples.append(Sample(name + '_sum', dict(labels), histogram.sample_sum, timestamp))
+            samples.append(Sample(name + '_count', labels, histogram.sample_count, timestamp))
+        else:
+            samples.append(Sample(sample_name, labels, metric.untyped.value, timestamp))
+
+    metric_family = Metric(name, message.help, metric_type)
+    metric_family.samples = samples
+    return metric_family
@@ -18,7 +18,12 @@ from ...errors import CheckException
 from ...utils.common import to_native_string
 from ...utils.http import RequestsWrapper
 from .. import AgentCheck
-from ..libs.prometheus import text_fd_to_metric_families
+from ..libs.prometheus import (
+    PROTOBUF_ACCEPT_HEADER,
+    PROTOBUF_CONTENT_TYPE,
+    protobuf_chunks_to_metric_families,
+    text_fd_to_metric_families,
+)
 
 if PY3:
     long = int
@@ -343,6 +348,11 @@ class OpenMetricsScraperMixin(object):
 
         config['telemetry'] = is_affirmative(instance.get('telemetry', default_instance.get('telemetry', False)))
 
+        # Request the protobuf format, the text format being used if the endpoint does not support it
+        config['use_protobuf'] = is_affirmative(
+            instance.get('use_protobuf', default_instance.get('use_protobuf', False))
+        )
+
         # The metric name services use to indicate build information
         config['metadata_metric_name'] = instance.get(
             'metadata_metric_name', default_instance.get('metadata_metric_name')
@@ -393,7 +403,10 @@ class OpenMetricsScraperMixin(object):
         headers.setdefault('accept-encoding', 'gzip')
 
         # Explicitly set the content type we accept
-        headers.setdefault('accept', 'text/plain')
+        if scraper_config['use_protobuf']:
+            headers.setdefault('accept', '{}, text/plain; q=0.3'.format(PROTOBUF_ACCEPT_HEADER))
+        else:
+            headers.setdefault('accept', 'text/plain')
 
         return http_handler
 
@@ -407,15 +420,21 @@ class OpenMetricsScraperMixin(object):
     def parse_metric_family(self, response, scraper_config):
         """
         Parse the MetricFamily from a valid `requests.Response` object to provide a MetricFamily object.
-        The text format uses iter_lines() generator.
+        The text format uses iter_lines() generator, the protobuf format uses iter_content() generator.
         """
-        if response.encoding is None:
-            response.encoding = 'utf-8'
-        input_gen = response.iter_lines(chunk_size=self.REQUESTS_CHUNK_SIZE, decode_unicode=True)
-        if scraper_config['_text_filter_blacklist']:
-            input_gen = self._text_filter_input(input_gen, scraper_config)
+        if PROTOBUF_CONTENT_TYPE in response.headers.get('Content-Type', ''):
+            input_gen = response.iter_content(chunk_size=self.REQUESTS_CHUNK_SIZE)
+            metric_families = protobuf_chunks_to_metric_families(input_gen)
+        else:
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            input_gen = response.iter_lines(chunk_size=self.REQUESTS_CHUNK_SIZE, decode_unicode=True)
+            if scraper_config['_text_filter_blacklist']:
+                input_gen = self._text_filter_input(input_gen, scraper_config)
+
+            metric_families = text_fd_to_metric_families(input_gen)
 
-        for metric in text_fd_to_metric_families(input_gen):
+        for metric in metric_families:
             self._send_telemetry_counter(
                 self.TELEMETRY_COUNTER_METRICS_INPUT_COUNT, len(metric.samples), scraper_config
             )
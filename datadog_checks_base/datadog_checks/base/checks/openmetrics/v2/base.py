@@ -4,6 +4,7 @@
 # TODO: remove ignore when we stop invoking Mypy with --py2
 # type: ignore
 from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
 from ....errors import ConfigurationError
@@ -23,18 +24,43 @@ class OpenMetricsBaseCheckV2(AgentCheck):
         # All configured scrapers keyed by the endpoint
         self.scrapers = {}
 
+        # The maximum number of endpoints to fetch at the same time
+        self.concurrent_scrapes = 1
+
         self.check_initializations.append(self.configure_scrapers)
 
     def check(self, _):
         self.refresh_scrapers()
 
-        for endpoint, scraper in self.scrapers.items():
-            self.log.info('Scraping OpenMetrics endpoint: %s', endpoint)
+        if self.concurrent_scrapes > 1 and len(self.scrapers) > 1:
+            self.prefetch_responses()
 
-            with self.adopt_namespace(scraper.namespace):
-                scraper.scrape()
+        try:
+            for endpoint, scraper in self.scrapers.items():
+                self.log.info('Scraping OpenMetrics endpoint: %s', endpoint)
+
+                with self.adopt_namespace(scraper.namespace):
+                    scraper.scrape()
+        finally:
+            for scraper in self.scrapers.values():
+                scraper.pending_response = None
+
+    def prefetch_responses(self):
+        # Only the fetching of payloads happens in other threads, scrapers still parse and submit on this one
+        executor = ThreadPoolExecutor(max_workers=min(self.concurrent_scrapes, len(self.scrapers)))
+        try:
+            for scraper in self.scrapers.values():
+                scraper.pending_response = executor.submit(scraper.fetch_response)
+        finally:
+            executor.shutdown(wait=False)
 
     def configure_scrapers(self):
+        concurrent_scrapes = self.instance.get('concurrent_scrapes', 1)
+        if not isinstance(concurrent_scrapes, int) or concurrent_scrapes < 1:
+            raise ConfigurationError('Setting `concurrent_scrapes` must be an integer greater than 0')
+
+        self.concurrent_scrapes = concurrent_scrapes
+
         scrapers = {}
 
         for config in self.scraper_configs:
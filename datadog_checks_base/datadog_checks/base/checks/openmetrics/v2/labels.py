@@ -1,6 +1,8 @@
 # (C) Datadog, Inc. 2020-present
 # All rights reserved
 # Licensed under a 3-clause BSD style license (see LICENSE)
+from operator import itemgetter
+
 from ....utils.common import no_op
 
 
@@ -13,6 +15,12 @@ class LabelAggregator:
             self.populate = no_op
             return
 
+        buffer_size = config.get('share_labels_buffer_size', 0)
+        if not isinstance(buffer_size, int) or buffer_size < 0:
+            raise TypeError('Setting `share_labels_buffer_size` must be a positive integer')
+
+        self.buffer_size = buffer_size
+
         self.metric_config = {}
         for metric, config in share_labels.items():
             data = self.metric_config[metric] = {}
@@ -65,16 +73,49 @@ class LabelAggregator:
 
         self.logger = check.log
 
-        self.label_sets = []
+        # Shared labels indexed by the names of the matching labels found on the samples of the configured metrics,
+        # then by the values of those labels, see `populate` for how lookups are made:
+        # {(label, ...): (getter, {(value, ...): {label: value}})}
+        self.label_index = {}
 
         self.unconditional_labels = {}
 
-    def __call__(self, metrics):
-        # TODO: add new option to cache metrics until all configured ones are
-        # seen to avoid dependence on the order in which they are exposed
+        # Number of samples buffered during the last scrape
+        self.buffered_samples = 0
+
+    def __call__(self, metrics, is_collected=None):
+        """
+        Collect the labels to share from the configured metrics while streaming all the metrics through.
+
+        When `share_labels_buffer_size` is set, the metrics for which `is_collected` returns true are held back until
+        all the configured metrics are seen, so that they get the shared labels regardless of the order of exposition.
+        """
         with self:
             metric_config = self.metric_config.copy()
 
+            if self.buffer_size and is_collected is not None:
+                buffer = MetricBuffer(self.buffer_size)
+                for metric in metrics:
+                    if metric.name in metric_config:
+                        self.collect(metric, metric_config.pop(metric.name))
+
+                    if not (is_collected(metric) and buffer.add(metric)):
+                        yield metric
+
+                        if buffer.full:
+                            self.logger.warning(
+                                'Buffered %s samples without seeing all metrics of setting `share_labels`, '
+                                'the remaining metrics may miss shared labels',
+                                buffer.samples,
+                            )
+                            break
+
+                    if not metric_config:
+                        break
+
+                self.buffered_samples = buffer.samples
+                yield from buffer.replay()
+
             for metric in metrics:
                 if metric_config and metric.name in metric_config:
                     self.collect(metric, metric_config.pop(metric.name))
@@ -85,33 +126,15 @@ class LabelAggregator:
         allowed_values = config.get('values')
 
         if 'match' in config:
-            matching_labels = config['match']
+            matching_labels = sorted(config['match'])
             if 'labels' in config:
                 labels = config['labels']
                 for sample in self.allowed_samples(metric, allowed_values):
-                    label_set = set()
-                    shared_labels = {}
-
-                    for label, value in sample.labels.items():
-                        if label in matching_labels:
-                            label_set.add((label, value))
-
-                        if label in labels:
-                            shared_labels[label] = value
-
-                    self.label_sets.append((label_set, shared_labels))
+                    shared_labels = {label: value for label, value in sample.labels.items() if label in labels}
+                    self.index_shared_labels(matching_labels, sample.labels, shared_labels)
             else:
                 for sample in self.allowed_samples(metric, allowed_values):
-                    label_set = set()
-                    shared_labels = {}
-
-                    for label, value in sample.labels.items():
-                        if label in matching_labels:
-                            label_set.add((label, value))
-
-                        shared_labels[label] = value
-
-                    self.label_sets.append((label_set, shared_labels))
+                    self.index_shared_labels(matching_labels, sample.labels, dict(sample.labels))
         else:
             if 'labels' in config:
                 labels = config['labels']
@@ -124,14 +147,36 @@ class LabelAggregator:
                     for label, value in sample.labels.items():
                         self.unconditional_labels[label] = value
 
+    def index_shared_labels(self, matching_labels, sample_labels, shared_labels):
+        # Samples missing some of the matching labels only require the ones they have to be matched
+        label_names = tuple(label for label in matching_labels if label in sample_labels)
+
+        index_entry = self.label_index.get(label_names)
+        if index_entry is None:
+            index_entry = self.label_index[label_names] = (get_label_values(label_names), {})
+
+        get_values, shared_label_sets = index_entry
+        key = get_values(sample_labels)
+        if key in shared_label_sets:
+            shared_label_sets[key].update(shared_labels)
+        else:
+            shared_label_sets[key] = shared_labels
+
     def populate(self, labels):
-        label_set = frozenset(labels.items())
-        labels.update(self.unconditional_labels)
+        # Look up the shared labels of every distinct set of matching label names before the labels get updated
+        matched_shared_labels = []
+        for get_values, shared_label_sets in self.label_index.values():
+            try:
+                shared_labels = shared_label_sets.get(get_values(labels))
+            except KeyError:
+                continue
 
-        for matching_label_set, shared_labels in self.label_sets:
-            # Check for subset without incurring the cost of a `.issubset` lookup and call
-            if matching_label_set <= label_set:
-                labels.update(shared_labels)
+            if shared_labels is not None:
+                matched_shared_labels.append(shared_labels)
+
+        labels.update(self.unconditional_labels)
+        for shared_labels in matched_shared_labels:
+            labels.update(shared_labels)
 
     @staticmethod
     def allowed_samples(metric, allowed_values):
@@ -148,13 +193,72 @@ class LabelAggregator:
         return self.populate is not no_op
 
     def __enter__(self):
-        pass
+        self.buffered_samples = 0
 
     def __exit__(self, exc_type, exc_value, traceback):
-        self.label_sets.clear()
+        self.label_index.clear()
         self.unconditional_labels.clear()
 
 
+class MetricBuffer:
+    """
+    Holds metrics back, up to a number of samples, until they can be replayed.
+
+    The label names of the samples are shared across the buffer and only their values are kept with each sample.
+    """
+
+    def __init__(self, max_samples):
+        self.max_samples = max_samples
+        self.samples = 0
+        self.full = False
+
+        # [(metric, [(label_names, sample)])]
+        self.metrics = []
+        self.label_names = {}
+
+    def add(self, metric):
+        """
+        Buffer the metric if there is room for all of its samples, returning whether it was buffered.
+        """
+        if self.samples + len(metric.samples) > self.max_samples:
+            self.full = True
+            return False
+
+        samples = []
+        label_names_cache = self.label_names
+        for sample in metric.samples:
+            label_names = tuple(sample.labels)
+            label_names = label_names_cache.setdefault(label_names, label_names)
+            samples.append((label_names, sample._replace(labels=tuple(sample.labels.values()))))
+
+        self.samples += len(samples)
+        metric.samples = []
+        self.metrics.append((metric, samples))
+        return True
+
+    def replay(self):
+        for metric, samples in self.metrics:
+            metric.samples = [
+                sample._replace(labels=dict(zip(label_names, sample.labels))) for label_names, sample in samples
+            ]
+            yield metric
+
+        self.metrics.clear()
+
+
+def get_label_values(label_names):
+    """
+    Return a function getting the tuple of the values of `label_names` from labels, raising `KeyError` if any is missing
+    """
+    if not label_names:
+        return lambda labels: ()
+    elif len(label_names) == 1:
+        get_value = itemgetter(label_names[0])
+        return lambda labels: (get_value(labels),)
+    else:
+        return itemgetter(*label_names)
+
+
 def canonicalize_numeric_label(label):
     # Prevent 0.0, see:
     # https://github.com/OpenObservability/OpenMetrics/blob/master/specification/OpenMetrics.md#considerations-canonical-numbers
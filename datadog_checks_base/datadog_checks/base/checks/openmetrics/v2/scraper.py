@@ -5,6 +5,7 @@ import inspect
 import re
 from itertools import chain
 from math import isinf, isnan
+from time import perf_counter
 
 from binary import KIBIBYTE
 from prometheus_client.openmetrics.parser import text_fd_to_metric_families as parse_metric_families_strict
@@ -14,7 +15,8 @@ from ....config import is_affirmative
 from ....constants import ServiceCheck
 from ....errors import ConfigurationError
 from ....utils.common import no_op
-from ....utils.http import RequestsWrapper
+from ....utils.http import RequestsWrapper, get_wire_size
+from ...libs.prometheus import PROTOBUF_ACCEPT_HEADER, PROTOBUF_CONTENT_TYPE, protobuf_chunks_to_metric_families
 from .labels import LabelAggregator, get_label_normalizer
 from .transform import MetricTransformer
 
@@ -134,6 +136,20 @@ class OpenMetricsScraper:
                         f'Label `{label}` of setting `exclude_metrics_by_labels` must be an array or set to `true`'
                     )
 
+        self.tag_cache_size = config.get('tag_cache_size', 100000)
+        if not isinstance(self.tag_cache_size, int) or self.tag_cache_size < 0:
+            raise ConfigurationError('Setting `tag_cache_size` must be a positive integer')
+
+        self.tag_cache_expiration = config.get('tag_cache_expiration', 5)
+        if not isinstance(self.tag_cache_expiration, int) or self.tag_cache_expiration < 1:
+            raise ConfigurationError('Setting `tag_cache_expiration` must be an integer greater than 0')
+
+        # Label sets recur on every scrape, so the tags and hostname derived from them are cached.
+        # Expected format: {label_items: [tags, hostname, scrape_count]}
+        # where `tags` is None if the sample is excluded
+        self.tag_cache = {}
+        self.scrape_count = 0
+
         custom_tags = config.get('tags', [])
         if not isinstance(custom_tags, list):
             raise ConfigurationError('Setting `tags` must be an array')
@@ -165,22 +181,37 @@ class OpenMetricsScraper:
 
             self.raw_line_filter = re.compile('|'.join(raw_line_filters))
 
-        self.http = RequestsWrapper(config, self.check.init_config, self.check.HTTP_CONFIG_REMAPPER, self.check.log)
+        self.http = RequestsWrapper(
+            config, self.check.init_config, self.check.HTTP_CONFIG_REMAPPER, self.check.log, profile='scrape'
+        )
 
         # Decide how strictly we will adhere to the latest version of the specification
         if is_affirmative(config.get('use_latest_spec', False)):
             self.parse_metric_families = parse_metric_families_strict
             # https://github.com/prometheus/client_python/blob/v0.9.0/prometheus_client/openmetrics/exposition.py#L7
-            self.http.options['headers'].setdefault(
-                'Accept', 'application/openmetrics-text; version=0.0.1; charset=utf-8'
-            )
+            accept_header = 'application/openmetrics-text; version=0.0.1; charset=utf-8'
         else:
             self.parse_metric_families = parse_metric_families
-            self.http.options['headers'].setdefault('Accept', 'text/plain')
+            accept_header = 'text/plain'
+
+        # Prefer the protobuf format, the text format being used if the endpoint does not support it
+        self.use_protobuf = is_affirmative(config.get('use_protobuf', False))
+        if self.use_protobuf:
+            accept_header = f'{PROTOBUF_ACCEPT_HEADER}, {accept_header}; q=0.3'
+
+            # The default header would let the endpoint choose
+            if self.http.options['headers'].get('Accept') == '*/*':
+                del self.http.options['headers']['Accept']
+
+        self.http.options['headers'].setdefault('Accept', accept_header)
 
         # Used for monotonic counts
         self.has_successfully_executed = False
 
+        # The future of a response fetched ahead of the scrape, see `fetch_response`
+        self.pending_response = None
+        self.parse_start_time = None
+
     def scrape(self):
         runtime_data = {'has_successfully_executed': self.has_successfully_executed, 'static_tags': self.static_tags}
 
@@ -192,27 +223,44 @@ class OpenMetricsScraper:
             transformer(metric, self.generate_sample_data(metric), runtime_data)
 
         self.has_successfully_executed = True
+        self.expire_tag_cache()
+        self.submit_telemetry_endpoint_parse_time()
+        self.submit_telemetry_connection_pool()
 
     def consume_metrics(self):
         metric_parser = self.parse_metrics()
         if self.label_aggregator.configured:
-            metric_parser = self.label_aggregator(metric_parser)
+            metric_parser = self.label_aggregator(metric_parser, self.is_collected)
 
         for metric in metric_parser:
-            if metric.name in self.exclude_metrics or (
-                self.exclude_metrics_pattern is not None and self.exclude_metrics_pattern.search(metric.name)
-            ):
+            if self.is_excluded(metric):
                 self.submit_telemetry_number_of_ignored_metric_samples(metric)
                 continue
 
             yield metric
 
+        if self.label_aggregator.configured and self.label_aggregator.buffer_size:
+            self.submit_telemetry_number_of_buffered_metric_samples(self.label_aggregator.buffered_samples)
+
+    def is_excluded(self, metric):
+        return metric.name in self.exclude_metrics or (
+            self.exclude_metrics_pattern is not None and self.exclude_metrics_pattern.search(metric.name) is not None
+        )
+
+    def is_collected(self, metric):
+        return not self.is_excluded(metric) and self.metric_transformer.is_collected(metric)
+
     def parse_metrics(self):
-        line_streamer = self.stream_connection_lines()
-        if self.raw_line_filter is not None:
-            line_streamer = self.filter_connection_lines(line_streamer)
+        if self.use_protobuf:
+            metric_families = self.stream_metric_families()
+        else:
+            line_streamer = self.stream_connection_lines()
+            if self.raw_line_filter is not None:
+                line_streamer = self.filter_connection_lines(line_streamer)
+
+            metric_families = self.parse_metric_families(line_streamer)
 
-        for metric in self.parse_metric_families(line_streamer):
+        for metric in metric_families:
             self.submit_telemetry_number_of_total_metric_samples(metric)
 
             # It is critical that the prefix is removed immediately so that
@@ -224,6 +272,8 @@ class OpenMetricsScraper:
 
     def generate_sample_data(self, metric):
         label_normalizer = get_label_normalizer(metric.type)
+        tag_cache = self.tag_cache if self.tag_cache_size else None
+        scrape_count = self.scrape_count
 
         for sample in metric.samples:
             value = sample.value
@@ -231,42 +281,86 @@ class OpenMetricsScraper:
                 self.log.debug('Ignoring sample for metric `%s` as it has an invalid value: %s', metric.name, value)
                 continue
 
-            tags = []
-            skip_sample = False
             labels = sample.labels
             self.label_aggregator.populate(labels)
             label_normalizer(labels)
 
-            for label_name, label_value in labels.items():
-                sample_excluder = self.exclude_metrics_by_labels.get(label_name)
-                if sample_excluder is not None and sample_excluder(label_value):
-                    skip_sample = True
-                    break
-                elif label_name in self.exclude_labels:
-                    continue
+            if tag_cache is None:
+                tags, hostname = self.compute_tags_and_hostname(labels)
+            else:
+                label_items = tuple(labels.items())
+                cached = tag_cache.get(label_items)
+                if cached is None:
+                    tags, hostname = self.compute_tags_and_hostname(labels)
+                    if len(tag_cache) < self.tag_cache_size:
+                        tag_cache[label_items] = [tags, hostname, scrape_count]
+                else:
+                    tags, hostname, _ = cached
+                    cached[2] = scrape_count
+
+            if tags is None:
+                continue
 
-                label_name = self.rename_labels.get(label_name, label_name)
-                tags.append(f'{label_name}:{label_value}')
+            self.submit_telemetry_number_of_processed_metric_samples()
+            yield sample, tags, hostname
 
-            if skip_sample:
+    def compute_tags_and_hostname(self, labels):
+        """
+        Return the tuple of tags and the hostname for a set of labels, or `None` as tags if the sample is excluded.
+        """
+        tags = []
+        for label_name, label_value in labels.items():
+            sample_excluder = self.exclude_metrics_by_labels.get(label_name)
+            if sample_excluder is not None and sample_excluder(label_value):
+                return None, None
+            elif label_name in self.exclude_labels:
                 continue
 
-            tags.extend(self.tags)
+            label_name = self.rename_labels.get(label_name, label_name)
+            tags.append(f'{label_name}:{label_value}')
 
-            hostname = self.hostname
-            if self.hostname_label and self.hostname_label in labels:
-                hostname = labels[self.hostname_label]
-                if self.hostname_formatter is not None:
-                    hostname = self.hostname_formatter(hostname)
+        tags.extend(self.tags)
 
-            self.submit_telemetry_number_of_processed_metric_samples()
-            yield sample, tags, hostname
+        hostname = self.hostname
+        if self.hostname_label and self.hostname_label in labels:
+            hostname = labels[self.hostname_label]
+            if self.hostname_formatter is not None:
+                hostname = self.hostname_formatter(hostname)
+
+        return tuple(tags), hostname
+
+    def expire_tag_cache(self):
+        """
+        Evict the label sets that were not seen in the last `tag_cache_expiration` scrapes.
+        """
+        self.scrape_count += 1
+        if self.tag_cache and self.scrape_count % self.tag_cache_expiration == 0:
+            oldest_scrape = self.scrape_count - self.tag_cache_expiration
+            self.tag_cache = {
+                label_items: cached for label_items, cached in self.tag_cache.items() if cached[2] >= oldest_scrape
+            }
+
+    def stream_metric_families(self):
+        with self.get_connection() as connection:
+            if PROTOBUF_CONTENT_TYPE in connection.headers.get('Content-Type', ''):
+                chunk_streamer = connection.iter_content(chunk_size=self.request_size)
+                yield from protobuf_chunks_to_metric_families(chunk_streamer, munge_counters=True)
+            else:
+                line_streamer = connection.iter_lines(chunk_size=self.request_size, decode_unicode=True)
+                if self.raw_line_filter is not None:
+                    line_streamer = self.filter_connection_lines(line_streamer)
+
+                yield from self.parse_metric_families(line_streamer)
+
+            self.submit_telemetry_endpoint_wire_size(connection)
 
     def stream_connection_lines(self):
         with self.get_connection() as connection:
             for line in connection.iter_lines(chunk_size=self.request_size, decode_unicode=True):
                 yield line
 
+            self.submit_telemetry_endpoint_wire_size(connection)
+
     def filter_connection_lines(self, line_streamer):
         for line in line_streamer:
             if self.raw_line_filter.search(line):
@@ -276,7 +370,7 @@ class OpenMetricsScraper:
 
     def get_connection(self):
         try:
-            response = self.send_request()
+            response, fetch_time = self.get_response()
         except Exception as e:
             self.submit_health_check(ServiceCheck.CRITICAL, message=str(e))
             raise
@@ -295,14 +389,47 @@ class OpenMetricsScraper:
                     response.encoding = 'utf-8'
 
                 self.submit_telemetry_endpoint_response_size(response)
+                self.submit_telemetry_endpoint_fetch_time(fetch_time)
+                self.submit_telemetry_endpoint_handshake_time(response)
+                self.parse_start_time = perf_counter()
                 return response
 
+    def get_response(self):
+        if self.pending_response is None:
+            start_time = perf_counter()
+            response = self.send_request()
+            return response, perf_counter() - start_time
+
+        pending_response, self.pending_response = self.pending_response, None
+        return pending_response.result()
+
+    def fetch_response(self):
+        """
+        Send the request and read the entire payload, returning the response and the time it took.
+
+        Nothing is submitted so that this may run in another thread, the response is then consumed by `scrape`
+        once set as `pending_response`.
+        """
+        start_time = perf_counter()
+        response = self.send_request()
+        try:
+            # Lines will then be iterated from memory
+            response.content
+        except Exception:
+            response.close()
+            raise
+
+        return response, perf_counter() - start_time
+
     def send_request(self, **kwargs):
         kwargs['stream'] = True
         return self.http.get(self.endpoint, **kwargs)
 
     def set_dynamic_tags(self, *tags):
-        self.tags = tuple(chain(self.static_tags, tags))
+        tags = tuple(chain(self.static_tags, tags))
+        if tags != self.tags:
+            self.tags = tags
+            self.tag_cache = {}
 
     def submit_health_check(self, status, **kwargs):
         if self.enable_health_service_check:
@@ -317,6 +444,9 @@ class OpenMetricsScraper:
     def submit_telemetry_number_of_processed_metric_samples(self):
         self.count('telemetry.metrics.processed.count', 1, tags=self.tags)
 
+    def submit_telemetry_number_of_buffered_metric_samples(self, buffered_samples):
+        self.count('telemetry.metrics.buffered.count', buffered_samples, tags=self.tags)
+
     def submit_telemetry_number_of_ignored_lines(self):
         self.count('telemetry.metrics.blacklist.count', 1, tags=self.tags)
 
@@ -329,6 +459,34 @@ class OpenMetricsScraper:
 
         self.gauge('telemetry.payload.size', content_length, tags=self.tags)
 
+    def submit_telemetry_endpoint_fetch_time(self, fetch_time):
+        self.gauge('telemetry.payload.fetch_time', fetch_time, tags=self.tags)
+
+    def submit_telemetry_endpoint_handshake_time(self, response):
+        # Only set when a new connection had to be established
+        handshake_time = getattr(response, 'handshake_time', None)
+        if handshake_time is not None:
+            self.gauge('telemetry.payload.handshake_time', handshake_time, tags=self.tags)
+
+    def submit_telemetry_endpoint_wire_size(self, response):
+        # Bytes actually read from the connection, before any content decoding
+        wire_size = get_wire_size(response)
+        if wire_size is not None:
+            self.gauge('telemetry.payload.wire_size', wire_size, tags=self.tags)
+
+    def submit_telemetry_endpoint_parse_time(self):
+        if self.parse_start_time is not None:
+            self.gauge('telemetry.payload.parse_time', perf_counter() - self.parse_start_time, tags=self.tags)
+            self.parse_start_time = None
+
+    def submit_telemetry_connection_pool(self):
+        # Only available when connections are shared across instances
+        stats = self.http.get_shared_pool_stats()
+        if stats is not None:
+            self.monotonic_count('telemetry.connection_pool.requests', stats['requests'], tags=self.tags)
+            self.monotonic_count('telemetry.connection_pool.connections', stats['connections'], tags=self.tags)
+            self.gauge('telemetry.connection_pool.idle_connections', stats['idle_connections'], tags=self.tags)
+
     def __getattr__(self, name):
         # Forward all unknown attribute lookups to the check instance for access to submission methods, hostname, etc.
         attribute = getattr(self.check, name)
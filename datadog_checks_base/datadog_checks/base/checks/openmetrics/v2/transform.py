@@ -75,6 +75,15 @@ class MetricTransformer:
 
         self.logger.debug('Skipping metric `%s` as it is not defined in `metrics`', metric_name)
 
+    def is_collected(self, metric):
+        """
+        Whether the metric is defined in `metrics`, without compiling a transformer for it
+        """
+        metric_name = metric.name
+        return metric_name in self.transformer_data or any(
+            metric_pattern.search(metric_name) for metric_pattern, _ in self.metric_patterns
+        )
+
     def compile_transformer(self, config):
         metric_name = config.pop('name')
         if not isinstance(metric_name, str):
@@ -69,7 +69,7 @@ def decumulate_histogram_buckets(sample_data):
             # Prevent 0.0
             lower_bound = str(matching_bucket_tuple[0] or 0)
             sample.labels['lower_bound'] = lower_bound
-            tags.append(f'lower_bound:{lower_bound}')
+            tags = (*tags, f'lower_bound:{lower_bound}')
 
             yield Sample(sample.name, sample.labels, matching_bucket_tuple[2]), tags, hostname
 
@@ -0,0 +1,30 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under a 3-clause BSD style license (see LICENSE)
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def map_concurrently(func, items, max_workers):
+    """
+    Call `func` on every item from up to `max_workers` threads, and yield (item, result) from the calling thread
+    as soon as each call returns. Exceptions raised by `func` are re-raised, and the pending calls cancelled.
+
+    The threads only live for the duration of the iteration: they are shut down once it is exhausted, interrupted
+    by an exception or closed, so nothing keeps running between check runs or after a check is unscheduled.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+    try:
+        for item in items:
+            futures[executor.submit(func, item)] = item
+
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+        executor.shutdown(wait=False)
+
+
+__all__ = ['map_concurrently']
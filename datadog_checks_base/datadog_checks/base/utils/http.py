@@ -4,17 +4,24 @@
 import logging
 import os
 import re
+import threading
 from contextlib import contextmanager
 from copy import deepcopy
 from io import open
 from ipaddress import ip_address, ip_network
+from timeit import default_timer
 
 import requests
 import requests_unixsocket
 from requests import auth as requests_auth
+from requests.adapters import DEFAULT_POOLSIZE, BaseAdapter, HTTPAdapter
+from requests.utils import select_proxy
 from requests_toolbelt.adapters import host_header_ssl
 from six import PY2, iteritems, string_types
 from six.moves.urllib.parse import quote, urlparse, urlunparse
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
 
 from ..config import is_affirmative
 from ..errors import ConfigurationError
@@ -53,9 +60,11 @@ STANDARD_FIELDS = {
     'aws_host': None,
     'aws_region': None,
     'aws_service': None,
+    'conditional_requests': False,
     'connect_timeout': None,
     'extra_headers': None,
     'headers': None,
+    'idle_connection_timeout': 60,
     'kerberos_auth': None,
     'kerberos_cache': None,
     'kerberos_delegate': False,
@@ -64,11 +73,13 @@ STANDARD_FIELDS = {
     'kerberos_keytab': None,
     'kerberos_principal': None,
     'log_requests': False,
+    'max_connections_per_host': DEFAULT_POOLSIZE,
     'ntlm_domain': None,
     'password': None,
     'persist_connections': False,
     'proxy': None,
     'read_timeout': None,
+    'share_connections': False,
     'skip_proxy': False,
     'tls_ca_cert': None,
     'tls_cert': None,
@@ -95,14 +106,28 @@ PROXY_SETTINGS_DISABLED = {
     'https': '',
 }
 
+# Default values of standard fields that depend on how the endpoint is queried
+PROFILES = {
+    # Endpoints, like metric exposition endpoints, that are polled on every check run
+    'scrape': {'persist_connections': True},
+}
+
 KERBEROS_STRATEGIES = {}
 
 UDS_SCHEME = 'unix'
 
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# How often, in seconds, shared connection pools are checked for idleness
+SHARED_POOL_SWEEP_INTERVAL = 10
+
 
 class RequestsWrapper(object):
     __slots__ = (
         '_session',
+        '_conditional_responses',
+        'conditional_requests',
+        'profile',
         'tls_use_host_header',
         'ignore_tls_warning',
         'log_requests',
@@ -111,15 +136,32 @@ class RequestsWrapper(object):
         'options',
         'persist_connections',
         'request_hooks',
+        'shared_pool_adapter',
         'auth_token_handler',
     )
 
-    def __init__(self, instance, init_config, remapper=None, logger=None):
+    def __init__(self, instance, init_config, remapper=None, logger=None, profile=None):
         self.logger = logger or LOGGER
         default_fields = dict(STANDARD_FIELDS)
 
+        if profile is not None and profile not in PROFILES:
+            raise ConfigurationError(
+                'Unknown HTTP profile `{}`, must be one of: {}'.format(profile, ', '.join(PROFILES))
+            )
+
+        self.profile = profile
+        if profile is not None:
+            default_fields.update(PROFILES[profile])
+
         # Update the default behavior for global settings
         default_fields['log_requests'] = init_config.get('log_requests', default_fields['log_requests'])
+        default_fields['share_connections'] = init_config.get('share_connections', default_fields['share_connections'])
+        default_fields['max_connections_per_host'] = init_config.get(
+            'max_connections_per_host', default_fields['max_connections_per_host']
+        )
+        default_fields['idle_connection_timeout'] = init_config.get(
+            'idle_connection_timeout', default_fields['idle_connection_timeout']
+        )
         default_fields['skip_proxy'] = init_config.get('skip_proxy', default_fields['skip_proxy'])
         default_fields['timeout'] = init_config.get('timeout', default_fields['timeout'])
         default_fields['tls_ignore_warning'] = init_config.get(
@@ -179,6 +221,11 @@ class RequestsWrapper(object):
         # http://docs.python-requests.org/en/master/user/quickstart/#custom-headers
         # http://docs.python-requests.org/en/master/user/advanced/#header-ordering
         headers = get_default_headers()
+        if profile == 'scrape':
+            # Advertise every content encoding that urllib3 is able to decode, e.g. Brotli or Zstandard
+            # when the optional libraries are installed, since payloads are often large and highly compressible
+            headers['Accept-Encoding'] = ACCEPT_ENCODING
+
         if config['headers']:
             headers.clear()
             update_headers(headers, config['headers'])
@@ -277,6 +324,34 @@ class RequestsWrapper(object):
         self.persist_connections = self.tls_use_host_header or is_affirmative(config['persist_connections'])
         self._session = None
 
+        # For reusing connections across every instance, of any check, sending requests to the same endpoint
+        self.shared_pool_adapter = None
+        if is_affirmative(config['share_connections']):
+            # NTLM and Kerberos authenticate the connection itself, which must then not be handed to other instances
+            if auth_type in ('ntlm', 'kerberos'):
+                raise ConfigurationError(
+                    'Setting `share_connections` is not supported with the `{}` auth_type'.format(auth_type)
+                )
+
+            max_connections = config['max_connections_per_host']
+            if not isinstance(max_connections, int) or isinstance(max_connections, bool) or max_connections < 1:
+                raise ConfigurationError('Setting `max_connections_per_host` must be a positive integer')
+
+            try:
+                idle_timeout = float(config['idle_connection_timeout'])
+            except (TypeError, ValueError):
+                idle_timeout = 0
+            if idle_timeout <= 0:
+                raise ConfigurationError('Setting `idle_connection_timeout` must be a number greater than 0')
+
+            self.shared_pool_adapter = SharedPoolAdapter(max_connections, idle_timeout)
+            self.persist_connections = True
+
+        # Whether or not to send `If-None-Match`/`If-Modified-Since` headers on GET requests and
+        # replay the last payload of the URL when the server answers with `304 Not Modified`
+        self.conditional_requests = is_affirmative(config['conditional_requests'])
+        self._conditional_responses = {}
+
         # Whether or not to log request information like method and url
         self.log_requests = is_affirmative(config['log_requests'])
 
@@ -340,6 +415,12 @@ class RequestsWrapper(object):
             persist = True  # UDS support is only enabled on the shared session.
             url = quote_uds_url(url)
 
+        conditional = self.conditional_requests and method == 'get' and not new_options.get('stream')
+        if conditional and url in self._conditional_responses:
+            # The default options must not be modified
+            new_options = dict(new_options, headers=new_options['headers'].copy())
+            new_options['headers'].update(self._conditional_responses[url][0])
+
         self.handle_auth_token(method=method, url=url, default_options=self.options)
 
         with ExitStack() as stack:
@@ -351,6 +432,9 @@ class RequestsWrapper(object):
             else:
                 request_method = getattr(requests, method)
 
+            if self.profile == 'scrape':
+                CONNECTION_TIMINGS.reset()
+
             if self.auth_token_handler:
                 try:
                     response = request_method(url, **new_options)
@@ -362,8 +446,37 @@ class RequestsWrapper(object):
             else:
                 response = request_method(url, **new_options)
 
+            if self.profile == 'scrape':
+                # None when an existing connection was reused
+                response.handshake_time = CONNECTION_TIMINGS.reset()
+
+            if conditional:
+                response = self.handle_conditional_response(url, response)
+
             return response
 
+    def handle_conditional_response(self, url, response):
+        if response.status_code == 304 and url in self._conditional_responses:
+            self.logger.debug(u'Payload of %s was not modified, reusing the previous one', url)
+            return replay_response(response, self._conditional_responses[url][1])
+
+        validators = {}
+        if response.status_code == 200:
+            etag = response.headers.get('ETag')
+            if etag:
+                validators['If-None-Match'] = etag
+
+            last_modified = response.headers.get('Last-Modified')
+            if last_modified:
+                validators['If-Modified-Since'] = last_modified
+
+        if validators:
+            self._conditional_responses[url] = (validators, response)
+        else:
+            self._conditional_responses.pop(url, None)
+
+        return response
+
     def populate_options(self, options):
         # Avoid needless dictionary update if there are no options
         if not options:
@@ -384,6 +497,15 @@ class RequestsWrapper(object):
             # https://toolbelt.readthedocs.io/en/latest/adapters.html#hostheaderssladapter
             if self.tls_use_host_header:
                 self._session.mount('https://', host_header_ssl.HostHeaderSSLAdapter())
+            elif self.shared_pool_adapter is not None:
+                self._session.mount('https://', self.shared_pool_adapter)
+            elif self.profile == 'scrape':
+                self._session.mount('https://', TimedHTTPAdapter())
+
+            if self.shared_pool_adapter is not None:
+                self._session.mount('http://', self.shared_pool_adapter)
+            elif self.profile == 'scrape':
+                self._session.mount('http://', TimedHTTPAdapter())
 
             # Enable Unix Domain Socket (UDS) support.
             # See: https://github.com/msabramo/requests-unixsocket
@@ -395,6 +517,11 @@ class RequestsWrapper(object):
 
         return self._session
 
+    def get_shared_pool_stats(self):
+        """Return the usage of the shared connection pools this instance sent requests through, if enabled."""
+        if self.shared_pool_adapter is not None:
+            return SHARED_CONNECTION_POOLS.get_stats(self.shared_pool_adapter.pool_keys)
+
     def handle_auth_token(self, **request):
         if self.auth_token_handler is not None:
             self.auth_token_handler.poll(**request)
@@ -408,6 +535,206 @@ class RequestsWrapper(object):
             pass
 
 
+class ConnectionTimings(threading.local):
+    """Time spent by the current thread establishing new connections, including the TLS handshake."""
+
+    def __init__(self):
+        self.handshake_time = None
+
+    def add(self, elapsed):
+        if self.handshake_time is None:
+            self.handshake_time = elapsed
+        else:
+            self.handshake_time += elapsed
+
+    def reset(self):
+        handshake_time, self.handshake_time = self.handshake_time, None
+        return handshake_time
+
+
+CONNECTION_TIMINGS = ConnectionTimings()
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start_time = default_timer()
+        super(TimedHTTPConnection, self).connect()
+        CONNECTION_TIMINGS.add(default_timer() - start_time)
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start_time = default_timer()
+        super(TimedHTTPSConnection, self).connect()
+        CONNECTION_TIMINGS.add(default_timer() - start_time)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Transport adapter recording the time spent establishing new connections in `CONNECTION_TIMINGS`."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(TimedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+class SharedConnectionPool(object):
+    __slots__ = ('adapter', 'idle_timeout', 'last_used', 'requests')
+
+    def __init__(self, max_connections):
+        # Every pool is dedicated to a single endpoint
+        self.adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.idle_timeout = None
+        self.last_used = None
+        self.requests = 0
+
+    def get_stats(self):
+        connections = idle_connections = 0
+        for manager in [self.adapter.poolmanager] + list(self.adapter.proxy_manager.values()):
+            for pool_key in manager.pools.keys():
+                try:
+                    pool = manager.pools[pool_key]
+                except KeyError:
+                    continue
+
+                connections += pool.num_connections
+                if pool.pool is not None:
+                    idle_connections += sum(1 for connection in list(pool.pool.queue) if connection is not None)
+
+        return self.requests, connections, idle_connections
+
+
+class SharedConnectionPools(object):
+    """Process-wide registry of the connection pools used by every `RequestsWrapper` with `share_connections`.
+
+    Pools are keyed by (scheme, host, port, TLS settings, proxy, max connections) so that instances only reuse
+    connections that they would have established themselves, and are closed once unused for `idle_connection_timeout`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._last_sweep = default_timer()
+
+    def get(self, key, max_connections, idle_timeout):
+        now = default_timer()
+        with self._lock:
+            if now - self._last_sweep >= SHARED_POOL_SWEEP_INTERVAL:
+                self.evict_idle(now)
+
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = SharedConnectionPool(max_connections)
+
+            pool.idle_timeout = idle_timeout
+            pool.last_used = now
+            pool.requests += 1
+
+        return pool
+
+    def evict_idle(self, now):
+        # Must be called with the lock held
+        self._last_sweep = now
+        for key, pool in list(self._pools.items()):
+            if now - pool.last_used >= pool.idle_timeout:
+                del self._pools[key]
+                pool.adapter.close()
+
+    def get_stats(self, keys):
+        """Return the total requests sent, connections established and idle connections of the pools with `keys`."""
+        requests_sent = connections = idle_connections = 0
+        for key in keys:
+            pool = self._pools.get(key)
+            if pool is not None:
+                pool_requests, pool_connections, pool_idle_connections = pool.get_stats()
+                requests_sent += pool_requests
+                connections += pool_connections
+                idle_connections += pool_idle_connections
+
+        return {'requests': requests_sent, 'connections': connections, 'idle_connections': idle_connections}
+
+    def clear(self):
+        with self._lock:
+            for pool in self._pools.values():
+                pool.adapter.close()
+
+            self._pools.clear()
+
+    def __len__(self):
+        return len(self._pools)
+
+
+SHARED_CONNECTION_POOLS = SharedConnectionPools()
+
+
+class SharedPoolAdapter(BaseAdapter):
+    """Transport adapter sending requests through the matching pool of `SHARED_CONNECTION_POOLS`."""
+
+    def __init__(self, max_connections, idle_timeout):
+        super(SharedPoolAdapter, self).__init__()
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.pool_keys = set()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        parsed_url = urlparse(request.url)
+        scheme = parsed_url.scheme.lower()
+        key = (
+            scheme,
+            parsed_url.hostname,
+            parsed_url.port or DEFAULT_PORTS.get(scheme),
+            verify,
+            cert,
+            select_proxy(request.url, proxies),
+            self.max_connections,
+        )
+        self.pool_keys.add(key)
+
+        pool = SHARED_CONNECTION_POOLS.get(key, self.max_connections, self.idle_timeout)
+        return pool.adapter.send(request, stream=stream, timeout=timeout, verify=verify, cert=cert, proxies=proxies)
+
+    def close(self):
+        # The connections outlive the sessions
+        pass
+
+
+def replay_response(response, cached_response):
+    """Return a copy of `cached_response` with the metadata of the `304 Not Modified` `response`."""
+    replayed = requests.Response()
+    replayed.status_code = cached_response.status_code
+    replayed.reason = cached_response.reason
+    replayed.headers = cached_response.headers.copy()
+    replayed.headers.update(response.headers)
+    replayed.encoding = cached_response.encoding
+    replayed._content = cached_response.content
+    replayed._content_consumed = True
+    replayed.url = response.url
+    replayed.request = response.request
+    replayed.elapsed = response.elapsed
+    replayed.connection = getattr(response, 'connection', None)
+    replayed.history = response.history
+    replayed.cookies = response.cookies
+    return replayed
+
+
+def get_wire_size(response):
+    """Return the number of bytes of the response body read from the network, before any content decoding.
+
+    This is None if the body was not read from a connection, e.g. when a cached payload was replayed.
+    """
+    try:
+        return response.raw.tell()
+    except AttributeError:
+        return None
+
+
 @contextmanager
 def handle_kerberos_keytab(keytab_file):
     # There are no keytab options in any wrapper libs. The env var will be
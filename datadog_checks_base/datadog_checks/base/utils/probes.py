@@ -0,0 +1,198 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under a 3-clause BSD style license (see LICENSE)
+"""
+A process-wide asyncio event loop running the network probes of many check instances concurrently, so that
+thousands of connections or handshakes do not each occupy a check worker for their whole duration.
+
+Checks register a `ScheduledProbe` and poll it on every run: the result of the last completed probe, if any,
+is returned and the next probe is submitted. Results are therefore reported one check run late.
+
+This module is only available on Python 3.
+"""
+import asyncio
+import random
+import socket
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+# How many probes may be in flight at once, which bounds the number of open sockets
+DEFAULT_MAX_CONCURRENCY = 1000
+
+# How many threads run the blocking probes, e.g. HTTP requests
+DEFAULT_MAX_WORKERS = 32
+
+ProbeResult = namedtuple('ProbeResult', ('value', 'error', 'duration'))
+
+
+class HandshakeError(Exception):
+    """The TLS handshake failed after the connection was established, `error` is the original exception."""
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+class ProbeScheduler(object):
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, max_workers=DEFAULT_MAX_WORKERS):
+        self.max_concurrency = max_concurrency
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._executor = None
+
+    def start(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                # Must be created by the loop's thread on Python < 3.10
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                started.set()
+                loop.run_forever()
+
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='probe')
+            self._thread = threading.Thread(target=run, name='probe-scheduler', daemon=True)
+            self._thread.start()
+            started.wait()
+            self._loop = loop
+
+    def stop(self):
+        with self._lock:
+            if self._loop is None:
+                return
+
+            asyncio.run_coroutine_threadsafe(self._cancel_probes(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._executor.shutdown(wait=False)
+            self._loop = self._thread = self._semaphore = self._executor = None
+
+    @staticmethod
+    async def _cancel_probes():
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def submit(self, probe_factory, timeout=None, jitter=0):
+        """
+        Run the coroutine returned by `probe_factory` on the event loop, returning a `concurrent.futures.Future`
+        of its `ProbeResult`. Timeouts are reported as `socket.timeout` errors.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._run(probe_factory, timeout, jitter), self._loop)
+
+    def submit_blocking(self, func, jitter=0):
+        """
+        Run `func` in the thread pool of the scheduler, returning a `concurrent.futures.Future` of its
+        `ProbeResult`. The function is responsible for its own timeouts.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._run_blocking(func, jitter), self._loop)
+
+    async def _run(self, probe_factory, timeout, jitter):
+        if jitter:
+            await asyncio.sleep(random.uniform(0, jitter))
+
+        async with self._semaphore:
+            start_time = perf_counter()
+            try:
+                value = await asyncio.wait_for(probe_factory(), timeout)
+            except asyncio.TimeoutError:
+                return ProbeResult(None, socket.timeout('timed out'), perf_counter() - start_time)
+            except Exception as e:
+                return ProbeResult(None, e, perf_counter() - start_time)
+
+            return ProbeResult(value, None, perf_counter() - start_time)
+
+    async def _run_blocking(self, func, jitter):
+        if jitter:
+            await asyncio.sleep(random.uniform(0, jitter))
+
+        async with self._semaphore:
+            start_time = perf_counter()
+            try:
+                value = await asyncio.get_event_loop().run_in_executor(self._executor, func)
+            except Exception as e:
+                return ProbeResult(None, e, perf_counter() - start_time)
+
+            return ProbeResult(value, None, perf_counter() - start_time)
+
+
+PROBE_SCHEDULER = ProbeScheduler()
+
+
+class ScheduledProbe(object):
+    """The probe of a check instance, of which at most one runs at a time."""
+
+    def __init__(self, probe_factory, timeout=None, jitter=0, blocking=False, scheduler=None):
+        self.probe_factory = probe_factory
+        self.timeout = timeout
+        self.jitter = jitter
+        self.blocking = blocking
+        self.scheduler = scheduler or PROBE_SCHEDULER
+        self.future = None
+
+    def poll(self):
+        """
+        Return the `ProbeResult` of the last probe if it completed since the previous call, and submit the next one.
+        Nothing is submitted while a probe is still running, so slow targets are not probed more than once at a time.
+        """
+        future = self.future
+        if future is not None and not future.done():
+            return None
+
+        if self.blocking:
+            self.future = self.scheduler.submit_blocking(self.probe_factory, jitter=self.jitter)
+        else:
+            self.future = self.scheduler.submit(self.probe_factory, timeout=self.timeout, jitter=self.jitter)
+
+        if future is not None:
+            return future.result()
+
+    def cancel(self):
+        if self.future is not None:
+            self.future.cancel()
+            self.future = None
+
+
+async def tcp_connect(host, port, family=0):
+    """Open a TCP connection and return the time it took to establish it, in seconds."""
+    start_time = perf_counter()
+    _, writer = await asyncio.open_connection(host, port, family=family)
+    response_time = perf_counter() - start_time
+    writer.close()
+
+    return response_time
+
+
+async def tls_handshake(host, port, ssl_context, server_hostname=None, family=0):
+    """
+    Open a TCP connection and perform a TLS handshake, returning the serialized peer certificate and the negotiated
+    protocol version. Handshake failures are raised as `HandshakeError` to distinguish them from connection errors.
+    """
+    loop = asyncio.get_event_loop()
+    transport, protocol = await loop.create_connection(asyncio.Protocol, host, port, family=family)
+    try:
+        try:
+            transport = await loop.start_tls(transport, protocol, ssl_context, server_hostname=server_hostname or host)
+        except Exception as e:
+            raise HandshakeError(e)
+
+        ssl_object = transport.get_extra_info('ssl_object')
+        return ssl_object.getpeercert(binary_form=True), ssl_object.version()
+    finally:
+        transport.close()
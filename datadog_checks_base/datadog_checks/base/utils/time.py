@@ -3,6 +3,7 @@
 # Licensed under a 3-clause BSD style license (see LICENSE)
 from __future__ import absolute_import
 
+from contextlib import contextmanager
 from datetime import datetime
 from time import time as epoch_offset
 
@@ -42,4 +43,19 @@ def ensure_aware_datetime(dt, default_tz=UTC):
     return dt
 
 
-__all__ = ['EPOCH', 'UTC', 'ensure_aware_datetime', 'get_current_datetime', 'get_timestamp']
+@contextmanager
+def timed(gauge, metric, tags=None, enabled=True):
+    """
+    Submits how long the wrapped block took to run, in seconds, with `gauge`, e.g. the `gauge` method of a check.
+    Nothing is submitted if `enabled` is false or if the block raises.
+    """
+    if not enabled:
+        yield
+        return
+
+    start = epoch_offset()
+    yield
+    gauge(metric, epoch_offset() - start, tags=tags)
+
+
+__all__ = ['EPOCH', 'UTC', 'ensure_aware_datetime', 'get_current_datetime', 'get_timestamp', 'timed']
@@ -2,13 +2,14 @@
 # All rights reserved
 # Licensed under a 3-clause BSD style license (see LICENSE)
 import os
+import re
 
 import pytest
 
 from datadog_checks.base import OpenMetricsBaseCheck, OpenMetricsBaseCheckV2
 from datadog_checks.dev import get_here
 
-from ..utils import requires_py3
+from ..utils import requires_py3, text_to_protobuf
 from .bench_utils import AMAZON_MSK_JMX_METRICS_MAP, AMAZON_MSK_JMX_METRICS_OVERRIDES
 
 pytestmark = [requires_py3, pytest.mark.openmetrics, pytest.mark.openmetrics_config]
@@ -21,6 +22,26 @@ def fixture_ksm():
     return os.path.join(os.path.dirname(HERE), 'fixtures', 'prometheus', 'ksm.txt')
 
 
+@pytest.fixture
+def fixture_ksm_scaled(fixture_ksm):
+    """
+    The ksm fixture with every sample having a `pod` label repeated for 100 distinct pods
+    """
+    with open(fixture_ksm) as f:
+        lines = f.read().splitlines()
+
+    scaled_lines = []
+    for line in lines:
+        if line.startswith('#') or 'pod="' not in line:
+            scaled_lines.append(line)
+            continue
+
+        for i in range(100):
+            scaled_lines.append(re.sub(r'pod="([^"]*)"', r'pod="\1-{}"'.format(i), line))
+
+    return '\n'.join(scaled_lines)
+
+
 @pytest.fixture
 def fixture_amazon_msk_jmx_metrics():
     return os.path.join(os.path.dirname(HERE), 'fixtures', 'prometheus', 'amazon_msk_jmx_metrics.txt')
@@ -36,6 +57,28 @@ def test_ksm_new(benchmark, dd_run_check, mock_http_response, fixture_ksm):
     benchmark(c.check, None)
 
 
+@pytest.mark.parametrize('exposition_format', ['text', 'protobuf'])
+def test_ksm_new_exposition_format(benchmark, dd_run_check, mock_http_response, fixture_ksm, exposition_format):
+    with open(fixture_ksm) as f:
+        payload = f.read()
+
+    if exposition_format == 'protobuf':
+        mock_http_response(
+            text_to_protobuf(payload), headers={'Content-Type': 'application/vnd.google.protobuf; encoding=delimited'}
+        )
+    else:
+        mock_http_response(payload, normalize_content=False)
+
+    c = OpenMetricsBaseCheckV2(
+        'test', {}, [{'openmetrics_endpoint': 'foo', 'namespace': 'bar', 'metrics': ['.+'], 'use_protobuf': True}]
+    )
+
+    # Run once to get initialization steps out of the way.
+    dd_run_check(c)
+
+    benchmark(c.check, None)
+
+
 def test_ksm_old(benchmark, dd_run_check, mock_http_response, fixture_ksm):
     mock_http_response(file_path=fixture_ksm)
     instance = {'prometheus_url': 'foo', 'namespace': 'bar', 'metrics': ['*']}
@@ -136,3 +179,38 @@ def test_label_joins_old(benchmark, dd_run_check, mock_http_response, fixture_ks
     dd_run_check(c)
 
     benchmark(c.check, instance)
+
+
+def test_label_joins_new_scaled(benchmark, dd_run_check, mock_http_response, fixture_ksm_scaled):
+    mock_http_response(fixture_ksm_scaled, normalize_content=False)
+    instance = {
+        'openmetrics_endpoint': 'foo',
+        'namespace': 'bar',
+        'hostname_label': 'node',
+        'metrics': ['.+'],
+        'share_labels': {
+            'kube_pod_info': {'match': ['pod', 'namespace'], 'labels': ['node'], 'values': [1]},
+            'kube_pod_labels': {'match': ['pod', 'namespace']},
+        },
+    }
+    c = OpenMetricsBaseCheckV2('test', {}, [instance])
+
+    # Run once to get initialization steps out of the way.
+    dd_run_check(c)
+
+    benchmark(c.check, None)
+
+
+@pytest.mark.parametrize('tag_cache_size', [pytest.param(0, id='no_cache'), pytest.param(100000, id='cache')])
+def test_ksm_new_scaled(benchmark, dd_run_check, mock_http_response, fixture_ksm_scaled, tag_cache_size):
+    mock_http_response(fixture_ksm_scaled, normalize_content=False)
+    c = OpenMetricsBaseCheckV2(
+        'test',
+        {},
+        [{'openmetrics_endpoint': 'foo', 'namespace': 'bar', 'metrics': ['.+'], 'tag_cache_size': tag_cache_size}],
+    )
+
+    # Run once to get initialization steps out of the way.
+    dd_run_check(c)
+
+    benchmark(c.check, None)
@@ -106,6 +106,31 @@ class TestRenameLabels:
             dd_run_check(check, extract_message=True)
 
 
+class TestConcurrentScrapes:
+    @pytest.mark.parametrize('concurrent_scrapes', [pytest.param(0, id='zero'), pytest.param('2', id='string')])
+    def test_invalid(self, dd_run_check, concurrent_scrapes):
+        check = get_check({'concurrent_scrapes': concurrent_scrapes})
+
+        with pytest.raises(Exception, match='^Setting `concurrent_scrapes` must be an integer greater than 0$'):
+            dd_run_check(check, extract_message=True)
+
+
+class TestTagCache:
+    @pytest.mark.parametrize('size', [pytest.param(-1, id='negative'), pytest.param('1000', id='string')])
+    def test_size_invalid(self, dd_run_check, size):
+        check = get_check({'tag_cache_size': size})
+
+        with pytest.raises(Exception, match='^Setting `tag_cache_size` must be a positive integer$'):
+            dd_run_check(check, extract_message=True)
+
+    @pytest.mark.parametrize('expiration', [pytest.param(0, id='zero'), pytest.param('5', id='string')])
+    def test_expiration_invalid(self, dd_run_check, expiration):
+        check = get_check({'tag_cache_expiration': expiration})
+
+        with pytest.raises(Exception, match='^Setting `tag_cache_expiration` must be an integer greater than 0$'):
+            dd_run_check(check, extract_message=True)
+
+
 class TestExcludeMetrics:
     def test_not_array(self, dd_run_check):
         check = get_check({'exclude_metrics': 9000})
@@ -406,3 +431,10 @@ class TestShareLabels:
             ),
         ):
             dd_run_check(check, extract_message=True)
+
+    @pytest.mark.parametrize('buffer_size', [pytest.param(-1, id='negative'), pytest.param('1000', id='string')])
+    def test_buffer_size_invalid(self, dd_run_check, buffer_size):
+        check = get_check({'share_labels': {'foo': True}, 'share_labels_buffer_size': buffer_size})
+
+        with pytest.raises(Exception, match='^Setting `share_labels_buffer_size` must be a positive integer$'):
+            dd_run_check(check, extract_message=True)
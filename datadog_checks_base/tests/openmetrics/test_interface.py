@@ -102,3 +102,92 @@ def test_scraper_override(aggregator, dd_run_check, mock_http_response):
     dd_run_check(check)
 
     aggregator.assert_service_check('test.prometheus.health', ServiceCheck.OK, tags=['endpoint:test'])
+
+
+class MultipleEndpointsCheck(OpenMetricsBaseCheckV2):
+    __NAMESPACE__ = 'test'
+
+    def __init__(self, name, init_config, instances):
+        super().__init__(name, init_config, instances)
+
+        self.scraper_configs = [
+            {'openmetrics_endpoint': endpoint, 'metrics': ['.+'], 'telemetry': True}
+            for endpoint in self.instance['endpoints']
+        ]
+
+
+def mock_endpoint_responses(mocker, responses):
+    # TODO: when we drop Python 2 move this up top
+    from datadog_checks.dev.http import MockResponse
+
+    def get(url, *args, **kwargs):
+        content = responses[url]
+        if isinstance(content, Exception):
+            raise content
+
+        return MockResponse(content)
+
+    mock = mocker.patch('requests.get', side_effect=get)
+    mocker.patch('requests.Session.get', new=mock)
+    return mock
+
+
+@pytest.mark.parametrize('concurrent_scrapes', [pytest.param(1, id='serial'), pytest.param(2, id='concurrent')])
+def test_multiple_endpoints(aggregator, dd_run_check, mocker, concurrent_scrapes):
+    mock_endpoint_responses(
+        mocker,
+        {
+            endpoint: """
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes{{foo="{}"}} 6.396288e+06
+            """.format(
+                endpoint
+            )
+            for endpoint in ('foo', 'bar', 'baz')
+        },
+    )
+    check = MultipleEndpointsCheck(
+        'test', {}, [{'endpoints': ['foo', 'bar', 'baz'], 'concurrent_scrapes': concurrent_scrapes}]
+    )
+    dd_run_check(check)
+
+    for endpoint in ('foo', 'bar', 'baz'):
+        tags = ['endpoint:{}'.format(endpoint)]
+        aggregator.assert_metric(
+            'test.go_memstats_alloc_bytes', 6396288, metric_type=aggregator.GAUGE, tags=tags + ['foo:' + endpoint]
+        )
+        aggregator.assert_metric('test.telemetry.payload.fetch_time', tags=tags)
+        aggregator.assert_metric('test.telemetry.payload.parse_time', tags=tags)
+        aggregator.assert_metric('test.telemetry.payload.wire_size', tags=tags)
+        aggregator.assert_service_check('test.openmetrics.health', ServiceCheck.OK, tags=tags)
+
+    assert all(scraper.pending_response is None for scraper in check.scrapers.values())
+
+
+def test_multiple_endpoints_concurrent_error(aggregator, dd_run_check, mocker):
+    mock_endpoint_responses(
+        mocker,
+        {
+            'foo': """
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes 6.396288e+06
+            """,
+            'bar': Exception('connection refused'),
+            'baz': '',
+        },
+    )
+    check = MultipleEndpointsCheck('test', {}, [{'endpoints': ['foo', 'bar', 'baz'], 'concurrent_scrapes': 3}])
+
+    with pytest.raises(Exception, match='^connection refused$'):
+        dd_run_check(check, extract_message=True)
+
+    aggregator.assert_metric('test.go_memstats_alloc_bytes', 6396288, tags=['endpoint:foo'])
+    aggregator.assert_metric('test.telemetry.payload.fetch_time', count=0, tags=['endpoint:bar'])
+    aggregator.assert_service_check('test.openmetrics.health', ServiceCheck.OK, tags=['endpoint:foo'])
+    aggregator.assert_service_check(
+        'test.openmetrics.health', ServiceCheck.CRITICAL, tags=['endpoint:bar'], message='connection refused'
+    )
+    aggregator.assert_service_check('test.openmetrics.health', count=0, tags=['endpoint:baz'])
+    assert all(scraper.pending_response is None for scraper in check.scrapers.values())
@@ -1,11 +1,13 @@
 # (C) Datadog, Inc. 2020-present
 # All rights reserved
 # Licensed under a 3-clause BSD style license (see LICENSE)
+from textwrap import dedent
+
 import pytest
 
 from datadog_checks.base.constants import ServiceCheck
 
-from ..utils import requires_py3
+from ..utils import requires_py3, text_to_protobuf
 from .utils import get_check
 
 pytestmark = [requires_py3, pytest.mark.openmetrics, pytest.mark.openmetrics_options]
@@ -252,6 +254,236 @@ class TestExcludeMetricsByLabels:
         aggregator.assert_all_metrics_covered()
 
 
+class TestTagCache:
+    def test_reuse(self, aggregator, dd_run_check, mock_http_response):
+        mock_http_response(
+            """
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes{foo="bar",pod="baz"} 6.396288e+06
+            go_memstats_alloc_bytes{foo="bat",pod="baz"} 6.396288e+06
+            """
+        )
+        check = get_check(
+            {
+                'metrics': ['.+'],
+                'exclude_metrics_by_labels': {'foo': ['bat']},
+                'hostname_label': 'pod',
+                'rename_labels': {'foo': 'bar'},
+            }
+        )
+
+        for scrape_count in range(2):
+            dd_run_check(check)
+
+            aggregator.assert_metric(
+                'test.go_memstats_alloc_bytes',
+                6396288,
+                metric_type=aggregator.GAUGE,
+                tags=['endpoint:test', 'bar:bar', 'pod:baz'],
+                hostname='baz',
+            )
+            aggregator.assert_all_metrics_covered()
+            aggregator.reset()
+
+            scraper = check.scrapers['test']
+            assert scraper.tag_cache == {
+                (('foo', 'bar'), ('pod', 'baz')): [('bar:bar', 'pod:baz', 'endpoint:test'), 'baz', scrape_count],
+                (('foo', 'bat'), ('pod', 'baz')): [None, None, scrape_count],
+            }
+
+    def test_expiration(self, dd_run_check, mock_http_response):
+        check = get_check({'metrics': ['.+'], 'tag_cache_expiration': 2})
+
+        mock_http_response(
+            """
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes{foo="bar"} 6.396288e+06
+            """
+        )
+        dd_run_check(check)
+        scraper = check.scrapers['test']
+        assert list(scraper.tag_cache) == [(('foo', 'bar'),)]
+
+        mock_http_response(
+            """
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes{foo="baz"} 6.396288e+06
+            """
+        )
+        dd_run_check(check)
+        assert list(scraper.tag_cache) == [(('foo', 'bar'),), (('foo', 'baz'),)]
+
+        dd_run_check(check)
+        dd_run_check(check)
+        assert list(scraper.tag_cache) == [(('foo', 'baz'),)]
+
+    def test_size(self, aggregator, dd_run_check, mock_http_response):
+        mock_http_response(
+            """
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes{foo="bar"} 6.396288e+06
+            go_memstats_alloc_bytes{foo="baz"} 6.396288e+06
+            """
+        )
+        check = get_check({'metrics': ['.+'], 'tag_cache_size': 1})
+        dd_run_check(check)
+
+        assert list(check.scrapers['test'].tag_cache) == [(('foo', 'bar'),)]
+        aggregator.assert_metric('test.go_memstats_alloc_bytes', tags=['endpoint:test', 'foo:bar'])
+        aggregator.assert_metric('test.go_memstats_alloc_bytes', tags=['endpoint:test', 'foo:baz'])
+        aggregator.assert_all_metrics_covered()
+
+    def test_disable(self, aggregator, dd_run_check, mock_http_response):
+        mock_http_response(
+            """
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes{foo="bar"} 6.396288e+06
+            """
+        )
+        check = get_check({'metrics': ['.+'], 'tag_cache_size': 0})
+        dd_run_check(check)
+
+        assert not check.scrapers['test'].tag_cache
+        aggregator.assert_metric('test.go_memstats_alloc_bytes', tags=['endpoint:test', 'foo:bar'])
+        aggregator.assert_all_metrics_covered()
+
+
+class TestUseProtobuf:
+    @pytest.mark.parametrize('exposition_format', ['text', 'protobuf'])
+    def test(self, aggregator, dd_run_check, mock_http_response, exposition_format):
+        payload = """
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes{foo="bar"} 6.396288e+06
+            # HELP go_memstats_frees_total Total number of frees.
+            # TYPE go_memstats_frees_total counter
+            go_memstats_frees_total 1.26037e+06
+            # HELP go_gc_duration_seconds A summary of the GC invocation durations.
+            # TYPE go_gc_duration_seconds summary
+            go_gc_duration_seconds{quantile="0"} 4.1e-05
+            go_gc_duration_seconds{quantile="1"} 0.000213
+            go_gc_duration_seconds_sum 0.00142
+            go_gc_duration_seconds_count 18
+            # HELP http_request_duration_seconds The request latencies.
+            # TYPE http_request_duration_seconds histogram
+            http_request_duration_seconds_bucket{le="0.5"} 1
+            http_request_duration_seconds_bucket{le="1"} 3
+            http_request_duration_seconds_bucket{le="+Inf"} 4
+            http_request_duration_seconds_sum 3.2
+            http_request_duration_seconds_count 4
+            """
+        if exposition_format == 'protobuf':
+            mock_http_response(
+                text_to_protobuf(dedent(payload)),
+                headers={
+                    'Content-Type': (
+                        'application/vnd.google.protobuf; proto=io.prometheus.client.MetricFamily; encoding=delimited'
+                    )
+                },
+            )
+        else:
+            mock_http_response(payload)
+
+        check = get_check({'metrics': ['.+'], 'use_protobuf': True})
+        dd_run_check(check)
+
+        assert check.scrapers['test'].http.options['headers']['Accept'] == (
+            'application/vnd.google.protobuf; proto=io.prometheus.client.MetricFamily; encoding=delimited; q=0.7, '
+            'text/plain; q=0.3'
+        )
+
+        aggregator.assert_metric(
+            'test.go_memstats_alloc_bytes', 6396288, metric_type=aggregator.GAUGE, tags=['endpoint:test', 'foo:bar']
+        )
+        aggregator.assert_metric(
+            'test.go_memstats_frees.count', 1260370, metric_type=aggregator.MONOTONIC_COUNT, tags=['endpoint:test']
+        )
+        aggregator.assert_metric(
+            'test.go_gc_duration_seconds.quantile',
+            0.000041,
+            metric_type=aggregator.GAUGE,
+            tags=['endpoint:test', 'quantile:0'],
+        )
+        aggregator.assert_metric(
+            'test.go_gc_duration_seconds.quantile',
+            0.000213,
+            metric_type=aggregator.GAUGE,
+            tags=['endpoint:test', 'quantile:1.0'],
+        )
+        aggregator.assert_metric(
+            'test.go_gc_duration_seconds.sum', 0.00142, metric_type=aggregator.MONOTONIC_COUNT, tags=['endpoint:test']
+        )
+        aggregator.assert_metric(
+            'test.go_gc_duration_seconds.count', 18, metric_type=aggregator.MONOTONIC_COUNT, tags=['endpoint:test']
+        )
+        aggregator.assert_metric(
+            'test.http_request_duration_seconds.bucket',
+            1,
+            metric_type=aggregator.MONOTONIC_COUNT,
+            tags=['endpoint:test', 'le:0.5'],
+        )
+        aggregator.assert_metric(
+            'test.http_request_duration_seconds.bucket',
+            3,
+            metric_type=aggregator.MONOTONIC_COUNT,
+            tags=['endpoint:test', 'le:1.0'],
+        )
+        aggregator.assert_metric(
+            'test.http_request_duration_seconds.sum',
+            3.2,
+            metric_type=aggregator.MONOTONIC_COUNT,
+            tags=['endpoint:test'],
+        )
+        aggregator.assert_metric(
+            'test.http_request_duration_seconds.count',
+            4,
+            metric_type=aggregator.MONOTONIC_COUNT,
+            tags=['endpoint:test'],
+        )
+
+        aggregator.assert_all_metrics_covered()
+
+    def test_truncated(self, dd_run_check, mock_http_response):
+        mock_http_response(
+            text_to_protobuf('go_memstats_alloc_bytes 6.396288e+06\n')[:-1],
+            headers={'Content-Type': 'application/vnd.google.protobuf; encoding=delimited'},
+        )
+        check = get_check({'metrics': ['.+'], 'use_protobuf': True})
+
+        with pytest.raises(Exception, match='^Truncated protobuf message of 42 bytes$'):
+            dd_run_check(check, extract_message=True)
+
+
+class TestShareConnections:
+    @pytest.mark.parametrize('share_connections', [True, False], ids=['shared', 'not shared'])
+    def test_telemetry(self, aggregator, dd_run_check, mock_http_response, share_connections):
+        mock_http_response(
+            """
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes 6.396288e+06
+            """
+        )
+        check = get_check({'metrics': ['.+'], 'telemetry': True, 'share_connections': share_connections})
+        dd_run_check(check)
+
+        count = 1 if share_connections else 0
+        aggregator.assert_metric(
+            'test.telemetry.connection_pool.requests', metric_type=aggregator.MONOTONIC_COUNT, count=count
+        )
+        aggregator.assert_metric(
+            'test.telemetry.connection_pool.connections', metric_type=aggregator.MONOTONIC_COUNT, count=count
+        )
+        aggregator.assert_metric(
+            'test.telemetry.connection_pool.idle_connections', metric_type=aggregator.GAUGE, count=count
+        )
+
+
 class TestRawLineFilters:
     def test(self, aggregator, dd_run_check, mock_http_response):
         mock_http_response(
@@ -550,3 +782,136 @@ class TestShareLabels:
         )
 
         aggregator.assert_all_metrics_covered()
+
+    def test_match_multiple_sources(self, aggregator, dd_run_check, mock_http_response):
+        mock_http_response(
+            """
+            # HELP kube_pod_info Information about pod.
+            # TYPE kube_pod_info gauge
+            kube_pod_info{namespace="default",pod="pod-1",node="node-1"} 1
+            kube_pod_info{namespace="default",pod="pod-2",node="node-2"} 1
+            kube_pod_info{namespace="other",pod="pod-1",node="node-3"} 1
+            kube_pod_info{pod="pod-3",node="node-4"} 1
+            # HELP kube_pod_status_ready Describes whether the pod is ready to serve requests.
+            # TYPE kube_pod_status_ready gauge
+            kube_pod_status_ready{namespace="default",pod="pod-1"} 1
+            kube_pod_status_ready{namespace="default",pod="pod-2"} 1
+            kube_pod_status_ready{namespace="other",pod="pod-1"} 0
+            kube_pod_status_ready{namespace="other",pod="pod-3"} 0
+            kube_pod_status_ready{namespace="other",pod="pod-4"} 0
+            """
+        )
+        check = get_check(
+            {
+                'metrics': ['kube_pod_status_ready'],
+                'share_labels': {'kube_pod_info': {'match': ['namespace', 'pod'], 'labels': ['node']}},
+            }
+        )
+        dd_run_check(check)
+
+        for namespace, pod, node in (
+            ('default', 'pod-1', 'node-1'),
+            ('default', 'pod-2', 'node-2'),
+            ('other', 'pod-1', 'node-3'),
+            # The source sample has no `namespace` label so only the `pod` label has to match
+            ('other', 'pod-3', 'node-4'),
+        ):
+            aggregator.assert_metric(
+                'test.kube_pod_status_ready',
+                tags=['endpoint:test', 'namespace:{}'.format(namespace), 'pod:{}'.format(pod), 'node:{}'.format(node)],
+            )
+        aggregator.assert_metric('test.kube_pod_status_ready', tags=['endpoint:test', 'namespace:other', 'pod:pod-4'])
+
+        aggregator.assert_all_metrics_covered()
+
+    def test_buffer_out_of_order(self, aggregator, dd_run_check, mock_http_response):
+        mock_http_response(
+            """
+            # HELP go_memstats_gc_sys_bytes Number of bytes used for garbage collection system metadata.
+            # TYPE go_memstats_gc_sys_bytes gauge
+            go_memstats_gc_sys_bytes{bar="foo",baz="foo"} 901120
+            # HELP go_memstats_free_bytes Number of bytes free and available for use.
+            # TYPE go_memstats_free_bytes gauge
+            go_memstats_free_bytes{bar="baz",baz="bar"} 6.396288e+06
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes{foo="bar",baz="foo",pod="test"} 6.396288e+06
+            # HELP go_memstats_heap_alloc_bytes Number of heap bytes allocated and still in use.
+            # TYPE go_memstats_heap_alloc_bytes gauge
+            go_memstats_heap_alloc_bytes{baz="foo"} 6.396288e+06
+            """
+        )
+        check = get_check(
+            {
+                'metrics': ['go_memstats_(gc_sys|alloc|heap_alloc)_bytes'],
+                'share_labels': {'go_memstats_alloc_bytes': {'match': ['baz'], 'labels': ['pod']}},
+                'share_labels_buffer_size': 100,
+                'telemetry': True,
+            }
+        )
+        dd_run_check(check)
+
+        aggregator.assert_metric(
+            'test.go_memstats_gc_sys_bytes',
+            901120,
+            metric_type=aggregator.GAUGE,
+            tags=['endpoint:test', 'bar:foo', 'baz:foo', 'pod:test'],
+        )
+        aggregator.assert_metric(
+            'test.go_memstats_alloc_bytes',
+            6396288,
+            metric_type=aggregator.GAUGE,
+            tags=['endpoint:test', 'foo:bar', 'baz:foo', 'pod:test'],
+        )
+        aggregator.assert_metric(
+            'test.go_memstats_heap_alloc_bytes',
+            6396288,
+            metric_type=aggregator.GAUGE,
+            tags=['endpoint:test', 'baz:foo', 'pod:test'],
+        )
+        # Only the collected metrics are buffered until the shared labels are known
+        aggregator.assert_metric('test.telemetry.metrics.buffered.count', 2, tags=['endpoint:test'])
+
+    def test_buffer_full(self, aggregator, dd_run_check, mock_http_response, caplog):
+        mock_http_response(
+            """
+            # HELP go_memstats_gc_sys_bytes Number of bytes used for garbage collection system metadata.
+            # TYPE go_memstats_gc_sys_bytes gauge
+            go_memstats_gc_sys_bytes{bar="foo",baz="foo"} 901120
+            # HELP go_memstats_free_bytes Number of bytes free and available for use.
+            # TYPE go_memstats_free_bytes gauge
+            go_memstats_free_bytes{bar="baz",baz="foo"} 6.396288e+06
+            go_memstats_free_bytes{bar="foo",baz="foo"} 6.396288e+06
+            # HELP go_memstats_alloc_bytes Number of bytes allocated and still in use.
+            # TYPE go_memstats_alloc_bytes gauge
+            go_memstats_alloc_bytes{foo="bar",baz="foo",pod="test"} 6.396288e+06
+            """
+        )
+        check = get_check(
+            {
+                'metrics': ['.+'],
+                'share_labels': {'go_memstats_alloc_bytes': {'match': ['baz'], 'labels': ['pod']}},
+                'share_labels_buffer_size': 2,
+            }
+        )
+        dd_run_check(check)
+
+        aggregator.assert_metric(
+            'test.go_memstats_gc_sys_bytes',
+            901120,
+            metric_type=aggregator.GAUGE,
+            tags=['endpoint:test', 'bar:foo', 'baz:foo'],
+        )
+        aggregator.assert_metric(
+            'test.go_memstats_free_bytes',
+            6396288,
+            metric_type=aggregator.GAUGE,
+            tags=['endpoint:test', 'bar:baz', 'baz:foo'],
+        )
+        aggregator.assert_metric(
+            'test.go_memstats_alloc_bytes',
+            6396288,
+            metric_type=aggregator.GAUGE,
+            tags=['endpoint:test', 'foo:bar', 'baz:foo', 'pod:test'],
+        )
+        assert 'Buffered 1 samples without seeing all metrics of setting `share_labels`' in caplog.text
@@ -0,0 +1,81 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under a 3-clause BSD style license (see LICENSE)
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mock
+import pytest
+
+from datadog_checks.base.utils.concurrency import map_concurrently
+
+
+def test_results():
+    assert sorted(map_concurrently(lambda item: item * 2, [1, 2, 3], 2)) == [(1, 2), (2, 4), (3, 6)]
+
+
+def test_empty():
+    assert list(map_concurrently(lambda item: item, [], 2)) == []
+
+
+def test_max_workers():
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def func(item):
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+
+        return item
+
+    assert sorted(item for item, _ in map_concurrently(func, range(10), 2)) == list(range(10))
+    assert max_running[0] == 2
+
+
+def test_error_cancels_pending_calls():
+    release = threading.Event()
+    called = []
+
+    def func(item):
+        called.append(item)
+        if item == 0:
+            raise Exception('foo')
+
+        release.wait(5)
+        return item
+
+    try:
+        with pytest.raises(Exception, match='^foo$'):
+            list(map_concurrently(func, range(10), 1))
+    finally:
+        release.set()
+
+    # The first call failed while the second one, at most, was running
+    assert called in ([0], [0, 1])
+
+
+@pytest.mark.parametrize('interruption', ['exhausted', 'closed', 'error'])
+def test_executor_shutdown(interruption):
+    shutdown = ThreadPoolExecutor.shutdown
+
+    with mock.patch.object(ThreadPoolExecutor, 'shutdown', autospec=True, side_effect=shutdown) as mocked:
+        results = map_concurrently(lambda item: item, [1, 2], 2)
+        next(results)
+        assert not mocked.called
+
+        if interruption == 'exhausted':
+            list(results)
+        elif interruption == 'closed':
+            results.close()
+        else:
+            with pytest.raises(Exception, match='^foo$'):
+                results.throw(Exception('foo'))
+
+    mocked.assert_called_once_with(mock.ANY, wait=False)
@@ -4,6 +4,7 @@
 import logging
 import os
 import re
+import threading
 from collections import OrderedDict
 
 import jwt
@@ -17,12 +18,24 @@ from aws_requests_auth import boto_utils as requests_aws
 from requests import auth as requests_auth
 from requests.exceptions import ConnectTimeout, ProxyError
 from six import iteritems
+from six.moves import BaseHTTPServer, socketserver
+from urllib3.util.request import ACCEPT_ENCODING
 
 from datadog_checks.base import AgentCheck, ConfigurationError
 from datadog_checks.base.utils.headers import headers as agent_headers
-from datadog_checks.base.utils.http import STANDARD_FIELDS, RequestsWrapper, is_uds_url, quote_uds_url
+from datadog_checks.base.utils.http import (
+    SHARED_CONNECTION_POOLS,
+    STANDARD_FIELDS,
+    RequestsWrapper,
+    SharedPoolAdapter,
+    TimedHTTPAdapter,
+    get_wire_size,
+    is_uds_url,
+    quote_uds_url,
+)
 from datadog_checks.base.utils.time import get_timestamp
 from datadog_checks.dev import EnvVars, TempDir
+from datadog_checks.dev.http import MockResponse
 from datadog_checks.dev.utils import ON_WINDOWS, read_file, running_on_windows_ci, write_file
 
 pytestmark = pytest.mark.http
@@ -1647,6 +1660,252 @@ class TestSession:
             assert getattr(http.session, key) == value
 
 
+class KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'OK')
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        yield 'http://127.0.0.1:{}'.format(server.server_address[1])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class TestProfile:
+    def test_unknown(self):
+        with pytest.raises(ConfigurationError, match='^Unknown HTTP profile `foo`'):
+            RequestsWrapper({}, {}, profile='foo')
+
+    def test_default(self):
+        http = RequestsWrapper({}, {})
+
+        assert http.persist_connections is False
+        assert http.options['headers']['Accept-Encoding'] == 'gzip, deflate'
+        assert not isinstance(http.session.get_adapter('http://localhost'), TimedHTTPAdapter)
+
+    def test_scrape(self):
+        http = RequestsWrapper({}, {}, profile='scrape')
+
+        assert http.persist_connections is True
+        assert http.options['headers']['Accept-Encoding'] == ACCEPT_ENCODING
+        assert isinstance(http.session.get_adapter('http://localhost'), TimedHTTPAdapter)
+        assert isinstance(http.session.get_adapter('https://localhost'), TimedHTTPAdapter)
+
+    def test_scrape_config_override(self):
+        instance = {'persist_connections': False, 'headers': {'Accept-Encoding': 'identity'}}
+        http = RequestsWrapper(instance, {}, profile='scrape')
+
+        assert http.persist_connections is False
+        assert http.options['headers'] == {'Accept-Encoding': 'identity'}
+
+    def test_scrape_handshake_time(self, local_server):
+        http = RequestsWrapper({}, {}, profile='scrape')
+
+        response = http.get(local_server)
+        assert response.content == b'OK'
+        assert response.handshake_time > 0
+        assert get_wire_size(response) == 2
+
+        # The connection is reused
+        response = http.get(local_server)
+        assert response.content == b'OK'
+        assert response.handshake_time is None
+
+
+class TestConditionalRequests:
+    def test_default(self):
+        http = RequestsWrapper({}, {})
+
+        with mock.patch('requests.get', return_value=MockResponse('foo', headers={'ETag': '"1"'})) as get:
+            http.get('http://www.example.com')
+            http.get('http://www.example.com')
+
+        assert 'If-None-Match' not in get.call_args[1]['headers']
+
+    @pytest.mark.parametrize(
+        'response_headers, request_headers',
+        [
+            pytest.param({'ETag': '"1"'}, {'If-None-Match': '"1"'}, id='etag'),
+            pytest.param(
+                {'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'},
+                {'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'},
+                id='last modified',
+            ),
+        ],
+    )
+    def test_not_modified(self, response_headers, request_headers):
+        http = RequestsWrapper({'conditional_requests': True}, {})
+        responses = [
+            MockResponse('foo', normalize_content=False, headers=response_headers),
+            MockResponse(status_code=304),
+        ]
+
+        with mock.patch('requests.get', side_effect=responses) as get:
+            response = http.get('http://www.example.com')
+            assert response.content == b'foo'
+
+            response = http.get('http://www.example.com')
+
+        assert response.status_code == 200
+        assert response.content == b'foo'
+        assert response.headers == response_headers
+        assert get_wire_size(response) is None
+
+        for header, value in iteritems(request_headers):
+            assert header not in get.call_args_list[0][1]['headers']
+            assert get.call_args_list[1][1]['headers'][header] == value
+
+    def test_modified(self):
+        http = RequestsWrapper({'conditional_requests': True}, {})
+        responses = [
+            MockResponse('foo', normalize_content=False, headers={'ETag': '"1"'}),
+            MockResponse('bar', normalize_content=False, headers={'ETag': '"2"'}),
+            MockResponse('baz', normalize_content=False),
+            MockResponse('baz', normalize_content=False),
+        ]
+
+        with mock.patch('requests.get', side_effect=responses) as get:
+            assert http.get('http://www.example.com').content == b'foo'
+            assert http.get('http://www.example.com').content == b'bar'
+            assert http.get('http://www.example.com').content == b'baz'
+            assert http.get('http://www.example.com').content == b'baz'
+
+        assert get.call_args_list[1][1]['headers']['If-None-Match'] == '"1"'
+        assert get.call_args_list[2][1]['headers']['If-None-Match'] == '"2"'
+        assert 'If-None-Match' not in get.call_args_list[3][1]['headers']
+
+    def test_stream(self):
+        http = RequestsWrapper({'conditional_requests': True}, {})
+
+        with mock.patch('requests.get', return_value=MockResponse('foo', headers={'ETag': '"1"'})) as get:
+            http.get('http://www.example.com', stream=True)
+            http.get('http://www.example.com', stream=True)
+
+        assert 'If-None-Match' not in get.call_args[1]['headers']
+
+
+class TestSharedConnections:
+    @pytest.fixture(autouse=True)
+    def clear_pools(self):
+        SHARED_CONNECTION_POOLS.clear()
+        yield
+        SHARED_CONNECTION_POOLS.clear()
+
+    def test_default(self):
+        http = RequestsWrapper({}, {})
+
+        assert http.shared_pool_adapter is None
+        assert http.get_shared_pool_stats() is None
+
+    def test_config(self):
+        http = RequestsWrapper({'share_connections': True}, {})
+
+        assert http.persist_connections is True
+        assert http.session.get_adapter('http://localhost') is http.shared_pool_adapter
+        assert http.session.get_adapter('https://localhost') is http.shared_pool_adapter
+        assert http.shared_pool_adapter.max_connections == STANDARD_FIELDS['max_connections_per_host']
+        assert http.shared_pool_adapter.idle_timeout == STANDARD_FIELDS['idle_connection_timeout']
+
+    def test_init_config(self):
+        init_config = {'share_connections': True, 'max_connections_per_host': 3, 'idle_connection_timeout': 5}
+        http = RequestsWrapper({}, init_config)
+
+        assert isinstance(http.shared_pool_adapter, SharedPoolAdapter)
+        assert http.shared_pool_adapter.max_connections == 3
+        assert http.shared_pool_adapter.idle_timeout == 5
+
+    @pytest.mark.parametrize('max_connections', [0, '5', True])
+    def test_max_connections_invalid(self, max_connections):
+        with pytest.raises(ConfigurationError, match='^Setting `max_connections_per_host` must be a positive integer$'):
+            RequestsWrapper({'share_connections': True, 'max_connections_per_host': max_connections}, {})
+
+    @pytest.mark.parametrize('idle_timeout', [0, -1, 'foo'])
+    def test_idle_timeout_invalid(self, idle_timeout):
+        with pytest.raises(
+            ConfigurationError, match='^Setting `idle_connection_timeout` must be a number greater than 0$'
+        ):
+            RequestsWrapper({'share_connections': True, 'idle_connection_timeout': idle_timeout}, {})
+
+    @pytest.mark.parametrize(
+        'instance, auth_type',
+        [
+            pytest.param({'auth_type': 'ntlm', 'ntlm_domain': 'domain\\user'}, 'ntlm', id='ntlm'),
+            pytest.param({'auth_type': 'kerberos'}, 'kerberos', id='kerberos'),
+            pytest.param({'ntlm_domain': 'domain\\user'}, 'ntlm', id='legacy ntlm'),
+            pytest.param({'kerberos_auth': 'required'}, 'kerberos', id='legacy kerberos'),
+        ],
+    )
+    def test_connection_auth_unsupported(self, instance, auth_type):
+        instance['share_connections'] = True
+
+        with pytest.raises(
+            ConfigurationError,
+            match='^Setting `share_connections` is not supported with the `{}` auth_type$'.format(auth_type),
+        ):
+            RequestsWrapper(instance, {})
+
+    def test_reuse_across_instances(self, local_server):
+        http1 = RequestsWrapper({'share_connections': True}, {}, profile='scrape')
+        http2 = RequestsWrapper({'share_connections': True}, {}, profile='scrape')
+
+        assert http1.get(local_server).handshake_time is not None
+        assert http2.get(local_server).handshake_time is None
+
+        assert len(SHARED_CONNECTION_POOLS) == 1
+        assert http1.get_shared_pool_stats() == {'requests': 2, 'connections': 1, 'idle_connections': 1}
+        assert http2.get_shared_pool_stats() == {'requests': 2, 'connections': 1, 'idle_connections': 1}
+
+    def test_tls_settings(self, local_server):
+        http1 = RequestsWrapper({'share_connections': True}, {})
+        http2 = RequestsWrapper({'share_connections': True, 'tls_verify': False}, {})
+
+        http1.get(local_server)
+        http2.get(local_server)
+
+        assert len(SHARED_CONNECTION_POOLS) == 2
+        assert http1.get_shared_pool_stats() == {'requests': 1, 'connections': 1, 'idle_connections': 1}
+        assert http2.get_shared_pool_stats() == {'requests': 1, 'connections': 1, 'idle_connections': 1}
+
+    def test_idle_eviction(self, local_server):
+        http = RequestsWrapper({'share_connections': True, 'idle_connection_timeout': 30}, {})
+        http.get(local_server)
+        http.get(local_server)
+        last_used = max(pool.last_used for pool in SHARED_CONNECTION_POOLS._pools.values())
+
+        SHARED_CONNECTION_POOLS.evict_idle(last_used + 29)
+        assert http.get_shared_pool_stats() == {'requests': 2, 'connections': 1, 'idle_connections': 1}
+
+        # Idle pools are evicted the next time any shared pool is used
+        with mock.patch('datadog_checks.base.utils.http.default_timer', return_value=last_used + 40):
+            http.get(local_server)
+
+        assert len(SHARED_CONNECTION_POOLS) == 1
+        assert http.get_shared_pool_stats() == {'requests': 1, 'connections': 1, 'idle_connections': 1}
+
+        SHARED_CONNECTION_POOLS.evict_idle(last_used + 80)
+        assert len(SHARED_CONNECTION_POOLS) == 0
+        assert http.get_shared_pool_stats() == {'requests': 0, 'connections': 0, 'idle_connections': 0}
+
+
 class TestRemapper:
     def test_legacy_no_proxy(self):
         instance = {'no_proxy': True}
@@ -207,6 +207,34 @@ def test_poll_octet_stream(mocked_prometheus_check, mocked_prometheus_scraper_co
         assert len(messages) == 40
 
 
+def test_poll_protobuf(mocked_prometheus_check, text_data):
+    """Tests poll using the protobuf format, falling back to the text format"""
+    from datadog_checks.dev.http import MockResponse as HTTPMockResponse
+
+    from .utils import text_to_protobuf
+
+    check = mocked_prometheus_check
+    scraper_config = check.get_scraper_config(dict(PROMETHEUS_CHECK_INSTANCE, use_protobuf=True))
+    assert check.get_http_handler(scraper_config).options['headers']['accept'] == (
+        'application/vnd.google.protobuf; proto=io.prometheus.client.MetricFamily; encoding=delimited; q=0.7, '
+        'text/plain; q=0.3'
+    )
+
+    with mock.patch('requests.get', return_value=HTTPMockResponse(text_data, normalize_content=False)):
+        response = check.poll(scraper_config)
+        text_messages = list(check.parse_metric_family(response, scraper_config))
+
+    protobuf_response = HTTPMockResponse(
+        text_to_protobuf(text_data), headers={'Content-Type': 'application/vnd.google.protobuf; encoding=delimited'}
+    )
+    with mock.patch('requests.get', return_value=protobuf_response):
+        response = check.poll(scraper_config)
+        protobuf_messages = list(check.parse_metric_family(response, scraper_config))
+
+    assert len(protobuf_messages) == 40
+    assert protobuf_messages == text_messages
+
+
 def test_submit_gauge_with_labels(aggregator, mocked_prometheus_check, mocked_prometheus_scraper_config):
     """ submitting metrics that contain labels should result in tags on the gauge call """
     ref_gauge = GaugeMetricFamily(
@@ -0,0 +1,165 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under a 3-clause BSD style license (see LICENSE)
+import socket
+import ssl
+import threading
+import time
+from contextlib import closing
+
+import pytest
+from six import PY3
+
+from .utils import requires_py3
+
+if PY3:
+    import asyncio
+
+    from datadog_checks.base.utils.probes import (
+        HandshakeError,
+        ProbeScheduler,
+        ScheduledProbe,
+        tcp_connect,
+        tls_handshake,
+    )
+
+pytestmark = requires_py3
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = ProbeScheduler(max_concurrency=10, max_workers=2)
+    yield scheduler
+    scheduler.stop()
+
+
+@pytest.fixture
+def tcp_server():
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(100)
+
+    def accept():
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            connection.close()
+
+    thread = threading.Thread(target=accept)
+    thread.daemon = True
+    thread.start()
+    with closing(server):
+        yield server.getsockname()
+
+
+def get_closed_port():
+    with closing(socket.socket()) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_result(probe):
+    probe.future.result(timeout=5)
+    return probe.poll()
+
+
+class TestScheduledProbe:
+    def test_tcp_connect(self, scheduler, tcp_server):
+        probe = ScheduledProbe(lambda: tcp_connect(*tcp_server), timeout=5, scheduler=scheduler)
+
+        # Nothing has completed yet
+        assert probe.poll() is None
+
+        result = wait_for_result(probe)
+        assert result.error is None
+        assert 0 < result.value <= result.duration
+
+    def test_connection_error(self, scheduler):
+        port = get_closed_port()
+        probe = ScheduledProbe(lambda: tcp_connect('127.0.0.1', port), timeout=5, scheduler=scheduler)
+        probe.poll()
+
+        result = wait_for_result(probe)
+        assert result.value is None
+        assert isinstance(result.error, ConnectionRefusedError)
+
+    def test_timeout(self, scheduler):
+        probe = ScheduledProbe(lambda: asyncio.sleep(10), timeout=0.1, scheduler=scheduler)
+        probe.poll()
+
+        result = wait_for_result(probe)
+        assert isinstance(result.error, socket.timeout)
+        assert str(result.error) == 'timed out'
+
+    def test_one_probe_at_a_time(self, scheduler):
+        event = threading.Event()
+        probe = ScheduledProbe(event.wait, blocking=True, scheduler=scheduler)
+
+        assert probe.poll() is None
+        future = probe.future
+
+        # The probe is still running
+        assert probe.poll() is None
+        assert probe.future is future
+
+        event.set()
+        assert wait_for_result(probe).value is True
+        assert probe.future is not future
+
+    def test_blocking_error(self, scheduler):
+        def probe_factory():
+            raise ValueError('foo')
+
+        probe = ScheduledProbe(probe_factory, blocking=True, scheduler=scheduler)
+        probe.poll()
+
+        result = wait_for_result(probe)
+        assert isinstance(result.error, ValueError)
+        assert str(result.error) == 'foo'
+
+    def test_concurrency(self, scheduler):
+        lock = threading.Lock()
+        running = []
+        max_running = []
+
+        def probe_factory():
+            with lock:
+                running.append(None)
+                max_running.append(len(running))
+            time.sleep(0.1)
+            with lock:
+                running.pop()
+
+        probes = [ScheduledProbe(probe_factory, blocking=True, scheduler=scheduler) for _ in range(6)]
+        for probe in probes:
+            probe.poll()
+
+        for probe in probes:
+            assert wait_for_result(probe).error is None
+
+        # Bounded by the number of workers
+        assert max(max_running) == 2
+
+    def test_tls_handshake_error(self, scheduler, tcp_server):
+        # The server closes connections right away
+        probe = ScheduledProbe(
+            lambda: tls_handshake(tcp_server[0], tcp_server[1], ssl.create_default_context()),
+            timeout=5,
+            scheduler=scheduler,
+        )
+        probe.poll()
+
+        result = wait_for_result(probe)
+        assert isinstance(result.error, HandshakeError)
+
+    def test_tls_connection_error(self, scheduler):
+        port = get_closed_port()
+        probe = ScheduledProbe(
+            lambda: tls_handshake('127.0.0.1', port, ssl.create_default_context()), timeout=5, scheduler=scheduler
+        )
+        probe.poll()
+
+        result = wait_for_result(probe)
+        assert isinstance(result.error, ConnectionRefusedError)
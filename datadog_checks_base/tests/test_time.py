@@ -3,11 +3,12 @@
 # Licensed under a 3-clause BSD style license (see LICENSE)
 from datetime import datetime
 
+import mock
 import pytest
 from dateutil import tz
 from six import PY2
 
-from datadog_checks.base.utils.time import EPOCH, UTC, ensure_aware_datetime, get_current_datetime, get_timestamp
+from datadog_checks.base.utils.time import EPOCH, UTC, ensure_aware_datetime, get_current_datetime, get_timestamp, timed
 
 pytestmark = pytest.mark.time
 
@@ -68,6 +69,34 @@ class TestTimestamp:
 
 
 @pytest.mark.skipif(PY2, reason='Using Python 3 features')
+class TestTimed:
+    def test_submit(self):
+        gauge = mock.MagicMock()
+
+        with mock.patch('datadog_checks.base.utils.time.epoch_offset', side_effect=[10, 12.5]):
+            with timed(gauge, 'foo.duration', tags=['bar:baz']):
+                pass
+
+        gauge.assert_called_once_with('foo.duration', 2.5, tags=['bar:baz'])
+
+    def test_disabled(self):
+        gauge = mock.MagicMock()
+
+        with timed(gauge, 'foo.duration', enabled=False):
+            pass
+
+        assert not gauge.called
+
+    def test_error(self):
+        gauge = mock.MagicMock()
+
+        with pytest.raises(Exception, match='^foo$'):
+            with timed(gauge, 'foo.duration'):
+                raise Exception('foo')
+
+        assert not gauge.called
+
+
 class TestConstants:
     def test_epoch(self):
         from datetime import timezone
@@ -5,3 +5,59 @@ from six import PY2
 
 requires_windows = pytest.mark.skipif(platform.system() != 'Windows', reason='Test only valid on Windows')
 requires_py3 = pytest.mark.skipif(PY2, reason='Test only available on Python 3')
+
+
+def text_to_protobuf(text):
+    """
+    Encode a payload of the Prometheus text format into the delimited protobuf format, omitting +Inf buckets
+    like the Go client does.
+    """
+    from google.protobuf.internal.encoder import _VarintBytes
+
+    from datadog_checks.base.checks.libs.prometheus import text_fd_to_metric_families
+    from datadog_checks.base.utils.prometheus import metrics_pb2
+
+    metric_types = {
+        'counter': metrics_pb2.COUNTER,
+        'gauge': metrics_pb2.GAUGE,
+        'summary': metrics_pb2.SUMMARY,
+        'histogram': metrics_pb2.HISTOGRAM,
+    }
+
+    payload = b''
+    for metric_family in text_fd_to_metric_families(text.splitlines()):
+        message = metrics_pb2.MetricFamily(
+            name=metric_family.name,
+            help=metric_family.documentation,
+            type=metric_types.get(metric_family.type, metrics_pb2.UNTYPED),
+        )
+
+        metrics = {}
+        for sample in metric_family.samples:
+            labels = tuple(sorted((k, v) for k, v in sample.labels.items() if k not in ('le', 'quantile')))
+            metric = metrics.get(labels)
+            if metric is None:
+                metric = metrics[labels] = message.metric.add()
+                for name, value in labels:
+                    metric.label.add(name=name, value=value)
+
+            if message.type == metrics_pb2.COUNTER:
+                metric.counter.value = sample.value
+            elif message.type == metrics_pb2.GAUGE:
+                metric.gauge.value = sample.value
+            elif message.type == metrics_pb2.UNTYPED:
+                metric.untyped.value = sample.value
+            else:
+                data = metric.summary if message.type == metrics_pb2.SUMMARY else metric.histogram
+                if sample.name.endswith('_sum'):
+                    data.sample_sum = sample.value
+                elif sample.name.endswith('_count'):
+                    data.sample_count = int(sample.value)
+                elif 'quantile' in sample.labels:
+                    data.quantile.add(quantile=float(sample.labels['quantile']), value=sample.value)
+                elif sample.labels['le'] != '+Inf':
+                    data.bucket.add(upper_bound=float(sample.labels['le']), cumulative_count=int(sample.value))
+
+        payload += _VarintBytes(message.ByteSize()) + message.SerializeToString()
+
+    return payload
@@ -8,13 +8,16 @@ from requests import Response
 
 
 class MockResponse(Response):
-    def __init__(self, content='', file_path=None, status_code=200, normalize_content=True):
+    def __init__(self, content='', file_path=None, status_code=200, normalize_content=True, headers=None):
         super(MockResponse, self).__init__()
 
         if file_path is not None:
             with open(file_path, 'rb') as f:
                 self._content = f.read()
                 self.raw = BytesIO(self._content)
+        elif isinstance(content, bytes):
+            self._content = content
+            self.raw = BytesIO(self._content)
         else:
             # For multi-line string literals
             if normalize_content:
@@ -25,3 +28,5 @@ class MockResponse(Response):
 
         # Add new keyword arguments to set as needed
         self.status_code = status_code
+        if headers:
+            self.headers.update(headers)
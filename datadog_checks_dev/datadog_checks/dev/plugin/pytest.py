@@ -239,9 +239,18 @@ def mock_http_response(mocker):
     if MockResponse is None:
         from ..http import MockResponse
 
-    yield lambda *args, **kwargs: mocker.patch(
-        kwargs.pop('method', 'requests.get'), return_value=MockResponse(*args, **kwargs)
-    )
+    def mock_response(*args, **kwargs):
+        method = kwargs.pop('method', 'requests.get')
+        mock = mocker.patch(method, return_value=MockResponse(*args, **kwargs))
+
+        # Requests sent through persistent connections bypass the module-level functions
+        module, _, name = method.rpartition('.')
+        if module == 'requests':
+            mocker.patch('requests.Session.{}'.format(name), new=mock)
+
+        return mock
+
+    yield mock_response
 
 
 def pytest_configure(config):
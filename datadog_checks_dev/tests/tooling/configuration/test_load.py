@@ -2746,6 +2746,10 @@ def test_template_array():
         'read_timeout',
         'log_requests',
         'persist_connections',
+        'share_connections',
+        'max_connections_per_host',
+        'idle_connection_timeout',
+        'conditional_requests',
         'bar',
     ]
 
@@ -13,6 +13,7 @@ from datadog_checks.base import AgentCheck, to_string
 from .config import from_instance
 from .metrics import (
     CLUSTER_PENDING_TASKS,
+    MetricPathTrie,
     health_stats_for_version,
     index_stats_for_version,
     node_system_stats_for_version,
@@ -51,9 +52,11 @@ class ESCheck(AgentCheck):
             }
         self.config = from_instance(self.instance)
 
+        # Metrics definitions compiled for the running ES version, keyed by (name, version)
+        self._metric_paths = {}
+
     def check(self, _):
         admin_forwarder = self.config.admin_forwarder
-        jvm_rate = self.instance.get('gc_collectors_as_rate', False)
         base_tags = list(self.config.tags)
         service_check_tags = list(self.config.service_check_tags)
 
@@ -66,11 +69,8 @@ class ESCheck(AgentCheck):
             raise
 
         health_url, stats_url, pshard_stats_url, pending_tasks_url, slm_url = self._get_urls(version)
-        stats_metrics = stats_for_version(version, jvm_rate)
-        if self.config.cluster_stats:
-            # Include Node System metrics
-            stats_metrics.update(node_system_stats_for_version(version))
-        pshard_stats_metrics = pshard_stats_for_version(version)
+        stats_metrics = self._get_metric_paths('stats', version, self._stats_for_version)
+        pshard_stats_metrics = self._get_metric_paths('pshard_stats', version, pshard_stats_for_version)
 
         # Load stats data.
         # This must happen before other URL processing as the cluster name
@@ -124,6 +124,23 @@ class ESCheck(AgentCheck):
         # If we're here we did not have any ES conn issues
         self.service_check(self.SERVICE_CHECK_CONNECT_NAME, AgentCheck.OK, tags=self.config.service_check_tags)
 
+    def _stats_for_version(self, version):
+        stats_metrics = stats_for_version(version, self.instance.get('gc_collectors_as_rate', False))
+        if self.config.cluster_stats:
+            # Include Node System metrics
+            stats_metrics.update(node_system_stats_for_version(version))
+        return stats_metrics
+
+    def _get_metric_paths(self, name, version, metrics_for_version):
+        """
+        Get the metrics definitions returned by `metrics_for_version` compiled for the specified ES version
+        """
+        key = (name, tuple(version))
+        metric_paths = self._metric_paths.get(key)
+        if metric_paths is None:
+            metric_paths = self._metric_paths[key] = MetricPathTrie(metrics_for_version(version))
+        return metric_paths
+
     def _get_es_version(self):
         """
         Get the running version of elasticsearch.
@@ -159,7 +176,7 @@ class ESCheck(AgentCheck):
         cat_url = '/_cat/indices?format=json&bytes=b'
         index_url = self._join_url(cat_url, admin_forwarder)
         index_resp = self._get_data(index_url)
-        index_stats_metrics = index_stats_for_version(version)
+        index_stats_metrics = self._get_metric_paths('index_stats', version, index_stats_for_version)
         health_stat = {'green': 0, 'yellow': 1, 'red': 2}
         reversed_health_stat = {'red': 0, 'yellow': 1, 'green': 2}
         for idx in index_resp:
@@ -188,10 +205,7 @@ class ESCheck(AgentCheck):
                     del index_data[key]
                     self.log.warning("The index %s has no metric data for %s", idx['index'], key)
 
-            for metric in index_stats_metrics:
-                # metric description
-                desc = index_stats_metrics[metric]
-                self._process_metric(index_data, metric, *desc, tags=tags)
+            self._process_metrics(index_data, index_stats_metrics, tags=tags)
 
     def _get_urls(self, version):
         """
@@ -263,10 +277,8 @@ class ESCheck(AgentCheck):
             'pending_tasks_time_in_queue': average_time_in_queue // (total or 1),
         }
 
-        for metric in CLUSTER_PENDING_TASKS:
-            # metric description
-            desc = CLUSTER_PENDING_TASKS[metric]
-            self._process_metric(node_data, metric, *desc, tags=base_tags)
+        pending_tasks_metrics = self._get_metric_paths('pending_tasks', [], lambda _: CLUSTER_PENDING_TASKS)
+        self._process_metrics(node_data, pending_tasks_metrics, tags=base_tags)
 
     def _process_stats_data(self, data, stats_metrics, base_tags):
         for node_data in itervalues(data.get('nodes', {})):
@@ -288,38 +300,26 @@ class ESCheck(AgentCheck):
                         metric_hostname = node_data[k]
                         break
 
-            for metric, desc in iteritems(stats_metrics):
-                self._process_metric(node_data, metric, *desc, tags=metrics_tags, hostname=metric_hostname)
+            self._process_metrics(node_data, stats_metrics, tags=metrics_tags, hostname=metric_hostname)
 
     def _process_pshard_stats_data(self, data, pshard_stats_metrics, base_tags):
-        for metric, desc in iteritems(pshard_stats_metrics):
-            self._process_metric(data, metric, *desc, tags=base_tags)
+        self._process_metrics(data, pshard_stats_metrics, tags=base_tags)
 
-    def _process_metric(self, data, metric, xtype, path, xform=None, tags=None, hostname=None):
+    def _process_metrics(self, data, metric_paths, tags=None, hostname=None):
         """
         data: dictionary containing all the stats
-        metric: datadog metric
-        path: corresponding path in data, flattened, e.g. thread_pool.bulk.queue
-        xform: a lambda to apply to the numerical value
+        metric_paths: MetricPathTrie of the metrics to extract from data
         """
-        value = data
-
-        # Traverse the nested dictionaries
-        for key in path.split('.'):
+        for metric, xtype, path, xform, value in metric_paths.extract(data):
             if value is not None:
-                value = value.get(key)
-            else:
-                break
-
-        if value is not None:
-            if xform:
-                value = xform(value)
-            if xtype == "gauge":
-                self.gauge(metric, value, tags=tags, hostname=hostname)
+                if xform:
+                    value = xform(value)
+                if xtype == "gauge":
+                    self.gauge(metric, value, tags=tags, hostname=hostname)
+                else:
+                    self.rate(metric, value, tags=tags, hostname=hostname)
             else:
-                self.rate(metric, value, tags=tags, hostname=hostname)
-        else:
-            self.log.debug("Metric not found: %s -> %s", path, metric)
+                self.log.debug("Metric not found: %s -> %s", path, metric)
 
     def _process_health_data(self, data, version, base_tags, service_check_tags):
         cluster_status = data.get('status')
@@ -334,10 +334,8 @@ class ESCheck(AgentCheck):
             event = self._create_event(cluster_status, tags=base_tags)
             self.event(event)
 
-        cluster_health_metrics = health_stats_for_version(version)
-
-        for metric, desc in iteritems(cluster_health_metrics):
-            self._process_metric(data, metric, *desc, tags=base_tags)
+        cluster_health_metrics = self._get_metric_paths('health_stats', version, health_stats_for_version)
+        self._process_metrics(data, cluster_health_metrics, tags=base_tags)
 
         # Process the service check
         if cluster_status == 'green':
@@ -370,13 +368,11 @@ class ESCheck(AgentCheck):
         self.service_check(self.SERVICE_CHECK_CLUSTER_STATUS, status, message=msg, tags=service_check_tags)
 
     def _process_policy_data(self, data, version, base_tags):
+        slm_stats = self._get_metric_paths('slm_stats', version, slm_stats_for_version)
         for policy, policy_data in iteritems(data):
             repo = policy_data.get('policy', {}).get('repository', 'unknown')
             tags = base_tags + ['policy:{}'.format(policy), 'repository:{}'.format(repo)]
-
-            slm_stats = slm_stats_for_version(version)
-            for metric, desc in iteritems(slm_stats):
-                self._process_metric(policy_data, metric, *desc, tags=tags)
+            self._process_metrics(policy_data, slm_stats, tags=tags)
 
     def _create_event(self, status, tags=None):
         hostname = to_string(self.hostname)
@@ -1,6 +1,8 @@
 # (C) Datadog, Inc. 2018-present
 # All rights reserved
 # Licensed under a 3-clause BSD style license (see LICENSE)
+from six import iteritems
+
 from .utils import ms_to_second
 
 # Metrics definition format is a dictionary mapping:
@@ -653,3 +655,51 @@ def node_system_stats_for_version(version):
         node_system_stats.update(NODE_SYSTEM_METRICS_POST_5)
 
     return node_system_stats
+
+
+class MetricPathTrie(object):
+    """
+    Metrics definitions compiled into a trie of the keys of their paths, so that the values of all the metrics
+    can be extracted from the stats in a single traversal, looking up every nested dictionary only once.
+    """
+
+    __slots__ = ('children', 'metrics', 'descendants')
+
+    def __init__(self, metrics=None):
+        # {key: MetricPathTrie}
+        self.children = {}
+        # (datadog_metric_name, datadog_metric_type, es_metric_name, conversion_func) of the metrics ending here
+        self.metrics = []
+        # Every metric ending in this subtree, reported as missing when the subtree is absent from the stats
+        self.descendants = []
+
+        for metric, desc in iteritems(metrics or {}):
+            xtype, path = desc[0], desc[1]
+            xform = desc[2] if len(desc) > 2 else None
+            self.add(path.split('.'), (metric, xtype, path, xform))
+
+    def add(self, keys, definition):
+        node = self
+        for key in keys:
+            node.descendants.append(definition)
+            node = node.children.setdefault(key, MetricPathTrie())
+        node.descendants.append(definition)
+        node.metrics.append(definition)
+
+    def extract(self, data):
+        """
+        Yield (datadog_metric_name, datadog_metric_type, es_metric_name, conversion_func, value) for every metric,
+        value being None when it is missing from the stats.
+        """
+        stack = [(self, data)]
+        while stack:
+            node, value = stack.pop()
+            if value is None:
+                for definition in node.descendants:
+                    yield definition + (None,)
+                continue
+
+            for definition in node.metrics:
+                yield definition + (value,)
+            for key, child in iteritems(node.children):
+                stack.append((child, value.get(key)))
@@ -4,9 +4,35 @@
 import time
 
 from datadog_checks.elastic import ESCheck
+from datadog_checks.elastic.metrics import node_system_stats_for_version, stats_for_version
 
 from .common import PASSWORD, URL, USER
 
+BENCH_VERSION = [7, 10, 0]
+BENCH_NODES = 300
+
+
+def nodes_stats(nodes):
+    """
+    Build a `_nodes/stats` payload of a cluster of `nodes` nodes reporting every metric collected by the check
+    """
+    node_stats_metrics = stats_for_version(BENCH_VERSION, jvm_rate=True)
+    node_stats_metrics.update(node_system_stats_for_version(BENCH_VERSION))
+
+    node_stats = {}
+    for i, (_, path) in enumerate(sorted(desc[:2] for desc in node_stats_metrics.values())):
+        keys = path.split('.')
+        parent = node_stats
+        for key in keys[:-1]:
+            parent = parent.setdefault(key, {})
+        parent[keys[-1]] = i
+
+    node_stats_data = {}
+    for i in range(nodes):
+        node_id = 'node-{}'.format(i)
+        node_stats_data[node_id] = dict(node_stats, name=node_id, host='10.0.{}.{}'.format(i // 256, i % 256))
+    return {'cluster_name': 'bench-cluster', 'nodes': node_stats_data}
+
 
 def test_check(benchmark, dd_environment, elastic_check, instance):
     for _ in range(3):
@@ -28,3 +54,21 @@ def test_index_metrics(benchmark, dd_environment):
     instance = {'url': URL, 'index_stats': True, 'username': USER, 'password': PASSWORD}
     elastic_check = ESCheck('elastic', {}, instances=[instance])
     benchmark(elastic_check.check, instance)
+
+
+def test_nodes_stats_processing(benchmark, aggregator):
+    instance = {'url': URL, 'cluster_stats': True, 'gc_collectors_as_rate': True}
+    elastic_check = ESCheck('elastic', {}, instances=[instance])
+    data = nodes_stats(BENCH_NODES)
+
+    def process_nodes_stats():
+        aggregator.reset()
+        stats_metrics = elastic_check._get_metric_paths('stats', BENCH_VERSION, elastic_check._stats_for_version)
+        elastic_check._process_stats_data(data, stats_metrics, ['cluster_name:bench-cluster'])
+
+    benchmark(process_nodes_stats)
+
+    aggregator.assert_metric('elasticsearch.docs.count', count=BENCH_NODES)
+    aggregator.assert_metric(
+        'elasticsearch.docs.count', hostname='10.0.0.0', tags=['cluster_name:bench-cluster', 'node_name:node-0']
+    )
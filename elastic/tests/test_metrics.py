@@ -4,6 +4,7 @@
 import pytest
 
 from datadog_checks.elastic.metrics import (
+    MetricPathTrie,
     health_stats_for_version,
     node_system_stats_for_version,
     pshard_stats_for_version,
@@ -119,3 +120,32 @@ def test_health_stats_for_version(version, expected_metric_count):
 def test_node_system_stats_for_version(version, expected_metric_count):
     metrics = node_system_stats_for_version(version)
     assert len(metrics) == expected_metric_count
+
+
+@pytest.mark.unit
+def test_metric_path_trie():
+    metrics = {
+        'elasticsearch.docs.count': ('gauge', 'indices.docs.count'),
+        'elasticsearch.docs.deleted': ('gauge', 'indices.docs.deleted'),
+        'elasticsearch.get.time': ('rate', 'indices.get.time_in_millis', lambda ms: ms / 1000),
+        'elasticsearch.thread_pool.bulk.queue': ('gauge', 'thread_pool.bulk.queue'),
+        'elasticsearch.thread_pool.bulk.rejected': ('rate', 'thread_pool.bulk.rejected'),
+        'elasticsearch.fs.total.free_in_bytes': ('gauge', 'fs.total.free_in_bytes'),
+    }
+    data = {
+        'indices': {'docs': {'count': 10, 'deleted': 0}, 'get': {'time_in_millis': 1500}},
+        'thread_pool': {'bulk': {'queue': 2}},
+    }
+
+    extracted = {
+        metric: (xtype, path, value) for metric, xtype, path, _, value in MetricPathTrie(metrics).extract(data)
+    }
+
+    assert extracted == {
+        'elasticsearch.docs.count': ('gauge', 'indices.docs.count', 10),
+        'elasticsearch.docs.deleted': ('gauge', 'indices.docs.deleted', 0),
+        'elasticsearch.get.time': ('rate', 'indices.get.time_in_millis', 1500),
+        'elasticsearch.thread_pool.bulk.queue': ('gauge', 'thread_pool.bulk.queue', 2),
+        'elasticsearch.thread_pool.bulk.rejected': ('rate', 'thread_pool.bulk.rejected', None),
+        'elasticsearch.fs.total.free_in_bytes': ('gauge', 'fs.total.free_in_bytes', None),
+    }
@@ -8,6 +8,8 @@ from datadog_checks.base import AgentCheck
 STATS_URL = "/;csv;norefresh"
 EVENT_TYPE = SOURCE_TYPE_NAME = 'haproxy'
 BUFSIZE = 8192
+# The stats CSV of large deployments is several megabytes, it is read from HTTP responses in large chunks
+HTTP_CHUNK_SIZE = 64 * 1024
 UPTIME_PARSER = re.compile(r"(?P<days>\d+)d (?P<hours>\d+)h(?P<minutes>\d+)m(?P<seconds>\d+)s")
 
 
@@ -5,10 +5,12 @@
 from __future__ import division
 
 import copy
+import csv
 import re
 import socket
 import time
 from collections import defaultdict, namedtuple
+from contextlib import closing
 
 from six import PY2, iteritems
 from six.moves.urllib.parse import urlparse
@@ -16,9 +18,13 @@ from six.moves.urllib.parse import urlparse
 from datadog_checks.base import AgentCheck, is_affirmative, to_string
 from datadog_checks.base.errors import CheckException
 
-from .const import BUFSIZE, EVENT_TYPE, METRICS, SOURCE_TYPE_NAME, STATS_URL, UPTIME_PARSER, Services
+from .const import BUFSIZE, EVENT_TYPE, HTTP_CHUNK_SIZE, METRICS, SOURCE_TYPE_NAME, STATS_URL, UPTIME_PARSER, Services
 from .version_utils import get_version_from_http, get_version_from_socket
 
+# Fields whose values are used beyond metric submission, which are converted to numbers as soon as they are read.
+# The values of the other fields are only converted when they are submitted.
+CONVERTED_FIELDS = frozenset(('pxname', 'svname', 'status', 'addr', 'lastchg', 'scur', 'slim'))
+
 
 class StickTable(namedtuple("StickTable", ["name", "type", "size", "used"])):
 
@@ -68,6 +74,13 @@ class HAProxyCheckLegacy(AgentCheck):
         self.include_active_tag = self.instance.get('active_tag', False)
         self.process_events = self.instance.get('status_check', self.init_config.get('status_check', False))
 
+        # The fields of the last CSV header and the metrics they map to, see `_parse_header`
+        self._header = None
+        self._fields = []
+        self._converted_fields = []
+        self._metric_fields = []
+        self._metric_plans = {}
+
     def check(self, _):
         self.log.debug('Processing HAProxy data for %s', self.url)
         parsed_url = urlparse(self.url)
@@ -103,15 +116,23 @@ class HAProxyCheckLegacy(AgentCheck):
             self.log.debug("unable to find HAProxy version info")
 
     def _fetch_url_data(self):
-        """Hit a given http url and return the stats lines."""
+        """Hit a given http url and return an iterator over the stats lines."""
         # Try to fetch data from the stats URL
         url = "%s%s" % (self.url, STATS_URL)
 
         self.log.debug("Fetching haproxy stats from url: %s", url)
 
-        response = self.http.get(url)
+        response = self.http.get(url, stream=True)
         response.raise_for_status()
-        return self._decode_response(response)
+        return self._iter_response_lines(response)
+
+    @staticmethod
+    def _iter_response_lines(response):
+        # The stats of large deployments are several megabytes, so they are parsed as they are received
+        with closing(response):
+            for line in response.iter_lines(chunk_size=HTTP_CHUNK_SIZE):
+                # it only needs additional decoding in py3, so skip it if it's py2
+                yield line if PY2 else line.decode('utf-8')
 
     @staticmethod
     def _decode_response(response):
@@ -185,12 +206,13 @@ class HAProxyCheckLegacy(AgentCheck):
 
         sock.send(b';'.join(commands) + b"\r\n")
 
-        response = ""
+        chunks = []
         output = sock.recv(BUFSIZE)
         while output:
-            response += output.decode("ASCII")
+            chunks.append(output)
             output = sock.recv(BUFSIZE)
         sock.close()
+        response = b"".join(chunks).decode("ASCII")
 
         responses = [r.strip() for r in response.split('\n\n') if r.strip()]
 
@@ -233,73 +255,56 @@ class HAProxyCheckLegacy(AgentCheck):
 
     def _process_data(self, data):
         """Main data-processing loop. For each piece of useful data, we'll
-        either save a metric, save an event or both."""
+        either save a metric, save an event or both.
+
+        `data` is an iterable over the lines of the stats CSV, which is parsed in a single pass."""
 
         active_tag = []
         if self.include_active_tag:
+            # This is a membership test on the lines, so they must all be read first
+            data = list(data)
             active_tag.append("active:%s" % ('true' if 'act' in data else 'false'))
 
-        # Split the first line into an index of fields
+        # Quoted values may contain line breaks, which are dropped like any other line ending
+        rows = csv.reader(data)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        # The first line is an index of fields
         # The line looks like (broken up onto multiple lines)
         # "# pxname,svname,qcur,qmax,scur,smax,slim,
         # stot,bin,bout,dreq,dresp,ereq,econ,eresp,wretr,
         # wredis,status,weight,act,bck,chkfail,chkdown,lastchg,
         # downtime,qlimit,pid,iid,sid,throttle,lbtot,tracked,
         # type,rate,rate_lim,rate_max,"
-        fields = []
-        for f in data[0].split(','):
-            if f:
-                f = f.replace('# ', '')
-                fields.append(f.strip())
+        self._parse_header(header)
+        fields = list(zip(self._fields, self._converted_fields))
 
         self.hosts_statuses = defaultdict(int)
 
-        back_or_front = None
-
-        # Sanitize CSV, handle line breaks
-        data = self._sanitize_lines(data)
-
-        # Skip the first line, go backwards to set back_or_front
-        for line in data[:0:-1]:
-            if not line.strip():
+        # Servers are listed before the BACKEND aggregate of their proxy, which sets their back_or_front,
+        # so they are held until it is read. Those listed after the last aggregate have none.
+        servers = []
+        for row in rows:
+            if not row or (len(row) == 1 and not row[0].strip()):
                 continue
 
             # Store each line's values in a dictionary
-            data_dict = self._line_to_dict(fields, line)
+            data_dict = self._row_to_dict(fields, row)
 
             if self._is_aggregate(data_dict):
                 back_or_front = data_dict['svname']
+                for server_dict in servers:
+                    self._process_data_dict(server_dict, back_or_front, active_tag)
+                servers = []
 
-            self._update_data_dict(data_dict, back_or_front)
-
-            self._update_hosts_statuses_if_needed(data_dict)
-
-            # Clone the list to avoid extending the original
-            # which would carry over previous iteration tags
-            line_tags = list(self.custom_tags)
-
-            regex_tags = self._tag_from_regex(data_dict['pxname'])
-            if regex_tags:
-                line_tags.extend(regex_tags)
-
-            if self._should_process(data_dict):
-                # update status
-                # Send the list of data to the metric and event callbacks
-                self._process_metrics(
-                    data_dict,
-                    custom_tags=line_tags,
-                    active_tag=active_tag,
-                )
-            if self.process_events:
-                self._process_event(
-                    data_dict,
-                    custom_tags=line_tags,
-                )
-            if self.enable_service_check:
-                self._process_service_check(
-                    data_dict,
-                    custom_tags=line_tags,
-                )
+                self._process_data_dict(data_dict, back_or_front, active_tag)
+            else:
+                servers.append(data_dict)
+
+        for server_dict in servers:
+            self._process_data_dict(server_dict, None, active_tag)
 
         if self.collect_status_metrics:
             self._process_status_metric(
@@ -310,70 +315,85 @@ class HAProxyCheckLegacy(AgentCheck):
                 active_tag=active_tag,
             )
 
-        return data
+    def _process_data_dict(self, data_dict, back_or_front, active_tag):
+        self._update_data_dict(data_dict, back_or_front)
 
-    @staticmethod
-    def _sanitize_lines(data):
-        sanitized = []
+        self._update_hosts_statuses_if_needed(data_dict)
 
-        def char_count(line, char):
-            count = 0
+        # Clone the list to avoid extending the original
+        # which would carry over previous iteration tags
+        line_tags = list(self.custom_tags)
 
-            for c in line:
-                if c is char:
-                    count += 1
+        regex_tags = self._tag_from_regex(data_dict['pxname'])
+        if regex_tags:
+            line_tags.extend(regex_tags)
 
-            return count
+        if self._should_process(data_dict):
+            # update status
+            # Send the list of data to the metric and event callbacks
+            self._process_metrics(
+                data_dict,
+                custom_tags=line_tags,
+                active_tag=active_tag,
+            )
+        if self.process_events:
+            self._process_event(
+                data_dict,
+                custom_tags=line_tags,
+            )
+        if self.enable_service_check:
+            self._process_service_check(
+                data_dict,
+                custom_tags=line_tags,
+            )
 
-        clean = ''
-        double_quotes = 0
-        for line in data:
-            double_quotes += char_count(line, '"')
-            clean += line
+    def _parse_header(self, header):
+        """Index the fields of the CSV header and the metrics they map to, unless the header did not change."""
+        if header == self._header:
+            return
 
-            if double_quotes % 2 == 0:
-                sanitized.append(clean.replace('\n', '').replace('\r', ''))
-                double_quotes = 0
-                clean = ''
+        self._header = header
+        self._fields = [f.replace('# ', '').strip() for f in header if f]
+        self._converted_fields = [field in CONVERTED_FIELDS for field in self._fields]
 
-        return sanitized
+        # `spct` is computed from the other fields, see `_update_data_dict`
+        self._metric_fields = []
+        for field in self._fields + ['spct']:
+            metric = METRICS.get(field)
+            if metric:
+                for metric_type, suffix in metric if isinstance(metric, list) else [metric]:
+                    self._metric_fields.append((field, metric_type, suffix))
 
-    def _line_to_dict(self, fields, line):
+        self._metric_plans = {}
+
+    def _get_metric_plan(self, back_or_front):
+        """Return the (field, metric_type, metric_name) to submit for each line of the given type."""
+        plan = self._metric_plans.get(back_or_front)
+        if plan is None:
+            prefix = "haproxy.%s." % back_or_front.lower()
+            plan = [(field, metric_type, prefix + suffix) for field, metric_type, suffix in self._metric_fields]
+            self._metric_plans[back_or_front] = plan
+
+        return plan
+
+    def _row_to_dict(self, fields, row):
+        """Map the values of a row to the (field, converted) pairs of the header, skipping empty values."""
         data_dict = {}
-        values = line.split(',')
-        if len(values) > len(fields):
-            values = self._gather_quoted_values(values)
-        for i, val in enumerate(values):
+        for (field, converted), val in zip(fields, row):
             if val:
-                try:
-                    # Try converting to a long, if failure, just leave it
-                    val = float(val)
-                except Exception:
-                    pass
-                data_dict[fields[i]] = val
+                if converted:
+                    try:
+                        # Try converting to a long, if failure, just leave it
+                        val = float(val)
+                    except Exception:
+                        pass
+                data_dict[field] = val
 
         if 'status' in data_dict:
             data_dict['status'] = self._normalize_status(data_dict['status'])
 
         return data_dict
 
-    @staticmethod
-    def _gather_quoted_values(values):
-        gathered_values = []
-        previous = ''
-        for val in values:
-            if val.startswith('"') and not val.endswith('"'):
-                previous = val
-            elif previous:
-                if val.endswith('"'):
-                    gathered_values.append(previous + val)
-                    previous = ''
-                else:
-                    previous += val
-            else:
-                gathered_values.append(val)
-        return gathered_values
-
     @staticmethod
     def _update_data_dict(data_dict, back_or_front):
         """
@@ -589,16 +609,11 @@ class HAProxyCheckLegacy(AgentCheck):
             if data.get('addr'):
                 tags.append('server_address:{}'.format(data.get('addr')))
 
-        for key, value in data.items():
-            if METRICS.get(key):
-                if isinstance(METRICS[key], list):
-                    for metric_tuple in METRICS[key]:
-                        self._submit_metric_tuple(metric_tuple[0], metric_tuple[1], back_or_front, value, tags)
-                else:
-                    self._submit_metric_tuple(METRICS[key][0], METRICS[key][1], back_or_front, value, tags)
+        for field, metric_type, name in self._get_metric_plan(back_or_front):
+            if field in data:
+                self._submit_haproxy_metric(metric_type, name, data[field], tags)
 
-    def _submit_metric_tuple(self, metric_type, suffix, back_or_front, value, tags):
-        name = "haproxy.%s.%s" % (back_or_front.lower(), suffix)
+    def _submit_haproxy_metric(self, metric_type, name, value, tags):
         try:
             if metric_type == 'rate':
                 self.rate(name, float(value), tags=tags)
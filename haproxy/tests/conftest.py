@@ -14,6 +14,7 @@ import requests
 from packaging import version
 
 from datadog_checks.dev import TempDir, WaitFor, docker_run
+from datadog_checks.dev.http import MockResponse
 from datadog_checks.haproxy import HAProxyCheck
 from datadog_checks.haproxy.metrics import METRIC_MAP
 
@@ -130,7 +131,7 @@ def haproxy_mock():
     filepath = os.path.join(HERE, 'fixtures', 'mock_data')
     with open(filepath, 'rb') as f:
         data = f.read()
-    p = mock.patch('requests.get', return_value=mock.Mock(content=data))
+    p = mock.patch('requests.get', return_value=MockResponse(content=data))
     yield p.start()
     p.stop()
 
@@ -148,7 +149,7 @@ def haproxy_mock_evil():
     filepath = os.path.join(HERE, 'fixtures', 'mock_data_evil')
     with open(filepath, 'rb') as f:
         data = f.read()
-    p = mock.patch('requests.get', return_value=mock.Mock(content=data))
+    p = mock.patch('requests.get', return_value=MockResponse(content=data))
     yield p.start()
     p.stop()
 
@@ -158,7 +159,7 @@ def haproxy_mock_enterprise_version_info():
     filepath = os.path.join(HERE, 'fixtures', 'enterprise_version_info.html')
     with open(filepath, 'rb') as f:
         data = f.read()
-    with mock.patch('requests.get', return_value=mock.Mock(content=data)) as p:
+    with mock.patch('requests.get', return_value=MockResponse(content=data)) as p:
         yield p
 
 
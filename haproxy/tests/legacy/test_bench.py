@@ -0,0 +1,49 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under Simplified BSD License (see LICENSE)
+import os
+
+import mock
+import pytest
+
+from datadog_checks.dev.http import MockResponse
+from datadog_checks.haproxy import HAProxyCheck
+
+from . import common
+
+pytestmark = [common.requires_legacy_environment]
+
+
+def generate_stats(backends=200, servers=100):
+    """Generate the stats CSV of `backends` proxies with `servers` servers each, based on the mock data."""
+    with open(os.path.join(os.path.dirname(common.HERE), 'fixtures', 'mock_data')) as f:
+        lines = f.read().splitlines()
+
+    header = lines[0]
+    frontend, server, backend = lines[3].split(',', 1)[1], lines[4].split(',', 2)[2], lines[9].split(',', 1)[1]
+    stats = [header]
+    for i in range(backends):
+        proxy = 'proxy_{}'.format(i)
+        stats.append('{},{}'.format(proxy, frontend))
+        stats.extend('{},srv_{},{}'.format(proxy, j, server) for j in range(servers))
+        stats.append('{},{}'.format(proxy, backend))
+
+    return '\n'.join(stats).encode('utf-8')
+
+
+@pytest.mark.parametrize('collect_aggregates_only', [True, False], ids=['aggregates', 'servers'])
+def test_process_stats(benchmark, collect_aggregates_only):
+    instance = {
+        'url': 'http://localhost/admin?stats',
+        'collect_aggregates_only': collect_aggregates_only,
+        'collect_status_metrics': True,
+        'enable_service_check': True,
+        'disable_legacy_service_tag': True,
+    }
+    check = HAProxyCheck('haproxy', {}, [instance])
+
+    with mock.patch('requests.get', return_value=MockResponse(content=generate_stats())):
+        # Run once to get the parsing of the header out of the way.
+        check.check(instance)
+
+        benchmark(check.check, instance)
@@ -5,6 +5,8 @@ from collections import defaultdict
 import mock
 import pytest
 
+from datadog_checks.dev.http import MockResponse
+
 from . import common
 
 pytestmark = [common.requires_legacy_environment]
@@ -430,7 +432,7 @@ def test_version_failure(aggregator, check, datadog_agent):
     with open(filepath, 'rb') as f:
         data = f.read()
     with mock.patch('requests.get') as m:
-        m.side_effect = [RuntimeError("Ooops"), mock.Mock(content=data)]
+        m.side_effect = [RuntimeError("Ooops"), MockResponse(content=data)]
         haproxy_check.check(config)
 
     # Version failed, but we should have some metrics
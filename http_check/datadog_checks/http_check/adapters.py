@@ -1,12 +1,15 @@
 # (C) Datadog, Inc. 2018-present
 # All rights reserved
 # Licensed under a 3-clause BSD style license (see LICENSE)
+import socket
 import ssl
+import threading
 import warnings
+from timeit import default_timer
 
 import urllib3
 from requests.adapters import HTTPAdapter
-from urllib3.exceptions import SecurityWarning
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError, SecurityWarning
 from urllib3.packages.ssl_match_hostname import match_hostname
 from urllib3.util import ssl_
 
@@ -105,3 +108,115 @@ class WeakCiphersAdapter(HTTPAdapter):
         self.poolmanager = WeakCiphersPoolManager(
             num_pools=connections, maxsize=maxsize, block=block, strict=True, **pool_kwargs
         )
+
+
+class ConnectionInfo(object):
+    """Timing breakdown, in seconds, and verified peer certificate of a new connection."""
+
+    __slots__ = ('dns_time', 'connect_time', 'tls_time', 'peer_cert')
+
+    def __init__(self):
+        self.dns_time = None
+        self.connect_time = None
+        self.tls_time = None
+        self.peer_cert = None
+
+    @property
+    def handshake_time(self):
+        return sum(t for t in (self.dns_time, self.connect_time, self.tls_time) if t is not None)
+
+
+class ConnectionInfoRecorder(threading.local):
+    """The first new connection to every (host, port) during the current request, per thread."""
+
+    def __init__(self):
+        self.connections = {}
+
+    def record(self, host, port, info):
+        self.connections.setdefault((host, port), info)
+
+    def pop(self):
+        connections, self.connections = self.connections, {}
+        return connections
+
+
+CONNECTION_INFO = ConnectionInfoRecorder()
+
+
+class InspectedConnectionMixin(object):
+    def _new_conn(self):
+        self.connection_info = ConnectionInfo()
+        dns_host = getattr(self, '_dns_host', None)
+        if dns_host is None:
+            return super(InspectedConnectionMixin, self)._new_conn()
+
+        # Resolve the host ourselves to time it, then connect to every address in turn like urllib3 would
+        start_time = default_timer()
+        try:
+            addresses = [address[4][0] for address in socket.getaddrinfo(dns_host, self.port, 0, socket.SOCK_STREAM)]
+        except socket.gaierror:
+            # Let urllib3 report the resolution error
+            return super(InspectedConnectionMixin, self)._new_conn()
+        self.connection_info.dns_time = default_timer() - start_time
+
+        start_time = default_timer()
+        try:
+            for i, address in enumerate(addresses, 1):
+                self._dns_host = address
+                try:
+                    conn = super(InspectedConnectionMixin, self)._new_conn()
+                except (ConnectTimeoutError, NewConnectionError):
+                    if i == len(addresses):
+                        raise
+                else:
+                    self.connection_info.connect_time = default_timer() - start_time
+                    return conn
+        finally:
+            self._dns_host = dns_host
+
+    def connect(self):
+        start_time = default_timer()
+        super(InspectedConnectionMixin, self).connect()
+        elapsed = default_timer() - start_time
+
+        info = self.connection_info
+        if isinstance(self, urllib3.connection.HTTPSConnection):
+            info.tls_time = max(elapsed - info.handshake_time, 0)
+
+            # Only certificates that were validated can be relied on, the verification itself is part of the result
+            if getattr(self, 'is_verified', False):
+                info.peer_cert = self.sock.getpeercert()
+
+        CONNECTION_INFO.record(
+            getattr(self, '_tunnel_host', None) or self.host, getattr(self, '_tunnel_port', None) or self.port, info
+        )
+
+
+class InspectedHTTPConnection(InspectedConnectionMixin, urllib3.connection.HTTPConnection):
+    pass
+
+
+class InspectedHTTPSConnection(InspectedConnectionMixin, urllib3.connection.HTTPSConnection):
+    pass
+
+
+class InspectedHTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
+    ConnectionCls = InspectedHTTPConnection
+
+
+class InspectedHTTPSConnectionPool(urllib3.connectionpool.HTTPSConnectionPool):
+    ConnectionCls = InspectedHTTPSConnection
+
+
+class InspectingAdapter(HTTPAdapter):
+    """
+    Transport adapter recording the timing breakdown and peer certificate of new connections in
+    `CONNECTION_INFO`, so that the certificate does not have to be fetched over another connection.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(InspectingAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': InspectedHTTPConnectionPool,
+            'https': InspectedHTTPSConnectionPool,
+        }
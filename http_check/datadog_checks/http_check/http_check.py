@@ -10,12 +10,13 @@ import time
 from datetime import datetime
 
 import requests
-from six import PY2, string_types
+from requests.adapters import HTTPAdapter
+from six import PY2, PY3, string_types
 from six.moves.urllib.parse import urlparse
 
-from datadog_checks.base import AgentCheck, ensure_unicode
+from datadog_checks.base import AgentCheck, ConfigurationError, ensure_unicode, is_affirmative
 
-from .adapters import WeakCiphersAdapter, WeakCiphersHTTPSConnection
+from .adapters import CONNECTION_INFO, InspectingAdapter, WeakCiphersAdapter, WeakCiphersHTTPSConnection
 from .config import DEFAULT_EXPECTED_CODE, from_instance
 from .utils import get_ca_certs_path
 
@@ -29,14 +30,23 @@ DEFAULT_EXPIRE_WARNING = DEFAULT_EXPIRE_DAYS_WARNING * 24 * 3600
 DEFAULT_EXPIRE_CRITICAL = DEFAULT_EXPIRE_DAYS_CRITICAL * 24 * 3600
 MESSAGE_LENGTH = 2500  # https://docs.datadoghq.com/api/v1/service-checks/
 
+# How long, in seconds, a verified peer certificate may be reused when no new connection was made to its host
+PEER_CERT_CACHE_TTL = 300
+
 DATA_METHODS = ['POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS']
 
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
 
 class HTTPCheck(AgentCheck):
     SOURCE_TYPE_NAME = 'system'
     SC_STATUS = 'http.can_connect'
     SC_SSL_CERT = 'http.ssl_cert'
 
+    # Verified peer certificates shared by all instances
+    # Expected format: {(host, port, verify): (cert, timestamp)}
+    peer_certs = {}
+
     DEFAULT_HTTP_CONFIG_REMAPPER = {
         'client_cert': {'name': 'tls_cert'},
         'client_key': {'name': 'tls_private_key'},
@@ -54,6 +64,19 @@ class HTTPCheck(AgentCheck):
         if not self.ca_certs:
             self.ca_certs = get_ca_certs_path()
 
+        self.probe = None
+        self._request_args = None
+        if self.instance and is_affirmative(self.instance.get('use_probe_scheduler', False)):
+            if not PY3:
+                raise ConfigurationError('Setting `use_probe_scheduler` is only supported on Python 3')
+
+            from datadog_checks.base.utils.probes import ScheduledProbe
+
+            # There is no asynchronous HTTP client, so requests are sent from the thread pool of the scheduler
+            self.probe = ScheduledProbe(
+                self.send_scheduled_request, blocking=True, jitter=float(self.instance.get('probe_jitter', 1))
+            )
+
     def check(self, instance):
         (
             addr,
@@ -77,8 +100,7 @@ class HTTPCheck(AgentCheck):
         ) = from_instance(instance, self.ca_certs)
         timeout = self.http.options['timeout'][0]
         start = time.time()
-        # allows default headers to be included based on `include_default_headers` flag
-        self.http.options['headers'] = headers
+        request_args = (addr, method, data, headers, weakcipher, allow_redirects, stream)
 
         def send_status_up(logMsg):
             # TODO: A6 log needs bytes and cannot handle unicode
@@ -99,35 +121,24 @@ class HTTPCheck(AgentCheck):
         service_checks = []
         service_checks_tags = self._get_service_checks_tags(instance)
         r = None
+        connections = {}
         try:
             parsed_uri = urlparse(addr)
-            self.log.debug("Connecting to %s", addr)
-            self.http.session.trust_env = False
-            if weakcipher:
-                base_addr = '{uri.scheme}://{uri.netloc}/'.format(uri=parsed_uri)
-                self.http.session.mount(base_addr, WeakCiphersAdapter())
-                self.log.debug(
-                    "Weak Ciphers will be used for %s. Supported Cipherlist: %s",
-                    base_addr,
-                    WeakCiphersHTTPSConnection.SUPPORTED_CIPHERS,
-                )
-
-            # Add 'Content-Type' for non GET requests when they have not been specified in custom headers
-            if method.upper() in DATA_METHODS and not headers.get('Content-Type'):
-                self.http.options['headers']['Content-Type'] = 'application/x-www-form-urlencoded'
-
-            http_method = method.lower()
-            if http_method == 'options':
-                http_method = 'options_method'
-
-            r = getattr(self.http, http_method)(
-                addr,
-                persist=True,
-                allow_redirects=allow_redirects,
-                stream=stream,
-                json=data if method.upper() in DATA_METHODS and isinstance(data, dict) else None,
-                data=data if method.upper() in DATA_METHODS and isinstance(data, string_types) else None,
-            )
+            if self.probe is None:
+                r, connections = self.send_request(*request_args)
+            else:
+                # The request is sent by the shared probe scheduler, this reports the last completed one
+                self._request_args = request_args
+                result = self.probe.poll()
+                if result is None:
+                    self.log.debug("No completed request to %s yet", addr)
+                    return
+
+                start -= result.duration
+                if result.error is not None:
+                    raise result.error
+
+                r, connections = result.value
         except (socket.timeout, requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
             length = int((time.time() - start) * 1000)
             self.log.info("%s is DOWN, error: %s. Connection failed after %s ms", addr, e, length)
@@ -169,6 +180,12 @@ class HTTPCheck(AgentCheck):
             if response_time and not service_checks:
                 self.gauge('network.http.response_time', r.elapsed.total_seconds(), tags=tags_list)
 
+                connection = connections.get(
+                    (parsed_uri.hostname, parsed_uri.port or DEFAULT_PORTS.get(parsed_uri.scheme))
+                )
+                if connection is not None:
+                    self.submit_timing_breakdown(connection, r.history[0] if r.history else r, tags_list)
+
             content = r.text
 
             # Check HTTP response status code
@@ -222,9 +239,8 @@ class HTTPCheck(AgentCheck):
         finally:
             if r is not None:
                 r.close()
-            # resets the wrapper Session object
-            self.http._session.close()
-            self.http._session = None
+            if self.probe is None:
+                self.reset_session()
 
         # Report status metrics as well
         if service_checks:
@@ -236,7 +252,10 @@ class HTTPCheck(AgentCheck):
             self.gauge('network.http.cant_connect', cant_status, tags=tags_list)
 
         if ssl_expire and parsed_uri.scheme == "https":
-            status, days_left, seconds_left, msg = self.check_cert_expiration(instance, timeout, instance_ca_certs)
+            peer_cert = self.get_peer_cert(instance, connections, r is not None)
+            status, days_left, seconds_left, msg = self.check_cert_expiration(
+                instance, timeout, instance_ca_certs, peer_cert
+            )
             tags_list = list(tags)
             tags_list.append('url:{}'.format(addr))
             tags_list.append("instance:{}".format(instance_name))
@@ -249,6 +268,109 @@ class HTTPCheck(AgentCheck):
             sc_name, status, msg = status
             self.report_as_service_check(sc_name, status, service_checks_tags, msg)
 
+    def send_request(self, addr, method, data, headers, weakcipher, allow_redirects, stream):
+        """Send the request of the instance, returning the response and the new connections it was sent over."""
+        # allows default headers to be included based on `include_default_headers` flag
+        self.http.options['headers'] = headers
+
+        parsed_uri = urlparse(addr)
+        self.log.debug("Connecting to %s", addr)
+        self.http.session.trust_env = False
+
+        # Only replace the default transport adapters, see `RequestsWrapper.session`
+        for prefix, adapter in list(self.http.session.adapters.items()):
+            if type(adapter) is HTTPAdapter:
+                self.http.session.mount(prefix, InspectingAdapter())
+
+        if weakcipher:
+            base_addr = '{uri.scheme}://{uri.netloc}/'.format(uri=parsed_uri)
+            self.http.session.mount(base_addr, WeakCiphersAdapter())
+            self.log.debug(
+                "Weak Ciphers will be used for %s. Supported Cipherlist: %s",
+                base_addr,
+                WeakCiphersHTTPSConnection.SUPPORTED_CIPHERS,
+            )
+
+        # Add 'Content-Type' for non GET requests when they have not been specified in custom headers
+        if method.upper() in DATA_METHODS and not headers.get('Content-Type'):
+            self.http.options['headers']['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        http_method = method.lower()
+        if http_method == 'options':
+            http_method = 'options_method'
+
+        CONNECTION_INFO.pop()
+        try:
+            r = getattr(self.http, http_method)(
+                addr,
+                persist=True,
+                allow_redirects=allow_redirects,
+                stream=stream,
+                json=data if method.upper() in DATA_METHODS and isinstance(data, dict) else None,
+                data=data if method.upper() in DATA_METHODS and isinstance(data, string_types) else None,
+            )
+        finally:
+            connections = CONNECTION_INFO.pop()
+
+        return r, connections
+
+    def send_scheduled_request(self):
+        try:
+            r, connections = self.send_request(*self._request_args)
+            try:
+                # Read the body here so that the check run does not block on it
+                r.content
+            finally:
+                r.close()
+
+            return r, connections
+        finally:
+            self.reset_session()
+
+    def reset_session(self):
+        # resets the wrapper Session object
+        if self.http._session is not None:
+            self.http._session.close()
+            self.http._session = None
+
+    def submit_timing_breakdown(self, connection, response, tags):
+        if connection.dns_time is not None:
+            self.gauge('network.http.dns_time', connection.dns_time, tags=tags)
+        if connection.connect_time is not None:
+            self.gauge('network.http.connect_time', connection.connect_time, tags=tags)
+        if connection.tls_time is not None:
+            self.gauge('network.http.tls_time', connection.tls_time, tags=tags)
+
+        # The elapsed time of the response starts before the connection is established
+        time_to_first_byte = max(response.elapsed.total_seconds() - connection.handshake_time, 0)
+        self.gauge('network.http.time_to_first_byte', time_to_first_byte, tags=tags)
+
+    def get_peer_cert(self, instance, connections, request_sent):
+        """
+        Return the certificate the host presented during the main request, if it was verified with the same
+        server name, or one that was recently verified for the same host if the request reused a connection.
+        """
+        o = urlparse(instance.get('url'))
+        if instance.get('ssl_server_name', o.hostname) != o.hostname:
+            return None
+
+        host, port = o.hostname, o.port or 443
+        cache_key = (host, port, self.http.options['verify'])
+        connection = connections.get((host, port))
+        if connection is not None:
+            if connection.peer_cert:
+                self.peer_certs[cache_key] = (connection.peer_cert, time.time())
+                return connection.peer_cert
+
+            # A new connection was made without verifying the certificate
+            return None
+
+        # Fall back to a new connection when the request failed before the handshake
+        if request_sent and cache_key in self.peer_certs:
+            peer_cert, timestamp = self.peer_certs[cache_key]
+            if time.time() - timestamp < PEER_CERT_CACHE_TTL:
+                return peer_cert
+
     def _get_service_checks_tags(self, instance):
         instance_name = self.normalize_tag(instance['name'])
         url = instance.get('url', None)
@@ -277,7 +399,7 @@ class HTTPCheck(AgentCheck):
 
         self.service_check(sc_name, status, tags=tags, message=msg)
 
-    def check_cert_expiration(self, instance, timeout, instance_ca_certs):
+    def check_cert_expiration(self, instance, timeout, instance_ca_certs, peer_cert=None):
         # thresholds expressed in seconds take precedence over those expressed in days
         seconds_warning = (
             int(instance.get('seconds_warning', 0))
@@ -297,15 +419,18 @@ class HTTPCheck(AgentCheck):
         port = o.port or 443
 
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(float(timeout))
-            sock.connect((host, port))
+            if peer_cert is not None:
+                cert = peer_cert
+            else:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.settimeout(float(timeout))
+                sock.connect((host, port))
 
-            context = self.get_tls_context()
-            context.load_verify_locations(instance_ca_certs)
+                context = self.get_tls_context()
+                context.load_verify_locations(instance_ca_certs)
 
-            ssl_sock = context.wrap_socket(sock, server_hostname=server_name)
-            cert = ssl_sock.getpeercert()
+                ssl_sock = context.wrap_socket(sock, server_hostname=server_name)
+                cert = ssl_sock.getpeercert()
 
         except Exception as e:
             msg = str(e)
@@ -278,6 +278,12 @@ def test_data_methods(aggregator, http_check):
         aggregator.assert_metric('network.http.cant_connect', tags=url_tag + instance_tag, value=0.0, count=1)
         aggregator.assert_metric('network.http.response_time', tags=url_tag + instance_tag, count=1)
 
+        # Every run establishes a new connection
+        aggregator.assert_metric('network.http.dns_time', tags=url_tag + instance_tag, count=1)
+        aggregator.assert_metric('network.http.connect_time', tags=url_tag + instance_tag, count=1)
+        aggregator.assert_metric('network.http.tls_time', count=0)
+        aggregator.assert_metric('network.http.time_to_first_byte', tags=url_tag + instance_tag, count=1)
+
         # Assert coverage for this check on this instance
         aggregator.assert_all_metrics_covered()
         aggregator.reset()
@@ -3,10 +3,17 @@
 # (C) Datadog, Inc. 2018-present
 # All rights reserved
 # Licensed under a 3-clause BSD style license (see LICENSE)
+from datetime import datetime, timedelta
 
 import mock
+import pytest
+import requests
+from six import PY2
 
+from datadog_checks.base import AgentCheck
+from datadog_checks.dev.http import MockResponse
 from datadog_checks.http_check import HTTPCheck, http_check
+from datadog_checks.http_check.adapters import ConnectionInfo
 
 
 def test__init__():
@@ -81,3 +88,78 @@ def test_message_when_content_is_disabled():
 
     assert message == error_message
     assert content not in message
+
+
+def test_check_cert_expiration_peer_cert():
+    check = HTTPCheck('http_check', {'ca_certs': 'foo'}, [{}])
+    peer_cert = {'notAfter': (datetime.utcnow() + timedelta(days=30)).strftime('%b %d %H:%M:%S %Y GMT')}
+
+    # The certificate of the main request is used instead of opening another connection
+    with mock.patch('socket.socket', side_effect=Exception('no connection')):
+        status, days_left, seconds_left, msg = check.check_cert_expiration(
+            {'url': 'https://example.com'}, 10, 'foo', peer_cert
+        )
+
+    assert status == AgentCheck.OK
+    assert days_left == 29
+    assert msg == 'Days left: 29'
+
+
+def test_get_peer_cert():
+    check = HTTPCheck('http_check', {'ca_certs': 'foo'}, [{}])
+    check.peer_certs.clear()
+    instance = {'url': 'https://example.com/health'}
+    peer_cert = {'notAfter': 'Jan  1 00:00:00 2050 GMT'}
+
+    # Failed before the handshake
+    assert check.get_peer_cert(instance, {}, False) is None
+
+    # Unverified connection
+    assert check.get_peer_cert(instance, {('example.com', 443): ConnectionInfo()}, True) is None
+
+    connection = ConnectionInfo()
+    connection.peer_cert = peer_cert
+    assert check.get_peer_cert(instance, {('example.com', 443): connection}, True) == peer_cert
+
+    # Reused connection
+    assert check.get_peer_cert(instance, {}, True) == peer_cert
+    assert check.get_peer_cert(instance, {}, False) is None
+    assert check.get_peer_cert({'url': 'https://example.com:8443'}, {}, True) is None
+
+    # Another server name is requested
+    instance = {'url': 'https://example.com/health', 'ssl_server_name': 'example.org'}
+    assert check.get_peer_cert(instance, {('example.com', 443): connection}, True) is None
+
+    check.peer_certs.clear()
+
+
+@pytest.mark.skipif(PY2, reason='The probe scheduler is only available on Python 3')
+@pytest.mark.parametrize(
+    'send_request, status, message',
+    [
+        pytest.param({'return_value': (MockResponse('UP'), {})}, AgentCheck.OK, None, id='up'),
+        pytest.param(
+            {'side_effect': requests.exceptions.ConnectionError('refused')},
+            AgentCheck.CRITICAL,
+            'refused. Connection failed after',
+            id='down',
+        ),
+    ],
+)
+def test_probe_scheduler(aggregator, send_request, status, message):
+    instance = {'name': 'foo', 'url': 'http://example.com', 'use_probe_scheduler': True, 'probe_jitter': 0}
+    check = HTTPCheck('http_check', {'ca_certs': 'foo'}, [instance])
+
+    with mock.patch.object(check, 'send_request', **send_request):
+        # The first run only sends the request, the next one reports it
+        check.check(instance)
+        assert not aggregator.service_checks(HTTPCheck.SC_STATUS)
+
+        check.probe.future.result(timeout=5)
+        check.check(instance)
+        check.probe.future.result(timeout=5)
+
+    aggregator.assert_service_check(HTTPCheck.SC_STATUS, status=status, count=1)
+    aggregator.assert_metric('network.http.can_connect', value=1 if status == AgentCheck.OK else 0)
+    if message:
+        assert aggregator.service_checks(HTTPCheck.SC_STATUS)[0].message.startswith(message)
@@ -1,6 +1,8 @@
 # (C) Datadog, Inc. 2019-present
 # All rights reserved
 # Licensed under Simplified BSD License (see LICENSE)
+from kafka import errors as kafka_errors
+
 DEFAULT_KAFKA_TIMEOUT = 5
 
 CONTEXT_UPPER_BOUND = 500
@@ -13,3 +15,13 @@ KAFKA_INTERNAL_TOPICS = {
 }
 
 BROKER_REQUESTS_BATCH_SIZE = 30
+
+# Matches the kafka-python default for `max_in_flight_requests_per_connection`, sending more than that to a broker only
+# makes the client spin until a slot frees up
+MAX_IN_FLIGHT_REQUESTS_PER_BROKER = 5
+
+# Errors returned by a broker that is no longer the coordinator for a consumer group
+GROUP_COORDINATOR_ERRORS = (
+    kafka_errors.NotCoordinatorForGroupError,
+    kafka_errors.GroupCoordinatorNotAvailableError,
+)
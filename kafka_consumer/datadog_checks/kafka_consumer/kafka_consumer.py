@@ -1,7 +1,7 @@
 # (C) Datadog, Inc. 2019-present
 # All rights reserved
 # Licensed under Simplified BSD License (see LICENSE)
-from collections import defaultdict
+from collections import defaultdict, deque
 from time import time
 
 from kafka import KafkaAdminClient, KafkaClient
@@ -12,8 +12,16 @@ from six import string_types
 
 from datadog_checks.base import AgentCheck, ConfigurationError, is_affirmative
 
-from .constants import BROKER_REQUESTS_BATCH_SIZE, CONTEXT_UPPER_BOUND, DEFAULT_KAFKA_TIMEOUT, KAFKA_INTERNAL_TOPICS
+from .constants import (
+    BROKER_REQUESTS_BATCH_SIZE,
+    CONTEXT_UPPER_BOUND,
+    DEFAULT_KAFKA_TIMEOUT,
+    GROUP_COORDINATOR_ERRORS,
+    KAFKA_INTERNAL_TOPICS,
+    MAX_IN_FLIGHT_REQUESTS_PER_BROKER,
+)
 from .legacy_0_10_2 import LegacyKafkaCheck_0_10_2
+from .offsets import CompactOffsetStore, OffsetStore
 
 
 class KafkaCheck(AgentCheck):
@@ -68,6 +76,18 @@ class KafkaCheck(AgentCheck):
         )
         self._consumer_groups = self.instance.get('consumer_groups', {})
         self._broker_requests_batch_size = self.instance.get('broker_requests_batch_size', BROKER_REQUESTS_BATCH_SIZE)
+        self._max_in_flight_requests_per_broker = int(
+            self.instance.get('max_in_flight_requests_per_broker', MAX_IN_FLIGHT_REQUESTS_PER_BROKER)
+        )
+        if self._max_in_flight_requests_per_broker < 1:
+            raise ConfigurationError("max_in_flight_requests_per_broker must be a positive integer")
+        # Group coordinators rarely move, so remember them across check runs to skip the FindCoordinatorRequests.
+        # Expected format: {consumer_group: coordinator_id}
+        self._group_coordinators = {}
+        if is_affirmative(self.instance.get('compact_offset_store', False)):
+            self._offsets = CompactOffsetStore(self._custom_tags)
+        else:
+            self._offsets = OffsetStore(self._custom_tags)
         self._kafka_client = None
 
     @property
@@ -85,8 +105,7 @@ class KafkaCheck(AgentCheck):
 
     def check(self, instance):
         """The main entrypoint of the check."""
-        self._consumer_offsets = {}  # Expected format: {(consumer_group, topic, partition): offset}
-        self._highwater_offsets = {}  # Expected format: {(topic, partition): offset}
+        self._offsets.reset()
 
         # For calculating consumer lag, we have to fetch both the consumer offset and the broker highwater offset.
         # There's a potential race condition because whichever one we check first may be outdated by the time we check
@@ -103,7 +122,7 @@ class KafkaCheck(AgentCheck):
 
         # Fetch the broker highwater offsets
         try:
-            if len(self._consumer_offsets) < self._context_limit:
+            if self._offsets.consumer_offsets_count() < self._context_limit:
                 self._get_highwater_offsets()
             else:
                 self.warning("Context limit reached. Skipping highwater offset collection.")
@@ -112,7 +131,7 @@ class KafkaCheck(AgentCheck):
             # Unlike consumer offsets, fail immediately because we can't calculate consumer lag w/o highwater_offsets
             raise
 
-        total_contexts = len(self._consumer_offsets) + len(self._highwater_offsets)
+        total_contexts = self._offsets.consumer_offsets_count() + self._offsets.highwater_offsets_count()
         if total_contexts >= self._context_limit:
             self.warning(
                 """Discovered %s metric contexts - this exceeds the maximum number of %s contexts permitted by the
@@ -124,7 +143,7 @@ class KafkaCheck(AgentCheck):
 
         # Report the metrics
         self._report_highwater_offsets(self._context_limit)
-        self._report_consumer_offsets_and_lag(self._context_limit - len(self._highwater_offsets))
+        self._report_consumer_offsets_and_lag(self._context_limit - self._offsets.highwater_offsets_count())
 
         self._collect_broker_metadata()
 
@@ -191,7 +210,7 @@ class KafkaCheck(AgentCheck):
         # which this run of the check has at least once saved consumer offset. This is later used as a filter for
         # excluding partitions.
         if not self._monitor_all_broker_highwatermarks:
-            tps_with_consumer_offset = {(topic, partition) for (_, topic, partition) in self._consumer_offsets}
+            tps_with_consumer_offset = self._offsets.consumer_topic_partitions()
 
         for batch in self.batchify(self.kafka_client._client.cluster.brokers(), self._broker_requests_batch_size):
             for broker in batch:
@@ -227,14 +246,14 @@ class KafkaCheck(AgentCheck):
             self.kafka_client._wait_for_futures(highwater_futures)
 
     def _highwater_offsets_callback(self, response):
-        """Callback that parses an OffsetFetchResponse and saves it to the highwater_offsets dict."""
+        """Callback that parses an OffsetFetchResponse and saves the highwater offsets."""
         if type(response) not in OffsetResponse:
             raise RuntimeError("response type should be OffsetResponse, but instead was %s." % type(response))
         for topic, partitions_data in response.topics:
             for partition, error_code, offsets in partitions_data:
                 error_type = kafka_errors.for_code(error_code)
                 if error_type is kafka_errors.NoError:
-                    self._highwater_offsets[(topic, partition)] = offsets[0]
+                    self._offsets.set_highwater_offset(topic, partition, offsets[0])
                 elif error_type is kafka_errors.NotLeaderForPartitionError:
                     self.log.warning(
                         "Kafka broker returned %s (error_code %s) for topic %s, partition: %s. This should only happen "
@@ -265,9 +284,7 @@ class KafkaCheck(AgentCheck):
     def _report_highwater_offsets(self, contexts_limit):
         """Report the broker highwater offsets."""
         reported_contexts = 0
-        for (topic, partition), highwater_offset in self._highwater_offsets.items():
-            broker_tags = ['topic:%s' % topic, 'partition:%s' % partition]
-            broker_tags.extend(self._custom_tags)
+        for _topic, _partition, highwater_offset, broker_tags in self._offsets.highwater_offsets():
             self.gauge('broker_offset', highwater_offset, tags=broker_tags)
             reported_contexts += 1
             if reported_contexts == contexts_limit:
@@ -276,18 +293,24 @@ class KafkaCheck(AgentCheck):
     def _report_consumer_offsets_and_lag(self, contexts_limit):
         """Report the consumer offsets and consumer lag."""
         reported_contexts = 0
-        for (consumer_group, topic, partition), consumer_offset in self._consumer_offsets.items():
+        # `partitions_for_topic` builds a new set on every call, so look it up once per topic rather than per partition
+        partitions_by_topic = {}
+        consumer_offsets = self._offsets.consumer_offsets()
+        for consumer_group, topic, partition, consumer_offset, consumer_lag, consumer_group_tags in consumer_offsets:
             if reported_contexts >= contexts_limit:
                 return
-            consumer_group_tags = ['topic:%s' % topic, 'partition:%s' % partition, 'consumer_group:%s' % consumer_group]
-            consumer_group_tags.extend(self._custom_tags)
-            if partition in self.kafka_client._client.cluster.partitions_for_topic(topic):
+            topic_partitions = partitions_by_topic.get(topic)
+            if topic_partitions is None:
+                topic_partitions = self.kafka_client._client.cluster.partitions_for_topic(topic) or set()
+                partitions_by_topic[topic] = topic_partitions
+
+            if partition in topic_partitions:
                 # report consumer offset if the partition is valid because even if leaderless the consumer offset will
                 # be valid once the leader failover completes
                 self.gauge('consumer_offset', consumer_offset, tags=consumer_group_tags)
                 reported_contexts += 1
 
-                if (topic, partition) not in self._highwater_offsets:
+                if consumer_lag is None:
                     self.log.warning(
                         "Consumer group: %s has offsets for topic: %s partition: %s, but no stored highwater offset "
                         "(likely the partition is in the middle of leader failover) so cannot calculate consumer lag.",
@@ -297,7 +320,6 @@ class KafkaCheck(AgentCheck):
                     )
                     continue
 
-                consumer_lag = self._highwater_offsets[(topic, partition)] - consumer_offset
                 if reported_contexts < contexts_limit:
                     self.gauge('consumer_lag', consumer_lag, tags=consumer_group_tags)
                     reported_contexts += 1
@@ -311,7 +333,7 @@ class KafkaCheck(AgentCheck):
                         "positive.".format(consumer_group, topic, partition)
                     )
                     key = "{}:{}:{}".format(consumer_group, topic, partition)
-                    self._send_event(title, message, consumer_group_tags, 'consumer_lag', key, severity="error")
+                    self._send_event(title, message, list(consumer_group_tags), 'consumer_lag', key, severity="error")
                     self.log.debug(message)
 
             else:
@@ -333,19 +355,24 @@ class KafkaCheck(AgentCheck):
         The callback flow is:
             A: When fetching all groups ('monitor_unlisted_consumer_groups' is True):
                 1. Issue a ListGroupsRequest to every broker
-                2. Attach a callback to each ListGroupsRequest that issues OffsetFetchRequests for every group.
+                2. Attach a callback to each ListGroupsRequest that queues OffsetFetchRequests for every group.
                    Note: Because a broker only returns groups for which it is the coordinator, as an optimization we
                    skip the FindCoordinatorRequest
             B: When fetching only listed groups:
-                1. Issue a FindCoordintorRequest for each group
-                2. Attach a callback to each FindCoordinatorResponse that issues OffsetFetchRequests for that group
+                1. Queue an OffsetFetchRequest for each group whose coordinator is known from a previous run, and
+                   issue a FindCoordinatorRequest for every other group
+                2. Attach a callback to each FindCoordinatorResponse that queues an OffsetFetchRequest for that group
             Both:
-                3. Attach a callback to each OffsetFetchRequest that parses the response
+                3. OffsetFetchRequests are pipelined per coordinator: at most `max_in_flight_requests_per_broker` are
+                   in flight to a given broker, and each response sends the next queued request for that broker
+                4. Attach a callback to each OffsetFetchRequest that parses the response
                    and saves the consumer group's offsets
         """
         # Store the list of futures on the object because some of the callbacks create/store additional futures and they
         # don't have access to variables scoped to this method, only to the object scope
         self._consumer_futures = []
+        self._pending_offset_requests = defaultdict(deque)  # Expected format: {coordinator_id: deque([consumer_group])}
+        self._in_flight_offset_requests = defaultdict(int)  # Expected format: {coordinator_id: count}
 
         if self._monitor_unlisted_consumer_groups:
             for broker in self.kafka_client._client.cluster.brokers():
@@ -355,9 +382,11 @@ class KafkaCheck(AgentCheck):
         elif self._consumer_groups:
             self._validate_listed_consumer_groups()
             for consumer_group in self._consumer_groups:
-                find_coordinator_future = self.kafka_client._find_coordinator_id_send_request(consumer_group)
-                find_coordinator_future.add_callback(self._find_coordinator_callback, consumer_group)
-                self._consumer_futures.append(find_coordinator_future)
+                coordinator_id = self._get_cached_group_coordinator(consumer_group)
+                if coordinator_id is None:
+                    self._send_find_coordinator_request(consumer_group)
+                else:
+                    self._queue_offset_fetch_request(consumer_group, coordinator_id)
         else:
             raise ConfigurationError(
                 "Cannot fetch consumer offsets because no consumer_groups are specified and "
@@ -366,10 +395,78 @@ class KafkaCheck(AgentCheck):
 
         # Loop until all futures resolved.
         self.kafka_client._wait_for_futures(self._consumer_futures)
-        del self._consumer_futures  # since it's reset on every check run, no sense holding the reference between runs
+        # since these are reset on every check run, no sense holding the references between runs
+        del self._consumer_futures
+        del self._pending_offset_requests
+        del self._in_flight_offset_requests
+
+    def _get_cached_group_coordinator(self, consumer_group):
+        """Return the coordinator cached for the consumer group, or None if it's unknown or no longer in the cluster."""
+        coordinator_id = self._group_coordinators.get(consumer_group)
+        if coordinator_id is None:
+            return None
+        if self.kafka_client._client.cluster.broker_metadata(coordinator_id) is None:
+            del self._group_coordinators[consumer_group]
+            return None
+        return coordinator_id
+
+    def _send_find_coordinator_request(self, consumer_group):
+        find_coordinator_future = self.kafka_client._find_coordinator_id_send_request(consumer_group)
+        find_coordinator_future.add_callback(self._find_coordinator_callback, consumer_group)
+        self._consumer_futures.append(find_coordinator_future)
+
+    def _queue_offset_fetch_request(self, consumer_group, coordinator_id):
+        """Queue an OffsetFetchRequest for the group and send it right away if the coordinator has room in flight."""
+        self._pending_offset_requests[coordinator_id].append(consumer_group)
+        self._send_pending_offset_fetch_requests(coordinator_id)
+
+    def _send_pending_offset_fetch_requests(self, coordinator_id):
+        pending_requests = self._pending_offset_requests[coordinator_id]
+        while (
+            pending_requests
+            and self._in_flight_offset_requests[coordinator_id] < self._max_in_flight_requests_per_broker
+        ):
+            consumer_group = pending_requests.popleft()
+            single_group_offsets_future = self.kafka_client._list_consumer_group_offsets_send_request(
+                group_id=consumer_group,
+                group_coordinator_id=coordinator_id,
+                partitions=self._get_listed_topic_partitions(consumer_group),
+            )
+            self._in_flight_offset_requests[coordinator_id] += 1
+            single_group_offsets_future.add_callback(
+                self._single_group_offsets_callback, consumer_group, coordinator_id
+            )
+            single_group_offsets_future.add_both(self._offset_fetch_done_callback, coordinator_id)
+            self._consumer_futures.append(single_group_offsets_future)
+
+    def _offset_fetch_done_callback(self, coordinator_id, _response_or_exception):
+        """Callback that frees an in-flight slot for the coordinator and sends its next queued OffsetFetchRequest."""
+        self._in_flight_offset_requests[coordinator_id] -= 1
+        self._send_pending_offset_fetch_requests(coordinator_id)
+
+    def _get_listed_topic_partitions(self, consumer_group):
+        """Return the TopicPartitions specified in the check config for the consumer group.
+
+        If topics are unspecified, returns None to fetch all known offsets for that consumer group. Similiarly, if the
+        partitions are unspecified for a topic listed in the config, offsets are fetched for all the partitions within
+        that topic.
+        """
+        if self._monitor_unlisted_consumer_groups:
+            return None
+        topics = self._consumer_groups.get(consumer_group)
+        if not topics:
+            return None  # None signals to fetch all known offsets for the consumer group
+
+        # transform [("t1", [1, 2])] into [TopicPartition("t1", 1), TopicPartition("t1", 2)]
+        topic_partitions = []
+        for topic, partitions in topics.items():
+            if not partitions:  # If partitions aren't specified, fetch all partitions in the topic
+                partitions = self.kafka_client._client.cluster.partitions_for_topic(topic)
+            topic_partitions.extend([TopicPartition(topic, p) for p in partitions])
+        return topic_partitions
 
     def _list_groups_callback(self, broker_id, response):
-        """Callback that takes a ListGroupsResponse and issues an OffsetFetchRequest for each group.
+        """Callback that takes a ListGroupsResponse and queues an OffsetFetchRequest for each group.
 
         broker_id must be manually passed in because it is not present in the response. Keeping track of the broker that
         gave us this response lets us skip issuing FindCoordinatorRequests because Kafka brokers only include
@@ -379,46 +476,46 @@ class KafkaCheck(AgentCheck):
             # consumer groups from Kafka < 0.9 that store their offset in Kafka don't use Kafka for group-coordination
             # so their group_type is empty
             if group_type in ('consumer', ''):
-                single_group_offsets_future = self.kafka_client._list_consumer_group_offsets_send_request(
-                    group_id=consumer_group, group_coordinator_id=broker_id
-                )
-                single_group_offsets_future.add_callback(self._single_group_offsets_callback, consumer_group)
-                self._consumer_futures.append(single_group_offsets_future)
+                self._queue_offset_fetch_request(consumer_group, broker_id)
 
     def _find_coordinator_callback(self, consumer_group, response):
-        """Callback that takes a FindCoordinatorResponse and issues an OffsetFetchRequest for the group.
+        """Callback that takes a FindCoordinatorResponse and queues an OffsetFetchRequest for the group.
 
         consumer_group must be manually passed in because it is not present in the response, but we need it in order to
         associate these offsets to the proper consumer group.
 
-        The OffsetFetchRequest is scoped to the topics and partitions that are specified in the check config. If
-        topics are unspecified, it will fetch all known offsets for that consumer group. Similiarly, if the partitions
-        are unspecified for a topic listed in the config, offsets are fetched for all the partitions within that topic.
+        The OffsetFetchRequest is scoped to the topics and partitions that are specified in the check config.
         """
         coordinator_id = self.kafka_client._find_coordinator_id_process_response(response)
-        topics = self._consumer_groups[consumer_group]
-        if not topics:
-            topic_partitions = None  # None signals to fetch all known offsets for the consumer group
-        else:
-            # transform [("t1", [1, 2])] into [TopicPartition("t1", 1), TopicPartition("t1", 2)]
-            topic_partitions = []
-            for topic, partitions in topics.items():
-                if not partitions:  # If partitions aren't specified, fetch all partitions in the topic
-                    partitions = self.kafka_client._client.cluster.partitions_for_topic(topic)
-                topic_partitions.extend([TopicPartition(topic, p) for p in partitions])
-        single_group_offsets_future = self.kafka_client._list_consumer_group_offsets_send_request(
-            group_id=consumer_group, group_coordinator_id=coordinator_id, partitions=topic_partitions
-        )
-        single_group_offsets_future.add_callback(self._single_group_offsets_callback, consumer_group)
-        self._consumer_futures.append(single_group_offsets_future)
+        self._queue_offset_fetch_request(consumer_group, coordinator_id)
 
-    def _single_group_offsets_callback(self, consumer_group, response):
-        """Callback that parses an OffsetFetchResponse and saves it to the consumer_offsets dict.
+    def _single_group_offsets_callback(self, consumer_group, coordinator_id, response):
+        """Callback that parses an OffsetFetchResponse and saves the consumer group's offsets.
 
         consumer_group must be manually passed in because it is not present in the response, but we need it in order to
         associate these offsets to the proper consumer group.
+
+        The coordinator is only cached once it successfully answered for the group. If a cached coordinator turns out
+        to be stale, the cache entry is dropped and the group's coordinator is looked up again (only once, because the
+        new coordinator isn't cached until it answers).
         """
-        single_group_offsets = self.kafka_client._list_consumer_group_offsets_process_response(response)
+        try:
+            single_group_offsets = self.kafka_client._list_consumer_group_offsets_process_response(response)
+        except GROUP_COORDINATOR_ERRORS as e:
+            if self._group_coordinators.get(consumer_group) != coordinator_id:
+                raise
+            self.log.debug(
+                "Cached coordinator %s for consumer group %s is stale (%s), looking it up again.",
+                coordinator_id,
+                consumer_group,
+                e,
+            )
+            del self._group_coordinators[consumer_group]
+            self._send_find_coordinator_request(consumer_group)
+            return
+
+        if not self._monitor_unlisted_consumer_groups:
+            self._group_coordinators[consumer_group] = coordinator_id
         for (topic, partition), (offset, _metadata) in single_group_offsets.items():
             # If the OffsetFetchRequest explicitly specified partitions, the offset could returned as -1, meaning there
             # is no recorded offset for that partition... for example, if the partition doesn't exist in the cluster.
@@ -426,8 +523,7 @@ class KafkaCheck(AgentCheck):
             if offset == -1:
                 self.kafka_client._client.cluster.request_update()  # force metadata update on next poll()
                 continue
-            key = (consumer_group, topic, partition)
-            self._consumer_offsets[key] = offset
+            self._offsets.set_consumer_offset(consumer_group, topic, partition, offset)
 
     # TODO since this is used to validate the config interface, ideally this would be shared between new and legacy
     # versions of the check to make sure the interface they accept doesn't diverge if someone updates one but forgets
@@ -0,0 +1,196 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under Simplified BSD License (see LICENSE)
+from array import array
+
+from six.moves import intern
+
+# Offsets are stored as doubles rather than 64-bit integers because the `q` typecode is unavailable on Python 2.
+# Doubles are exact up to 2^53, and metrics are submitted as floats anyway.
+OFFSET_TYPECODE = 'd'
+
+
+class OffsetStore(object):
+    """Store for the broker highwater and consumer offsets collected during a check run.
+
+    Offsets are kept in dicts that are rebuilt on every run, and tags are formatted on every report.
+    """
+
+    def __init__(self, custom_tags):
+        self._custom_tags = list(custom_tags)
+        self.reset()
+
+    def reset(self):
+        """Forget the offsets collected during the previous run."""
+        self._consumer_offsets = {}  # Expected format: {(consumer_group, topic, partition): offset}
+        self._highwater_offsets = {}  # Expected format: {(topic, partition): offset}
+
+    def set_consumer_offset(self, consumer_group, topic, partition, offset):
+        self._consumer_offsets[(consumer_group, topic, partition)] = offset
+
+    def set_highwater_offset(self, topic, partition, offset):
+        self._highwater_offsets[(topic, partition)] = offset
+
+    def consumer_offsets_count(self):
+        return len(self._consumer_offsets)
+
+    def highwater_offsets_count(self):
+        return len(self._highwater_offsets)
+
+    def consumer_topic_partitions(self):
+        """Return the set of (topic, partition) for which at least one consumer offset was collected."""
+        return {(topic, partition) for (_, topic, partition) in self._consumer_offsets}
+
+    def highwater_offsets(self):
+        """Yield (topic, partition, highwater_offset, tags) for every collected highwater offset."""
+        for (topic, partition), highwater_offset in self._highwater_offsets.items():
+            broker_tags = ['topic:%s' % topic, 'partition:%s' % partition]
+            broker_tags.extend(self._custom_tags)
+            yield topic, partition, highwater_offset, broker_tags
+
+    def consumer_offsets(self):
+        """Yield (consumer_group, topic, partition, consumer_offset, consumer_lag, tags) for every consumer offset.
+
+        consumer_lag is None when no highwater offset was collected for the topic partition.
+        """
+        for (consumer_group, topic, partition), consumer_offset in self._consumer_offsets.items():
+            highwater_offset = self._highwater_offsets.get((topic, partition))
+            consumer_lag = None if highwater_offset is None else highwater_offset - consumer_offset
+            consumer_group_tags = ['topic:%s' % topic, 'partition:%s' % partition, 'consumer_group:%s' % consumer_group]
+            consumer_group_tags.extend(self._custom_tags)
+            yield consumer_group, topic, partition, consumer_offset, consumer_lag, consumer_group_tags
+
+
+class CompactOffsetStore(OffsetStore):
+    """Array-backed store for the broker highwater and consumer offsets, kept across check runs.
+
+    Every (topic, partition) and (consumer_group, topic, partition) is interned into an integer id the first time it is
+    seen, and its tags are built once as a tuple. Offsets live in arrays indexed by those ids, alongside the run in
+    which they were last set, so that a new run only has to bump the run counter instead of reallocating everything.
+
+    Ids of contexts that stop showing up are reclaimed once they outnumber the contexts seen during the previous run.
+    """
+
+    def __init__(self, custom_tags):
+        self._custom_tags = tuple(custom_tags)
+        self._run = 0
+        self._clear()
+
+    def _clear(self):
+        self._topic_partition_ids = {}  # Expected format: {(topic, partition): topic_partition_id}
+        self._topic_partition_keys = []
+        self._topic_partition_tags = []
+        self._topic_partition_runs = array('L')
+        self._highwater_offsets = array(OFFSET_TYPECODE)
+        self._highwater_runs = array('L')
+
+        self._context_ids = {}  # Expected format: {(consumer_group, topic, partition): context_id}
+        self._context_keys = []
+        self._context_tags = []
+        self._context_topic_partition_ids = array('L')
+        self._consumer_offsets = array(OFFSET_TYPECODE)
+        self._consumer_runs = array('L')
+
+        # Ids of the offsets set during the current run, in the order they were set
+        self._run_highwater_ids = []
+        self._run_context_ids = []
+        self._run_topic_partitions_count = 0
+
+    def reset(self):
+        """Forget the offsets collected during the previous run, keeping the interned keys and tags around."""
+        if len(self._context_keys) > 2 * len(self._run_context_ids) or (
+            len(self._topic_partition_keys) > 2 * self._run_topic_partitions_count
+        ):
+            self._clear()
+        else:
+            self._run_highwater_ids = []
+            self._run_context_ids = []
+            self._run_topic_partitions_count = 0
+        self._run += 1
+
+    def _get_topic_partition_id(self, topic, partition):
+        key = (topic, partition)
+        topic_partition_id = self._topic_partition_ids.get(key)
+        if topic_partition_id is None:
+            topic_partition_id = len(self._topic_partition_keys)
+            self._topic_partition_ids[key] = topic_partition_id
+            self._topic_partition_keys.append(key)
+            self._topic_partition_tags.append(('topic:%s' % topic, 'partition:%s' % partition) + self._custom_tags)
+            self._topic_partition_runs.append(0)
+            self._highwater_offsets.append(0)
+            self._highwater_runs.append(0)
+
+        if self._topic_partition_runs[topic_partition_id] != self._run:
+            self._topic_partition_runs[topic_partition_id] = self._run
+            self._run_topic_partitions_count += 1
+        return topic_partition_id
+
+    def set_consumer_offset(self, consumer_group, topic, partition, offset):
+        key = (consumer_group, topic, partition)
+        context_id = self._context_ids.get(key)
+        topic_partition_id = self._get_topic_partition_id(intern(topic), partition)
+        if context_id is None:
+            context_id = len(self._context_keys)
+            self._context_ids[key] = context_id
+            self._context_keys.append((intern(consumer_group), intern(topic), partition))
+            self._context_tags.append(
+                self._topic_partition_tags[topic_partition_id][:2]
+                + ('consumer_group:%s' % consumer_group,)
+                + self._custom_tags
+            )
+            self._context_topic_partition_ids.append(topic_partition_id)
+            self._consumer_offsets.append(0)
+            self._consumer_runs.append(0)
+
+        if self._consumer_runs[context_id] != self._run:
+            self._consumer_runs[context_id] = self._run
+            self._run_context_ids.append(context_id)
+        self._consumer_offsets[context_id] = offset
+
+    def set_highwater_offset(self, topic, partition, offset):
+        topic_partition_id = self._get_topic_partition_id(topic, partition)
+        if self._highwater_runs[topic_partition_id] != self._run:
+            self._highwater_runs[topic_partition_id] = self._run
+            self._run_highwater_ids.append(topic_partition_id)
+        self._highwater_offsets[topic_partition_id] = offset
+
+    def consumer_offsets_count(self):
+        return len(self._run_context_ids)
+
+    def highwater_offsets_count(self):
+        return len(self._run_highwater_ids)
+
+    def consumer_topic_partitions(self):
+        topic_partition_keys = self._topic_partition_keys
+        context_topic_partition_ids = self._context_topic_partition_ids
+        return {topic_partition_keys[context_topic_partition_ids[i]] for i in self._run_context_ids}
+
+    def highwater_offsets(self):
+        topic_partition_keys = self._topic_partition_keys
+        topic_partition_tags = self._topic_partition_tags
+        highwater_offsets = self._highwater_offsets
+        for topic_partition_id in self._run_highwater_ids:
+            topic, partition = topic_partition_keys[topic_partition_id]
+            yield topic, partition, highwater_offsets[topic_partition_id], topic_partition_tags[topic_partition_id]
+
+    def consumer_offsets(self):
+        run_context_ids = self._run_context_ids
+        consumer_offsets = [self._consumer_offsets[i] for i in run_context_ids]
+
+        # Compute the lag of all the contexts at once from the ids of their topic partitions
+        current_run = self._run
+        highwater_offsets = self._highwater_offsets
+        highwater_runs = self._highwater_runs
+        topic_partition_ids = [self._context_topic_partition_ids[i] for i in run_context_ids]
+        consumer_lags = [
+            highwater_offsets[topic_partition_id] - consumer_offset
+            if highwater_runs[topic_partition_id] == current_run
+            else None
+            for topic_partition_id, consumer_offset in zip(topic_partition_ids, consumer_offsets)
+        ]
+
+        context_keys = self._context_keys
+        context_tags = self._context_tags
+        for context_id, consumer_offset, consumer_lag in zip(run_context_ids, consumer_offsets, consumer_lags):
+            consumer_group, topic, partition = context_keys[context_id]
+            yield consumer_group, topic, partition, consumer_offset, consumer_lag, context_tags[context_id]
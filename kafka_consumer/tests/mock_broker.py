@@ -0,0 +1,150 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under Simplified BSD License (see LICENSE)
+from collections import defaultdict
+
+from kafka import KafkaAdminClient
+from kafka.cluster import ClusterMetadata
+from kafka.future import Future
+from kafka.protocol.admin import ListGroupsRequest, ListGroupsResponse
+from kafka.protocol.commit import (
+    GroupCoordinatorRequest,
+    GroupCoordinatorResponse,
+    OffsetFetchRequest,
+    OffsetFetchResponse,
+)
+from kafka.protocol.metadata import MetadataResponse
+from kafka.protocol.offset import OffsetRequest, OffsetResponse
+
+NO_ERROR = 0
+NOT_COORDINATOR_FOR_GROUP = 16
+
+
+class MockKafkaClient(object):
+    """In-memory stand-in for `kafka.KafkaClient` that answers every sent request on the next `poll()`."""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.cluster = broker.cluster
+        self.in_flight = defaultdict(int)
+        self.max_in_flight = defaultdict(int)
+        self.requests = defaultdict(int)
+        self._pending = []
+
+    def ready(self, node_id):
+        return True
+
+    def least_loaded_node(self):
+        return min(self.cluster.brokers(), key=lambda broker: self.in_flight[broker.nodeId]).nodeId
+
+    def send(self, node_id, request):
+        future = Future()
+        self.in_flight[node_id] += 1
+        self.max_in_flight[node_id] = max(self.max_in_flight[node_id], self.in_flight[node_id])
+        self.requests[type(request).__name__] += 1
+        self._pending.append((node_id, request, future))
+        return future
+
+    def poll(self, timeout_ms=None, future=None):
+        # Every request currently in flight is answered in one round trip, like a broker with no latency variance
+        pending, self._pending = self._pending, []
+        for node_id, request, response_future in pending:
+            self.in_flight[node_id] -= 1
+            response_future.success(self.broker.handle(node_id, request))
+
+    def check_version(self):
+        return 2, 3, 0
+
+
+class MockKafkaAdminClient(object):
+    """Drop-in replacement for the `KafkaAdminClient` used by the check, backed by a `MockKafkaBroker`."""
+
+    _wait_for_futures = KafkaAdminClient._wait_for_futures
+    _find_coordinator_id_process_response = KafkaAdminClient._find_coordinator_id_process_response
+    _list_consumer_groups_process_response = KafkaAdminClient._list_consumer_groups_process_response
+    _list_consumer_group_offsets_process_response = KafkaAdminClient._list_consumer_group_offsets_process_response
+
+    def __init__(self, broker):
+        self._client = MockKafkaClient(broker)
+
+    def _send_request_to_node(self, node_id, request):
+        return self._client.send(node_id, request)
+
+    def _list_consumer_groups_send_request(self, broker_id):
+        return self._send_request_to_node(broker_id, ListGroupsRequest[1]())
+
+    def _find_coordinator_id_send_request(self, group_id):
+        return self._send_request_to_node(self._client.least_loaded_node(), GroupCoordinatorRequest[0](group_id))
+
+    def _list_consumer_group_offsets_send_request(self, group_id, group_coordinator_id, partitions=None):
+        topics_partitions = None
+        if partitions is not None:
+            topics_partitions_dict = defaultdict(set)
+            for topic, partition in partitions:
+                topics_partitions_dict[topic].add(partition)
+            topics_partitions = list(topics_partitions_dict.items())
+        return self._send_request_to_node(group_coordinator_id, OffsetFetchRequest[3](group_id, topics_partitions))
+
+
+class MockKafkaBroker(object):
+    """A cluster of `brokers` brokers hosting `groups` consumer groups that each consume every partition of `topics`.
+
+    Topic partitions are led by brokers in a round-robin fashion, and so are the consumer groups coordinators.
+    """
+
+    def __init__(self, brokers=3, topics=10, partitions=4, groups=100):
+        self.topics = ['topic_{}'.format(i) for i in range(topics)]
+        self.partitions = list(range(partitions))
+        self.groups = ['group_{}'.format(i) for i in range(groups)]
+        self.coordinators = {group: i % brokers for i, group in enumerate(self.groups)}
+        self.highwater_offset = 1000
+        self.consumer_offset = 900
+
+        leaders = {}
+        topics_metadata = []
+        for i, topic in enumerate(self.topics):
+            partitions_metadata = []
+            for partition in self.partitions:
+                leader = (i + partition) % brokers
+                leaders[(topic, partition)] = leader
+                partitions_metadata.append((NO_ERROR, partition, leader, [leader], [leader]))
+            topics_metadata.append((NO_ERROR, topic, partitions_metadata))
+
+        self.cluster = ClusterMetadata()
+        self.cluster.update_metadata(
+            MetadataResponse[0]([(node_id, 'localhost', 9092 + node_id) for node_id in range(brokers)], topics_metadata)
+        )
+
+    def move_coordinator(self, group, node_id):
+        self.coordinators[group] = node_id
+
+    def handle(self, node_id, request):
+        if isinstance(request, GroupCoordinatorRequest[0]):
+            return GroupCoordinatorResponse[0](NO_ERROR, self.coordinators[request.consumer_group], 'localhost', 9092)
+
+        if isinstance(request, ListGroupsRequest[1]):
+            groups = [(group, 'consumer') for group, coordinator in self.coordinators.items() if coordinator == node_id]
+            return ListGroupsResponse[1](0, NO_ERROR, groups)
+
+        if isinstance(request, OffsetFetchRequest[3]):
+            if self.coordinators[request.consumer_group] != node_id:
+                return OffsetFetchResponse[3](0, [], NOT_COORDINATOR_FOR_GROUP)
+            topics = request.topics or [(topic, self.partitions) for topic in self.topics]
+            return OffsetFetchResponse[3](
+                0,
+                [
+                    (topic, [(partition, self.consumer_offset, '', NO_ERROR) for partition in partitions])
+                    for topic, partitions in topics
+                ],
+                NO_ERROR,
+            )
+
+        if isinstance(request, OffsetRequest[0]):
+            return OffsetResponse[0](
+                [
+                    (topic, [(partition, NO_ERROR, [self.highwater_offset]) for partition, _, _ in partitions])
+                    for topic, partitions in request.topics
+                ]
+            )
+
+        raise NotImplementedError('Unsupported request {}'.format(request))
@@ -0,0 +1,42 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under Simplified BSD License (see LICENSE)
+import pytest
+
+from datadog_checks.kafka_consumer import KafkaCheck
+
+from .mock_broker import MockKafkaAdminClient, MockKafkaBroker
+
+
+@pytest.mark.parametrize('compact_offset_store', [False, True], ids=['dict', 'compact'])
+def test_monitor_unlisted_consumer_groups(benchmark, dd_run_check, compact_offset_store):
+    broker = MockKafkaBroker(brokers=5, topics=5, partitions=4, groups=5000)
+    instance = {
+        'kafka_connect_str': 'localhost:9092',
+        'kafka_client_api_version': '2.3.0',
+        'monitor_unlisted_consumer_groups': True,
+        'compact_offset_store': compact_offset_store,
+    }
+    check = KafkaCheck('kafka_consumer', {'max_partition_contexts': 250000}, [instance])
+    check._kafka_client = MockKafkaAdminClient(broker)
+
+    # Run once to get initialization steps out of the way.
+    dd_run_check(check)
+
+    benchmark(check.check, instance)
+
+
+def test_listed_consumer_groups(benchmark, dd_run_check):
+    broker = MockKafkaBroker(brokers=5, topics=5, partitions=4, groups=5000)
+    instance = {
+        'kafka_connect_str': 'localhost:9092',
+        'kafka_client_api_version': '2.3.0',
+        'consumer_groups': {group: {} for group in broker.groups},
+    }
+    check = KafkaCheck('kafka_consumer', {'max_partition_contexts': 250000}, [instance])
+    check._kafka_client = MockKafkaAdminClient(broker)
+
+    # Run once to get the group coordinators cached.
+    dd_run_check(check)
+
+    benchmark(check.check, instance)
@@ -0,0 +1,70 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under Simplified BSD License (see LICENSE)
+import pytest
+
+from datadog_checks.kafka_consumer.offsets import CompactOffsetStore, OffsetStore
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.parametrize('store_class', [OffsetStore, CompactOffsetStore])
+def test_consumer_offsets_and_lag(store_class):
+    store = store_class(['optional:tag1'])
+    store.reset()
+    store.set_consumer_offset('group', 'topic', 0, 90)
+    store.set_consumer_offset('group', 'topic', 1, 40)
+    store.set_consumer_offset('group', 'topic', 1, 50)
+    store.set_highwater_offset('topic', 0, 100)
+
+    assert store.consumer_offsets_count() == 2
+    assert store.highwater_offsets_count() == 1
+    assert store.consumer_topic_partitions() == {('topic', 0), ('topic', 1)}
+    assert [(t, p, o, list(tags)) for t, p, o, tags in store.highwater_offsets()] == [
+        ('topic', 0, 100, ['topic:topic', 'partition:0', 'optional:tag1'])
+    ]
+    assert [(g, t, p, o, lag, list(tags)) for g, t, p, o, lag, tags in store.consumer_offsets()] == [
+        ('group', 'topic', 0, 90, 10, ['topic:topic', 'partition:0', 'consumer_group:group', 'optional:tag1']),
+        ('group', 'topic', 1, 50, None, ['topic:topic', 'partition:1', 'consumer_group:group', 'optional:tag1']),
+    ]
+
+
+@pytest.mark.parametrize('store_class', [OffsetStore, CompactOffsetStore])
+def test_reset_forgets_previous_run(store_class):
+    store = store_class([])
+    store.reset()
+    store.set_consumer_offset('group', 'topic', 0, 90)
+    store.set_highwater_offset('topic', 0, 100)
+    store.reset()
+    store.set_consumer_offset('group', 'topic', 1, 90)
+
+    assert store.consumer_offsets_count() == 1
+    assert store.highwater_offsets_count() == 0
+    assert [lag for _, _, _, _, lag, _ in store.consumer_offsets()] == [None]
+
+
+def test_compact_store_reuses_tags():
+    store = CompactOffsetStore(['optional:tag1'])
+    store.reset()
+    store.set_consumer_offset('group', 'topic', 0, 90)
+    [(_, _, _, _, _, first_tags)] = store.consumer_offsets()
+    store.reset()
+    store.set_consumer_offset('group', 'topic', 0, 95)
+    [(_, _, _, offset, _, second_tags)] = store.consumer_offsets()
+
+    assert offset == 95
+    assert second_tags is first_tags
+
+
+def test_compact_store_reclaims_stale_contexts():
+    store = CompactOffsetStore([])
+    store.reset()
+    for partition in range(10):
+        store.set_consumer_offset('group', 'topic', partition, 90)
+    store.reset()
+    store.set_consumer_offset('group', 'topic', 0, 90)
+    store.reset()
+
+    assert len(store._context_keys) == 0
+    store.set_consumer_offset('group', 'topic', 0, 90)
+    assert len(store._context_keys) == 1
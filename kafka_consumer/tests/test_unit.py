@@ -0,0 +1,87 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under Simplified BSD License (see LICENSE)
+import pytest
+
+from datadog_checks.kafka_consumer import KafkaCheck
+
+from .mock_broker import MockKafkaAdminClient, MockKafkaBroker
+
+pytestmark = pytest.mark.unit
+
+
+def get_check(broker, instance, init_config=None):
+    instance = dict(instance, kafka_connect_str='localhost:9092', kafka_client_api_version='2.3.0')
+    check = KafkaCheck('kafka_consumer', init_config or {}, [instance])
+    check._kafka_client = MockKafkaAdminClient(broker)
+    return check
+
+
+def test_listed_consumer_groups_coordinators_are_cached(aggregator, dd_run_check):
+    broker = MockKafkaBroker(brokers=2, topics=1, partitions=2, groups=4)
+    check = get_check(broker, {'consumer_groups': {group: {} for group in broker.groups}})
+    requests = check.kafka_client._client.requests
+
+    dd_run_check(check)
+    assert requests['GroupCoordinatorRequest_v0'] == 4
+
+    dd_run_check(check)
+    assert requests['GroupCoordinatorRequest_v0'] == 4
+    assert requests['OffsetFetchRequest_v3'] == 8
+
+    for group in broker.groups:
+        for partition in broker.partitions:
+            tags = ['topic:topic_0', 'partition:{}'.format(partition), 'consumer_group:{}'.format(group)]
+            aggregator.assert_metric('kafka.consumer_lag', 100, tags=tags, count=2)
+
+
+def test_stale_coordinator_is_looked_up_again(aggregator, dd_run_check):
+    broker = MockKafkaBroker(brokers=2, topics=1, partitions=1, groups=2)
+    check = get_check(broker, {'consumer_groups': {'group_0': {'topic_0': [0]}}})
+    requests = check.kafka_client._client.requests
+
+    dd_run_check(check)
+    aggregator.reset()
+    broker.move_coordinator('group_0', 1)
+    dd_run_check(check)
+
+    assert requests['GroupCoordinatorRequest_v0'] == 2
+    assert check._group_coordinators == {'group_0': 1}
+    aggregator.assert_metric(
+        'kafka.consumer_offset', 900, tags=['topic:topic_0', 'partition:0', 'consumer_group:group_0'], count=1
+    )
+
+
+def test_max_in_flight_requests_per_broker(aggregator, dd_run_check):
+    broker = MockKafkaBroker(brokers=3, topics=2, partitions=2, groups=30)
+    check = get_check(
+        broker,
+        {'monitor_unlisted_consumer_groups': True, 'max_in_flight_requests_per_broker': 2},
+        {'max_partition_contexts': 1000},
+    )
+
+    dd_run_check(check)
+
+    assert check.kafka_client._client.requests['OffsetFetchRequest_v3'] == 30
+    assert set(check.kafka_client._client.max_in_flight.values()) == {2}
+    aggregator.assert_metric('kafka.consumer_lag', 100, count=30 * 2 * 2)
+
+
+def test_compact_offset_store(aggregator, dd_run_check):
+    broker = MockKafkaBroker(brokers=2, topics=2, partitions=2, groups=2)
+    check = get_check(
+        broker, {'monitor_unlisted_consumer_groups': True, 'compact_offset_store': True, 'tags': ['foo:bar']}
+    )
+
+    dd_run_check(check)
+    dd_run_check(check)
+
+    for group in broker.groups:
+        for topic in broker.topics:
+            for partition in broker.partitions:
+                tags = ['topic:{}'.format(topic), 'partition:{}'.format(partition), 'foo:bar']
+                aggregator.assert_metric('kafka.broker_offset', 1000, tags=tags, count=2)
+                tags = tags[:2] + ['consumer_group:{}'.format(group), 'foo:bar']
+                aggregator.assert_metric('kafka.consumer_offset', 900, tags=tags, count=2)
+                aggregator.assert_metric('kafka.consumer_lag', 100, tags=tags, count=2)
+    aggregator.assert_all_metrics_covered()
@@ -2,6 +2,8 @@
 # All rights reserved
 # Licensed under Simplified BSD License (see LICENSE)
 
+from six import iteritems
+
 from datadog_checks.base.utils.tagging import tagger
 
 try:
@@ -106,13 +108,14 @@ class PodListUtils(object):
     send metrics for a given container.
     Results and podlist are cached between calls to avoid the repeated python-go switching
     cost (filter called once per prometheus metric), hence the PodListUtils object MUST
-    be re-created at every check run.
+    be re-created at every check run. The results of the containers that did not change
+    can be carried over from the PodListUtils object of the previous run with `previous`.
 
     Containers that are part of a static pod are not filtered, as we cannot curently
     reliably determine their image name to pass to the filtering logic.
     """
 
-    def __init__(self, podlist):
+    def __init__(self, podlist, previous=None):
         self.containers = {}
         self.static_pod_uids = set()
         self.cache = {}
@@ -145,6 +148,18 @@ class PodListUtils(object):
                 self.container_id_by_name_tuple[(namespace, pod_name, ctr.get('name'))] = cid
                 self.container_id_to_namespace[cid] = namespace
 
+        if previous is not None:
+            for cid, ctr in iteritems(self.containers):
+                if cid not in previous.cache or cid not in previous.containers:
+                    continue
+                previous_ctr = previous.containers[cid]
+                if (
+                    ctr.get("name") == previous_ctr.get("name")
+                    and ctr.get("image") == previous_ctr.get("image")
+                    and self.container_id_to_namespace[cid] == previous.container_id_to_namespace.get(cid)
+                ):
+                    self.cache[cid] = previous.cache[cid]
+
     def get_uid_by_name_tuple(self, name_tuple):
         """
         Get the pod uid from the tuple namespace and name
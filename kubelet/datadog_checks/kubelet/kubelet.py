@@ -3,6 +3,7 @@
 # Licensed under Simplified BSD License (see LICENSE)
 from __future__ import division
 
+import hashlib
 import json
 import logging
 import re
@@ -10,12 +11,13 @@ import sys
 from collections import defaultdict
 from copy import deepcopy
 from datetime import datetime, timedelta
+from functools import partial
 
 import requests
 from kubeutil import get_connection_info
 from six import iteritems
 
-from datadog_checks.base import AgentCheck, OpenMetricsBaseCheck
+from datadog_checks.base import AgentCheck, OpenMetricsBaseCheck, ensure_bytes, is_affirmative
 from datadog_checks.base.errors import CheckException
 from datadog_checks.base.utils.date import UTC, parse_rfc3339
 from datadog_checks.base.utils.tagging import tagger
@@ -182,6 +184,13 @@ class KubeletCheck(CadvisorPrometheusScraperMixin, OpenMetricsBaseCheck, Cadviso
         self.cadvisor_legacy_port = inst.get('cadvisor_port', CADVISOR_DEFAULT_PORT)
         self.cadvisor_legacy_url = None
 
+        # Keep the last pod list between check runs, and only decode the pod list again when it changed
+        self.cache_pod_list = is_affirmative(inst.get('cache_pod_list', False))
+        # (digest of the /pods response, decoded pod list)
+        self._pod_list_cache = None
+        # (pod list, PodListUtils built from it)
+        self._pod_list_utils_cache = None
+
         self.use_stats_summary_as_source = inst.get('use_stats_summary_as_source')
         if self.use_stats_summary_as_source is None and sys.platform == 'win32':
             self.use_stats_summary_as_source = True
@@ -331,7 +340,7 @@ class KubeletCheck(CadvisorPrometheusScraperMixin, OpenMetricsBaseCheck, Cadviso
             self.log.debug('cAdvisor not found, running in prometheus mode: %s', e)
 
         self.pod_list = self.retrieve_pod_list()
-        self.pod_list_utils = PodListUtils(self.pod_list)
+        self.pod_list_utils = self._get_pod_list_utils(self.pod_list)
 
         self.pod_tags_by_pvc = self._create_pod_tags_by_pvc(self.pod_list)
 
@@ -350,7 +359,7 @@ class KubeletCheck(CadvisorPrometheusScraperMixin, OpenMetricsBaseCheck, Cadviso
             self.process_cadvisor(instance, self.cadvisor_legacy_url, self.pod_list, self.pod_list_utils)
         elif self.cadvisor_scraper_config['prometheus_url']:  # Prometheus
             self.log.debug('processing cadvisor metrics')
-            self.process(self.cadvisor_scraper_config, metric_transformers=self.transformers)
+            self.process_cadvisor_metrics(self.cadvisor_scraper_config, metric_transformers=self.transformers)
 
         if self.kubelet_scraper_config['prometheus_url']:  # Prometheus
             self.log.debug('processing kubelet metrics')
@@ -378,24 +387,76 @@ class KubeletCheck(CadvisorPrometheusScraperMixin, OpenMetricsBaseCheck, Cadviso
         try:
             cutoff_date = self._compute_pod_expiration_datetime()
             with self.perform_kubelet_query(self.pod_list_url, stream=True) as r:
-                if cutoff_date:
-                    f = ExpiredPodFilter(cutoff_date)
-                    pod_list = json.load(r.raw, object_hook=f.json_hook)
-                    pod_list['expired_count'] = f.expired_count
-                    if pod_list.get("items") is not None:
-                        # Filter out None items from the list
-                        pod_list['items'] = [p for p in pod_list['items'] if p is not None]
-                else:
-                    pod_list = json.load(r.raw)
+                if not self.cache_pod_list:
+                    return self._decode_pod_list(partial(json.load, r.raw), cutoff_date)
+
+                body = r.raw.read()
 
-            if pod_list.get("items") is None:
-                # Sanitize input: if no pod are running, 'items' is a NoneObject
-                pod_list['items'] = []
+            digest = hashlib.sha256(ensure_bytes(body)).digest()
+            if self._pod_list_cache is not None and self._pod_list_cache[0] == digest:
+                pod_list = self._filter_expired_pods(self._pod_list_cache[1], cutoff_date)
+            else:
+                pod_list = self._decode_pod_list(partial(json.loads, body), cutoff_date)
+            self._pod_list_cache = (digest, pod_list)
             return pod_list
         except Exception as e:
             self.log.warning('failed to retrieve pod list from the kubelet at %s : %s', self.pod_list_url, e)
             return None
 
+    @staticmethod
+    def _decode_pod_list(load, cutoff_date):
+        """
+        Decode the pod list with `load`, filtering out the pods expired before `cutoff_date`
+        """
+        if cutoff_date:
+            f = ExpiredPodFilter(cutoff_date)
+            pod_list = load(object_hook=f.json_hook)
+            pod_list['expired_count'] = f.expired_count
+            if pod_list.get("items") is not None:
+                # Filter out None items from the list
+                pod_list['items'] = [p for p in pod_list['items'] if p is not None]
+        else:
+            pod_list = load()
+
+        if pod_list.get("items") is None:
+            # Sanitize input: if no pod are running, 'items' is a NoneObject
+            pod_list['items'] = []
+        return pod_list
+
+    @staticmethod
+    def _filter_expired_pods(pod_list, cutoff_date):
+        """
+        Filter out the pods of an already decoded pod list that expired since it was decoded.
+        The pod list is returned as is if no other pod expired.
+        """
+        if not cutoff_date:
+            return pod_list
+
+        f = ExpiredPodFilter(cutoff_date)
+        items = [p for p in pod_list['items'] if f.json_hook(p) is not None]
+        if not f.expired_count:
+            return pod_list
+
+        pod_list = dict(pod_list, items=items)
+        pod_list['expired_count'] = pod_list.get('expired_count', 0) + f.expired_count
+        return pod_list
+
+    def _get_pod_list_utils(self, pod_list):
+        """
+        Return the PodListUtils of the pod list. With `cache_pod_list`, the PodListUtils of an unchanged pod list
+        is reused, and the filtering results of the unchanged containers are kept when the pod list changed.
+        """
+        if not self.cache_pod_list:
+            return PodListUtils(pod_list)
+
+        previous_pod_list, previous_pod_list_utils = self._pod_list_utils_cache or (None, None)
+        if pod_list is not None and pod_list is previous_pod_list:
+            return previous_pod_list_utils
+
+        pod_list_utils = PodListUtils(pod_list, previous=previous_pod_list_utils)
+        self._pod_list_utils_cache = (pod_list, pod_list_utils)
+        return pod_list_utils
+
     @staticmethod
     def _compute_pod_expiration_datetime():
         """
@@ -3,9 +3,10 @@
 # Licensed under Simplified BSD License (see LICENSE)
 from __future__ import division
 
+from collections import namedtuple
 from copy import deepcopy
 
-from six import iteritems
+from six import iteritems, itervalues
 
 from datadog_checks.base.checks.openmetrics import OpenMetricsBaseCheck
 from datadog_checks.base.utils.tagging import tagger
@@ -18,6 +19,16 @@ METRIC_TYPES = ['counter', 'gauge', 'summary']
 PRE_1_16_CONTAINER_LABELS = set(['namespace', 'name', 'image', 'id', 'container_name', 'pod_name'])
 POST_1_16_CONTAINER_LABELS = set(['namespace', 'name', 'image', 'id', 'container', 'pod'])
 
+TELEMETRY_GAUGE_CONTAINER_CONTEXTS = 'container.contexts.count'
+
+# What a cadvisor sample tells about its container, resolved once per container and scrape:
+# entity_id: the container id, or the pod uid for static pods whose container statuses aren't known yet
+# tagger_entity: the entity the tagger knows the container by
+# pod_uid: the uid of the pod the container belongs to
+# static_pod: whether the pod is a pending static pod
+# excluded: whether the container is excluded by the container filters
+ContainerContext = namedtuple('ContainerContext', ['entity_id', 'tagger_entity', 'pod_uid', 'static_pod', 'excluded'])
+
 
 class CadvisorPrometheusScraperMixin(object):
     """
@@ -34,6 +45,10 @@ class CadvisorPrometheusScraperMixin(object):
         self.mem_usage_bytes = {}
         self.swap_usage_bytes = {}
 
+        # container contexts and tagger results of the ongoing cadvisor scrape, see `process_cadvisor_metrics`
+        self._container_contexts = None
+        self._entity_tags = None
+
         self.CADVISOR_METRIC_TRANSFORMERS = {
             'container_cpu_usage_seconds_total': self.container_cpu_usage_seconds_total,
             'container_cpu_load_average_10s': self.container_cpu_load_average_10s,
@@ -99,6 +114,22 @@ class CadvisorPrometheusScraperMixin(object):
         )
         return cadvisor_instance
 
+    def process_cadvisor_metrics(self, scraper_config, metric_transformers=None):
+        """
+        Scrape the cadvisor endpoint. The context of each container and the tagger results are resolved
+        once and shared by all the container metric families of the scrape.
+        """
+        self._container_contexts = {}
+        self._entity_tags = {}
+        try:
+            self.process(scraper_config, metric_transformers=metric_transformers)
+            if scraper_config['telemetry']:
+                container_count = sum(1 for context in itervalues(self._container_contexts) if context is not None)
+                self._send_telemetry_gauge(TELEMETRY_GAUGE_CONTAINER_CONTEXTS, container_count, scraper_config)
+        finally:
+            self._container_contexts = None
+            self._entity_tags = None
+
     @staticmethod
     def _is_container_metric(labels):
         """
@@ -184,13 +215,74 @@ class CadvisorPrometheusScraperMixin(object):
         :param labels
         :return str or None
         """
-        if CadvisorPrometheusScraperMixin._is_container_metric(labels):
-            pod = self._get_pod_by_metric_label(labels)
-            if pod is not None and is_static_pending_pod(pod):
-                # If the pod is static, ContainerStatus is unavailable.
-                # Return the pod UID so that we can collect metrics from it later on.
-                return self._get_pod_uid(labels)
-            return self._get_container_id(labels)
+        context = self._get_container_context(labels)
+        if context is not None:
+            return context.entity_id
+
+    def _get_container_context(self, labels):
+        """
+        Return the ContainerContext of a container metric, or None if the metric isn't about a container.
+        During a cadvisor scrape, contexts are cached by (namespace, pod, container, id) labels.
+
+        :param labels
+        :return ContainerContext or None
+        """
+        if self._container_contexts is None:
+            return self._resolve_container_context(labels)
+
+        key = (
+            labels.get('namespace'),
+            labels.get('pod') or labels.get('pod_name'),
+            labels.get('container') or labels.get('container_name'),
+            labels.get('id'),
+        )
+        if key not in self._container_contexts:
+            self._container_contexts[key] = self._resolve_container_context(labels)
+        return self._container_contexts[key]
+
+    def _resolve_container_context(self, labels):
+        """
+        :param labels
+        :return ContainerContext or None
+        """
+        if not CadvisorPrometheusScraperMixin._is_container_metric(labels):
+            return None
+
+        pod_uid = self._get_pod_uid(labels)
+        pod = get_pod_by_uid(pod_uid, self.pod_list)
+        static_pod = pod is not None and is_static_pending_pod(pod)
+        if static_pod:
+            # If the pod is static, ContainerStatus is unavailable.
+            # Use the pod UID so that we can collect metrics from it later on.
+            entity_id = pod_uid
+        else:
+            entity_id = self._get_container_id(labels)
+        if not entity_id:
+            return ContainerContext(None, None, pod_uid, static_pod, True)
+
+        return ContainerContext(
+            entity_id,
+            replace_container_rt_prefix(entity_id),
+            pod_uid,
+            static_pod,
+            self.pod_list_utils.is_excluded(entity_id, pod_uid),
+        )
+
+    def _get_entity_tags(self, entity):
+        """
+        Return the high cardinality tags of a tagger entity, queried once per cadvisor scrape.
+        The returned list can be extended by the caller.
+
+        :param entity: str
+        :return: list
+        """
+        if self._entity_tags is None:
+            tags = tagger.tag(entity, tagger.HIGH)
+        elif entity in self._entity_tags:
+            tags = self._entity_tags[entity]
+        else:
+            tags = self._entity_tags[entity] = tagger.tag(entity, tagger.HIGH)
+        return list(tags) if tags else []
 
     def _get_pod_uid(self, labels):
         """
@@ -297,22 +389,21 @@ class CadvisorPrometheusScraperMixin(object):
             return
 
         samples = self._sum_values_by_context(metric, self._get_entity_id_if_container_metric)
-        for c_id, sample in iteritems(samples):
-            pod_uid = self._get_pod_uid(sample[self.SAMPLE_LABELS])
-            if self.pod_list_utils.is_excluded(c_id, pod_uid):
+        for sample in itervalues(samples):
+            context = self._get_container_context(sample[self.SAMPLE_LABELS])
+            if context.excluded:
                 continue
 
             # FIXME we are forced to do that because the Kubelet PodList isn't updated
             # for static pods, see https://github.com/kubernetes/kubernetes/pull/59948
-            pod = self._get_pod_by_metric_label(sample[self.SAMPLE_LABELS])
-            if pod is not None and is_static_pending_pod(pod):
-                pod_tags = tagger.tag('kubernetes_pod_uid://%s' % pod["metadata"]["uid"], tagger.HIGH)
+            if context.static_pod:
+                pod_tags = self._get_entity_tags('kubernetes_pod_uid://%s' % context.pod_uid)
                 if not pod_tags:
                     continue
                 pod_tags += self._get_kube_container_name(sample[self.SAMPLE_LABELS])
                 tags = list(set(pod_tags))
             else:
-                tags = tagger.tag(replace_container_rt_prefix(c_id), tagger.HIGH)
+                tags = self._get_entity_tags(context.tagger_entity)
 
             if not tags:
                 continue
@@ -346,7 +437,7 @@ class CadvisorPrometheusScraperMixin(object):
         for pod_uid, sample in iteritems(samples):
             if '.network.' in metric_name and self._is_pod_host_networked(pod_uid):
                 continue
-            tags = tagger.tag('kubernetes_pod_uid://%s' % pod_uid, tagger.HIGH)
+            tags = self._get_entity_tags('kubernetes_pod_uid://%s' % pod_uid)
             if not tags:
                 continue
             tags += scraper_config['custom_tags']
@@ -370,24 +461,23 @@ class CadvisorPrometheusScraperMixin(object):
         seen_keys = {k: False for k in cache}
 
         samples = self._sum_values_by_context(metric, self._get_entity_id_if_container_metric)
-        for c_id, sample in iteritems(samples):
+        for sample in itervalues(samples):
             c_name = self._get_container_label(sample[self.SAMPLE_LABELS], 'name')
             if not c_name:
                 continue
-            pod_uid = self._get_pod_uid(sample[self.SAMPLE_LABELS])
-            if self.pod_list_utils.is_excluded(c_id, pod_uid):
+            context = self._get_container_context(sample[self.SAMPLE_LABELS])
+            if context.excluded:
                 continue
 
-            tags = tagger.tag(replace_container_rt_prefix(c_id), tagger.HIGH)
+            tags = self._get_entity_tags(context.tagger_entity)
             if not tags:
                 continue
             tags += scraper_config['custom_tags']
 
             # FIXME we are forced to do that because the Kubelet PodList isn't updated
             # for static pods, see https://github.com/kubernetes/kubernetes/pull/59948
-            pod = self._get_pod_by_metric_label(sample[self.SAMPLE_LABELS])
-            if pod is not None and is_static_pending_pod(pod):
-                pod_tags = tagger.tag('kubernetes_pod_uid://%s' % pod["metadata"]["uid"], tagger.HIGH)
+            if context.static_pod:
+                pod_tags = self._get_entity_tags('kubernetes_pod_uid://%s' % context.pod_uid)
                 if not pod_tags:
                     continue
                 tags += pod_tags
@@ -416,13 +506,13 @@ class CadvisorPrometheusScraperMixin(object):
         for each sample in the metric and reports the usage_pct
         """
         samples = self._sum_values_by_context(metric, self._get_entity_id_if_container_metric)
-        for c_id, sample in iteritems(samples):
+        for sample in itervalues(samples):
             limit = sample[self.SAMPLE_VALUE]
-            pod_uid = self._get_pod_uid(sample[self.SAMPLE_LABELS])
-            if self.pod_list_utils.is_excluded(c_id, pod_uid):
+            context = self._get_container_context(sample[self.SAMPLE_LABELS])
+            if context.excluded:
                 continue
 
-            tags = tagger.tag(replace_container_rt_prefix(c_id), tagger.HIGH)
+            tags = self._get_entity_tags(context.tagger_entity)
             if not tags:
                 continue
             tags += scraper_config['custom_tags']
@@ -452,7 +542,7 @@ class CadvisorPrometheusScraperMixin(object):
             metric.samples[i] = (
                 sample[self.SAMPLE_NAME],
                 sample[self.SAMPLE_LABELS],
-                sample[self.SAMPLE_VALUE] * 10.0 ** 9,
+                sample[self.SAMPLE_VALUE] * 10.0**9,
             )
         self._process_container_metric('rate', metric_name, metric, scraper_config)
 
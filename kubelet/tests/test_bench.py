@@ -0,0 +1,60 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under Simplified BSD License (see LICENSE)
+import copy
+import io
+import json
+
+import mock
+import pytest
+
+from datadog_checks.base import ensure_bytes
+from datadog_checks.kubelet import KubeletCheck
+
+from .test_kubelet import mock_from_file
+
+
+class MockBodyResponse:
+    def __init__(self, body):
+        self.body = body
+
+    @property
+    def raw(self):
+        return io.BytesIO(ensure_bytes(self.body))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def large_pod_list(count=250):
+    """
+    Build a pod list of `count` pods from the pods of the recorded `pods.json` pod list
+    """
+    recorded_pods = json.loads(mock_from_file('pods.json'))['items']
+    pods = []
+    for i in range(count):
+        pod = copy.deepcopy(recorded_pods[i % len(recorded_pods)])
+        pod['metadata']['name'] = '{}-{}'.format(pod['metadata']['name'], i)
+        pod['metadata']['uid'] = '{}-{}'.format(pod['metadata'].get('uid'), i)
+        for ctr in pod['status'].get('containerStatuses', []):
+            if ctr.get('containerID'):
+                ctr['containerID'] = '{}{:04d}'.format(ctr['containerID'], i)
+        pods.append(pod)
+    return json.dumps({'kind': 'PodList', 'apiVersion': 'v1', 'metadata': {}, 'items': pods})
+
+
+@pytest.mark.parametrize('cache_pod_list', [False, True])
+def test_retrieve_pod_list(benchmark, cache_pod_list):
+    check = KubeletCheck('kubelet', {}, [{'cache_pod_list': cache_pod_list}])
+    check.pod_list_url = 'dummyurl'
+    check.perform_kubelet_query = mock.Mock(return_value=MockBodyResponse(large_pod_list()))
+    check._compute_pod_expiration_datetime = mock.Mock(return_value=None)
+
+    def retrieve_pod_list():
+        pod_list = check.retrieve_pod_list()
+        check._get_pod_list_utils(pod_list)
+
+    benchmark(retrieve_pod_list)
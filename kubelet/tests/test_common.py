@@ -69,6 +69,36 @@ def test_container_filter(monkeypatch):
     c_is_excluded.assert_called_with(ctr_name, ctr_image, namespace)
 
 
+def test_container_filter_previous(monkeypatch):
+    c_is_excluded = mock.Mock(return_value=True)
+    monkeypatch.setattr('datadog_checks.kubelet.common.c_is_excluded', c_is_excluded)
+
+    long_cid = "docker://a335589109ce5506aa69ba7481fc3e6c943abd23c5277016c92dac15d0f40479"
+
+    pods = json.loads(mock_from_file('pods.json'))
+    previous = PodListUtils(pods)
+    assert previous.is_excluded(long_cid) is True
+    assert previous.is_excluded("invalid") is True
+    c_is_excluded.reset_mock()
+
+    # The filtering results of the unchanged containers are carried over
+    pod_list_utils = PodListUtils(json.loads(mock_from_file('pods.json')), previous=previous)
+    assert pod_list_utils.cache == {long_cid: True}
+    assert pod_list_utils.is_excluded(long_cid) is True
+    c_is_excluded.assert_not_called()
+
+    # The image of the container changed
+    pods = json.loads(mock_from_file('pods.json'))
+    for pod in pods['items']:
+        for ctr in pod['status'].get('containerStatuses', []):
+            if ctr.get('containerID') == long_cid:
+                ctr['image'] = 'datadog/agent:latest'
+    pod_list_utils = PodListUtils(pods, previous=previous)
+    assert pod_list_utils.cache == {}
+    assert pod_list_utils.is_excluded(long_cid) is True
+    c_is_excluded.assert_called_once()
+
+
 def test_filter_staticpods(monkeypatch):
     c_is_excluded = mock.Mock(return_value=True)
     monkeypatch.setattr('datadog_checks.kubelet.common.c_is_excluded', c_is_excluded)
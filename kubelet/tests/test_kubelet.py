@@ -458,6 +458,16 @@ def test_prometheus_cpu_summed(monkeypatch, aggregator, tagger):
         assert c not in check.rate.mock_calls
 
 
+def test_container_contexts_telemetry(monkeypatch, aggregator, tagger):
+    check = mock_kubelet_check(monkeypatch, [{"telemetry": True}])
+    check.check({"cadvisor_metrics_endpoint": "http://dummy/metrics/cadvisor", "kubelet_metrics_endpoint": ""})
+
+    # One context per container found in the cadvisor payload, whatever the number of series reported for it
+    aggregator.assert_metric('kubernetes.telemetry.container.contexts.count', value=7, count=1)
+    assert check._container_contexts is None
+    assert check._entity_tags is None
+
+
 def test_prometheus_net_summed(monkeypatch, aggregator, tagger):
     check = mock_kubelet_check(monkeypatch, [{}])
     monkeypatch.setattr(check, 'rate', mock.Mock())
@@ -844,6 +854,49 @@ def test_retrieve_pod_list_success(monkeypatch):
     assert json.dumps(retrieved, sort_keys=True) == json.dumps(expected, sort_keys=True)
 
 
+def test_retrieve_pod_list_cache(monkeypatch):
+    check = KubeletCheck('kubelet', {}, [{'cache_pod_list': True}])
+    check.pod_list_url = "dummyurl"
+    monkeypatch.setattr(check, 'perform_kubelet_query', mock.Mock(return_value=MockStreamResponse('pod_list_raw.dat')))
+    monkeypatch.setattr(check, '_compute_pod_expiration_datetime', mock.Mock(return_value=None))
+
+    retrieved = check.retrieve_pod_list()
+    expected = json.loads(mock_from_file("pod_list_raw.json"))
+    assert json.dumps(retrieved, sort_keys=True) == json.dumps(expected, sort_keys=True)
+
+    # The pod list did not change, it is not decoded again
+    with mock.patch('json.loads') as loads:
+        assert check.retrieve_pod_list() is retrieved
+        loads.assert_not_called()
+    assert check._get_pod_list_utils(retrieved) is check._get_pod_list_utils(retrieved)
+
+    # The pod list changed
+    check.perform_kubelet_query.return_value = MockStreamResponse('pods.json')
+    retrieved = check.retrieve_pod_list()
+    assert json.dumps(retrieved, sort_keys=True) == json.dumps(json.loads(mock_from_file("pods.json")), sort_keys=True)
+
+
+def test_retrieve_pod_list_cache_expiration(monkeypatch):
+    check = KubeletCheck('kubelet', {}, [{'cache_pod_list': True}])
+    check.pod_list_url = "dummyurl"
+    monkeypatch.setattr(check, 'perform_kubelet_query', mock.Mock(return_value=MockStreamResponse('pods_expired.json')))
+    monkeypatch.setattr(
+        check, '_compute_pod_expiration_datetime', mock.Mock(return_value=parse_rfc3339("2019-02-18T16:00:06Z"))
+    )
+
+    pod_list = check.retrieve_pod_list()
+    assert pod_list['expired_count'] == 1
+
+    # hello8-1550505780-kdnjx expires when the cutoff date moves, while the pod list does not change
+    check._compute_pod_expiration_datetime.return_value = parse_rfc3339("2019-02-18T17:00:00Z")
+    pod_list = check.retrieve_pod_list()
+    assert pod_list['expired_count'] == 2
+
+    expected_names = ['dd-agent-ntepl', 'hello5-1550509440-rlgvf']
+    collected_names = [p['metadata']['name'] for p in pod_list['items']]
+    assert collected_names == expected_names
+
+
 def test_retrieved_pod_list_failure(monkeypatch):
     def mock_perform_kubelet_query(s, stream=False):
         raise Exception("network error")
@@ -278,3 +278,34 @@ def test_get_kube_container_name():
 
     tags = CadvisorPrometheusScraperMixin._get_kube_container_name([])
     assert tags == []
+
+
+def test_get_container_context_cache(cadvisor_scraper):
+    labels = {
+        "container": "datadog-agent",
+        "namespace": "default",
+        "pod": "datadog-agent-pbqt2",
+        "name": "datadog-agent",
+        "image": "datadog/agent:latest",
+        "id": "/kubepods/burstable/podb66c40af-997d-11e8-96a3-42010a840157/51cba2ca2290",
+    }
+    per_cpu_labels = dict(labels, cpu="cpu01")
+    resolve = mock.Mock(wraps=cadvisor_scraper._resolve_container_context)
+    cadvisor_scraper._resolve_container_context = resolve
+
+    # Outside of a cadvisor scrape, contexts are not cached
+    context = cadvisor_scraper._get_container_context(labels)
+    assert context.entity_id == "containerd://51cba2ca229069039575750d44ed3a67e9b5ead651312ba7ff218dd9202fde64"
+    assert context.tagger_entity == ("container_id://51cba2ca229069039575750d44ed3a67e9b5ead651312ba7ff218dd9202fde64")
+    assert context.pod_uid == "b66c40af-997d-11e8-96a3-42010a840157"
+    assert context.static_pod is False
+    cadvisor_scraper._get_container_context(labels)
+    assert resolve.call_count == 2
+
+    resolve.reset_mock()
+    cadvisor_scraper._container_contexts = {}
+    assert cadvisor_scraper._get_container_context(labels) == context
+    assert cadvisor_scraper._get_container_context(per_cpu_labels) is cadvisor_scraper._get_container_context(labels)
+    assert cadvisor_scraper._get_container_context(dict(labels, container="POD")) is None
+    assert resolve.call_count == 2
+    assert len(cadvisor_scraper._container_contexts) == 2
@@ -6,6 +6,7 @@ import re
 import time
 from collections import Counter, defaultdict
 from copy import deepcopy
+from functools import partial
 
 from six import iteritems
 
@@ -140,11 +141,17 @@ class KubernetesState(OpenMetricsBaseCheck):
         self.job_succeeded_count = defaultdict(int)
         self.job_failed_count = defaultdict(int)
 
+        # Tags built from a (label name, label value) pair, shared by all the metric families of a scrape
+        self._label_tags_cache = {}
+
     def check(self, instance):
         endpoint = instance.get('kube_state_url')
 
         scraper_config = self.config_map[endpoint]
-        self.process(scraper_config, metric_transformers=self.METRIC_TRANSFORMERS)
+        try:
+            self.process(scraper_config, metric_transformers=self.METRIC_TRANSFORMERS)
+        finally:
+            self._label_tags_cache = {}
 
         # Logic for Cron Jobs
         for job_tags, job in iteritems(self.failed_cron_job_counts):
@@ -541,11 +548,7 @@ class KubernetesState(OpenMetricsBaseCheck):
         Tag name is label name if not specified.
         Returns an empty list if name was not found.
         """
-        value = labels.get(name)
-        tags = []
-        if value:
-            tags += self._build_tags(tag_name or name, value, scraper_config)
-        return tags
+        return self._value_to_tags(tag_name or name, labels.get(name), scraper_config)
 
     def _trim_job_tag(self, name):
         """
@@ -565,6 +568,31 @@ class KubernetesState(OpenMetricsBaseCheck):
             self.log.debug("Cannot extract ts from job name %s", name)
             return None
 
+    def _aggregate_by_labels(self, metric, label_names, count_objects=False):
+        """
+        Sum the values of the samples of `metric`, or count them, grouped by the values of `label_names`.
+        No tag is built here, the caller builds them once per group.
+        """
+        counter = Counter()
+        for sample in metric.samples:
+            labels = sample[self.SAMPLE_LABELS]
+            key = tuple(labels.get(label_name) for label_name in label_names)
+            counter[key] += 1 if count_objects else sample[self.SAMPLE_VALUE]
+        return counter
+
+    def _submit_aggregated_gauges(self, metric_name, counter, tags_from_key, scraper_config):
+        """
+        Submit the groups of `_aggregate_by_labels` as gauges. Groups ending up with the same tags,
+        for instance label values only differing by their case, are summed together.
+        """
+        by_tags = Counter()
+        for key, count in iteritems(counter):
+            tags = tags_from_key(key) + scraper_config['custom_tags']
+            by_tags[tuple(sorted(tags))] += count
+
+        for tags, count in iteritems(by_tags):
+            self.gauge(metric_name, count, tags=list(tags))
+
     # Labels attached: namespace, pod
     # As a message the phase=Pending|Running|Succeeded|Failed|Unknown
     # From the phase the check will update its status
@@ -573,20 +601,17 @@ class KubernetesState(OpenMetricsBaseCheck):
     def kube_pod_status_phase(self, metric, scraper_config):
         """ Phase a pod is in. """
         metric_name = scraper_config['namespace'] + '.pod.status_phase'
-        status_phase_counter = Counter()
 
-        for sample in metric.samples:
-            # Counts aggregated cluster-wide to avoid no-data issues on pod churn,
-            # pod granularity available in the service checks
-            tags = (
-                self._label_to_tags('namespace', sample[self.SAMPLE_LABELS], scraper_config)
-                + self._label_to_tags('phase', sample[self.SAMPLE_LABELS], scraper_config)
-                + scraper_config['custom_tags']
+        # Counts aggregated cluster-wide to avoid no-data issues on pod churn,
+        # pod granularity available in the service checks
+        def tags_from_key(key):
+            namespace, phase = key
+            return self._value_to_tags('namespace', namespace, scraper_config) + self._value_to_tags(
+                'phase', phase, scraper_config
             )
-            status_phase_counter[tuple(sorted(tags))] += sample[self.SAMPLE_VALUE]
 
-        for tags, count in iteritems(status_phase_counter):
-            self.gauge(metric_name, count, tags=list(tags))
+        status_phase_counter = self._aggregate_by_labels(metric, ('namespace', 'phase'))
+        self._submit_aggregated_gauges(metric_name, status_phase_counter, tags_from_key, scraper_config)
 
     def _submit_metric_kube_pod_container_status_reason(
         self, metric, metric_suffix, allowed_status_reasons, scraper_config
@@ -599,7 +624,7 @@ class KubernetesState(OpenMetricsBaseCheck):
             reason = sample[self.SAMPLE_LABELS].get('reason')
             if reason and reason.lower() in allowed_status_reasons:
                 # Filtering according to the reason here is paramount to limit cardinality
-                tags += self._build_tags('reason', reason, scraper_config)
+                tags += self._get_label_tags('reason', reason, scraper_config)
             else:
                 continue
 
@@ -608,12 +633,12 @@ class KubernetesState(OpenMetricsBaseCheck):
                     continue
 
                 elif label_name == 'container':
-                    tags += self._build_tags(
+                    tags += self._get_label_tags(
                         'kube_container_name', sample[self.SAMPLE_LABELS]['container'], scraper_config
                     )
 
                 else:
-                    tags += self._build_tags(label_name, label_value, scraper_config)
+                    tags += self._get_label_tags(label_name, label_value, scraper_config)
 
             self.gauge(
                 metric_name,
@@ -641,7 +666,7 @@ class KubernetesState(OpenMetricsBaseCheck):
             on_schedule = int(sample[self.SAMPLE_VALUE]) - curr_time
             tags = []
             for label_name, label_value in iteritems(sample[self.SAMPLE_LABELS]):
-                tags += self._build_tags(label_name, label_value, scraper_config)
+                tags += self._get_label_tags(label_name, label_value, scraper_config)
 
             tags += scraper_config['custom_tags']
             if on_schedule < 0:
@@ -659,9 +684,9 @@ class KubernetesState(OpenMetricsBaseCheck):
             for label_name, label_value in iteritems(sample[self.SAMPLE_LABELS]):
                 if label_name == 'job' or label_name == 'job_name':
                     trimmed_job = self._trim_job_tag(label_value)
-                    tags += self._build_tags(label_name, trimmed_job, scraper_config)
+                    tags += self._get_label_tags(label_name, trimmed_job, scraper_config)
                 else:
-                    tags += self._build_tags(label_name, label_value, scraper_config)
+                    tags += self._get_label_tags(label_name, label_value, scraper_config)
             self.service_check(service_check_name, self.OK, tags=tags + scraper_config['custom_tags'])
 
     def kube_job_failed(self, metric, scraper_config):
@@ -671,9 +696,9 @@ class KubernetesState(OpenMetricsBaseCheck):
             for label_name, label_value in iteritems(sample[self.SAMPLE_LABELS]):
                 if label_name == 'job' or label_name == 'job_name':
                     trimmed_job = self._trim_job_tag(label_value)
-                    tags += self._build_tags(label_name, trimmed_job, scraper_config)
+                    tags += self._get_label_tags(label_name, trimmed_job, scraper_config)
                 else:
-                    tags += self._build_tags(label_name, label_value, scraper_config)
+                    tags += self._get_label_tags(label_name, label_value, scraper_config)
             self.service_check(service_check_name, self.CRITICAL, tags=tags + scraper_config['custom_tags'])
 
     def kube_job_status_failed(self, metric, scraper_config):
@@ -684,9 +709,9 @@ class KubernetesState(OpenMetricsBaseCheck):
                 if label_name == 'job' or label_name == 'job_name':
                     trimmed_job = self._trim_job_tag(label_value)
                     job_ts = self._extract_job_timestamp(label_value)
-                    tags += self._build_tags(label_name, trimmed_job, scraper_config)
+                    tags += self._get_label_tags(label_name, trimmed_job, scraper_config)
                 else:
-                    tags += self._build_tags(label_name, label_value, scraper_config)
+                    tags += self._get_label_tags(label_name, label_value, scraper_config)
             if job_ts is not None:  # if there is a timestamp, this is a Cron Job
                 self.failed_cron_job_counts[frozenset(tags)].update_current_ts_and_add_count(
                     job_ts, sample[self.SAMPLE_VALUE]
@@ -702,9 +727,9 @@ class KubernetesState(OpenMetricsBaseCheck):
                 if label_name == 'job' or label_name == 'job_name':
                     trimmed_job = self._trim_job_tag(label_value)
                     job_ts = self._extract_job_timestamp(label_value)
-                    tags += self._build_tags(label_name, trimmed_job, scraper_config)
+                    tags += self._get_label_tags(label_name, trimmed_job, scraper_config)
                 else:
-                    tags += self._build_tags(label_name, label_value, scraper_config)
+                    tags += self._get_label_tags(label_name, label_value, scraper_config)
             if job_ts is not None:  # if there is a timestamp, this is a Cron Job
                 self.succeeded_cron_job_counts[frozenset(tags)].update_current_ts_and_add_count(
                     job_ts, sample[self.SAMPLE_VALUE]
@@ -716,7 +741,6 @@ class KubernetesState(OpenMetricsBaseCheck):
         """ The ready status of a cluster node. v1.0+"""
         base_check_name = scraper_config['namespace'] + '.node'
         metric_name = scraper_config['namespace'] + '.nodes.by_condition'
-        by_condition_counter = Counter()
 
         for sample in metric.samples:
             node_tags = self._label_to_tags("node", sample[self.SAMPLE_LABELS], scraper_config)
@@ -728,17 +752,16 @@ class KubernetesState(OpenMetricsBaseCheck):
                 tags=node_tags + scraper_config['custom_tags'],
             )
 
-            # Counts aggregated cluster-wide to avoid no-data issues on node churn,
-            # node granularity available in the service checks
-            tags = (
-                self._label_to_tags("condition", sample[self.SAMPLE_LABELS], scraper_config)
-                + self._label_to_tags("status", sample[self.SAMPLE_LABELS], scraper_config)
-                + scraper_config['custom_tags']
+        # Counts aggregated cluster-wide to avoid no-data issues on node churn,
+        # node granularity available in the service checks
+        def tags_from_key(key):
+            condition, status = key
+            return self._value_to_tags('condition', condition, scraper_config) + self._value_to_tags(
+                'status', status, scraper_config
             )
-            by_condition_counter[tuple(sorted(tags))] += sample[self.SAMPLE_VALUE]
 
-        for tags, count in iteritems(by_condition_counter):
-            self.gauge(metric_name, count, tags=list(tags))
+        by_condition_counter = self._aggregate_by_labels(metric, ('condition', 'status'))
+        self._submit_aggregated_gauges(metric_name, by_condition_counter, tags_from_key, scraper_config)
 
     def kube_node_status_ready(self, metric, scraper_config):
         """ The ready status of a cluster node (legacy)"""
@@ -808,10 +831,10 @@ class KubernetesState(OpenMetricsBaseCheck):
             for sample in metric.samples:
                 tags = []
                 for label_name, label_value in iteritems(sample[self.SAMPLE_LABELS]):
-                    tags += self._build_tags(label_name, label_value, scraper_config)
+                    tags += self._get_label_tags(label_name, label_value, scraper_config)
                 tags += scraper_config['custom_tags']
                 status = statuses[int(sample[self.SAMPLE_VALUE])]  # value can be 0 or 1
-                tags += self._build_tags('status', status, scraper_config)
+                tags += self._get_label_tags('status', status, scraper_config)
                 self.gauge(metric_name, 1, tags)  # metric value is always one, value is on the tags
         else:
             self.log.error("Metric type %s unsupported for metric %s", metric.type, metric.name)
@@ -871,39 +894,48 @@ class KubernetesState(OpenMetricsBaseCheck):
         """ Sum values by allowed tags and submit counts as gauges. """
         config = self.object_count_params[metric.name]
         metric_name = "{}.{}".format(scraper_config['namespace'], config['metric_name'])
-        object_counter = Counter()
-
-        for sample in metric.samples:
-            tags = []
-            for l in config['allowed_labels']:
-                tag = self._label_to_tag(l, sample[self.SAMPLE_LABELS], scraper_config)
-                if tag is None:
-                    tag = self._format_tag(l, "unknown", scraper_config)
-                tags.append(tag)
-            tags += scraper_config['custom_tags']
-            object_counter[tuple(sorted(tags))] += sample[self.SAMPLE_VALUE]
-
-        for tags, count in iteritems(object_counter):
-            self.gauge(metric_name, count, tags=list(tags))
+        object_counter = self._aggregate_by_labels(metric, config['allowed_labels'])
+        self._submit_aggregated_gauges(
+            metric_name, object_counter, partial(self._allowed_labels_tags, config, scraper_config), scraper_config
+        )
 
     def count_objects_by_tags(self, metric, scraper_config):
         """ Count objects by allowed tags and submit counts as gauges. """
         config = self.object_count_params[metric.name]
         metric_name = "{}.{}".format(scraper_config['namespace'], config['metric_name'])
-        object_counter = Counter()
+        object_counter = self._aggregate_by_labels(metric, config['allowed_labels'], count_objects=True)
+        self._submit_aggregated_gauges(
+            metric_name, object_counter, partial(self._allowed_labels_tags, config, scraper_config), scraper_config
+        )
 
-        for sample in metric.samples:
-            tags = []
-            for l in config['allowed_labels']:
-                tag = self._label_to_tag(l, sample[self.SAMPLE_LABELS], scraper_config)
-                if tag is None:
-                    tag = self._format_tag(l, "unknown", scraper_config)
-                tags.append(tag)
-            tags += scraper_config['custom_tags']
-            object_counter[tuple(sorted(tags))] += 1
+    def _allowed_labels_tags(self, config, scraper_config, label_values):
+        """
+        Build the tags of a group of `sum_values_by_tags` or `count_objects_by_tags`, "unknown" standing for
+        the missing labels
+        """
+        return [
+            self._format_tag(label_name, label_value or "unknown", scraper_config)
+            for label_name, label_value in zip(config['allowed_labels'], label_values)
+        ]
 
-        for tags, count in iteritems(object_counter):
-            self.gauge(metric_name, count, tags=list(tags))
+    def _value_to_tags(self, name, value, scraper_config):
+        """
+        Same as `_label_to_tags` with the label value already extracted
+        """
+        if value:
+            return list(self._get_label_tags(name, value, scraper_config))
+        return []
+
+    def _get_label_tags(self, label_name, label_value, scraper_config):
+        """
+        Return the tags `_build_tags` builds for a label as a tuple, cached for the whole scrape
+        so that the tag strings of labels found in several metric families are only built once.
+        """
+        key = (label_name, label_value)
+        tags = self._label_tags_cache.get(key)
+        if tags is None:
+            tags = self._label_tags_cache[key] = tuple(self._build_tags(label_name, label_value, scraper_config))
+        return tags
 
     def _build_tags(self, label_name, label_value, scraper_config, hostname=None):
         """
@@ -930,7 +962,7 @@ class KubernetesState(OpenMetricsBaseCheck):
         _tags += scraper_config['_metric_tags']
         for label_name, label_value in iteritems(sample[self.SAMPLE_LABELS]):
             if label_name not in scraper_config['exclude_labels']:
-                _tags += self._build_tags(label_name, label_value, scraper_config)
+                _tags += self._get_label_tags(label_name, label_value, scraper_config)
         return self._finalize_tags_to_submit(
             _tags, metric_name, val, sample, custom_tags=custom_tags, hostname=hostname
         )
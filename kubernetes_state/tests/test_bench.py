@@ -0,0 +1,68 @@
+# (C) Datadog, Inc. 2021-present
+# All rights reserved
+# Licensed under Simplified BSD License (see LICENSE)
+import mock
+
+from datadog_checks.base import ensure_bytes
+from datadog_checks.kubernetes_state import KubernetesState
+
+from .test_kubernetes_state import CHECK_NAME, MockResponse
+
+POD_PHASES = ('Pending', 'Running', 'Succeeded', 'Failed', 'Unknown')
+NODE_CONDITIONS = ('Ready', 'OutOfDisk', 'MemoryPressure', 'DiskPressure', 'NetworkUnavailable')
+
+
+def large_ksm_payload(pods=5000, nodes=100, namespaces=20):
+    """
+    Build a kube-state-metrics payload of `pods` pods, of one container each, spread over `nodes` nodes
+    """
+    lines = ['# TYPE kube_node_status_condition gauge']
+    for n in range(nodes):
+        for condition in NODE_CONDITIONS:
+            for status in ('true', 'false', 'unknown'):
+                value = int((status == 'true') == (condition == 'Ready'))
+                lines.append(
+                    'kube_node_status_condition{{node="node-{}",condition="{}",status="{}"}} {}'.format(
+                        n, condition, status, value
+                    )
+                )
+
+    families = {
+        'kube_pod_info': [],
+        'kube_pod_status_phase': [],
+        'kube_pod_status_ready': [],
+        'kube_pod_container_status_ready': [],
+        'kube_pod_container_status_restarts_total': [],
+        'kube_pod_container_resource_requests_cpu_cores': [],
+    }
+    for p in range(pods):
+        labels = 'namespace="namespace-{}",pod="pod-{}"'.format(p % namespaces, p)
+        container_labels = '{},container="container-{}"'.format(labels, p)
+        families['kube_pod_info'].append(
+            '{{{},node="node-{}",created_by_kind="ReplicaSet"}} 1'.format(labels, p % nodes)
+        )
+        for phase in POD_PHASES:
+            families['kube_pod_status_phase'].append(
+                '{{{},phase="{}"}} {}'.format(labels, phase, int(phase == 'Running'))
+            )
+        for condition in ('true', 'false', 'unknown'):
+            families['kube_pod_status_ready'].append(
+                '{{{},condition="{}"}} {}'.format(labels, condition, int(condition == 'true'))
+            )
+        families['kube_pod_container_status_ready'].append('{{{}}} 1'.format(container_labels))
+        families['kube_pod_container_status_restarts_total'].append('{{{}}} {}'.format(container_labels, p % 3))
+        families['kube_pod_container_resource_requests_cpu_cores'].append('{{{}}} 0.1'.format(container_labels))
+
+    for name, samples in families.items():
+        lines.append('# TYPE {} gauge'.format(name))
+        lines.extend(name + sample for sample in samples)
+    return ensure_bytes('\n'.join(lines) + '\n')
+
+
+def test_check(benchmark):
+    instance = {'kube_state_url': 'http://foo', 'tags': ['optional:tag1']}
+    check = KubernetesState(CHECK_NAME, {}, [instance])
+    payload = large_ksm_payload()
+    check.poll = mock.MagicMock(side_effect=lambda *args, **kwargs: MockResponse(payload, 'text/plain'))
+
+    benchmark(check.check, instance)
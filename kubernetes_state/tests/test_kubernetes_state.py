@@ -675,6 +675,22 @@ def test_pod_phase_gauges(aggregator, instance, check):
     )
 
 
+def test_label_tags_cache(aggregator, instance, check):
+    # run check twice to have pod/node mapping
+    check.check(instance)
+    check._build_tags = mock.Mock(wraps=check._build_tags)
+    check.check(instance)
+
+    # The tags of a label are built once per scrape, whatever the number of metric families carrying it
+    built_labels = [c[0][:2] for c in check._build_tags.call_args_list]
+    assert len(built_labels) == len(set(built_labels))
+    assert ('namespace', 'default') in built_labels
+    assert check._label_tags_cache == {}
+
+    check.check(instance)
+    assert check._build_tags.call_count == 2 * len(built_labels)
+
+
 def test_extract_timestamp(check):
     job_name = "hello2-1509998340"
     job_name2 = "hello-2-1509998340"
@@ -8,6 +8,10 @@ from datadog_checks.mongo.metrics import CASE_SENSITIVE_METRIC_NAME_SUFFIXES
 if PY3:
     long = int
 
+_CASE_SENSITIVE_METRIC_NAME_PATTERNS = [
+    (re.compile(pattern), repl) for pattern, repl in iteritems(CASE_SENSITIVE_METRIC_NAME_SUFFIXES)
+]
+
 
 class MongoCollector(object):
     """The base collector object, can be considered abstract.
@@ -24,6 +28,15 @@ class MongoCollector(object):
         self.gauge = self.check.gauge
         self.base_tags = tags
         self.metrics_to_collect = self.check.metrics_to_collect
+        self._normalized_metric_names = self.check.normalized_metric_names
+
+    @property
+    def name(self):
+        """The name of the collector, e.g. `db_stat` for the `DbStatCollector`."""
+        class_name = type(self).__name__
+        if class_name.endswith('Collector'):
+            class_name = class_name[: -len('Collector')]
+        return re.sub(r'(?<!^)(?=[A-Z])', '_', class_name).lower()
 
     def collect(self, api):
         """The main method exposed by the collector classes, needs to be implemented by every subclass.
@@ -37,13 +50,23 @@ class MongoCollector(object):
     def _normalize(self, metric_name, submit_method, prefix=None):
         """Replace case-sensitive metric name characters, normalize the metric name,
         prefix and suffix according to its type.
+        Metric names are only normalized once per check instance, and then cached.
         """
+        key = (metric_name, submit_method, prefix)
+        normalized_metric_name = self._normalized_metric_names.get(key)
+        if normalized_metric_name is None:
+            normalized_metric_name = self._normalized_metric_names[key] = self._compute_normalized_metric_name(
+                metric_name, submit_method, prefix
+            )
+        return normalized_metric_name
+
+    def _compute_normalized_metric_name(self, metric_name, submit_method, prefix):
         metric_prefix = "mongodb." if not prefix else "mongodb.{0}.".format(prefix)
         metric_suffix = "ps" if submit_method == AgentCheck.rate else ""
 
         # Replace case-sensitive metric name characters
-        for pattern, repl in iteritems(CASE_SENSITIVE_METRIC_NAME_SUFFIXES):
-            metric_name = re.compile(pattern).sub(repl, metric_name)
+        for pattern, repl in _CASE_SENSITIVE_METRIC_NAME_PATTERNS:
+            metric_name = pattern.sub(repl, metric_name)
 
         # Normalize, and wrap
         return u"{metric_prefix}{normalized_metric_name}{metric_suffix}".format(
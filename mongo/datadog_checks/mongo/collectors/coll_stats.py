@@ -1,6 +1,9 @@
+from functools import partial
+
 from six import iteritems
 
 from datadog_checks.base import AgentCheck
+from datadog_checks.base.utils.concurrency import map_concurrently
 from datadog_checks.mongo.collectors.base import MongoCollector
 from datadog_checks.mongo.metrics import COLLECTION_METRICS
 
@@ -25,10 +28,11 @@ class CollStatsCollector(MongoCollector):
     def collect(self, api):
         # Ensure that you're on the right db
         db = api[self.db_name]
-        # Loop through the collections
-        for coll_name in self.coll_names:
-            # Grab the stats from the collection
-            payload = {'collection': db.command("collstats", coll_name)}
+        # Grab the stats from the collections concurrently
+        for coll_name, coll_stats in map_concurrently(
+            partial(db.command, "collstats"), self.coll_names, self.check.config.threads_count
+        ):
+            payload = {'collection': coll_stats}
             additional_tags = ["db:%s" % self.db_name, "collection:%s" % coll_name]
             self._submit_payload(payload, additional_tags, COLLECTION_METRICS)
 
@@ -25,11 +25,17 @@ class DbStatCollector(MongoCollector):
             return deployment.is_principal()
 
     def collect(self, api):
-        db = api[self.db_name]
+        self.submit_stats(self.get_stats(api))
+
+    def get_stats(self, api):
+        """Run the 'dbstats' command. Safe to call from a worker thread, see `MongoDb._collect_db_stats`."""
+        return api[self.db_name].command('dbstats')
+
+    def submit_stats(self, db_stats):
         # Submit the metric
         additional_tags = [
             u"cluster:db:{0}".format(self.db_name),  # FIXME: 8.x, was kept for backward compatibility
             u"db:{0}".format(self.db_name),
         ]
-        stats = {'stats': db.command('dbstats')}
+        stats = {'stats': db_stats}
         return self._submit_payload(stats, additional_tags)
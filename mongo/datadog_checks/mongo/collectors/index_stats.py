@@ -1,3 +1,4 @@
+from datadog_checks.base.utils.concurrency import map_concurrently
 from datadog_checks.mongo.collectors.base import MongoCollector
 
 
@@ -15,14 +16,21 @@ class IndexStatsCollector(MongoCollector):
 
     def collect(self, api):
         db = api[self.db_name]
-        for coll_name in self.coll_names:
+
+        def get_index_stats(coll_name):
             try:
-                for stats in db[coll_name].aggregate([{"$indexStats": {}}], cursor={}):
-                    idx_tags = self.base_tags + [
-                        "name:{0}".format(stats.get('name', 'unknown')),
-                        "collection:{0}".format(coll_name),
-                    ]
-                    val = int(stats.get('accesses', {}).get('ops', 0))
-                    self.gauge('mongodb.collection.indexes.accesses.ops', val, idx_tags)
+                return list(db[coll_name].aggregate([{"$indexStats": {}}], cursor={}))
             except Exception as e:
                 self.log.error("Could not fetch indexes stats for collection %s: %s", coll_name, e)
+                return []
+
+        for coll_name, index_stats in map_concurrently(
+            get_index_stats, self.coll_names, self.check.config.threads_count
+        ):
+            for stats in index_stats:
+                idx_tags = self.base_tags + [
+                    "name:{0}".format(stats.get('name', 'unknown')),
+                    "collection:{0}".format(coll_name),
+                ]
+                val = int(stats.get('accesses', {}).get('ops', 0))
+                self.gauge('mongodb.collection.indexes.accesses.ops', val, idx_tags)
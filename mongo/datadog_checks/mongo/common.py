@@ -28,6 +28,7 @@ SECONDARY_STATE_ID = 2
 ARBITER_STATE_ID = 7
 
 DEFAULT_TIMEOUT = 30
+DEFAULT_THREADS_COUNT = 10
 ALLOWED_CUSTOM_METRICS_TYPES = ['gauge', 'rate', 'count', 'monotonic_count']
 ALLOWED_CUSTOM_QUERIES_COMMANDS = ['aggregate', 'count', 'find']
 
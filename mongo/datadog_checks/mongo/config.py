@@ -1,6 +1,6 @@
 from datadog_checks.base import ConfigurationError, is_affirmative
 from datadog_checks.base.utils.common import exclude_undefined_keys
-from datadog_checks.mongo.common import DEFAULT_TIMEOUT
+from datadog_checks.mongo.common import DEFAULT_THREADS_COUNT, DEFAULT_TIMEOUT
 from datadog_checks.mongo.utils import build_connection_string, parse_mongo_uri
 
 
@@ -65,6 +65,11 @@ class MongoConfig(object):
         self.coll_names = instance.get('collections', [])
         self.custom_queries = instance.get("custom_queries", [])
 
+        self.threads_count = int(instance.get('threads_count', DEFAULT_THREADS_COUNT))
+        if self.threads_count < 1:
+            raise ConfigurationError('`threads_count` must be greater than 0')
+        self.collect_duration_metrics = is_affirmative(instance.get('collect_duration_metrics', False))
+
         self._base_tags = list(set(instance.get('tags', [])))
         self.service_check_tags = self._compute_service_check_tags()
         self.metric_tags = self._compute_metric_tags()
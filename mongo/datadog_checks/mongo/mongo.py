@@ -7,9 +7,11 @@ from copy import deepcopy
 from distutils.version import LooseVersion
 
 import pymongo
-from six import PY3, itervalues
+from six import PY3, iteritems, itervalues
 
 from datadog_checks.base import AgentCheck, is_affirmative
+from datadog_checks.base.utils.concurrency import map_concurrently
+from datadog_checks.base.utils.time import timed
 from datadog_checks.mongo.api import MongoApi
 from datadog_checks.mongo.collectors import (
     CollStatsCollector,
@@ -75,13 +77,29 @@ class MongoDb(AgentCheck):
         # Get the list of metrics to collect
         self.metrics_to_collect = self._build_metric_list_to_collect()
         self.collectors = []
+        self._collectors_key = None
         self.last_states_by_server = {}
 
+        # Normalized metric names, shared by the collectors, see `MongoCollector._normalize`
+        self.normalized_metric_names = {}
+
     @classmethod
     def get_library_versions(cls):
         return {'pymongo': pymongo.version}
 
     def refresh_collectors(self, deployment_type, mongo_version, all_dbs, tags):
+        # The collectors are reused as long as the deployment, the version, the databases and the tags do not change
+        collectors_key = (
+            type(deployment_type),
+            sorted(iteritems(vars(deployment_type))),
+            mongo_version,
+            list(all_dbs),
+            list(tags),
+        )
+        if collectors_key == self._collectors_key:
+            return
+        self._collectors_key = collectors_key
+
         collect_tcmalloc_metrics = 'tcmalloc' in self.config.additional_metrics
         potential_collectors = [
             ConnPoolStatsCollector(self, tags),
@@ -200,10 +218,49 @@ class MongoDb(AgentCheck):
             self.gauge('mongodb.dbs', len(dbnames), tags=tags)
 
         self.refresh_collectors(api.deployment_type, mongo_version, dbnames, tags)
+
+        # The dbstats commands of all the databases are run concurrently
+        db_stat_collectors = [coll for coll in self.collectors if isinstance(coll, DbStatCollector)]
+        if db_stat_collectors:
+            with self._timed_collector('db_stat', tags):
+                self._collect_db_stats(api, db_stat_collectors)
+
         for collector in self.collectors:
+            if isinstance(collector, DbStatCollector):
+                continue
+            with self._timed_collector(collector.name, tags):
+                try:
+                    collector.collect(api)
+                except Exception:
+                    self.log.info(
+                        "Unable to collect logs from collector %s. Some metrics will be missing.",
+                        collector,
+                        exc_info=True,
+                    )
+
+    def _collect_db_stats(self, api, collectors):
+        def get_stats(collector):
             try:
-                collector.collect(api)
+                return collector.get_stats(api)
             except Exception:
                 self.log.info(
                     "Unable to collect logs from collector %s. Some metrics will be missing.", collector, exc_info=True
                 )
+
+        for collector, stats in map_concurrently(get_stats, collectors, self.config.threads_count):
+            if stats is None:
+                continue
+            try:
+                collector.submit_stats(stats)
+            except Exception:
+                self.log.info(
+                    "Unable to collect logs from collector %s. Some metrics will be missing.", collector, exc_info=True
+                )
+
+    def _timed_collector(self, collector_name, tags):
+        return timed(
+            self.gauge,
+            'mongodb.collector.duration',
+            tags=tags + ['collector:{}'.format(collector_name)],
+            enabled=self.config.collect_duration_metrics,
+        )
@@ -77,6 +77,22 @@ def test_metric_normalization(check, instance):
     assert 'mongodb.foobar.exclusive' == normalize('foobar.W', GAUGE)
 
 
+def test_metric_normalization_cache(check, instance):
+    """
+    Metric names are only normalized once.
+    """
+    check = check(instance)
+    collector = MongoCollector(check, None)
+
+    with mock.patch.object(check, 'normalize', wraps=check.normalize) as normalize:
+        assert 'mongodb.foobar.sharedps' == collector._normalize('foobar.R', RATE)
+        assert 'mongodb.foobar.sharedps' == collector._normalize('foobar.R', RATE)
+        assert 'mongodb.foobar.shared' == collector._normalize('foobar.R', GAUGE)
+        assert 'mongodb.oplog.foobar.shared' == collector._normalize('foobar.R', GAUGE, prefix='oplog')
+
+    assert normalize.call_count == 3
+
+
 def test_state_translation(check, instance):
     """
     Check that resolving replset member state IDs match to names and descriptions properly.
@@ -177,6 +193,12 @@ def test_config_credentials(check, instance, options, is_error):
         check(instance)
 
 
+def test_config_threads_count(check, instance):
+    instance['threads_count'] = 0
+    with pytest.raises(ConfigurationError):
+        check(instance)
+
+
 def test_legacy_config_deprecation(check):
     check = check(common.INSTANCE_BASIC_LEGACY_CONFIG)
 
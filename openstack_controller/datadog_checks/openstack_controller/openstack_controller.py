@@ -3,6 +3,7 @@
 # Licensed under Simplified BSD License (see LICENSE)
 import copy
 import re
+import time
 from collections import defaultdict
 from datetime import datetime
 
@@ -10,8 +11,9 @@ import requests
 from openstack.config.loader import OpenStackConfig
 from six import iteritems, itervalues
 
-from datadog_checks.base import AgentCheck, is_affirmative
+from datadog_checks.base import AgentCheck, ConfigurationError, is_affirmative
 from datadog_checks.base.utils.common import pattern_filter
+from datadog_checks.base.utils.concurrency import map_concurrently
 from datadog_checks.base.utils.tracing import traced
 
 from .api import ApiFactory
@@ -25,6 +27,7 @@ from .exceptions import (
     MissingNovaEndpoint,
 )
 from .retry import BackOffRetry
+from .settings import DEFAULT_CACHE_TTL, DEFAULT_THREADS_COUNT
 
 SOURCE_TYPE = 'openstack'
 
@@ -133,6 +136,21 @@ class OpenStackControllerCheck(AgentCheck):
         # Mapping of Nova-managed servers to tags for current instance name
         self.external_host_tags = {}
 
+        # Per-server and per-project API calls are made from a pool of threads sharing the check's HTTP session
+        self.threads_count = int(self.instance.get('threads_count', DEFAULT_THREADS_COUNT))
+        if self.threads_count < 1:
+            raise ConfigurationError('`threads_count` must be greater than 0')
+
+        # Responses of rarely changing objects (projects, aggregates, flavors) are kept for `cache_ttl` seconds
+        # Ex: _objects_cache = {'flavors': (<fetch timestamp>, <flavors>)}
+        self.cache_ttl = int(self.instance.get('cache_ttl', DEFAULT_CACHE_TTL))
+        self._objects_cache = {}
+        self._run_timestamp = 0
+
+        # Ex: _api_response_times = [(<endpoint>, <response time in seconds>)]
+        self.collect_api_latency_metrics = is_affirmative(self.instance.get('collect_api_latency_metrics', False))
+        self._api_response_times = []
+
     def delete_api_cache(self):
         self._api = None
 
@@ -173,13 +191,16 @@ class OpenStackControllerCheck(AgentCheck):
 
     # Compute
     def _parse_uptime_string(self, uptime):
-        """ Parse u' 16:53:48 up 1 day, 21:34,  3 users,  load average: 0.04, 0.14, 0.19\n' """
+        """Parse u' 16:53:48 up 1 day, 21:34,  3 users,  load average: 0.04, 0.14, 0.19\n'"""
         uptime = uptime.strip()
         load_averages = uptime[uptime.find('load average:') :].split(':')[1].strip().split(',')
         load_averages = [float(load_avg) for load_avg in load_averages]
         return load_averages
 
     def get_all_aggregate_hypervisors(self):
+        return self._get_cached_object('aggregates', self._get_all_aggregate_hypervisors)
+
+    def _get_all_aggregate_hypervisors(self):
         hypervisor_aggregate_map = {}
         try:
             aggregate_list = self.get_os_aggregates()
@@ -225,7 +246,13 @@ class OpenStackControllerCheck(AgentCheck):
                 hyp_project_names[hypervisor_hostname].add(server['project_name'])
 
         hypervisors = self.get_os_hypervisors_detail()
-        for hyp in hypervisors:
+        if collect_hypervisor_metrics and collect_hypervisor_load:
+            # Fetch the loads of all the hypervisors concurrently, in the order of their responses
+            hypervisors_loads = map_concurrently(self._get_hypervisor_load_averages, hypervisors, self.threads_count)
+        else:
+            hypervisors_loads = ((hyp, None) for hyp in hypervisors)
+
+        for hyp, load_averages in hypervisors_loads:
             self.get_stats_for_single_hypervisor(
                 hyp,
                 hyp_project_names,
@@ -233,6 +260,7 @@ class OpenStackControllerCheck(AgentCheck):
                 use_shortname=use_shortname,
                 collect_hypervisor_metrics=collect_hypervisor_metrics,
                 collect_hypervisor_load=collect_hypervisor_load,
+                load_averages=load_averages,
             )
         if not hypervisors:
             self.warning("Unable to collect any hypervisors from Nova response.")
@@ -245,6 +273,7 @@ class OpenStackControllerCheck(AgentCheck):
         use_shortname=False,
         collect_hypervisor_metrics=True,
         collect_hypervisor_load=True,
+        load_averages=None,
     ):
         hyp_hostname = hyp.get('hypervisor_hostname')
         custom_tags = custom_tags or []
@@ -286,17 +315,21 @@ class OpenStackControllerCheck(AgentCheck):
         # Disable this by default for higher performance in a large environment
         # If the Agent is installed on the hypervisors, system.load.1/5/15 is available as a system metric
         if collect_hypervisor_load:
-            try:
-                load_averages = self.get_loads_for_single_hypervisor(hyp['id'])
-            except Exception as e:
-                self.warning('Unable to get loads averages for hypervisor %s: %s', hyp['id'], e)
-                load_averages = []
+            if load_averages is None:
+                load_averages = self._get_hypervisor_load_averages(hyp)
             if load_averages and len(load_averages) == 3:
                 for i, avg in enumerate([1, 5, 15]):
                     self.gauge('openstack.nova.hypervisor_load.{}'.format(avg), load_averages[i], tags=tags)
             else:
                 self.warning("Load Averages didn't return expected values: %s", load_averages)
 
+    def _get_hypervisor_load_averages(self, hyp):
+        try:
+            return self.get_loads_for_single_hypervisor(hyp['id'])
+        except Exception as e:
+            self.warning('Unable to get loads averages for hypervisor %s: %s', hyp['id'], e)
+            return []
+
     def get_active_servers(self, tenant_to_name):
         query_params = {"all_tenants": True, 'status': 'ACTIVE'}
         servers = self.get_servers_detail(query_params)
@@ -388,7 +421,38 @@ class OpenStackControllerCheck(AgentCheck):
         self.servers_cache = {'servers': servers, 'changes_since': changes_since}
         return servers
 
+    def collect_servers_diagnostic_metrics(self, servers, tags=None, use_shortname=False):
+        """
+        Fetch the diagnostics of all the servers concurrently and submit them in the order of their responses
+        """
+        for server_details, server_stats in map_concurrently(
+            self._get_server_diagnostics, itervalues(servers), self.threads_count
+        ):
+            self.submit_server_diagnostic_metrics(server_details, server_stats, tags=tags, use_shortname=use_shortname)
+
     def collect_server_diagnostic_metrics(self, server_details, tags=None, use_shortname=False):
+        server_stats = self._get_server_diagnostics(server_details)
+        self.submit_server_diagnostic_metrics(server_details, server_stats, tags=tags, use_shortname=use_shortname)
+
+    def _get_server_diagnostics(self, server_details):
+        server_id = server_details.get('server_id')
+        try:
+            return self.get_server_diagnostics(server_id)
+        except InstancePowerOffFailure:  # 409 response code came back fro nova
+            self.log.debug("Server %s is powered off and cannot be monitored", server_id)
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 404:
+                self.log.debug("Server %s is not in an ACTIVE state and cannot be monitored, %s", server_id, e)
+            else:
+                self.warning(
+                    "Received HTTP Error when reaching the Diagnostics endpoint for server:%s, %s",
+                    e,
+                    server_details.get('server_name'),
+                )
+        except Exception as e:
+            self.warning("Unknown error when monitoring %s : %s", server_id, e)
+
+    def submit_server_diagnostic_metrics(self, server_details, server_stats, tags=None, use_shortname=False):
         def _is_valid_metric(label):
             return label in NOVA_SERVER_METRICS or any(seg in label for seg in NOVA_SERVER_INTERFACE_SEGMENTS)
 
@@ -408,23 +472,6 @@ class OpenStackControllerCheck(AgentCheck):
         hypervisor_hostname = server_details.get('hypervisor_hostname')
         project_name = server_details.get('project_name')
 
-        try:
-            server_stats = self.get_server_diagnostics(server_id)
-        except InstancePowerOffFailure:  # 409 response code came back fro nova
-            self.log.debug("Server %s is powered off and cannot be monitored", server_id)
-            return
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                self.log.debug("Server %s is not in an ACTIVE state and cannot be monitored, %s", server_id, e)
-            else:
-                self.warning(
-                    "Received HTTP Error when reaching the Diagnostics endpoint for server:%s, %s", e, server_name
-                )
-            return
-        except Exception as e:
-            self.warning("Unknown error when monitoring %s : %s", server_id, e)
-            return
-
         if server_stats:
             if project_name:
                 tags.append("project_name:{}".format(project_name))
@@ -454,7 +501,23 @@ class OpenStackControllerCheck(AgentCheck):
                         hostname=server_id,
                     )
 
+    def collect_projects_limits(self, projects, tags=None):
+        """
+        Fetch the limits of all the projects concurrently and submit them in the order of their responses
+        """
+        for project, server_stats in map_concurrently(
+            self._get_project_limits, itervalues(projects), self.threads_count
+        ):
+            self.submit_project_limit(project, server_stats, tags=tags)
+
     def collect_project_limit(self, project, tags=None):
+        self.submit_project_limit(project, self._get_project_limits(project), tags=tags)
+
+    def _get_project_limits(self, project):
+        self.log.debug("Collecting metrics for project. name: %s id: %s", project.get('name'), project['id'])
+        return self.get_project_limits(project['id'])
+
+    def submit_project_limit(self, project, server_stats, tags=None):
         # NOTE: starting from Version 3.10 (Queens)
         # We can use /v3/limits (Unified Limits API) if not experimental any more.
         def _is_valid_metric(label):
@@ -466,8 +529,6 @@ class OpenStackControllerCheck(AgentCheck):
         project_name = project.get('name')
         project_id = project.get('id')
 
-        self.log.debug("Collecting metrics for project. name: %s id: %s", project_name, project['id'])
-        server_stats = self.get_project_limits(project['id'])
         server_tags.append('tenant_id:{}'.format(project_id))
 
         if project_name:
@@ -482,6 +543,9 @@ class OpenStackControllerCheck(AgentCheck):
             self.warning("Unexpected response, not submitting limits metrics for project id %s", project['id'])
 
     def get_flavors(self):
+        return self._get_cached_object('flavors', self._get_flavors)
+
+    def _get_flavors(self):
         query_params = {}
         flavors = self.get_flavors_detail(query_params)
 
@@ -661,6 +725,8 @@ class OpenStackControllerCheck(AgentCheck):
     def check(self, instance):
         # Initialize global variable that are per instances
         self.external_host_tags = {}
+        self._run_timestamp = time.time()
+        self._api_response_times = []
         self.instance_name = instance.get('name')
         if not self.instance_name:
             # We need a instance_name to identify this instance
@@ -710,8 +776,7 @@ class OpenStackControllerCheck(AgentCheck):
             projects = self.get_projects(include_project_name_rules, exclude_project_name_rules)
 
             if collect_project_metrics:
-                for project in itervalues(projects):
-                    self.collect_project_limit(project, custom_tags)
+                self.collect_projects_limits(projects, custom_tags)
 
             servers = self.populate_servers_cache(projects, exclude_server_id_rules)
 
@@ -726,8 +791,7 @@ class OpenStackControllerCheck(AgentCheck):
             if collect_server_diagnostic_metrics or collect_server_flavor_metrics:
                 if collect_server_diagnostic_metrics:
                     self.log.debug("Fetch stats from %s server(s)", len(servers))
-                    for server in itervalues(servers):
-                        self.collect_server_diagnostic_metrics(server, tags=custom_tags, use_shortname=use_shortname)
+                    self.collect_servers_diagnostic_metrics(servers, tags=custom_tags, use_shortname=use_shortname)
                 if collect_server_flavor_metrics:
                     if len(servers) >= 1 and 'flavor_id' in next(itervalues(servers)):
                         self.log.debug("Fetch server flavors")
@@ -745,6 +809,9 @@ class OpenStackControllerCheck(AgentCheck):
 
             self.set_external_tags(self.get_external_host_tags())
 
+            if self.collect_api_latency_metrics:
+                self.submit_api_latency_metrics(custom_tags)
+
         except IncompleteConfig as e:
             if isinstance(e, IncompleteIdentity):
                 self.warning(
@@ -768,6 +835,33 @@ class OpenStackControllerCheck(AgentCheck):
 
         self._backoff.reset_backoff()
 
+    def submit_api_latency_metrics(self, tags):
+        for endpoint, response_time in self._api_response_times:
+            self.histogram('openstack.api.response_time', response_time, tags=['endpoint:{}'.format(endpoint)] + tags)
+
+    def _get_cached_object(self, name, fetch):
+        """
+        Return the object cached under `name`, calling `fetch` to refresh it once per run at most,
+        and only after `cache_ttl` seconds
+        """
+        cached = self._objects_cache.get(name)
+        if cached is not None:
+            timestamp, value = cached
+            if timestamp >= self._run_timestamp or time.time() - timestamp < self.cache_ttl:
+                return value
+
+        value = fetch()
+        self._objects_cache[name] = (time.time(), value)
+        return value
+
+    def _call_api(self, endpoint, method, *args):
+        start = time.time()
+        try:
+            return method(*args)
+        finally:
+            if self.collect_api_latency_metrics:
+                self._api_response_times.append((endpoint, time.time() - start))
+
     def do_backoff(self, tags):
         backoff_interval, retries = self._backoff.do_backoff()
 
@@ -794,29 +888,29 @@ class OpenStackControllerCheck(AgentCheck):
         return self._api.get_nova_endpoint()
 
     def get_os_hypervisor_uptime(self, hyp_id):
-        return self._api.get_os_hypervisor_uptime(hyp_id)
+        return self._call_api('os_hypervisor_uptime', self._api.get_os_hypervisor_uptime, hyp_id)
 
     def get_os_aggregates(self):
-        return self._api.get_os_aggregates()
+        return self._call_api('os_aggregates', self._api.get_os_aggregates)
 
     def get_os_hypervisors_detail(self):
-        return self._api.get_os_hypervisors_detail()
+        return self._call_api('os_hypervisors_detail', self._api.get_os_hypervisors_detail)
 
     def get_servers_detail(self, query_params):
-        return self._api.get_servers_detail(query_params)
+        return self._call_api('servers_detail', self._api.get_servers_detail, query_params)
 
     def get_server_diagnostics(self, server_id):
-        return self._api.get_server_diagnostics(server_id)
+        return self._call_api('server_diagnostics', self._api.get_server_diagnostics, server_id)
 
     def get_project_limits(self, tenant_id):
-        return self._api.get_project_limits(tenant_id)
+        return self._call_api('project_limits', self._api.get_project_limits, tenant_id)
 
     def get_flavors_detail(self, query_params):
-        return self._api.get_flavors_detail(query_params)
+        return self._call_api('flavors_detail', self._api.get_flavors_detail, query_params)
 
     # Keystone Proxy Methods
     def get_projects(self, include_project_name_rules, exclude_project_name_rules):
-        projects = self._api.get_projects()
+        projects = self._get_cached_object('projects', lambda: self._call_api('projects', self._api.get_projects))
         project_by_name = {}
         for project in projects:
             name = project.get('name')
@@ -832,7 +926,7 @@ class OpenStackControllerCheck(AgentCheck):
         return self._api.get_neutron_endpoint()
 
     def get_networks(self):
-        return self._api.get_networks()
+        return self._call_api('networks', self._api.get_networks)
 
     def _get_keystone_server_url(self, instance_config):
         keystone_server_url = instance_config.get("keystone_server_url")
@@ -2,16 +2,18 @@
 # All rights reserved
 # Licensed under Simplified BSD License (see LICENSE)
 import copy
+import time
 from copy import deepcopy
 
 import mock
 import pytest
+import requests
 from mock import ANY
 
-from datadog_checks.base import AgentCheck
+from datadog_checks.base import AgentCheck, ConfigurationError
 from datadog_checks.openstack_controller import OpenStackControllerCheck
 from datadog_checks.openstack_controller.api import AbstractApi
-from datadog_checks.openstack_controller.exceptions import IncompleteConfig
+from datadog_checks.openstack_controller.exceptions import AuthenticationNeeded, IncompleteConfig
 
 from . import common
 
@@ -386,3 +388,116 @@ def test_config(test_case, extra_config, expected_http_kwargs):
         assert check.http.options[key] == value, "Expected '{}' to be {} but was {}".format(
             key, value, check.http.options[key]
         )
+
+
+def test_threads_count_validation():
+    instance = deepcopy(common.KEYSTONE_INSTANCE)
+    instance['threads_count'] = 0
+
+    with pytest.raises(ConfigurationError):
+        OpenStackControllerCheck('openstack_controller', {}, instances=[instance])
+
+
+def get_server_diagnostics_response(server_id):
+    if server_id == 'server-powered-off':
+        raise requests.exceptions.HTTPError(response=mock.MagicMock(status_code=404))
+    return {'memory': int(server_id.split('-')[1]), 'vda_read': 10}
+
+
+@mock.patch(
+    'datadog_checks.openstack_controller.OpenStackControllerCheck.get_server_diagnostics',
+    side_effect=get_server_diagnostics_response,
+)
+@mock.patch(
+    'datadog_checks.openstack_controller.OpenStackControllerCheck.get_os_aggregates',
+    return_value=common.EXAMPLE_GET_OS_AGGREGATES_RETURN_VALUE,
+)
+def test_collect_servers_diagnostic_metrics_concurrently(os_aggregates, server_diagnostics, aggregator):
+    instance = deepcopy(common.KEYSTONE_INSTANCE)
+    instance['threads_count'] = 4
+    check = OpenStackControllerCheck('openstack_controller', {}, instances=[instance])
+    servers = {
+        'server-{}'.format(i): {
+            'server_id': 'server-{}'.format(i),
+            'server_name': 'name-{}'.format(i),
+            'hypervisor_hostname': 'compute',
+        }
+        for i in range(50)
+    }
+    servers['server-powered-off'] = {
+        'server_id': 'server-powered-off',
+        'server_name': 'powered-off',
+        'hypervisor_hostname': 'compute',
+    }
+
+    check.collect_servers_diagnostic_metrics(servers)
+
+    assert server_diagnostics.call_count == 51
+    # The aggregates are fetched once for all the servers
+    assert os_aggregates.call_count == 1
+    for i in range(50):
+        aggregator.assert_metric(
+            'openstack.nova.server.memory',
+            value=i,
+            tags=[
+                'nova_managed_server',
+                'hypervisor:compute',
+                'server_name:name-{}'.format(i),
+                'aggregate:name',
+                'availability_zone:london',
+                'availability_zone:NA',
+            ],
+            hostname='server-{}'.format(i),
+        )
+    aggregator.assert_metric('openstack.nova.server.vda_read', count=50)
+    aggregator.assert_all_metrics_covered()
+    assert 'powered-off' in check.external_host_tags
+
+
+@mock.patch(
+    'datadog_checks.openstack_controller.OpenStackControllerCheck.get_project_limits',
+    side_effect=[common.EXAMPLE_GET_PROJECT_LIMITS_RETURN_VALUE, AuthenticationNeeded],
+)
+def test_collect_projects_limits_propagates_errors(project_limits, aggregator):
+    check = OpenStackControllerCheck('openstack_controller', {}, instances=[common.KEYSTONE_INSTANCE])
+    projects = {'project-1': {'id': 'project-1', 'name': 'project-1'}, 'project-2': {'id': 'project-2'}}
+
+    with pytest.raises(AuthenticationNeeded):
+        check.collect_projects_limits(projects)
+
+
+@mock.patch(
+    'datadog_checks.openstack_controller.OpenStackControllerCheck.get_flavors_detail',
+    return_value=common.EXAMPLE_GET_FLAVORS_DETAIL_RETURN_VALUE,
+)
+@pytest.mark.parametrize(
+    'cache_ttl, expected_calls', [pytest.param(300, 1, id='cached'), pytest.param(0, 2, id='ttl 0')]
+)
+def test_objects_cache(flavors_detail, cache_ttl, expected_calls):
+    instance = deepcopy(common.KEYSTONE_INSTANCE)
+    instance['cache_ttl'] = cache_ttl
+    check = OpenStackControllerCheck('openstack_controller', {}, instances=[instance])
+
+    for _ in range(2):
+        # Simulate the start of a check run
+        check._run_timestamp = time.time()
+        flavors = check.get_flavors()
+        # Within a run, the flavors are only fetched once
+        assert check.get_flavors() is flavors
+
+    assert flavors_detail.call_count == expected_calls
+    assert list(flavors) == [flavor['id'] for flavor in common.EXAMPLE_GET_FLAVORS_DETAIL_RETURN_VALUE]
+
+
+@mock.patch('datadog_checks.openstack_controller.api.ApiFactory.create', return_value=mock.MagicMock(AbstractApi))
+def test_api_latency_metrics(mock_api, aggregator):
+    instance = deepcopy(common.KEYSTONE_INSTANCE)
+    instance['collect_api_latency_metrics'] = True
+    check = OpenStackControllerCheck('openstack_controller', {}, instances=[instance])
+
+    check.check(instance)
+
+    for endpoint in ('projects', 'servers_detail', 'os_hypervisors_detail', 'networks'):
+        aggregator.assert_metric(
+            'openstack.api.response_time', tags=['endpoint:{}'.format(endpoint)] + instance.get('tags', [])
+        )
@@ -10,7 +10,7 @@ from collections import defaultdict
 from requests.exceptions import RequestException
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 from six import iteritems
-from six.moves.urllib.parse import quote_plus, urljoin, urlparse
+from six.moves.urllib.parse import quote_plus, urlencode, urljoin, urlparse
 
 from datadog_checks.base import AgentCheck, is_affirmative
 
@@ -23,6 +23,10 @@ OVERVIEW_TYPE = 'overview'
 MAX_DETAILED_EXCHANGES = 50
 MAX_DETAILED_QUEUES = 200
 MAX_DETAILED_NODES = 100
+# Largest page size accepted by the management API
+MAX_PAGE_SIZE = 500
+# Object types whose listing supports pagination in the management API (RabbitMQ >= 3.6)
+PAGINATED_TYPES = (EXCHANGE_TYPE, QUEUE_TYPE)
 # Post an event in the stream when the number of queues or nodes to
 # collect is above 90% of the limit:
 ALERT_THRESHOLD = 0.9
@@ -129,6 +133,17 @@ TAGS_MAP = {
 
 METRIC_SUFFIX = {EXCHANGE_TYPE: "exchange", QUEUE_TYPE: "queue", NODE_TYPE: "node", OVERVIEW_TYPE: "overview"}
 
+# Only request the fields used for tags and metrics, nested fields are selected with dots, e.g. `message_stats.ack`
+COLUMNS = {
+    object_type: ','.join(
+        sorted(
+            {tag for tag in TAGS_MAP[object_type] if not tag.endswith('_family')}
+            | {attribute.replace('/', '.') for attribute, _, _ in ATTRIBUTES[object_type]}
+        )
+    )
+    for object_type in PAGINATED_TYPES
+}
+
 
 class RabbitMQException(Exception):
     pass
@@ -305,7 +320,9 @@ class RabbitMQ(AgentCheck):
                     message="Could not contact aliveness API",
                 )
 
-    def _get_data(self, url):
+    def _get_data(self, url, params=None):
+        if params:
+            url = '{}?{}'.format(url, urlencode(params))
         try:
             r = self.http.get(url)
             r.raise_for_status()
@@ -315,39 +332,32 @@ class RabbitMQ(AgentCheck):
         except ValueError as e:
             raise RabbitMQException('Cannot parse JSON response from API url: {} {}'.format(url, str(e)))
 
-    def _filter_list(self, data, explicit_filters, regex_filters, object_type, tag_families):
-        if explicit_filters or regex_filters:
-            matching_lines = []
-            for data_line in data:
-                name = data_line.get("name")
-                if name in explicit_filters:
-                    matching_lines.append(data_line)
-                    explicit_filters.remove(name)
-                    continue
-
-                match_found = self._append_match_lines(
-                    regex_filters, name, tag_families, data_line, object_type, matching_lines
-                )
-
-                if match_found:
-                    continue
-
-                # Absolute names work only for queues and exchanges
-                if object_type != QUEUE_TYPE and object_type != EXCHANGE_TYPE:
-                    continue
-                absolute_name = '{}/{}'.format(data_line.get("vhost"), name)
-                if absolute_name in explicit_filters:
-                    matching_lines.append(data_line)
-                    explicit_filters.remove(absolute_name)
-                    continue
-
-                match_found = self._append_match_lines(
-                    regex_filters, absolute_name, tag_families, data_line, object_type, matching_lines
-                )
-                if match_found:
-                    continue
-            return matching_lines
-        return data
+    def _filter_line(self, data_line, explicit_filters, regex_filters, object_type, tag_families, matching_lines):
+        """
+        Append data_line to matching_lines if it matches one of the filters, explicit filters are removed once matched.
+        Returns True if the line matched.
+        """
+        name = data_line.get("name")
+        if name in explicit_filters:
+            matching_lines.append(data_line)
+            explicit_filters.remove(name)
+            return True
+
+        if self._append_match_lines(regex_filters, name, tag_families, data_line, object_type, matching_lines):
+            return True
+
+        # Absolute names work only for queues and exchanges
+        if object_type != QUEUE_TYPE and object_type != EXCHANGE_TYPE:
+            return False
+        absolute_name = '{}/{}'.format(data_line.get("vhost"), name)
+        if absolute_name in explicit_filters:
+            matching_lines.append(data_line)
+            explicit_filters.remove(absolute_name)
+            return True
+
+        return self._append_match_lines(
+            regex_filters, absolute_name, tag_families, data_line, object_type, matching_lines
+        )
 
     def _append_match_lines(self, regex_filters, name, tag_families, data_line, object_type, matching_lines):
         result = False
@@ -381,7 +391,7 @@ class RabbitMQ(AgentCheck):
                 tags.append('{}_{}:{}'.format(TAG_PREFIX, tag_list[t], tag))
         return tags + custom_tags
 
-    def _get_object_data(self, instance, base_url, object_type, limit_vhosts):
+    def _get_object_data(self, instance, base_url, object_type, limit_vhosts, object_counts=None):
         """data is a list of nodes or queues:
         data = [
             {
@@ -481,21 +491,66 @@ class RabbitMQ(AgentCheck):
             },
             ...
         ]
-        """
-        data = []
 
+        Queues and exchanges are fetched page by page, only requesting the fields the check uses, so the items are
+        yielded as they are received and the caller can stop consuming them (and fetching pages) at any point.
+        The number of objects the API reports for each listed url is appended to `object_counts`.
+        """
         # only do this if vhosts were specified,
         # otherwise it'll just be making more queries for the same data
         if self._limit_vhosts(instance) and object_type == QUEUE_TYPE:
             for vhost in limit_vhosts:
                 url = '{}/{}'.format(object_type, quote_plus(vhost))
                 try:
-                    data += self._get_data(urljoin(base_url, url))
+                    for data_line in self._get_paginated_data(
+                        instance, urljoin(base_url, url), object_type, object_counts
+                    ):
+                        yield data_line
                 except Exception as e:
                     self.log.debug("Couldn't grab queue data from vhost, %s: %s", vhost, e)
         else:
-            data = self._get_data(urljoin(base_url, object_type))
-        return data
+            for data_line in self._get_paginated_data(
+                instance, urljoin(base_url, object_type), object_type, object_counts
+            ):
+                yield data_line
+
+    def _get_paginated_data(self, instance, url, object_type, object_counts=None):
+        """
+        Yield the items listed by the url, one page at a time when the object type supports pagination.
+        The total number of items, as reported by the first page, is appended to `object_counts`.
+
+        RabbitMQ < 3.6 ignores the pagination parameters and returns the full list, which is handled transparently.
+        """
+        if object_counts is None:
+            object_counts = []
+
+        page_size = int(instance.get('api_page_size', MAX_PAGE_SIZE))
+        if object_type not in PAGINATED_TYPES or page_size <= 0:
+            data = self._get_data(url)
+            object_counts.append(len(data))
+            for data_line in data:
+                yield data_line
+            return
+
+        params = {'page_size': min(page_size, MAX_PAGE_SIZE), 'columns': COLUMNS[object_type]}
+        page = 1
+        while True:
+            data = self._get_data(url, dict(params, page=page))
+            if not isinstance(data, dict):
+                object_counts.append(len(data))
+                for data_line in data:
+                    yield data_line
+                return
+
+            if page == 1:
+                object_counts.append(data.get('filtered_count', data.get('total_count', 0)))
+
+            for data_line in data.get('items', []):
+                yield data_line
+
+            if page >= data.get('page_count', 0):
+                return
+            page += 1
 
     def get_stats(self, instance, base_url, object_type, max_detailed, filters, limit_vhosts, custom_tags):
         """
@@ -511,41 +566,59 @@ class RabbitMQ(AgentCheck):
         # iteration
         explicit_filters = list(filters['explicit'])
         regex_filters = filters['regexes']
-        data = self._get_object_data(instance, base_url, object_type, limit_vhosts)
+        tag_families = instance.get("tag_families", False)
 
         if len(explicit_filters) > max_detailed:
             raise Exception("The maximum number of {} you can specify is {}.".format(object_type, max_detailed))
 
-        # a list of queues/nodes is specified. We process only those
-        data = self._filter_list(
-            data, explicit_filters, regex_filters, object_type, instance.get("tag_families", False)
-        )
-
-        # if no filters are specified, check everything according to the limits
-        if len(data) > ALERT_THRESHOLD * max_detailed:
-            # Post a message on the dogweb stream to warn
-            self.alert(base_url, max_detailed, len(data), object_type, custom_tags)
-
+        # If a list of queues/nodes is specified, we process only those. Items are processed as they are received.
+        # Without filters, fetching stops once `max_detailed` items sent metrics: the number of items comes from the
+        # API. With filters, matching items past the limit are only counted, and fetching stops early once every
+        # explicit filter matched when there are no regexes filters.
+        is_filtered = bool(explicit_filters or regex_filters)
+        object_counts = []
+        matching_count = 0
         data_lines_sent = 0
-        for data_line in data:
+        reported_lines = []
+        too_many_items = False
+        for data_line in self._get_object_data(instance, base_url, object_type, limit_vhosts, object_counts):
+            if is_filtered and not self._filter_line(
+                data_line, explicit_filters, regex_filters, object_type, tag_families, []
+            ):
+                continue
+            matching_count += 1
+
             if data_lines_sent >= max_detailed:
-                # Display a warning in the info page
-                msg = (
-                    "Too many items to fetch. "
-                    "You must choose the {} you are interested in by editing the rabbitmq.d/conf.yaml configuration "
-                    "file or get in touch with Datadog support"
-                ).format(object_type)
-                self.warning(msg)
+                if not too_many_items:
+                    too_many_items = True
+                    # Display a warning in the info page
+                    msg = (
+                        "Too many items to fetch. "
+                        "You must choose the {} you are interested in by editing the rabbitmq.d/conf.yaml "
+                        "configuration file or get in touch with Datadog support"
+                    ).format(object_type)
+                    self.warning(msg)
+                if is_filtered:
+                    continue
                 break
-            # We truncate the list if it's above the limit
+
+            reported_lines.append(data_line)
             metrics_sent = self._get_metrics(data_line, object_type, custom_tags)
             if metrics_sent >= 1:
                 data_lines_sent += 1
 
+            if is_filtered and not explicit_filters and not regex_filters:
+                break
+
+        object_count = matching_count if is_filtered else max(sum(object_counts), matching_count)
+        if object_count > ALERT_THRESHOLD * max_detailed:
+            # Post a message on the dogweb stream to warn
+            self.alert(base_url, max_detailed, object_count, object_type, custom_tags)
+
         # get a list of the number of bindings on a given queue
         # /api/queues/vhost/name/bindings
         if object_type is QUEUE_TYPE:
-            self._get_queue_bindings_metrics(base_url, custom_tags, data, object_type)
+            self._get_queue_bindings_metrics(base_url, custom_tags, reported_lines, object_type)
 
     def get_overview_stats(self, base_url, custom_tags):
         data = self._get_data(urljoin(base_url, "overview"))
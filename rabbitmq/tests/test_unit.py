@@ -9,7 +9,7 @@ from tests.common import EXCHANGE_MESSAGE_STATS
 
 import datadog_checks.base
 from datadog_checks.rabbitmq import RabbitMQ
-from datadog_checks.rabbitmq.rabbitmq import EXCHANGE_TYPE, NODE_TYPE, OVERVIEW_TYPE, RabbitMQException
+from datadog_checks.rabbitmq.rabbitmq import EXCHANGE_TYPE, NODE_TYPE, OVERVIEW_TYPE, QUEUE_TYPE, RabbitMQException
 
 from . import common, metrics
 
@@ -175,3 +175,114 @@ def test_disable_nodes(aggregator, check):
     # check to ensure other metrics are being collected
     for m in metrics.Q_METRICS:
         aggregator.assert_metric(m, count=1)
+
+
+def _paginated_queues(pages, page_size, without_metrics=()):
+    def get_data(url, params=None):
+        if url.endswith('/bindings'):
+            return []
+        page = params['page']
+        items = []
+        for i in range(page_size):
+            name = 'queue{}'.format((page - 1) * page_size + i)
+            items.append(
+                {'name': name, 'vhost': '/'} if name in without_metrics else {'name': name, 'vhost': '/', 'messages': 1}
+            )
+        return {
+            'items': items,
+            'page': page,
+            'page_count': pages,
+            'page_size': page_size,
+            'filtered_count': pages * page_size,
+            'total_count': pages * page_size,
+        }
+
+    return mock.MagicMock(side_effect=get_data)
+
+
+@pytest.mark.unit
+def test_get_stats_paginated_queues(check, aggregator):
+    instance = {'rabbitmq_api_url': 'http://example.com/api/', 'api_page_size': 2}
+    check._get_data = _paginated_queues(pages=3, page_size=2)
+
+    check.get_stats(instance, 'http://example.com/api/', QUEUE_TYPE, 10, {'explicit': [], 'regexes': []}, [], [])
+
+    queue_calls = [c for c in check._get_data.call_args_list if not c[0][0].endswith('/bindings')]
+    assert [c[0][1]['page'] for c in queue_calls] == [1, 2, 3]
+    assert queue_calls[0][0][0] == 'http://example.com/api/queues'
+    assert queue_calls[0][0][1]['page_size'] == 2
+    assert 'messages_details.rate' in queue_calls[0][0][1]['columns'].split(',')
+    for i in range(6):
+        aggregator.assert_metric(
+            'rabbitmq.queue.messages', tags=['rabbitmq_queue:queue{}'.format(i), 'rabbitmq_vhost:/'], count=1
+        )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    'filters, max_detailed, expected_pages, expected_queues',
+    [
+        pytest.param({'explicit': [], 'regexes': []}, 2, [1, 2], ['queue0', 'queue1'], id='limit'),
+        pytest.param({'explicit': ['queue1'], 'regexes': []}, 10, [1], ['queue1'], id='explicit'),
+        pytest.param({'explicit': [], 'regexes': [r'queue[13]$']}, 10, [1, 2, 3], ['queue1', 'queue3'], id='regex'),
+    ],
+)
+def test_get_stats_paginated_queues_stop_early(
+    check, aggregator, filters, max_detailed, expected_pages, expected_queues
+):
+    instance = {'rabbitmq_api_url': 'http://example.com/api/', 'api_page_size': 2}
+    check._get_data = _paginated_queues(pages=3, page_size=2)
+
+    check.get_stats(instance, 'http://example.com/api/', QUEUE_TYPE, max_detailed, filters, [], [])
+
+    queue_calls = [c for c in check._get_data.call_args_list if not c[0][0].endswith('/bindings')]
+    assert [c[0][1]['page'] for c in queue_calls] == expected_pages
+    for queue in expected_queues:
+        aggregator.assert_metric('rabbitmq.queue.messages', tags=['rabbitmq_queue:' + queue, 'rabbitmq_vhost:/'])
+    aggregator.assert_metric('rabbitmq.queue.messages', count=len(expected_queues))
+
+
+@pytest.mark.unit
+def test_get_stats_unpaginated_response(check, aggregator):
+    """RabbitMQ < 3.6 ignores the pagination parameters and returns the full list."""
+    instance = {'rabbitmq_api_url': 'http://example.com/api/'}
+    check._get_data = mock.MagicMock(return_value=[{'name': 'queue0', 'vhost': '/', 'messages': 1}])
+
+    check.get_stats(instance, 'http://example.com/api/', QUEUE_TYPE, 10, {'explicit': [], 'regexes': []}, [], [])
+
+    aggregator.assert_metric('rabbitmq.queue.messages', tags=['rabbitmq_queue:queue0', 'rabbitmq_vhost:/'], count=1)
+
+
+@pytest.mark.unit
+def test_get_stats_paginated_queues_alert_count(check, aggregator):
+    instance = {'rabbitmq_api_url': 'http://example.com/api/', 'api_page_size': 2}
+    check._get_data = _paginated_queues(pages=3, page_size=2)
+    check.alert = mock.MagicMock()
+
+    check.get_stats(instance, 'http://example.com/api/', QUEUE_TYPE, 2, {'explicit': [], 'regexes': []}, [], [])
+
+    # Only the first page is needed, the number of queues comes from the API
+    check.alert.assert_called_once_with('http://example.com/api/', 2, 6, QUEUE_TYPE, [])
+    aggregator.assert_metric('rabbitmq.queue.messages', count=2)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    'filters',
+    [
+        pytest.param({'explicit': [], 'regexes': []}, id='unfiltered'),
+        pytest.param({'explicit': [], 'regexes': ['queue']}, id='regex'),
+    ],
+)
+def test_get_stats_paginated_queues_without_metrics(check, aggregator, filters):
+    instance = {'rabbitmq_api_url': 'http://example.com/api/', 'api_page_size': 2}
+    check._get_data = _paginated_queues(pages=3, page_size=2, without_metrics=('queue0', 'queue2'))
+    check.alert = mock.MagicMock()
+
+    check.get_stats(instance, 'http://example.com/api/', QUEUE_TYPE, 3, filters, [], [])
+
+    # Queues sending no metrics don't count toward the limit
+    for queue in ('queue1', 'queue3', 'queue4'):
+        aggregator.assert_metric('rabbitmq.queue.messages', tags=['rabbitmq_queue:' + queue, 'rabbitmq_vhost:/'])
+    aggregator.assert_metric('rabbitmq.queue.messages', count=3)
+    check.alert.assert_called_once_with('http://example.com/api/', 3, 6, QUEUE_TYPE, [])
@@ -6,7 +6,7 @@ from __future__ import division
 import re
 import time
 from collections import Counter, defaultdict
-from copy import deepcopy
+from itertools import islice
 
 import redis
 from six import iteritems
@@ -22,6 +22,17 @@ LINK_DOWN_KEY = 'master_link_down_since_seconds'
 
 DEFAULT_CLIENT_NAME = "unknown"
 
+DEFAULT_KEYS_BATCH_SIZE = 1000
+
+# Commands returning the length of a key, by key type
+KEY_LENGTH_COMMANDS = {'list': 'LLEN', 'set': 'SCARD', 'zset': 'ZCARD', 'hash': 'HLEN'}
+
+
+class DatabaseSelectionError(Exception):
+    """
+    Raised when a database of the instance can't be selected for the key length lookups
+    """
+
 
 class Redis(AgentCheck):
     db_key_pattern = re.compile(r'^db\d+')
@@ -110,6 +121,10 @@ class Redis(AgentCheck):
         custom_tags = self.instance.get('tags', [])
         self.tags = self._get_tags(custom_tags)
         self.collect_client_metrics = is_affirmative(self.instance.get('collect_client_metrics', False))
+        self.keys_batch_size = int(self.instance.get('keys_batch_size', DEFAULT_KEYS_BATCH_SIZE))
+        if self.keys_batch_size < 1:
+            raise ConfigurationError("`keys_batch_size` must be greater than 0")
+        self.max_keys_per_pattern = int(self.instance.get('max_keys_per_pattern', 0))
         if ("host" not in self.instance or "port" not in self.instance) and "unix_socket_path" not in self.instance:
             raise ConfigurationError("You must specify a host/port couple or a unix_socket_path")
 
@@ -317,63 +332,35 @@ class Redis(AgentCheck):
                 return
             databases = [instance_db]
 
+        start = time.time()
+
         # maps a key to the total length across databases
         lengths_overall = defaultdict(int)
 
-        # don't overwrite the configured instance, use a copy
-        tmp_instance = deepcopy(self.instance)
-
         for db in databases:
             lengths = defaultdict(lambda: defaultdict(int))
-            tmp_instance['db'] = db
-            db_conn = self._get_conn(tmp_instance)
-
-            for key_pattern in key_list:
-                if re.search(r"(?<!\\)[*?[]", key_pattern):
-                    keys = db_conn.scan_iter(match=key_pattern)
-                else:
-                    keys = [key_pattern]
 
-                for key in keys:
-                    text_key = ensure_unicode(key)
-                    try:
-                        key_type = ensure_unicode(db_conn.type(key))
-                    except redis.ResponseError:
-                        self.log.info("key %s on remote server; skipping", text_key)
-                        continue
+            try:
+                for key_pattern in key_list:
+                    if re.search(r"(?<!\\)[*?[]", key_pattern):
+                        keys = self._scan_keys(conn, db, key_pattern)
+                    else:
+                        keys = [key_pattern]
 
-                    if key_type == 'list':
-                        keylen = db_conn.llen(key)
+                    for key, key_type, keylen in self._get_key_lengths(conn, db, keys):
+                        text_key = ensure_unicode(key)
                         lengths[text_key]["length"] += keylen
-                        lengths_overall[text_key] += keylen
-                    elif key_type == 'set':
-                        keylen = db_conn.scard(key)
-                        lengths[text_key]["length"] += keylen
-                        lengths_overall[text_key] += keylen
-                    elif key_type == 'zset':
-                        keylen = db_conn.zcard(key)
-                        lengths[text_key]["length"] += keylen
-                        lengths_overall[text_key] += keylen
-                    elif key_type == 'hash':
-                        keylen = db_conn.hlen(key)
-                        lengths[text_key]["length"] += keylen
-                        lengths_overall[text_key] += keylen
-                    elif key_type == 'string':
-                        # Send 1 if the key exists as a string
-                        lengths[text_key]["length"] += 1
-                        lengths_overall[text_key] += 1
-                    else:
-                        # If the type is unknown, it might be because the key doesn't exist,
-                        # which can be because the list is empty. So always send 0 in that case.
-                        lengths[text_key]["length"] += 0
-                        lengths_overall[text_key] += 0
 
-                    # Tagging with key_type since the same key can exist with a
-                    # different key_type in another db
-                    lengths[text_key]["key_type"] = key_type
+                        # Tagging with key_type since the same key can exist with a
+                        # different key_type in another db
+                        lengths[text_key]["key_type"] = key_type
+            except DatabaseSelectionError as e:
+                self.warning("Unable to collect the key lengths of db%s: %s", db, e)
+                continue
 
             # Send the metrics for each db in the redis instance.
             for key, total in iteritems(lengths):
+                lengths_overall[key] += total["length"]
                 # Only send non-zeros if tagged per db.
                 if total["length"] > 0:
                     self.gauge(
@@ -395,6 +382,104 @@ class Redis(AgentCheck):
                 if warn_on_missing_keys:
                     self.warning("%s key not found in redis", key)
 
+        self.gauge('redis.key.scan.duration', round_value((time.time() - start) * 1000, 2), tags=tags)
+
+    def _execute_in_db(self, conn, db, commands):
+        """
+        Run the commands against the database `db` in a single round trip, reusing the connection of the instance:
+        the database is only selected for the duration of the pipeline. Failed commands return their exception.
+        Raise DatabaseSelectionError if `db` couldn't be selected, or the database of the instance restored.
+        """
+        conn_db = conn.connection_pool.connection_kwargs.get('db') or 0
+        pipe = conn.pipeline(transaction=False)
+        if db == conn_db:
+            for command in commands:
+                pipe.execute_command(*command)
+            return pipe.execute(raise_on_error=False)
+
+        pipe.execute_command('SELECT', db)
+        for command in commands:
+            pipe.execute_command(*command)
+        pipe.execute_command('SELECT', conn_db)
+        responses = pipe.execute(raise_on_error=False)
+
+        if isinstance(responses[0], Exception):
+            # The commands ran against the database of the instance, their responses can't be used
+            raise DatabaseSelectionError('cannot select db{}: {}'.format(db, responses[0]))
+        if isinstance(responses[-1], Exception):
+            # The connection went back to the pool with `db` selected, drop it so that it isn't reused
+            conn.connection_pool.disconnect()
+            raise DatabaseSelectionError('cannot select back db{}: {}'.format(conn_db, responses[-1]))
+        return responses[1:-1]
+
+    def _scan_keys(self, conn, db, key_pattern):
+        """
+        Iterate over the keys of the database `db` matching the pattern, up to `max_keys_per_pattern` keys
+        """
+        cursor = 0
+        scanned_keys = 0
+        while True:
+            response = self._execute_in_db(
+                conn, db, [('SCAN', cursor, 'MATCH', key_pattern, 'COUNT', self.keys_batch_size)]
+            )[0]
+            if isinstance(response, Exception):
+                raise response
+
+            cursor, keys = response
+            for key in keys:
+                if self.max_keys_per_pattern and scanned_keys >= self.max_keys_per_pattern:
+                    self.warning(
+                        "More than %s keys match %s in db%s, the length of the other keys won't be collected",
+                        self.max_keys_per_pattern,
+                        key_pattern,
+                        db,
+                    )
+                    return
+                scanned_keys += 1
+                yield key
+
+            if cursor == 0:
+                return
+
+    def _get_key_lengths(self, conn, db, keys):
+        """
+        Yield the (key, type, length) of the keys of the database `db`,
+        looking up the types and then the lengths of `keys_batch_size` keys at a time
+        """
+        keys = iter(keys)
+        while True:
+            batch = list(islice(keys, self.keys_batch_size))
+            if not batch:
+                return
+
+            key_types = []
+            for key, key_type in zip(batch, self._execute_in_db(conn, db, [('TYPE', key) for key in batch])):
+                if isinstance(key_type, redis.ResponseError):
+                    self.log.info("key %s on remote server; skipping", ensure_unicode(key))
+                    continue
+                key_types.append((key, ensure_unicode(key_type)))
+
+            length_commands = [
+                (KEY_LENGTH_COMMANDS[key_type], key) for key, key_type in key_types if key_type in KEY_LENGTH_COMMANDS
+            ]
+            key_lengths = iter(self._execute_in_db(conn, db, length_commands) if length_commands else [])
+
+            for key, key_type in key_types:
+                if key_type in KEY_LENGTH_COMMANDS:
+                    keylen = next(key_lengths)
+                    if isinstance(keylen, redis.ResponseError):
+                        self.log.info("Unable to get the length of key %s; skipping", ensure_unicode(key))
+                        continue
+                elif key_type == 'string':
+                    # Send 1 if the key exists as a string
+                    keylen = 1
+                else:
+                    # If the type is unknown, it might be because the key doesn't exist,
+                    # which can be because the list is empty. So always send 0 in that case.
+                    keylen = 0
+
+                yield key, key_type, keylen
+
     def _check_replication(self, info, tags):
         # Save the replication delay for each slave
         for key in info:
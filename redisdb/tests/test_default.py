@@ -248,3 +248,49 @@ def test__check_key_lengths_multi_db(aggregator, redis_instance):
     aggregator.assert_metric('redis.key.length', value=2, tags=['key:test_foo', 'key_type:list', 'redis_db:db3'])
     aggregator.assert_metric('redis.key.length', value=1, tags=['key:test_bar', 'key_type:list', 'redis_db:db0'])
     aggregator.assert_metric('redis.key.length', value=0, tags=['key:missing_key'])
+
+
+def test__check_key_lengths_batches(aggregator, redis_instance):
+    """
+    Keys are looked up in batches, up to `max_keys_per_pattern` keys per pattern in each database
+    """
+    redis_instance['keys_batch_size'] = 3
+    redis_instance['max_keys_per_pattern'] = 8
+    redis_check = Redis('redisdb', {}, [redis_instance])
+    c = redis_check._get_conn(redis_instance)
+    tmp = deepcopy(redis_instance)
+
+    # fill db 0
+    tmp['db'] = 0
+    conn = redis_check._get_conn(tmp)
+    conn.flushdb()
+    for i in range(10):
+        conn.lpush('test_list_{}'.format(i), *range(i + 1))
+
+    # fill db 3
+    tmp['db'] = 3
+    conn = redis_check._get_conn(tmp)
+    conn.flushdb()
+    conn.sadd('test_set', 'value1', 'value2')
+    conn.hset('test_hash', 'field', 'value')
+    conn.zadd('test_zset', {'value1': 1, 'value2': 2, 'value3': 3})
+    conn.set('test_string', 'value')
+
+    redis_check._check_key_lengths(c, ['foo:bar'])
+    aggregator.assert_metric('redis.key.length', count=12)
+    aggregator.assert_metric(
+        'redis.key.length', value=2, tags=['foo:bar', 'key:test_set', 'key_type:set', 'redis_db:db3']
+    )
+    aggregator.assert_metric(
+        'redis.key.length', value=1, tags=['foo:bar', 'key:test_hash', 'key_type:hash', 'redis_db:db3']
+    )
+    aggregator.assert_metric(
+        'redis.key.length', value=3, tags=['foo:bar', 'key:test_zset', 'key_type:zset', 'redis_db:db3']
+    )
+    aggregator.assert_metric(
+        'redis.key.length', value=1, tags=['foo:bar', 'key:test_string', 'key_type:string', 'redis_db:db3']
+    )
+    aggregator.assert_metric('redis.key.scan.duration', count=1, tags=['foo:bar'])
+
+    # The databases are selected on the connection of the instance for the duration of the lookups only
+    assert c.dbsize() == redis_check._get_conn(dict(tmp, db=0)).dbsize()
@@ -50,6 +50,7 @@ def assert_common_metrics(aggregator):
     aggregator.assert_metric('redis.cpu.user_children', count=1, tags=tags)
     aggregator.assert_metric('redis.rdb.last_bgsave_time', count=2, tags=tags)
     aggregator.assert_metric('redis.rdb.changes_since_last', count=2, tags=tags)
+    aggregator.assert_metric('redis.key.scan.duration', count=2, tags=tags)
 
     tags += ['redis_db:db14']
     aggregator.assert_metric('redis.expires', count=2, tags=tags)
@@ -2,8 +2,14 @@
 # All rights reserved
 # Licensed under a 3-clause BSD style license (see LICENSE)
 import mock
+import pytest
+import redis
 from six import iteritems
 
+from datadog_checks.base import ConfigurationError
+from datadog_checks.redisdb import Redis
+from datadog_checks.redisdb.redisdb import DatabaseSelectionError
+
 
 def test_init(check):
     assert check.connections == {}
@@ -31,6 +37,12 @@ def test__get_conn(check):
     assert conn2 != conn1
 
 
+def test_keys_batch_size(redis_instance):
+    redis_instance['keys_batch_size'] = 0
+    with pytest.raises(ConfigurationError):
+        Redis('redisdb', {}, [redis_instance])
+
+
 def test__check_command_stats_host(check, aggregator):
     conn = mock.MagicMock()
     conn.info.return_value = {
@@ -54,3 +66,49 @@ def test__check_command_stats_host(check, aggregator):
     expected_tags = ['foo:bar', 'command:lpush']
     aggregator.assert_metric('redis.command.calls', value=4, count=1, tags=expected_tags)
     aggregator.assert_metric('redis.command.usec_per_call', value=14.00, count=1, tags=expected_tags)
+
+
+def test__execute_in_db_selection_errors(check):
+    conn = mock.MagicMock()
+    conn.connection_pool.connection_kwargs = {'db': 0}
+    pipe = conn.pipeline.return_value
+
+    pipe.execute.return_value = ['OK', 'list', 'OK']
+    assert check._execute_in_db(conn, 3, [('TYPE', 'foo')]) == ['list']
+
+    # The commands ran against db0, they must not be reported for db3
+    pipe.execute.return_value = [redis.ResponseError('ERR DB index is out of range'), 'list', 'OK']
+    with pytest.raises(DatabaseSelectionError, match='db3'):
+        check._execute_in_db(conn, 3, [('TYPE', 'foo')])
+    conn.connection_pool.disconnect.assert_not_called()
+
+    # The pooled connection still has db3 selected and must not be reused
+    pipe.execute.return_value = ['OK', 'list', redis.ResponseError('ERR SELECT is not allowed')]
+    with pytest.raises(DatabaseSelectionError, match='db0'):
+        check._execute_in_db(conn, 3, [('TYPE', 'foo')])
+    conn.connection_pool.disconnect.assert_called_once()
+
+
+def test__check_key_lengths_skips_unselectable_db(check, aggregator):
+    conn = mock.MagicMock()
+    conn.info.return_value = {'db0': {}, 'db3': {}}
+    conn.connection_pool.connection_kwargs = {'db': 0}
+    check.instance['keys'] = ['foo']
+    check.instance['warn_on_missing_keys'] = False
+
+    def execute(raise_on_error=True):
+        commands = [c[0][0] for c in pipe.execute_command.call_args_list]
+        pipe.execute_command.reset_mock()
+        if commands[0] == 'SELECT':
+            return [redis.ResponseError('ERR DB index is out of range')] + [None] * (len(commands) - 1)
+        return ['list'] if commands[0] == 'TYPE' else [2]
+
+    pipe = conn.pipeline.return_value
+    pipe.execute.side_effect = execute
+    check._check_key_lengths(conn, ['foo:bar'])
+
+    aggregator.assert_metric(
+        'redis.key.length', value=2, count=1, tags=['foo:bar', 'key:foo', 'key_type:list', 'redis_db:db0']
+    )
+    aggregator.assert_metric('redis.key.length', count=1)
+    assert any('db3' in w for w in check.warnings)
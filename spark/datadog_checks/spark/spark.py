@@ -10,6 +10,8 @@ from six import iteritems, itervalues
 from six.moves.urllib.parse import urljoin, urlparse, urlsplit, urlunsplit
 
 from datadog_checks.base import AgentCheck, ConfigurationError, is_affirmative
+from datadog_checks.base.utils.concurrency import map_concurrently
+from datadog_checks.base.utils.time import timed
 
 # Identifier for cluster master address in `spark.yaml`
 MASTER_ADDRESS = 'spark_url'
@@ -26,6 +28,9 @@ SPARK_MESOS_MODE = 'spark_mesos_mode'
 # option enabling compatibility mode for Spark ver < 2
 SPARK_PRE_20_MODE = 'spark_pre_20_mode'
 
+# Number of applications whose REST API is queried concurrently
+DEFAULT_THREADS_COUNT = 10
+
 # Service Checks
 SPARK_STANDALONE_SERVICE_CHECK = 'spark.standalone_master.can_connect'
 SPARK_DRIVER_SERVICE_CHECK = 'spark.driver.can_connect'
@@ -185,6 +190,16 @@ class SparkCheck(AgentCheck):
 
         self.master_address = self._get_master_address()
 
+        # The per-application endpoints are queried from a pool of threads
+        self.threads_count = int(self.instance.get('threads_count', DEFAULT_THREADS_COUNT))
+        if self.threads_count < 1:
+            raise ConfigurationError('`threads_count` must be greater than 0')
+
+        # Requests failing to connect or timing out are retried this many times
+        self.request_retries = int(self.instance.get('request_retries', 0))
+
+        self.collect_duration_metrics = is_affirmative(self.instance.get('collect_duration_metrics', False))
+
     def check(self, _):
         tags = list(self.tags)
         tags.append('cluster_name:%s' % self.cluster_name)
@@ -192,21 +207,21 @@ class SparkCheck(AgentCheck):
         spark_apps = self._get_running_apps()
 
         # Get the job metrics
-        self._spark_job_metrics(spark_apps, tags)
+        self._collect(self._spark_job_metrics, 'job', spark_apps, tags)
 
         # Get the stage metrics
-        self._spark_stage_metrics(spark_apps, tags)
+        self._collect(self._spark_stage_metrics, 'stage', spark_apps, tags)
 
         # Get the executor metrics
-        self._spark_executor_metrics(spark_apps, tags)
+        self._collect(self._spark_executor_metrics, 'executor', spark_apps, tags)
 
         # Get the rdd metrics
-        self._spark_rdd_metrics(spark_apps, tags)
+        self._collect(self._spark_rdd_metrics, 'rdd', spark_apps, tags)
 
         # Get the streaming statistics metrics
         if is_affirmative(self.instance.get('streaming_metrics', True)):
-            self._spark_streaming_statistics_metrics(spark_apps, tags)
-            self._spark_structured_streams_metrics(spark_apps, tags)
+            self._collect(self._spark_streaming_statistics_metrics, 'streaming_statistics', spark_apps, tags)
+            self._collect(self._spark_structured_streams_metrics, 'structured_streaming', spark_apps, tags)
 
         # Report success after gathering all metrics from the ApplicationMaster
         if spark_apps:
@@ -221,6 +236,34 @@ class SparkCheck(AgentCheck):
                 message='Connection to ApplicationMaster "%s" was successful' % am_address,
             )
 
+    def _collect(self, collector, name, spark_apps, tags):
+        """
+        Run a collector, submitting how long it took with `collect_duration_metrics`
+        """
+        with timed(
+            self.gauge,
+            'spark.collector.duration',
+            tags=tags + ['collector:{}'.format(name)],
+            enabled=self.collect_duration_metrics,
+        ):
+            collector(spark_apps, tags)
+
+    def _get_apps_json(self, running_apps, addl_tags, *args):
+        """
+        Query the REST API endpoint `args` of every application concurrently,
+        and yield (app_id, app_name, response) as soon as each response is parsed.
+        """
+
+        def get_json(app):
+            app_id, (_, tracking_url) = app
+            base_url = self._get_request_url(tracking_url)
+            return self._rest_request_to_json(base_url, SPARK_APPS_PATH, SPARK_SERVICE_CHECK, addl_tags, app_id, *args)
+
+        for (app_id, (app_name, _)), response in map_concurrently(
+            get_json, list(iteritems(running_apps)), self.threads_count
+        ):
+            yield app_id, app_name, response
+
     def _get_master_address(self):
         """
         Get the master address from the instance configuration
@@ -469,16 +512,19 @@ class SparkCheck(AgentCheck):
         Return a dictionary of {app_id: (app_name, tracking_url)} for Spark applications
         """
         spark_apps = {}
-        version_set = False
-        for app_id, (app_name, tracking_url) in iteritems(running_apps):
+        for _, tracking_url in itervalues(running_apps):
+            if self._collect_version(tracking_url, tags):
+                break
+
+        def get_apps(tracking_url):
             try:
-                if not version_set:
-                    version_set = self._collect_version(tracking_url, tags)
-                response = self._rest_request_to_json(tracking_url, SPARK_APPS_PATH, SPARK_SERVICE_CHECK, tags)
+                return self._rest_request_to_json(tracking_url, SPARK_APPS_PATH, SPARK_SERVICE_CHECK, tags)
             except RequestException as e:
                 self.log.warning("Exception happened when fetching app ids for %s: %s", tracking_url, e)
-                continue
+                return []
 
+        tracking_urls = [tracking_url for _, tracking_url in itervalues(running_apps)]
+        for tracking_url, response in map_concurrently(get_apps, tracking_urls, self.threads_count):
             for app in response:
                 app_id = app.get('id')
                 app_name = app.get('name')
@@ -492,13 +538,7 @@ class SparkCheck(AgentCheck):
         """
         Get metrics for each Spark job.
         """
-        for app_id, (app_name, tracking_url) in iteritems(running_apps):
-
-            base_url = self._get_request_url(tracking_url)
-            response = self._rest_request_to_json(
-                base_url, SPARK_APPS_PATH, SPARK_SERVICE_CHECK, addl_tags, app_id, 'jobs'
-            )
-
+        for _, app_name, response in self._get_apps_json(running_apps, addl_tags, 'jobs'):
             for job in response:
 
                 status = job.get('status')
@@ -521,13 +561,7 @@ class SparkCheck(AgentCheck):
         """
         Get metrics for each Spark stage.
         """
-        for app_id, (app_name, tracking_url) in iteritems(running_apps):
-
-            base_url = self._get_request_url(tracking_url)
-            response = self._rest_request_to_json(
-                base_url, SPARK_APPS_PATH, SPARK_SERVICE_CHECK, addl_tags, app_id, 'stages'
-            )
-
+        for _, app_name, response in self._get_apps_json(running_apps, addl_tags, 'stages'):
             for stage in response:
 
                 status = stage.get('status')
@@ -547,13 +581,7 @@ class SparkCheck(AgentCheck):
         """
         Get metrics for each Spark executor.
         """
-        for app_id, (app_name, tracking_url) in iteritems(running_apps):
-
-            base_url = self._get_request_url(tracking_url)
-            response = self._rest_request_to_json(
-                base_url, SPARK_APPS_PATH, SPARK_SERVICE_CHECK, addl_tags, app_id, 'executors'
-            )
-
+        for _, app_name, response in self._get_apps_json(running_apps, addl_tags, 'executors'):
             tags = ['app_name:%s' % str(app_name)]
             tags.extend(addl_tags)
 
@@ -577,13 +605,7 @@ class SparkCheck(AgentCheck):
         """
         Get metrics for each Spark RDD.
         """
-        for app_id, (app_name, tracking_url) in iteritems(running_apps):
-
-            base_url = self._get_request_url(tracking_url)
-            response = self._rest_request_to_json(
-                base_url, SPARK_APPS_PATH, SPARK_SERVICE_CHECK, addl_tags, app_id, 'storage/rdd'
-            )
-
+        for _, app_name, response in self._get_apps_json(running_apps, addl_tags, 'storage/rdd'):
             tags = ['app_name:%s' % str(app_name)]
             tags.extend(addl_tags)
 
@@ -597,24 +619,32 @@ class SparkCheck(AgentCheck):
         """
         Get metrics for each application streaming statistics.
         """
-        for app_id, (app_name, tracking_url) in iteritems(running_apps):
+
+        def get_statistics(app):
+            app_id, (_, tracking_url) = app
             try:
                 base_url = self._get_request_url(tracking_url)
-                response = self._rest_request_to_json(
+                return self._rest_request_to_json(
                     base_url, SPARK_APPS_PATH, SPARK_SERVICE_CHECK, addl_tags, app_id, 'streaming/statistics'
                 )
-                self.log.debug('streaming/statistics: %s', response)
-                tags = ['app_name:%s' % str(app_name)]
-                tags.extend(addl_tags)
-
-                # NOTE: response is a dict
-                self._set_metrics_from_json(tags, response, SPARK_STREAMING_STATISTICS_METRICS)
             except HTTPError as e:
                 # NOTE: If api call returns response 404
                 # then it means that the application is not a streaming application, we should skip metric submission
                 if e.response.status_code != 404:
                     raise
 
+        for (_, (app_name, _)), response in map_concurrently(
+            get_statistics, list(iteritems(running_apps)), self.threads_count
+        ):
+            if response is None:
+                continue
+            self.log.debug('streaming/statistics: %s', response)
+            tags = ['app_name:%s' % str(app_name)]
+            tags.extend(addl_tags)
+
+            # NOTE: response is a dict
+            self._set_metrics_from_json(tags, response, SPARK_STREAMING_STATISTICS_METRICS)
+
     def _spark_structured_streams_metrics(self, running_apps, addl_tags):
         """
         Get metrics for each application structured stream.
@@ -623,35 +653,39 @@ class SparkCheck(AgentCheck):
         - `SET spark.sql.streaming.metricsEnabled=true` in the app
         """
 
-        for app_name, tracking_url in itervalues(running_apps):
+        def get_metrics(app):
+            app_name, tracking_url = app
             try:
                 base_url = self._get_request_url(tracking_url)
-                response = self._rest_request_to_json(
-                    base_url, self.metricsservlet_path, SPARK_SERVICE_CHECK, addl_tags
-                )
-                self.log.debug('Structured streaming metrics: %s', response)
-                response = {
-                    metric_name: v['value']
-                    for metric_name, v in iteritems(response.get('gauges'))
-                    if 'streaming' in metric_name and 'value' in v
-                }
-                for gauge_name, value in iteritems(response):
-                    match = STRUCTURED_STREAMS_METRICS_REGEX.match(gauge_name)
-                    if not match:
-                        continue
-                    groups = match.groupdict()
-                    metric_name = groups['metric_name']
-                    if metric_name not in SPARK_STRUCTURED_STREAMING_METRICS:
-                        continue
-                    metric_name, submission_type = SPARK_STRUCTURED_STREAMING_METRICS[metric_name]
-                    tags = ['app_name:%s' % str(app_name)]
-                    tags.extend(addl_tags)
-                    self._set_metric(metric_name, submission_type, value, tags=tags)
+                return self._rest_request_to_json(base_url, self.metricsservlet_path, SPARK_SERVICE_CHECK, addl_tags)
             except HTTPError as e:
                 self.log.debug(
                     "No structured streaming metrics to collect from" " app %s. %s", app_name, e, exc_info=True
                 )
-                pass
+
+        for (app_name, _), response in map_concurrently(
+            get_metrics, list(itervalues(running_apps)), self.threads_count
+        ):
+            if response is None:
+                continue
+            self.log.debug('Structured streaming metrics: %s', response)
+            response = {
+                metric_name: v['value']
+                for metric_name, v in iteritems(response.get('gauges'))
+                if 'streaming' in metric_name and 'value' in v
+            }
+            for gauge_name, value in iteritems(response):
+                match = STRUCTURED_STREAMS_METRICS_REGEX.match(gauge_name)
+                if not match:
+                    continue
+                groups = match.groupdict()
+                metric_name = groups['metric_name']
+                if metric_name not in SPARK_STRUCTURED_STREAMING_METRICS:
+                    continue
+                metric_name, submission_type = SPARK_STRUCTURED_STREAMING_METRICS[metric_name]
+                tags = ['app_name:%s' % str(app_name)]
+                tags.extend(addl_tags)
+                self._set_metric(metric_name, submission_type, value, tags=tags)
 
     def _set_metrics_from_json(self, tags, metrics_json, metrics):
         """
@@ -706,7 +740,7 @@ class SparkCheck(AgentCheck):
 
         try:
             self.log.debug('Spark check URL: %s', url)
-            response = self.http.get(url, cookies=self.proxy_redirect_cookies)
+            response = self._get(url)
             response.raise_for_status()
             content = response.text
             proxy_redirect_url = self._parse_proxy_redirect_url(content)
@@ -745,6 +779,20 @@ class SparkCheck(AgentCheck):
         else:
             return response
 
+    def _get(self, url):
+        """
+        GET the given URL, retrying up to `request_retries` times on connection errors and timeouts
+        """
+        attempt = 0
+        while True:
+            try:
+                return self.http.get(url, cookies=self.proxy_redirect_cookies)
+            except (Timeout, ConnectionError) as e:
+                if attempt >= self.request_retries:
+                    raise
+                attempt += 1
+                self.log.debug('Retrying request to %s (%s/%s): %s', url, attempt, self.request_retries, e)
+
     def _rest_request_to_json(self, address, object_path, service_name, tags, *args, **kwargs):
         """
         Query the given URL and return the JSON response
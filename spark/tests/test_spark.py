@@ -796,6 +796,47 @@ def test_auth_yarn(aggregator):
             assert sc.tags == tags
 
 
+@pytest.mark.unit
+def test_collect_duration_metrics(aggregator):
+    config = dict(YARN_CONFIG, collect_duration_metrics=True)
+    with mock.patch('requests.get', yarn_requests_get_mock):
+        c = SparkCheck('spark', {}, [config])
+        c.check(config)
+
+    for collector in ('job', 'stage', 'executor', 'rdd', 'streaming_statistics', 'structured_streaming'):
+        aggregator.assert_metric(
+            'spark.collector.duration',
+            count=1,
+            tags=['cluster_name:' + CLUSTER_NAME, 'collector:' + collector] + CUSTOM_TAGS,
+        )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize('request_retries', [0, 1])
+def test_request_retries(aggregator, request_retries):
+    failed_requests = []
+
+    def requests_get_mock(url, *args, **kwargs):
+        if Url(url) == YARN_SPARK_STAGE_URL and not failed_requests:
+            failed_requests.append(url)
+            raise requests.exceptions.ConnectionError('Connection refused')
+        return yarn_requests_get_mock(url, *args, **kwargs)
+
+    config = dict(YARN_CONFIG, request_retries=request_retries)
+    with mock.patch('requests.get', requests_get_mock):
+        c = SparkCheck('spark', {}, [config])
+        if request_retries:
+            c.check(config)
+        else:
+            with pytest.raises(requests.exceptions.ConnectionError):
+                c.check(config)
+
+    assert len(failed_requests) == 1
+    if request_retries:
+        for metric, value in iteritems(SPARK_STAGE_RUNNING_METRIC_VALUES):
+            aggregator.assert_metric(metric, value=value, tags=SPARK_STAGE_RUNNING_METRIC_TAGS + CUSTOM_TAGS)
+
+
 @pytest.mark.unit
 def test_mesos(aggregator):
     with mock.patch('requests.get', mesos_requests_get_mock):
@@ -7,7 +7,7 @@ from contextlib import closing
 
 from six import PY3
 
-from datadog_checks.base import AgentCheck, ConfigurationError
+from datadog_checks.base import AgentCheck, ConfigurationError, is_affirmative
 from datadog_checks.base.utils.platform import Platform
 
 if PY3:
@@ -75,6 +75,19 @@ class TCPCheck(AgentCheck):
                 msg = "URL: {} is not a correct IPv4, IPv6 or hostname".format(self.url)
                 raise ConfigurationError(msg)
 
+        self.probe = None
+        if is_affirmative(instance.get('use_probe_scheduler', False)):
+            if not PY3:
+                raise ConfigurationError('Setting `use_probe_scheduler` is only supported on Python 3')
+
+            from datadog_checks.base.utils.probes import ScheduledProbe, tcp_connect
+
+            self.probe = ScheduledProbe(
+                lambda: tcp_connect(self.addr, self.port, family=self.socket_type),
+                timeout=self.timeout,
+                jitter=float(instance.get('probe_jitter', 1)),
+            )
+
     def resolve_ip(self):
         self.addr = socket.gethostbyname(self.url)
 
@@ -87,47 +100,67 @@ class TCPCheck(AgentCheck):
             return response_time
 
     def check(self, instance):
+        if self.probe is not None:
+            self.check_scheduled()
+            return
+
         start = time_func()  # Avoid initialisation warning
         self.log.debug("Connecting to %s %d", self.addr, self.port)
         try:
             response_time = self.connect()
-            self.log.debug("%s:%d is UP", self.addr, self.port)
-            self.report_as_service_check(AgentCheck.OK, 'UP')
-            if self.collect_response_time:
-                self.gauge(
-                    'network.tcp.response_time',
-                    response_time,
-                    tags=self.tags,
-                )
         except Exception as e:
-            length = int((time_func() - start) * 1000)
-            if isinstance(e, socket.error) and "timed out" in str(e):
-                # The connection timed out because it took more time than the system tcp stack allows
-                self.log.warning(
-                    'The connection timed out because it took more time '
-                    'than the system tcp stack allows. You might want to '
-                    'change this setting to allow longer timeouts'
-                )
-                self.log.info("System tcp timeout. Assuming that the checked system is down")
-                self.report_as_service_check(
-                    AgentCheck.CRITICAL,
-                    """Socket error: {}.
+            self.report_connection_error(e, int((time_func() - start) * 1000))
+        else:
+            self.report_connection(response_time)
+
+    def check_scheduled(self):
+        # The connection is attempted by the shared probe scheduler, this reports the last completed attempt
+        result = self.probe.poll()
+        if result is None:
+            self.log.debug("No completed connection attempt to %s %d yet", self.addr, self.port)
+        elif result.error is not None:
+            self.report_connection_error(result.error, int(result.duration * 1000))
+        else:
+            self.report_connection(result.value)
+
+    def report_connection(self, response_time):
+        self.log.debug("%s:%d is UP", self.addr, self.port)
+        self.report_as_service_check(AgentCheck.OK, 'UP')
+        if self.collect_response_time:
+            self.gauge(
+                'network.tcp.response_time',
+                response_time,
+                tags=self.tags,
+            )
+
+    def report_connection_error(self, e, length):
+        if isinstance(e, socket.error) and "timed out" in str(e):
+            # The connection timed out because it took more time than the system tcp stack allows
+            self.log.warning(
+                'The connection timed out because it took more time '
+                'than the system tcp stack allows. You might want to '
+                'change this setting to allow longer timeouts'
+            )
+            self.log.info("System tcp timeout. Assuming that the checked system is down")
+            self.report_as_service_check(
+                AgentCheck.CRITICAL,
+                """Socket error: {}.
                  The connection timed out after {} ms because it took more time than the system tcp stack allows.
                  You might want to change this setting to allow longer timeouts""".format(
-                        str(e), length
-                    ),
-                )
-            else:
-                self.log.info("%s:%d is DOWN (%s). Connection failed after %d ms", self.addr, self.port, str(e), length)
-                self.report_as_service_check(
-                    AgentCheck.CRITICAL, "{}. Connection failed after {} ms".format(str(e), length)
-                )
-            if self.socket_type == socket.AF_INET:
-                self.log.debug("Attempting to re-resolve IP for %s:%d", self.addr, self.port)
-                try:
-                    self.resolve_ip()
-                except Exception:
-                    self.log.debug("Unable to re-resolve IP for %s:%d", self.addr, self.port)
+                    str(e), length
+                ),
+            )
+        else:
+            self.log.info("%s:%d is DOWN (%s). Connection failed after %d ms", self.addr, self.port, str(e), length)
+            self.report_as_service_check(
+                AgentCheck.CRITICAL, "{}. Connection failed after {} ms".format(str(e), length)
+            )
+        if self.socket_type == socket.AF_INET:
+            self.log.debug("Attempting to re-resolve IP for %s:%d", self.addr, self.port)
+            try:
+                self.resolve_ip()
+            except Exception:
+                self.log.debug("Unable to re-resolve IP for %s:%d", self.addr, self.port)
 
     def report_as_service_check(self, status, msg=None):
         if status == AgentCheck.OK:
@@ -5,6 +5,8 @@
 from copy import deepcopy
 
 import mock
+import pytest
+from six import PY2
 
 from datadog_checks.tcp_check import TCPCheck
 
@@ -73,3 +75,22 @@ def test_response_time(aggregator):
     aggregator.assert_metric('network.tcp.response_time', tags=expected_tags)
     aggregator.assert_all_metrics_covered()
     assert len(aggregator.service_checks('tcp.can_connect')) == 1
+
+
+@pytest.mark.skipif(PY2, reason='The probe scheduler is only available on Python 3')
+def test_probe_scheduler(aggregator):
+    instance = deepcopy(common.INSTANCE_KO)
+    instance['use_probe_scheduler'] = True
+    instance['probe_jitter'] = 0
+    check = TCPCheck(common.CHECK_NAME, {}, [instance])
+
+    # The first run only starts the connection attempt
+    check.check(instance)
+    assert len(aggregator.service_checks('tcp.can_connect')) == 0
+
+    check.probe.future.result(timeout=5)
+    check.check(instance)
+    expected_tags = ["instance:DownService", "target_host:127.0.0.1", "port:65530", "foo:bar"]
+    aggregator.assert_service_check('tcp.can_connect', status=check.CRITICAL, tags=expected_tags)
+    aggregator.assert_metric('network.tcp.can_connect', value=0, tags=expected_tags)
+    assert len(aggregator.service_checks('tcp.can_connect')) == 1
@@ -8,7 +8,7 @@ from datetime import datetime
 import service_identity
 from cryptography.hazmat.backends import default_backend
 from cryptography.x509 import load_der_x509_certificate, load_pem_x509_certificate
-from six import text_type
+from six import PY3, text_type
 from six.moves.urllib.parse import urlparse
 
 from datadog_checks.base import AgentCheck, ConfigurationError, is_affirmative
@@ -18,6 +18,8 @@ from .utils import closing, days_to_seconds, get_protocol_versions, is_ip_addres
 # Python 3 only
 PROTOCOL_TLS_CLIENT = getattr(ssl, 'PROTOCOL_TLS_CLIENT', ssl.PROTOCOL_TLS)
 
+UNRESOLVED_HOST_ERRORS = (socket.EAI_NODATA, socket.EAI_NONAME)
+
 
 class TLSCheck(AgentCheck):
     SERVICE_CHECK_CAN_CONNECT = 'tls.can_connect'
@@ -116,20 +118,35 @@ class TLSCheck(AgentCheck):
         self._validation_data = None
         self._tls_context = None
 
+        self._probe = None
+        if is_affirmative(self.instance.get('use_probe_scheduler', False)) and not self._local_cert_path:
+            if not PY3:
+                raise ConfigurationError('Setting `use_probe_scheduler` is only supported on Python 3')
+
+            from datadog_checks.base.utils.probes import ScheduledProbe, tls_handshake
+
+            self._probe = ScheduledProbe(
+                lambda: tls_handshake(self._server, self._port, self.get_tls_context(), self._server_hostname),
+                timeout=self._timeout,
+                jitter=float(self.instance.get('probe_jitter', 1)),
+            )
+
     def check_remote(self, _):
         if not self._server:
             raise ConfigurationError('You must specify `server` in your configuration file.')
 
+        if self._probe is not None:
+            self.check_remote_scheduled()
+            return
+
         try:
             self.log.debug('Checking that TLS service check can connect')
             sock = self.create_connection()
         except Exception as e:
-            self.log.debug('Error occurred while connecting to socket: %s', str(e))
-            self.service_check(self.SERVICE_CHECK_CAN_CONNECT, self.CRITICAL, tags=self._tags, message=str(e))
+            self.report_connection_error(e)
             return
         else:
-            self.log.debug('TLS check able to connect')
-            self.service_check(self.SERVICE_CHECK_CAN_CONNECT, self.OK, tags=self._tags)
+            self.report_connection()
 
         # Get the cert & TLS version from the connection
         with closing(sock):
@@ -142,22 +159,56 @@ class TLSCheck(AgentCheck):
                     protocol_version = secure_sock.version()
                     self.log.debug('Received serialized peer certificate and TLS protocol version %s', protocol_version)
             except Exception as e:
-                # https://docs.python.org/3/library/ssl.html#ssl.SSLCertVerificationError
-                err_code = getattr(e, 'verify_code', None)
-                message = getattr(e, 'verify_message', str(e))
-                self.log.debug('Error occurred while getting cert and TLS version from connection: %s', str(e))
-                self.service_check(self.SERVICE_CHECK_VALIDATION, self.CRITICAL, tags=self._tags, message=message)
-
-                # There's no sane way to tell it to not validate just the expiration
-                # This only works on Python 3.7+, see: https://bugs.python.org/issue28182
-                # https://github.com/openssl/openssl/blob/0b45d8eec051fd9816b6bf46a975fa461ffc983d/include/openssl/x509_vfy.h#L109
-                if err_code == 10:
-                    self.service_check(
-                        self.SERVICE_CHECK_EXPIRATION, self.CRITICAL, tags=self._tags, message='Certificate has expired'
-                    )
-
+                self.report_handshake_error(e)
                 return
 
+        self.check_peer_cert(der_cert, protocol_version)
+
+    def check_remote_scheduled(self):
+        # The handshake is performed by the shared probe scheduler, this reports the last completed one
+        from datadog_checks.base.utils.probes import HandshakeError
+
+        result = self._probe.poll()
+        if result is None:
+            self.log.debug('No completed TLS handshake with %s:%s yet', self._server, self._port)
+            return
+
+        error = result.error
+        if error is None:
+            self.report_connection()
+            self.check_peer_cert(*result.value)
+        elif isinstance(error, HandshakeError):
+            self.report_connection()
+            self.report_handshake_error(error.error)
+        elif isinstance(error, socket.gaierror) and error.args[0] in UNRESOLVED_HOST_ERRORS:
+            self.report_connection_error(unresolved_host_error(error))
+        else:
+            self.report_connection_error(error)
+
+    def report_connection(self):
+        self.log.debug('TLS check able to connect')
+        self.service_check(self.SERVICE_CHECK_CAN_CONNECT, self.OK, tags=self._tags)
+
+    def report_connection_error(self, e):
+        self.log.debug('Error occurred while connecting to socket: %s', str(e))
+        self.service_check(self.SERVICE_CHECK_CAN_CONNECT, self.CRITICAL, tags=self._tags, message=str(e))
+
+    def report_handshake_error(self, e):
+        # https://docs.python.org/3/library/ssl.html#ssl.SSLCertVerificationError
+        err_code = getattr(e, 'verify_code', None)
+        message = getattr(e, 'verify_message', str(e))
+        self.log.debug('Error occurred while getting cert and TLS version from connection: %s', str(e))
+        self.service_check(self.SERVICE_CHECK_VALIDATION, self.CRITICAL, tags=self._tags, message=message)
+
+        # There's no sane way to tell it to not validate just the expiration
+        # This only works on Python 3.7+, see: https://bugs.python.org/issue28182
+        # https://github.com/openssl/openssl/blob/0b45d8eec051fd9816b6bf46a975fa461ffc983d/include/openssl/x509_vfy.h#L109
+        if err_code == 10:
+            self.service_check(
+                self.SERVICE_CHECK_EXPIRATION, self.CRITICAL, tags=self._tags, message='Certificate has expired'
+            )
+
+    def check_peer_cert(self, der_cert, protocol_version):
         # Load https://cryptography.io/en/latest/x509/reference/#cryptography.x509.Certificate
         try:
             self.log.debug('Deserializing peer certificate')
@@ -309,9 +360,8 @@ class TLSCheck(AgentCheck):
             else:
                 raise socket.error('No valid addresses found, try checking your IPv6 connectivity')  # noqa: G
         except socket.gaierror as e:
-            err_code, message = e.args
-            if err_code == socket.EAI_NODATA or err_code == socket.EAI_NONAME:
-                raise socket.error('Unable to resolve host, check your DNS: {}'.format(message))  # noqa: G
+            if e.args[0] in UNRESOLVED_HOST_ERRORS:
+                raise unresolved_host_error(e)
 
             raise
 
@@ -330,3 +380,7 @@ class TLSCheck(AgentCheck):
         if b'-----BEGIN CERTIFICATE-----' in cert:
             return load_pem_x509_certificate(cert, backend)
         return load_der_x509_certificate(cert, backend)
+
+
+def unresolved_host_error(e):
+    return socket.error('Unable to resolve host, check your DNS: {}'.format(e.args[1]))  # noqa: G
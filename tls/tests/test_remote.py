@@ -278,3 +278,51 @@ def test_cert_warning_seconds(aggregator, instance_remote_cert_warning_seconds):
     aggregator.assert_metric('tls.days_left', count=1)
     aggregator.assert_metric('tls.seconds_left', count=1)
     aggregator.assert_all_metrics_covered()
+
+
+def run_scheduled(check):
+    # The first run only starts the handshake, the next one reports it
+    check.check(None)
+    check._probe.future.result(timeout=10)
+    check.check(None)
+
+
+@pytest.mark.skipif(PY2, reason='The probe scheduler is only available on Python 3')
+def test_probe_scheduler_ok(aggregator, instance_remote_ok):
+    c = TLSCheck('tls', {}, [dict(instance_remote_ok, use_probe_scheduler=True, probe_jitter=0)])
+    run_scheduled(c)
+
+    aggregator.assert_service_check(c.SERVICE_CHECK_CAN_CONNECT, status=c.OK, tags=c._tags, count=1)
+    aggregator.assert_service_check(c.SERVICE_CHECK_VERSION, status=c.OK, tags=c._tags, count=1)
+    aggregator.assert_service_check(c.SERVICE_CHECK_VALIDATION, status=c.OK, tags=c._tags, count=1)
+    aggregator.assert_service_check(c.SERVICE_CHECK_EXPIRATION, status=c.OK, tags=c._tags, count=1)
+
+    aggregator.assert_metric('tls.days_left', count=1)
+    aggregator.assert_metric('tls.seconds_left', count=1)
+    aggregator.assert_all_metrics_covered()
+
+
+@pytest.mark.skipif(PY2, reason='The probe scheduler is only available on Python 3')
+def test_probe_scheduler_cert_expired(aggregator, instance_remote_cert_expired):
+    c = TLSCheck('tls', {}, [dict(instance_remote_cert_expired, use_probe_scheduler=True, probe_jitter=0)])
+    run_scheduled(c)
+
+    aggregator.assert_service_check(c.SERVICE_CHECK_CAN_CONNECT, status=c.OK, tags=c._tags, count=1)
+    aggregator.assert_service_check(c.SERVICE_CHECK_VALIDATION, status=c.CRITICAL, tags=c._tags, count=1)
+    aggregator.assert_service_check(c.SERVICE_CHECK_VERSION, count=0)
+    aggregator.assert_service_check(
+        c.SERVICE_CHECK_EXPIRATION, status=c.CRITICAL, tags=c._tags, message='Certificate has expired', count=1
+    )
+    aggregator.assert_all_metrics_covered()
+
+
+@pytest.mark.skipif(PY2, reason='The probe scheduler is only available on Python 3')
+def test_probe_scheduler_no_resolve(aggregator, instance_remote_no_resolve):
+    c = TLSCheck('tls', {}, [dict(instance_remote_no_resolve, use_probe_scheduler=True, probe_jitter=0)])
+    run_scheduled(c)
+
+    aggregator.assert_service_check(c.SERVICE_CHECK_CAN_CONNECT, status=c.CRITICAL, tags=c._tags, count=1)
+    aggregator.assert_service_check(c.SERVICE_CHECK_VALIDATION, count=0)
+
+    message = 'Unable to resolve host, check your DNS'
+    assert message in aggregator.service_checks(c.SERVICE_CHECK_CAN_CONNECT)[0].message
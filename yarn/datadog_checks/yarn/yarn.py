@@ -2,7 +2,7 @@
 # All rights reserved
 # Licensed under a 3-clause BSD style license (see LICENSE)
 from requests.exceptions import ConnectionError, HTTPError, InvalidURL, SSLError, Timeout
-from six import iteritems
+from six import iteritems, itervalues
 from six.moves.urllib.parse import urljoin, urlsplit, urlunsplit
 
 from datadog_checks.base import AgentCheck, is_affirmative
@@ -15,6 +15,7 @@ DEFAULT_CLUSTER_NAME = 'default_cluster'
 DEFAULT_COLLECT_APP_METRICS = True
 MAX_DETAILED_QUEUES = 100
 DEFAULT_SPLIT_YARN_APPLICATION_TAGS = False
+DEFAULT_INCREMENTAL_APP_COLLECTION = False
 
 # Path to retrieve cluster metrics
 YARN_CLUSTER_METRICS_PATH = '/ws/v1/cluster/metrics'
@@ -37,6 +38,8 @@ SERVICE_CHECK_NAME = 'yarn.can_connect'
 
 # Application states
 YARN_APPLICATION_RUNNING = 'RUNNING'
+YARN_ACTIVE_APPLICATION_STATES = ['NEW', 'NEW_SAVING', 'SUBMITTED', 'ACCEPTED', YARN_APPLICATION_RUNNING]
+YARN_FINISHED_APPLICATION_STATES = ['FINISHED', 'FAILED', 'KILLED']
 
 APPLICATION_STATUS_SERVICE_CHECK = 'yarn.application.status'
 
@@ -170,6 +173,18 @@ class YarnCheck(AgentCheck):
         except AttributeError as e:
             raise ConfigurationError("Invalid mapping: {}".format(e))
 
+        self.incremental_app_collection = is_affirmative(
+            self.instance.get('incremental_app_collection', DEFAULT_INCREMENTAL_APP_COLLECTION)
+        )
+
+        # Latest finish time reported by the ResourceManager and the ids of the applications finished at that time,
+        # used to only request the applications finished since the previous run
+        self._last_finished_time = None
+        self._last_finished_app_ids = set()
+
+        # Tags of the applications seen during the previous run, keyed by application id
+        self._app_tags_cache = {}
+
     def check(self, instance):
 
         # Get properties from conf file
@@ -229,21 +244,89 @@ class YarnCheck(AgentCheck):
         """
         Get metrics for running applications
         """
-        metrics_json = self._rest_request_to_json(rm_address, YARN_APPS_PATH, addl_tags)
+        if self.incremental_app_collection:
+            apps = self._get_incremental_apps(rm_address, addl_tags)
+        else:
+            apps = self._get_apps(rm_address, addl_tags)
+
+        app_tags_cache = {}
+        for app_json in apps:
+            tags = self._get_cached_app_tags(app_json, app_tags, app_tags_cache) + addl_tags
+
+            if app_json['state'] == YARN_APPLICATION_RUNNING:
+                self._set_yarn_metrics_from_json(tags, app_json, DEPRECATED_YARN_APP_METRICS)
+                self._set_yarn_metrics_from_json(tags, app_json, YARN_APP_METRICS)
+
+            self.service_check(
+                APPLICATION_STATUS_SERVICE_CHECK,
+                self.application_status_mapping.get(app_json['state'], AgentCheck.UNKNOWN),
+                tags=tags,
+            )
+
+        self._app_tags_cache = app_tags_cache
+
+    def _get_apps(self, rm_address, addl_tags, **filters):
+        """
+        Get the applications matching the given filters
+        """
+        metrics_json = self._rest_request_to_json(rm_address, YARN_APPS_PATH, addl_tags, **filters)
 
         if metrics_json and metrics_json['apps'] is not None and metrics_json['apps']['app'] is not None:
-            for app_json in metrics_json['apps']['app']:
-                tags = self._get_app_tags(app_json, app_tags) + addl_tags
-
-                if app_json['state'] == YARN_APPLICATION_RUNNING:
-                    self._set_yarn_metrics_from_json(tags, app_json, DEPRECATED_YARN_APP_METRICS)
-                    self._set_yarn_metrics_from_json(tags, app_json, YARN_APP_METRICS)
-
-                self.service_check(
-                    APPLICATION_STATUS_SERVICE_CHECK,
-                    self.application_status_mapping.get(app_json['state'], AgentCheck.UNKNOWN),
-                    tags=tags,
-                )
+            return metrics_json['apps']['app']
+
+        return []
+
+    def _get_incremental_apps(self, rm_address, addl_tags):
+        """
+        Get the active applications and the applications finished since the previous run
+        """
+        apps = self._get_apps(rm_address, addl_tags, states=','.join(YARN_ACTIVE_APPLICATION_STATES))
+
+        filters = {'states': ','.join(YARN_FINISHED_APPLICATION_STATES)}
+        if self._last_finished_time is not None:
+            filters['finishedTimeBegin'] = self._last_finished_time
+
+        last_finished_time = self._last_finished_time
+        last_finished_app_ids = set(self._last_finished_app_ids)
+        for app_json in self._get_apps(rm_address, addl_tags, **filters):
+            app_id = app_json.get('id')
+            finished_time = app_json.get('finishedTime')
+
+            # `finishedTimeBegin` is inclusive, skip the applications already reported by the previous run
+            if finished_time == self._last_finished_time and app_id in self._last_finished_app_ids:
+                continue
+
+            apps.append(app_json)
+
+            if finished_time is None:
+                continue
+            if last_finished_time is None or finished_time > last_finished_time:
+                last_finished_time = finished_time
+                last_finished_app_ids = {app_id}
+            elif finished_time == last_finished_time:
+                last_finished_app_ids.add(app_id)
+
+        self._last_finished_time = last_finished_time
+        self._last_finished_app_ids = last_finished_app_ids
+
+        return apps
+
+    def _get_cached_app_tags(self, app_json, app_tags, app_tags_cache):
+        """
+        Get the tags of an application, reusing the tags computed during the previous run
+        as long as the values they are built from did not change
+        """
+        app_id = app_json.get('id')
+        values = tuple(app_json.get(yarn_key) for yarn_key in itervalues(app_tags))
+
+        cached = self._app_tags_cache.get(app_id)
+        if cached is not None and cached[0] == values:
+            tags = cached[1]
+        else:
+            tags = self._get_app_tags(app_json, app_tags)
+
+        app_tags_cache[app_id] = (values, tags)
+        return tags
 
     def _get_app_tags(self, app_json, app_tags):
         split_app_tags = self.instance.get('split_yarn_application_tags', DEFAULT_SPLIT_YARN_APPLICATION_TAGS)
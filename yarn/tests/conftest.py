@@ -88,18 +88,19 @@ def mocked_bad_cert_request():
         yield
 
 
-def requests_get_mock(*args, **kwargs):
-    class MockResponse:
-        def __init__(self, json_data, status_code):
-            self.json_data = json_data
-            self.status_code = status_code
+class MockResponse:
+    def __init__(self, json_data, status_code):
+        self.json_data = json_data
+        self.status_code = status_code
+
+    def json(self):
+        return json.loads(self.json_data)
 
-        def json(self):
-            return json.loads(self.json_data)
+    def raise_for_status(self):
+        return True
 
-        def raise_for_status(self):
-            return True
 
+def requests_get_mock(*args, **kwargs):
     if args[0] == YARN_CLUSTER_METRICS_URL:
         yarn_cluster_metrics = os.path.join(HERE, "fixtures", "cluster_metrics")
         with open(yarn_cluster_metrics, "r") as f:
@@ -2,22 +2,27 @@
 # All rights reserved
 # Licensed under a 3-clause BSD style license (see LICENSE)
 import copy
+import json
 import os
 
+from mock import patch
 from requests.exceptions import SSLError
 from six import iteritems
+from six.moves.urllib.parse import parse_qs, urlsplit
 
 from datadog_checks.yarn import YarnCheck
 from datadog_checks.yarn.yarn import (
     APPLICATION_STATUS_SERVICE_CHECK,
     SERVICE_CHECK_NAME,
     YARN_APP_METRICS,
+    YARN_APPS_PATH,
     YARN_QUEUE_METRICS,
 )
 
 from .common import (
     CUSTOM_TAGS,
     DEPRECATED_YARN_APP_METRICS_VALUES,
+    HERE,
     RM_ADDRESS,
     YARN_APP_METRICS_TAGS,
     YARN_APP_METRICS_VALUES,
@@ -38,6 +43,7 @@ from .common import (
     YARN_SSL_VERIFY_FALSE_CONFIG,
     YARN_SSL_VERIFY_TRUE_CONFIG,
 )
+from .conftest import MockResponse, requests_get_mock
 
 
 def test_check(aggregator, mocked_request):
@@ -223,6 +229,65 @@ def test_check_splits_yarn_application_tags(aggregator, mocked_request):
     )
 
 
+def test_incremental_app_collection(aggregator):
+    instance = copy.deepcopy(YARN_CONFIG['instances'][0])
+    instance['incremental_app_collection'] = True
+
+    with open(os.path.join(HERE, 'fixtures', 'apps_metrics')) as f:
+        apps = json.load(f)['apps']['app']
+
+    apps_queries = []
+
+    def requests_apps_get(url, *args, **kwargs):
+        split_url = urlsplit(url)
+        if not split_url.path.endswith(YARN_APPS_PATH):
+            return requests_get_mock(url, *args, **kwargs)
+
+        query = parse_qs(split_url.query)
+        apps_queries.append(query)
+        states = query['states'][0].split(',')
+        finished_time_begin = int(query.get('finishedTimeBegin', [0])[0])
+        matching_apps = [app for app in apps if app['state'] in states and app['finishedTime'] >= finished_time_begin]
+        return MockResponse(json.dumps({'apps': {'app': matching_apps}}), 200)
+
+    yarn = YarnCheck('yarn', {}, [instance])
+
+    with patch('requests.get', new=requests_apps_get):
+        yarn.check(instance)
+
+        assert [query['states'][0] for query in apps_queries] == [
+            'NEW,NEW_SAVING,SUBMITTED,ACCEPTED,RUNNING',
+            'FINISHED,FAILED,KILLED',
+        ]
+        assert 'finishedTimeBegin' not in apps_queries[1]
+
+        for metric, value in iteritems(YARN_APP_METRICS_VALUES):
+            aggregator.assert_metric(metric, value=value, tags=YARN_APP_METRICS_TAGS + CUSTOM_TAGS, count=1)
+        for app_name, status in (('word count', YarnCheck.OK), ('dead app', YarnCheck.CRITICAL)):
+            aggregator.assert_service_check(
+                APPLICATION_STATUS_SERVICE_CHECK,
+                status=status,
+                tags=['app_queue:default', 'app_name:{}'.format(app_name)]
+                + CUSTOM_TAGS
+                + ['cluster_name:SparkCluster'],
+                count=1,
+            )
+
+        # The second run only requests the applications finished since the first one
+        aggregator.reset()
+        del apps_queries[:]
+        yarn.check(instance)
+
+        assert apps_queries[1]['finishedTimeBegin'] == ['1326815598530']
+        for metric, value in iteritems(YARN_APP_METRICS_VALUES):
+            aggregator.assert_metric(metric, value=value, tags=YARN_APP_METRICS_TAGS + CUSTOM_TAGS, count=1)
+        aggregator.assert_service_check(
+            APPLICATION_STATUS_SERVICE_CHECK,
+            tags=['app_queue:default', 'app_name:dead app'] + CUSTOM_TAGS + ['cluster_name:SparkCluster'],
+            count=0,
+        )
+
+
 def test_auth(aggregator, mocked_auth_request):
     instance = YARN_AUTH_CONFIG['instances'][0]
 